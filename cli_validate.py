@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# cli_validate.py
+
+"""
+Valideer een prijslijst vanaf de command line (o.a. voor de Lucee koppeling).
+
+Voorbeeld:
+    python cli_validate.py --input prijslijst.xlsx --output rapporten --profile errors-only --formats xlsx,json
+
+Uitvoer op stdout (één regel per bestand):
+    REPORT_PATH=<output>/<naam>_rapport.xlsx      (als xlsx gevraagd is)
+    OUTPUT_JSON=<output>/<naam>_summary.json       (enz. voor parquet en ndjson)
+"""
+
+import argparse, os, sys, traceback
+
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from validator.rapport_utils import DEFAULT_REPORT_PROFILE, REPORT_PROFILES
+from validator.report_exports import OUTPUT_FORMATS, output_base_name, resolve_output_formats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valideer prijslijst (CLI).")
+    parser.add_argument("--input", required=True, help="Pad naar input .xlsx")
+    parser.add_argument("--output", required=True, help="Map voor rapport-output")
+    parser.add_argument("--config", required=False, default=PROJECT_ROOT,
+                        help="Pad naar config-map met header_mapping.json, field_validation_v20.json en reference_lists.json")
+    parser.add_argument("--max-rows", type=int, required=False,
+                        help="Maximum aantal rijen om te valideren (voor quick mode). Indien niet opgegeven: volledige validatie")
+    parser.add_argument("--profile", choices=list(REPORT_PROFILES), default=DEFAULT_REPORT_PROFILE,
+                        help="Rapport profiel: welke sheets het Excel rapport krijgt (default: %(default)s)")
+    parser.add_argument("--formats", default=None,
+                        help=f"Komma-gescheiden outputs uit {', '.join(OUTPUT_FORMATS)} (default: GHX_OUTPUT_FORMATS of xlsx)")
+    args = parser.parse_args()
+
+    # Absoluut maken
+    input_xlsx  = os.path.abspath(args.input)
+    output_dir  = os.path.abspath(args.output)
+    config_dir  = os.path.abspath(args.config)
+
+    # Bestanden in config
+    mapping_json     = os.path.join(config_dir, "header_mapping.json")
+    validation_json  = os.path.join(config_dir, "field_validation_v20.json")
+    reference_json   = os.path.join(config_dir, "reference_lists.json")
+    original_name    = os.path.basename(input_xlsx)
+
+    # Controles
+    try:
+        formats = resolve_output_formats(args.formats)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    if not os.path.isfile(input_xlsx):
+        print(f"Inputbestand niet gevonden: {input_xlsx}", file=sys.stderr)
+        return 2
+    if not os.path.isfile(mapping_json):
+        print(f"header_mapping.json niet gevonden: {mapping_json}", file=sys.stderr)
+        return 2
+    if not os.path.isfile(validation_json):
+        print(f"field_validation_v20.json niet gevonden: {validation_json}", file=sys.stderr)
+        return 2
+    if not os.path.isfile(reference_json):
+        print(f"reference_lists.json niet gevonden: {reference_json}", file=sys.stderr)
+        return 2
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Import en run
+    try:
+        from validator.price_tool import validate_pricelist
+        from validator.workbook_probe import WorkbookProbe
+        import shutil
+
+        # Eén probe voor de rijtelling én de validatie: de werkmap wordt maar één keer geopend
+        with WorkbookProbe(input_xlsx) as probe:
+            # Bepaal total_rows voor rapportage doeleinden, zonder de hele sheet te parsen
+            total_rows = None
+            if args.max_rows is not None:
+                total_rows = probe.row_count
+                if total_rows is None:
+                    print("WARNING: Kon totaal aantal rijen niet bepalen", file=sys.stderr)
+                else:
+                    print(f"INFO: Bestand heeft {total_rows} rijen, validatie beperkt tot eerste {args.max_rows} rijen")
+
+            written_outputs = {}  # formaat -> pad, precies de bestanden van deze run
+            report_path = validate_pricelist(
+                input_excel_path=probe,
+                mapping_json_path=mapping_json,
+                validation_json_path=validation_json,
+                reference_json_path=reference_json,
+                original_input_filename=original_name,
+                max_rows=args.max_rows,
+                total_rows=total_rows,
+                output_formats=formats,
+                report_profile=args.profile,
+                output_paths=written_outputs,
+            )
+        if not report_path or not os.path.isfile(report_path):
+            print("Validatie voltooid maar geen rapport gevonden/geretourneerd.", file=sys.stderr)
+            return 3
+
+        # Doelpaden: <output_dir>/<input_basename>_rapport.xlsx en <input_basename>_<output>.<ext>
+        # Alleen de paden die validate_pricelist voor deze run teruggaf; de rapportmap kan
+        # ook outputs van andere invoerbestanden bevatten
+        base_no_ext = os.path.splitext(os.path.basename(input_xlsx))[0]
+        source_prefix = output_base_name(original_name, quick_mode=args.max_rows is not None)
+        copies = []
+        for fmt in formats:
+            source_path = written_outputs.get(fmt)
+            if source_path is None:
+                print(f"WARNING: Geen {fmt} output geschreven", file=sys.stderr)
+                continue
+            name = os.path.basename(source_path)
+            if fmt == "xlsx":
+                copies.append(("REPORT_PATH", source_path, f"{base_no_ext}_rapport.xlsx"))
+            else:
+                suffix = name[len(source_prefix):] if name.startswith(source_prefix) else os.path.splitext(name)[1]
+                copies.append((f"OUTPUT_{fmt.upper()}", source_path, base_no_ext + suffix))
+
+        # Kopieer/overschrijf
+        os.makedirs(output_dir, exist_ok=True)
+        for key, source_path, target_name in copies:
+            target_path = os.path.join(output_dir, target_name)
+            try:
+                shutil.copy2(source_path, target_path)
+            except Exception as e:
+                print(f"Kon {os.path.basename(source_path)} niet kopiëren naar {target_path}: {e}", file=sys.stderr)
+                return 4
+            print(f"{key}={target_path}")
+        return 0
+
+
+    except Exception as e:
+        print(f"Fout tijdens validatie: {e}", file=sys.stderr)
+        traceback.print_exc()
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Vergelijkt de iterrows en vectorized validatie engines op de bestanden in test/testinput.
+
+Gebruik:
+    python compare_validation_engines.py                 # alle .xlsx in test/testinput
+    python compare_validation_engines.py pad/naar.xlsx   # specifieke bestanden
+
+Voor elk bestand worden beide engines op exact dezelfde DataFrame gedraaid en wordt
+de uitvoer (results, filled_percentages, red_flag_messages, errors_per_field) vergeleken.
+"""
+
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_ROOT)
+
+from validator import price_tool
+from validator.vectorized_engine import compare_validation_outputs
+
+MAPPING_JSON = os.path.join(PROJECT_ROOT, "header_mapping.json")
+VALIDATION_JSON = os.path.join(PROJECT_ROOT, "field_validation_v20.json")
+REFERENCE_JSON = os.path.join(PROJECT_ROOT, "reference_lists.json")
+TEST_DIR = os.path.join(PROJECT_ROOT, "test", "testinput")
+
+
+def load_dataframe(file_path, header_mapping_config):
+    """Leest en prepareert een prijslijst zoals validate_pricelist dat doet."""
+    dtype_spec = {
+        "UNSPSC CODE (UNITED NATIONS STANDARD PRODUCTS AND SERVICES CODE)": str,
+        "UNSPSC Code": str,
+        "BARCODENUMMER (EAN/ GTIN/ HIBC)": str,
+        "GTIN Verpakkingseenheid": str,
+    }
+    df = pd.read_excel(file_path, dtype=dtype_spec)
+    df.columns = [
+        price_tool.normalize_template_header(col) if isinstance(col, str) and '\n' in col and '_' in col else col
+        for col in df.columns
+    ]
+    df, _, _, original_column_mapping = price_tool.map_headers(df, header_mapping_config, return_mapping=True)
+    df, removed_rows_count = price_tool.clean_dataframe(df)
+
+    template_type = price_tool.determine_template_type(file_path)
+    template_context = None
+    if template_type == "TG":
+        template_context = price_tool.extract_template_generator_context(file_path)
+    if not template_context:
+        template_context = {'template_type': template_type, 'configuration': {}, 'decisions': {}}
+    template_context['template_type'] = template_type
+    template_context['removed_rows_count'] = removed_rows_count
+    return df, original_column_mapping, template_context
+
+
+def compare_file(file_path, header_mapping_config, validation_config):
+    """Draait beide engines op één bestand en print het resultaat."""
+    print(f"\n{os.path.basename(file_path)}")
+    print("-" * 60)
+    try:
+        df, original_column_mapping, template_context = load_dataframe(file_path, header_mapping_config)
+    except Exception as e:
+        print(f"  Overgeslagen: kon bestand niet voorbereiden ({e})")
+        return None
+
+    timings = {}
+    outputs = {}
+    for engine in ("iterrows", "vectorized"):
+        start = time.time()
+        outputs[engine] = price_tool.validate_dataframe(
+            df, validation_config, original_column_mapping, template_context, engine=engine
+        )
+        timings[engine] = time.time() - start
+
+    differences = compare_validation_outputs(outputs["iterrows"], outputs["vectorized"])
+    speedup = timings["iterrows"] / timings["vectorized"] if timings["vectorized"] > 0 else float("inf")
+    print(f"  Rijen: {len(df)}, meldingen: {len(outputs['iterrows'][0])}")
+    print(f"  iterrows: {timings['iterrows']:.2f} sec, vectorized: {timings['vectorized']:.2f} sec ({speedup:.1f}x)")
+    if differences:
+        print(f"  VERSCHILLEN ({len(differences)}):")
+        for difference in differences[:10]:
+            print(f"    {difference[:300]}")
+    else:
+        print("  Identiek")
+    return not differences
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+    files = sys.argv[1:] or sorted(
+        path for path in glob.glob(os.path.join(TEST_DIR, "*.xlsx"))
+        if not os.path.basename(path).startswith("~")
+    )
+    if not files:
+        print(f"Geen test bestanden gevonden in {TEST_DIR}")
+        return 1
+
+    with open(MAPPING_JSON, 'r', encoding='utf-8') as f:
+        header_mapping_config = json.load(f)
+    with open(VALIDATION_JSON, 'r', encoding='utf-8') as f:
+        validation_config = json.load(f)
+    with open(REFERENCE_JSON, 'r', encoding='utf-8') as f:
+        price_tool.loaded_reference_lists = json.load(f)
+
+    outcomes = [compare_file(path, header_mapping_config, validation_config) for path in files]
+    failed = [path for path, ok in zip(files, outcomes) if ok is False]
+
+    print("\n" + "=" * 60)
+    print(f"{sum(1 for ok in outcomes if ok)} identiek, {len(failed)} met verschillen, "
+          f"{sum(1 for ok in outcomes if ok is None)} overgeslagen")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
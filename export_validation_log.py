@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Rendert het opgemaakte validatie overzicht (validaties_overzicht.xlsx) uit het logboek.
+
+Gebruik:
+    python export_validation_log.py                              # naar VALIDATION_LOG_FILE
+    python export_validation_log.py --output overzicht.xlsx      # ander doelbestand
+    python export_validation_log.py --bestandsnaam lijst.xlsx --since 2025-01-01
+    python export_validation_log.py --import-xlsx oud.xlsx       # bestaand overzicht overnemen
+
+Validaties schrijven alleen een regel naar de store (GHX_VALIDATION_LOG_STORE); dit script
+bouwt het Excel overzicht wanneer het nodig is.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, PROJECT_ROOT)
+
+from validator.rapport_utils import VALIDATION_LOG_FILE, VALIDATION_LOG_STORE
+from validator.validation_log import export_validation_log, import_validation_log_excel
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporteer het validatie logboek naar Excel.")
+    parser.add_argument("--store", default=VALIDATION_LOG_STORE,
+                        help="Pad naar de log store (.sqlite of .ndjson, default: %(default)s)")
+    parser.add_argument("--output", default=VALIDATION_LOG_FILE,
+                        help="Doelbestand voor het overzicht (default: %(default)s)")
+    parser.add_argument("--bestandsnaam", default=None, help="Alleen validaties van dit bestand")
+    parser.add_argument("--since", default=None, help="Alleen validaties vanaf deze datum (YYYY-MM-DD)")
+    parser.add_argument("--import-xlsx", default=None,
+                        help="Neem eerst de regels van een bestaand overzicht over in de store")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    try:
+        if args.import_xlsx:
+            count = import_validation_log_excel(args.import_xlsx, args.store)
+            print(f"{count} regels overgenomen uit {args.import_xlsx}")
+        output_path = export_validation_log(
+            args.output, args.store, bestandsnaam=args.bestandsnaam, since=args.since
+        )
+    except Exception as e:
+        print(f"Fout bij exporteren van het logboek: {e}", file=sys.stderr)
+        return 1
+    print(f"OVERVIEW_PATH={output_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
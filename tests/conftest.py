@@ -0,0 +1,84 @@
+"""
+Gedeelde fixtures voor de pytest suite.
+
+De centrale afspraak (user-001): de iterrows en de vectorized engine geven voor elke
+DataFrame exact dezelfde (results, filled_percentages, red_flag_messages, errors_per_field).
+validate_both draait beide engines, controleert dat en geeft de uitvoer terug.
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, Optional
+
+import pandas as pd
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from validator import price_tool
+from validator.vectorized_engine import compare_validation_outputs
+
+MAPPING_JSON = os.path.join(PROJECT_ROOT, "header_mapping.json")
+VALIDATION_JSON = os.path.join(PROJECT_ROOT, "field_validation_v20.json")
+REFERENCE_JSON = os.path.join(PROJECT_ROOT, "reference_lists.json")
+TEST_INPUT_DIR = os.path.join(PROJECT_ROOT, "test", "testinput")
+
+
+def _load_json(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="session")
+def header_mapping() -> dict:
+    return _load_json(MAPPING_JSON)
+
+
+@pytest.fixture(scope="session")
+def validation_config() -> dict:
+    return _load_json(VALIDATION_JSON)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def reference_lists() -> dict:
+    # Beide engines lezen de referentielijsten uit price_tool.loaded_reference_lists
+    reference_lists = _load_json(REFERENCE_JSON)
+    price_tool.loaded_reference_lists = reference_lists
+    return reference_lists
+
+
+def default_context() -> Dict[str, Any]:
+    return {'template_type': 'DT', 'configuration': {}, 'decisions': {}}
+
+
+@pytest.fixture
+def validate_both(validation_config):
+    """
+    Draait beide engines op een DataFrame met GHX kolomnamen en eist identieke uitvoer.
+
+    Returns:
+        Functie (df, template_context=None) -> uitvoer van de vectorized engine
+    """
+    def run(df: pd.DataFrame, template_context: Optional[Dict[str, Any]] = None):
+        template_context = template_context or default_context()
+        column_mapping = {column: column for column in df.columns}
+        outputs = {
+            engine: price_tool.validate_dataframe(df, validation_config, column_mapping, template_context, engine=engine)
+            for engine in ("iterrows", "vectorized")
+        }
+        differences = compare_validation_outputs(outputs["iterrows"], outputs["vectorized"])
+        assert differences == [], "\n".join(differences[:10])
+        return outputs["vectorized"]
+    return run
+
+
+def findings(output, code: str, field: Optional[str] = None) -> Dict[int, str]:
+    """Rij -> Veldwaarde van de meldingen met deze code (optioneel alleen voor één veld)."""
+    return {
+        item["Rij"]: item["Veldwaarde"]
+        for item in output[0]
+        if str(item.get("code")) == code and (field is None or item["GHX Kolom"] == field)
+    }
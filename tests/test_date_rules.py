@@ -0,0 +1,54 @@
+"""
+Datum regels (722 invalid_date_format, 723 is_in_the_past / is_before_field): één parse per
+unieke waarde, met dezelfde uitkomst in beide engines.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import findings
+from validator.price_tool import parse_date_string
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("01-01-2025", "2025-01-01"),
+    ("31/12/2025", "2025-12-31"),
+    ("2025-01-01 00:00:00", "2025-01-01"),
+    ("20250101", "2025-01-01"),
+    ("20250101.0", "2025-01-01"),
+    ("99991231", "9999-12-31"),
+    ("45000", "2023-03-15"),
+])
+def test_parse_valid_dates(value, expected):
+    assert parse_date_string(value) == np.datetime64(expected, "D")
+
+
+@pytest.mark.parametrize("value", ["202511", "20251301", "2025011", "250", "32-01-2025", "morgen", ""])
+def test_parse_invalid_dates(value):
+    assert np.isnat(parse_date_string(value))
+
+
+def test_compact_dates_from_numeric_column(validate_both):
+    # ERP exports leveren JJJJMMDD als getal; read_excel maakt er int64 van
+    df = pd.DataFrame({
+        "Startdatum Prijs Artikel": [20250101, 20250101, 20251301],
+        "Einddatum Prijs Artikel": [20251231, 20241231, 20251231],
+    })
+    output = validate_both(df)
+    assert findings(output, "722", "Startdatum Prijs Artikel") == {5: "20251301"}
+    assert findings(output, "722", "Einddatum Prijs Artikel") == {}
+    assert set(findings(output, "723", "Einddatum Prijs Artikel")) == {4}
+
+
+def test_mixed_date_notations(validate_both):
+    df = pd.DataFrame({
+        "Startdatum Prijs Artikel": ["01-01-2025", "2025-06-01", "20250101", "1-1-25", None],
+        "Einddatum Prijs Artikel": ["31-12-2025", "01-01-2025", "31.12.9999", "31-12-2025", "31-12-2025"],
+        "CE Certificaat einddatum": ["01-01-2000", "31-12-9999", "", "20000101", "morgen"],
+    })
+    output = validate_both(df)
+    assert set(findings(output, "722", "Startdatum Prijs Artikel")) == {6}
+    assert set(findings(output, "723", "Einddatum Prijs Artikel")) == {4}
+    assert set(findings(output, "723", "CE Certificaat einddatum")) == {3, 6}
+    assert set(findings(output, "722", "CE Certificaat einddatum")) == {7}
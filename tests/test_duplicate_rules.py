@@ -0,0 +1,33 @@
+"""
+Duplicaat regels (703): hash index per kolom, rijnummers van de andere duplicaten in de
+melding, identiek in beide engines.
+"""
+
+import pandas as pd
+
+from conftest import findings
+from validator.price_tool import DUPLICATE_ROWS_IN_MESSAGE
+
+
+def _messages(output, field):
+    return {r["Rij"]: r["Foutmelding"] for r in output[0] if r["code"] == "703" and r["GHX Kolom"] == field}
+
+
+def test_duplicate_artikelnummers(validate_both):
+    df = pd.DataFrame({"Artikelnummer": ["A1", " a1", "A2", "", "", "n.v.t.", "n.v.t.", "A3", "A1"]})
+    output = validate_both(df)
+    assert set(findings(output, "703", "Artikelnummer")) == {3, 4, 11}
+    assert _messages(output, "Artikelnummer")[3].endswith("(ook in rij 4, 11)")
+
+
+def test_large_duplicate_group_is_truncated(validate_both):
+    n_rows = DUPLICATE_ROWS_IN_MESSAGE + 5
+    output = validate_both(pd.DataFrame({"Artikelnummer": ["X"] * n_rows}))
+    messages = _messages(output, "Artikelnummer")
+    assert len(messages) == n_rows
+    assert messages[3].endswith(f" en {n_rows - 1 - DUPLICATE_ROWS_IN_MESSAGE} andere)")
+
+
+def test_no_duplicates_in_single_row(validate_both):
+    output = validate_both(pd.DataFrame({"Artikelnummer": ["A1"]}))
+    assert findings(output, "703") == {}
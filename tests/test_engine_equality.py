@@ -0,0 +1,62 @@
+"""
+Engine gelijkheid (user-001): de vectorized engine moet exact dezelfde uitvoer geven als
+de oorspronkelijke iterrows loop, op echte prijslijsten en op randgevallen.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compare_validation_engines
+from conftest import TEST_INPUT_DIR, findings
+from validator import price_tool
+from validator.vectorized_engine import compare_validation_outputs
+
+FIXTURE_FILES = ["Test1.xlsx", "legacy_small.xlsx", "ghx_default_small4.xlsx", "generator_small.xlsx"]
+
+
+@pytest.mark.parametrize("file_name", FIXTURE_FILES)
+def test_engines_identical_on_fixture_files(file_name, header_mapping, validation_config):
+    df, column_mapping, template_context = compare_validation_engines.load_dataframe(
+        os.path.join(TEST_INPUT_DIR, file_name), header_mapping
+    )
+    outputs = [
+        price_tool.validate_dataframe(df, validation_config, column_mapping, template_context, engine=engine)
+        for engine in ("iterrows", "vectorized")
+    ]
+    assert compare_validation_outputs(*outputs) == []
+    assert len(outputs[0][0]) > 0
+
+
+def test_engines_identical_on_edge_values(validate_both):
+    # Lege waarden, null_values, spaties, NaN en gemengde types door elkaar
+    df = pd.DataFrame({
+        "Artikelnummer": ["A1", " A2 ", "", None, "nvt", "A6"],
+        "Artikelomschrijving": ["x" * 300, "Handschoen", np.nan, "n.v.t.", "  ", "Pleister"],
+        "Brutoprijs": ["12,50", "abc", 3, None, "1e3", "-"],
+        "Nettoprijs": ["10", "11.5", "x", "", 2.5, "7"],
+        "UNSPSC Code": ["42131600", "4213", "abcdefgh", None, "42131600 ", "12345678"],
+        "Is BestelbareEenheid": ["1", "ja", "misschien", None, "0", "true"],
+    })
+    output = validate_both(df)
+    assert findings(output, "704", "Brutoprijs") == {4: "abc"}
+
+
+def test_engines_identical_on_fully_numeric_frame(validate_both):
+    # iterrows zet een volledig numerieke rij om naar één dtype (int -> float)
+    df = pd.DataFrame({
+        "Brutoprijs": [10, 20, 30],
+        "Nettoprijs": [12.5, 15.0, 30.0],
+        "Staffel Vanaf": [1, 10, 5],
+        "Staffel Tot": [9, 10, 4],
+    })
+    output = validate_both(df)
+    assert set(findings(output, "752", "Brutoprijs")) == {3}
+    assert set(findings(output, "758", "Staffel Tot")) == {4, 5}
+
+
+def test_engines_identical_on_empty_frame(validate_both):
+    output = validate_both(pd.DataFrame({"Artikelnummer": pd.Series([], dtype=object)}))
+    assert len(output[0]) == 0
@@ -0,0 +1,58 @@
+"""
+GTIN controlecijfer regel (725) en GTIN duplicaten (703), ook voor numerieke GTIN kolommen
+zoals read_excel die als float64 teruggeeft.
+"""
+
+import numpy as np
+import pandas as pd
+
+from conftest import findings
+from validator.price_tool import invalid_gtin_check_digits, normalize_duplicate_values
+from validator.rapport_utils import get_error_category
+from validator.report_stats import _is_rejection_code
+
+
+def test_check_digit_strings():
+    values = ["4022495755674", "4022495755675", "04022495755674", "96385074", "96385075",
+              "123", "abc", "", "4022495755674X", "٤٠٢٢٤٩٥٧٥٥٦٧٤"]
+    assert invalid_gtin_check_digits(values).tolist() == [
+        False, True, False, False, True, False, False, False, False, False
+    ]
+
+
+def test_check_digit_whole_floats():
+    values = ["4022495755674.0", "4022495755675.0", "4022495755674.00", "4022495755674.5"]
+    assert invalid_gtin_check_digits(values).tolist() == [False, True, False, False]
+
+
+def test_check_digit_code_is_a_rejection_code(validation_config):
+    # Dashboard categorie en afkeuringen telling volgen de code range, niet het rule type
+    rules = [
+        rule
+        for field in validation_config["field_validations"].values()
+        for rule in field.get("rules", [])
+        if rule.get("condition") == "invalid_gtin_check_digit"
+    ]
+    assert len(rules) == 2
+    for rule in rules:
+        assert rule["type"] == "rejection"
+        assert get_error_category(rule["code"]) == "Afkeuring"
+        assert _is_rejection_code(rule["code"])
+
+
+def test_numeric_gtin_column(validate_both):
+    # read_excel geeft een numerieke GTIN kolom als float64 terug
+    df = pd.DataFrame({
+        "GTIN Verpakkingseenheid": np.array([4022495755674, 4022495755675, np.nan, 96385075], dtype="float64"),
+    })
+    output = validate_both(df)
+    assert set(findings(output, "725", "GTIN Verpakkingseenheid")) == {4, 6}
+
+
+def test_duplicate_gtin_ignores_leading_zeros_and_float_suffix(validate_both):
+    df = pd.DataFrame({
+        "GTIN Verpakkingseenheid": ["4022495755674", "04022495755674", 4022495755674.0, "96385074"],
+    })
+    assert normalize_duplicate_values(df["GTIN Verpakkingseenheid"], "is_duplicate_gtin").nunique() == 2
+    output = validate_both(df)
+    assert set(findings(output, "703", "GTIN Verpakkingseenheid")) == {3, 4, 5}
@@ -0,0 +1,110 @@
+"""
+Incrementele validatie (validate_dataframe_incremental met de run state van een vorige
+versie) geeft dezelfde uitvoer als een volledige run van de vectorized engine.
+"""
+
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import compare_validation_engines
+from conftest import TEST_INPUT_DIR, default_context, findings
+from validator import price_tool
+from validator.incremental_validation import IncrementalRun, validate_dataframe_incremental
+from validator.vectorized_engine import compare_validation_outputs
+
+
+class _FrozenDatetime(datetime):
+    """datetime met een vaste now(), voor de datum-relatieve regels (validation_today)."""
+
+    current = datetime(2026, 3, 1)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def frozen_today(monkeypatch):
+    monkeypatch.setattr(price_tool, "datetime", _FrozenDatetime)
+    return _FrozenDatetime
+
+
+@pytest.fixture
+def validate_incremental(validation_config, reference_lists):
+    """
+    Valideert df incrementeel op de state van de vorige aanroep en eist dezelfde uitvoer
+    als een volledige run.
+
+    Returns:
+        Functie (df, column_mapping=None, template_context=None) -> (uitvoer, IncrementalRun)
+    """
+    previous = {"state": None}
+
+    def run(df: pd.DataFrame, column_mapping: dict = None, template_context: dict = None):
+        column_mapping = column_mapping or {column: column for column in df.columns}
+        context = template_context or default_context()
+        incremental_run = IncrementalRun(validation_config, context, reference_lists, previous["state"])
+        output = validate_dataframe_incremental(df, validation_config, column_mapping, context, incremental_run)
+        full = price_tool.validate_dataframe(df, validation_config, column_mapping, context, engine="vectorized")
+        differences = compare_validation_outputs(full, output)
+        assert differences == [], "\n".join(differences[:10])
+        previous["state"] = incremental_run.to_state()
+        return output, incremental_run
+    return run
+
+
+def test_date_relative_rules_not_reused_on_a_later_day(frozen_today, validate_incremental):
+    df = pd.DataFrame({
+        "Artikelnummer": ["A1", "A2", "A3"],
+        "CE Certificaat einddatum": ["02-03-2026", "03-03-2026", "31-12-2030"],
+    })
+    output, _ = validate_incremental(df)
+    assert findings(output, "723", "CE Certificaat einddatum") == {}
+
+    # Zelfde dag: alle rijen komen uit de state
+    _, same_day = validate_incremental(df)
+    assert same_day.reused_rows == 3
+
+    # Drie dagen later zijn beide certificaten verlopen; de state mag niet hergebruikt worden
+    frozen_today.current = datetime(2026, 3, 4)
+    output, later = validate_incremental(df)
+    assert later.reused_rows == 0
+    assert set(findings(output, "723", "CE Certificaat einddatum")) == {3, 4}
+
+
+def _next_version(df: pd.DataFrame) -> pd.DataFrame:
+    """Nieuwe versie van een prijslijst: rijen weg, verschoven, gedupliceerd en gewijzigd."""
+    rng = np.random.default_rng(7)
+    kept = df.drop(index=df.index[1::9])
+    duplicated = kept.iloc[::25]
+    new = pd.concat([kept, duplicated]).iloc[rng.permutation(len(kept) + len(duplicated))]
+    new = new.reset_index(drop=True).copy()
+    edited = new.index[::11]
+    for column, value in (("Brutoprijs", "abc"), ("Artikelomschrijving", ""), ("GTIN Verpakkingseenheid", "4022495755675")):
+        if column in new.columns:
+            new[column] = new[column].astype(object)
+            new.loc[edited, column] = value
+    return new
+
+
+@pytest.mark.parametrize("file_name", ["Test1.xlsx", "generator_small.xlsx"])
+def test_incremental_equals_full_after_changes(file_name, header_mapping, validate_incremental):
+    df, column_mapping, template_context = compare_validation_engines.load_dataframe(
+        os.path.join(TEST_INPUT_DIR, file_name), header_mapping
+    )
+    _, first_run = validate_incremental(df, column_mapping, template_context)
+    assert first_run.reused_rows == 0
+
+    # Ongewijzigd: alles uit de state
+    _, unchanged = validate_incremental(df, column_mapping, template_context)
+    assert unchanged.reused_rows == len(df)
+
+    # Gewijzigd, verschoven en gedupliceerd: de fixture eist dezelfde uitvoer als een volledige run
+    new = _next_version(df)
+    _, changed = validate_incremental(new, column_mapping, template_context)
+    assert 0 < changed.reused_rows < len(new)
+    assert changed.validated_rows > 0
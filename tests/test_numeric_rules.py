@@ -0,0 +1,65 @@
+"""
+Numerieke regels (704, 720, 752, 754, 755, 758): één numerieke parse per kolom met komma
+decimalen en duizendtallen scheiding, identiek in beide engines.
+"""
+
+import pandas as pd
+import pytest
+
+from conftest import findings
+from validator.price_tool import parse_numeric_string
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("12.5", 12.5),
+    ("12,5", 12.5),
+    ("1.234,56", 1234.56),
+    ("1,234.56", 1234.56),
+    ("1.000", 1.0),
+    ("1 234 567", 1234567.0),
+    ("1.234.567", 1234567.0),
+    ("-3", -3.0),
+    ("1e3", 1000.0),
+])
+def test_parse_valid_numbers(value, expected):
+    assert parse_numeric_string(value) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", ["abc", "1,2,3,4", "1.23.4", "12,5.0", "1.234,5.6", "€ 12", ""])
+def test_parse_invalid_numbers(value):
+    assert parse_numeric_string(value) is None
+
+
+def test_thousands_separators(validate_both):
+    df = pd.DataFrame({
+        "Brutoprijs": ["1.234,56", "1,234.56", "1.23.4", "12,50"],
+        "Nettoprijs": ["1.000,00", "1,300.00", "10", "12,5"],
+    })
+    output = validate_both(df)
+    assert findings(output, "704", "Brutoprijs") == {5: "1.23.4"}
+    assert findings(output, "704", "Nettoprijs") == {}
+    assert set(findings(output, "752", "Brutoprijs")) == {4}
+
+
+def test_integer_and_field_comparisons(validate_both):
+    df = pd.DataFrame({
+        "Levertijd": ["5", "5,0", "5.5", "vijf", "1.000"],
+        "Staffel Vanaf": ["1", "10", "5", "x", "1.000"],
+        "Staffel Tot": ["9", "10", "4", "3", "999"],
+        "Omrekenfactor": ["", "abc", "10", "2,5", "1.000"],
+    })
+    output = validate_both(df)
+    assert set(findings(output, "704", "Levertijd")) == {5, 6}
+    # "1.000" is voor float() gewoon 1.0; duizendtallen alleen als float() en komma falen
+    assert set(findings(output, "758", "Staffel Tot")) == {4, 5}
+    assert set(findings(output, "754", "Omrekenfactor")) == {3, 4}
+
+
+def test_mismatch_calculation(validate_both):
+    df = pd.DataFrame({
+        "Inhoud Verpakkingseenheid": ["10", "1.000", "2,5"],
+        "Inhoud Basiseenheid": ["2", "2", "2"],
+        "Omrekenfactor": ["20", "2.000", "6"],
+    })
+    output = validate_both(df)
+    assert set(findings(output, "720", "Omrekenfactor")) == {5}
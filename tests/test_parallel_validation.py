@@ -0,0 +1,33 @@
+"""
+Parallelle validatie in row shards (validate_dataframe_parallel) geeft na het samenvoegen
+(resultaten, filled_counts, eerste triggerende Red Flag rij, UOM meldingen) exact dezelfde
+uitvoer als validate_dataframe_vectorized in één proces.
+"""
+
+import logging
+import os
+
+import pytest
+
+import compare_validation_engines
+from conftest import TEST_INPUT_DIR
+from validator.parallel_validation import validate_dataframe_parallel
+from validator.vectorized_engine import compare_validation_outputs, validate_dataframe_vectorized
+
+
+@pytest.mark.parametrize("file_name", ["Test1.xlsx", "legacy_small.xlsx"])
+def test_shards_merge_to_single_process_output(file_name, header_mapping, validation_config,
+                                               reference_lists, caplog):
+    df, column_mapping, template_context = compare_validation_engines.load_dataframe(
+        os.path.join(TEST_INPUT_DIR, file_name), header_mapping
+    )
+    single = validate_dataframe_vectorized(df, validation_config, column_mapping, template_context, reference_lists)
+    with caplog.at_level(logging.INFO):
+        sharded = validate_dataframe_parallel(df, validation_config, column_mapping, template_context,
+                                              reference_lists, workers=3, shard_rows=40)
+
+    # Echt parallel gevalideerd (geen terugval naar één proces)
+    assert "Parallelle validatie:" in caplog.text
+    assert "Parallelle validatie mislukt" not in caplog.text
+    assert compare_validation_outputs(single, sharded) == []
+    assert single[2], "bestand triggert geen Red Flags; kies een bestand dat de samenvoeging test"
@@ -0,0 +1,60 @@
+"""
+LRU eviction van de parse cache slaat entries over die een open CachedWorkbookProbe nog
+(lazy) leest, en entries worden alleen uit een privé cache map gelezen.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from conftest import TEST_INPUT_DIR
+from validator import parse_cache
+from validator.workbook_probe import WorkbookProbe
+
+pytestmark = pytest.mark.skipif(parse_cache.pq is None, reason="pyarrow niet geïnstalleerd")
+
+
+@pytest.fixture
+def cached_entry(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    probe = WorkbookProbe(os.path.join(TEST_INPUT_DIR, "Test1.xlsx"))
+    df = pd.DataFrame({"Artikelnummer": ["A1", "A2"], "Prijs": [1.5, 2.0]})
+    entry_dir = parse_cache.store_parsed_workbook(probe, None, df, cache_dir=cache_dir)
+    assert entry_dir is not None
+    yield probe, cache_dir, entry_dir
+    probe.close()
+
+
+def test_evict_skips_entry_in_use(cached_entry):
+    probe, cache_dir, entry_dir = cached_entry
+    cached = parse_cache.load_cached_probe(probe, None, cache_dir=cache_dir)
+    assert cached is not None
+
+    assert parse_cache.evict_lru(cache_dir, max_bytes=0) == 0
+    assert os.path.isdir(entry_dir)
+    assert list(cached.read()["Artikelnummer"]) == ["A1", "A2"]
+
+    cached.close()
+    assert parse_cache.evict_lru(cache_dir, max_bytes=0) == 1
+    assert not os.path.exists(entry_dir)
+
+
+def test_commit_keeps_entry_in_use(cached_entry):
+    probe, cache_dir, entry_dir = cached_entry
+    cached = parse_cache.load_cached_probe(probe, None, cache_dir=cache_dir)
+    df = pd.DataFrame({"Artikelnummer": ["A1", "A2"], "Prijs": [1.5, 2.0]})
+
+    assert parse_cache.store_parsed_workbook(probe, None, df, cache_dir=cache_dir) == entry_dir
+    assert list(cached.iter_parts())[0]["Prijs"].tolist() == [1.5, 2.0]
+    cached.close()
+
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="uid/mode controles alleen op POSIX")
+def test_entries_not_loaded_from_shared_dir(cached_entry):
+    probe, cache_dir, entry_dir = cached_entry
+    os.chmod(cache_dir, 0o777)
+    assert parse_cache.load_cached_probe(probe, None, cache_dir=cache_dir) is None
+    assert parse_cache.find_cached_probe(probe, cache_dir=cache_dir) is None
+    assert parse_cache.evict_lru(cache_dir, max_bytes=0) == 0
+    assert os.path.isdir(entry_dir)
@@ -0,0 +1,81 @@
+"""
+Pickle caches (config snapshots, incrementele run states) en job uploads worden alleen
+gelezen uit of geschreven naar een map van de huidige gebruiker die anderen niet kunnen
+beschrijven.
+"""
+
+import os
+import pickle
+
+import pytest
+
+from conftest import VALIDATION_JSON
+from validator import config_manager, incremental_validation, validation_jobs
+from validator.utils import ensure_private_dir, private_temp_dir
+
+posix_only = pytest.mark.skipif(not hasattr(os, "getuid"), reason="uid/mode controles alleen op POSIX")
+
+
+def test_private_temp_dir_is_per_user():
+    if hasattr(os, "getuid"):
+        assert private_temp_dir("ghx_x").endswith(f"ghx_x-{os.getuid()}")
+
+
+@posix_only
+def test_ensure_private_dir(tmp_path):
+    created = tmp_path / "cache"
+    assert ensure_private_dir(str(created))
+    assert created.stat().st_mode & 0o777 == 0o700
+
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    assert not ensure_private_dir(str(shared))
+
+    link = tmp_path / "link"
+    link.symlink_to(created)
+    assert not ensure_private_dir(str(link))
+
+
+@posix_only
+def test_snapshot_not_loaded_from_shared_dir(tmp_path):
+    snapshot = config_manager.get_validation_snapshot(VALIDATION_JSON)
+    snapshot_dir = tmp_path / "snapshots"
+    snapshot_file = snapshot_dir / f"{snapshot.key}.pkl"
+    config_manager._write_snapshot_file(str(snapshot_file), snapshot)
+    assert config_manager._load_snapshot_file(str(snapshot_file), snapshot.key) is not None
+
+    snapshot_dir.chmod(0o777)
+    assert config_manager._load_snapshot_file(str(snapshot_file), snapshot.key) is None
+    with open(snapshot_file, "rb") as f:
+        assert pickle.load(f).key == snapshot.key
+
+
+@posix_only
+def test_run_state_not_loaded_from_shared_dir(tmp_path):
+    state = {"format": incremental_validation.STATE_FORMAT_VERSION, "rows": {}}
+    state_path = incremental_validation.default_state_path("prijslijst.xlsx", str(tmp_path / "states"))
+    assert incremental_validation.save_run_state(state_path, state)
+    assert incremental_validation.load_run_state(state_path) == state
+
+    os.chmod(os.path.dirname(state_path), 0o777)
+    assert incremental_validation.load_run_state(state_path) is None
+    assert not incremental_validation.save_run_state(state_path, state)
+
+
+@posix_only
+def test_job_uploads_only_in_private_dir(tmp_path):
+    job_dir = tmp_path / "jobs"
+    job_dir.mkdir()
+    job_dir.chmod(0o777)
+    queue = validation_jobs.ValidationJobQueue({}, base_dir=str(job_dir))
+    with pytest.raises(RuntimeError):
+        queue.submit("prijslijst.xlsx", b"geheim")
+    assert list(job_dir.iterdir()) == []
+
+
+def test_job_queues_share_one_pool():
+    try:
+        assert validation_jobs._shared_executor(2) is validation_jobs._shared_executor(2)
+    finally:
+        validation_jobs.shutdown_shared_executors()
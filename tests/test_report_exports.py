@@ -0,0 +1,65 @@
+"""
+Machine-leesbare outputs (write_report_outputs): Parquet en NDJSON bevatten alle meldingen,
+de JSON summary is ReportStats.to_dict(), en resolve_output_formats weigert onbekende of
+lege selecties.
+"""
+
+import json
+import os
+
+import pandas as pd
+import pytest
+
+import compare_validation_engines
+from conftest import TEST_INPUT_DIR
+from validator import price_tool
+from validator.rapport_utils import prepare_report_stats
+from validator import report_exports
+from validator.report_exports import resolve_output_formats, write_report_outputs
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("xlsx", ("xlsx",)),
+    (" JSON , parquet,json,", ("json", "parquet")),
+    (["ndjson", "xlsx"], ("ndjson", "xlsx")),
+])
+def test_resolve_output_formats(value, expected):
+    assert resolve_output_formats(value) == expected
+
+
+@pytest.mark.parametrize("value", ["csv", "xlsx,pdf", "", " , ", []])
+def test_resolve_output_formats_rejects(value):
+    with pytest.raises(ValueError):
+        resolve_output_formats(value)
+
+
+@pytest.mark.skipif(report_exports.pq is None, reason="pyarrow niet geïnstalleerd")
+def test_outputs_round_trip(tmp_path, header_mapping, validation_config):
+    path = os.path.join(TEST_INPUT_DIR, "Test1.xlsx")
+    df, column_mapping, template_context = compare_validation_engines.load_dataframe(path, header_mapping)
+    results, _, _, errors_per_field = price_tool.validate_dataframe(
+        df, validation_config, column_mapping, template_context, engine="vectorized"
+    )
+    mandatory_fields = price_tool.determine_mandatory_fields_for_template(path)
+    stats = prepare_report_stats(results, df, mandatory_fields, errors_per_field, validation_config,
+                                 template_context=template_context, excel_path=path)
+
+    paths = write_report_outputs(results, stats, str(tmp_path), "Test1.xlsx", ("xlsx", "parquet", "json", "ndjson"),
+                                 processed_rows=len(df))
+    assert set(paths) == {"parquet", "json", "ndjson"}  # xlsx bouwt genereer_rapport
+    assert all(os.path.dirname(p) == str(tmp_path) and os.path.basename(p).startswith("Test1_VR_")
+               for p in paths.values())
+
+    errors = pd.read_parquet(paths["parquet"])
+    assert len(errors) == len(results) > 0
+    assert (errors["GHX Kolom"] == "RED FLAG").sum() == sum(1 for r in results if r["GHX Kolom"] == "RED FLAG")
+    with open(paths["ndjson"], encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f]
+    assert len(lines) == len(results)
+    assert [line["Rij"] for line in lines] == errors["Rij"].tolist()
+
+    with open(paths["json"], encoding="utf-8") as f:
+        summary = json.load(f)
+    assert summary["processed_rows"] == summary["total_rows"] == len(df)
+    assert summary["quick_mode"] is False
+    assert summary["stats"] == json.loads(json.dumps(stats.to_dict(), default=str))
@@ -0,0 +1,53 @@
+"""
+Row context regels (756, 759, 760, 763, 764, 765, 771): contexten als boolean kolommen,
+is_empty_when_context identiek in beide engines.
+"""
+
+import pandas as pd
+
+from conftest import default_context, findings
+from validator.row_context import evaluate_row_contexts, file_contexts
+
+
+def test_field_triggers(validation_config, reference_lists):
+    df = pd.DataFrame({
+        "UNSPSC Code": ["42131600", "12352104", "41104100", "", "42"],
+        "Steriel": ["", "", "1.0", "1", "0"],
+        "Aanvullende Productclassificatiewaarde (Risicoklasse)": ["eu_class_iii", "", "", "", "EU_CLASS_I"],
+        "CAS nummer": ["", "", "", "n.v.t.", ""],
+    })
+    contexts = evaluate_row_contexts(df, validation_config, default_context(), reference_lists, ["n.v.t."])
+    assert contexts["is_medical_device"].tolist() == [True, False, True, True, True]
+    assert contexts["risk_class_is_high"].tolist() == [True, False, False, False, False]
+    assert contexts["is_medical_device_high_risk"].tolist() == [True, False, False, False, False]
+    assert contexts["is_chemical"].tolist() == [False, True, False, False, False]
+    assert contexts["is_lab_product"].tolist() == [False, False, True, False, False]
+
+
+def test_file_contexts_from_template_context():
+    context = {"configuration": {"gs1_mode": "full", "institution_codes": ["UMCU"],
+                                 "product_types": ["lab", "medisch"]}}
+    per_file = file_contexts(context)
+    assert per_file["is_gs1_submission"] and per_file["is_umcu_or_lumc_submission"]
+    assert per_file["template_category"] == frozenset({"lab", "medical"})
+    assert not file_contexts(default_context())["is_gs1_submission"]
+
+
+def test_is_empty_when_context(validate_both):
+    df = pd.DataFrame({
+        "UNSPSC Code": ["42131600", "42131600", "12352104", "30000000"],
+        "Aanvullende Productclassificatiewaarde (Risicoklasse)": ["EU_CLASS_IIB", "", "", ""],
+        "Link IFU": ["", "https://example.com/ifu.pdf", "", ""],
+        "GTIN Verpakkingseenheid": ["", "", "", ""],
+        "CAS nummer": ["", "", "", ""],
+        "GLN Leverancier": ["", "", "", ""],
+    })
+    output = validate_both(df)
+    assert set(findings(output, "760", "Link IFU")) == {3}
+    assert set(findings(output, "756", "GTIN Verpakkingseenheid")) == {3}
+    assert set(findings(output, "765", "CAS nummer")) == {5}
+    assert findings(output, "759", "GLN Leverancier") == {}
+
+    gs1_context = dict(default_context(), configuration={"gs1_mode": "full"})
+    output = validate_both(df, gs1_context)
+    assert set(findings(output, "759", "GLN Leverancier")) == {3, 4, 5, 6}
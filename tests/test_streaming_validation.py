@@ -0,0 +1,49 @@
+"""
+Streaming validatie (validate_excel_streaming met chunks kleiner dan het bestand, het pad
+van elke "Volledige Validatie" job) geeft dezelfde uitvoer als validate_dataframe op het
+in één keer gelezen werkblad.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+import compare_validation_engines
+from conftest import TEST_INPUT_DIR
+from validator import price_tool
+from validator.streaming_validation import validate_excel_streaming
+from validator.vectorized_engine import compare_validation_outputs
+from validator.workbook_probe import WorkbookProbe
+
+# Zelfde dtype spec als compare_validation_engines.load_dataframe
+DTYPE_SPEC = {
+    "UNSPSC CODE (UNITED NATIONS STANDARD PRODUCTS AND SERVICES CODE)": str,
+    "UNSPSC Code": str,
+    "BARCODENUMMER (EAN/ GTIN/ HIBC)": str,
+    "GTIN Verpakkingseenheid": str,
+}
+
+
+@pytest.mark.parametrize("file_name, engine", [
+    ("Test1.xlsx", "vectorized"),
+    ("legacy_small2.xlsx", "vectorized"),
+    ("Test1.xlsx", "iterrows"),
+])
+def test_chunked_equals_full_read(file_name, engine, header_mapping, validation_config, reference_lists):
+    path = os.path.join(TEST_INPUT_DIR, file_name)
+    df, column_mapping, template_context = compare_validation_engines.load_dataframe(path, header_mapping)
+    full = price_tool.validate_dataframe(df, validation_config, column_mapping, template_context, engine=engine)
+
+    streaming_context = {k: v for k, v in template_context.items() if k != "removed_rows_count"}
+    with WorkbookProbe(path) as probe:
+        streamed_df, _, streamed_mapping, removed_rows, streamed = validate_excel_streaming(
+            probe, header_mapping, validation_config, streaming_context, dtype=DTYPE_SPEC,
+            chunk_size=100, engine=engine, reference_lists=reference_lists,
+        )
+
+    assert len(df) > 100  # meerdere chunks
+    assert streamed_mapping == column_mapping
+    assert removed_rows == template_context["removed_rows_count"]
+    pd.testing.assert_frame_equal(streamed_df.reset_index(drop=True), df.reset_index(drop=True))
+    assert compare_validation_outputs(full, streamed) == []
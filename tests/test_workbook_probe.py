@@ -0,0 +1,33 @@
+"""
+WorkbookProbe.row_count telt zoals de oude ws.max_row - 1 en len(pd.read_excel(...)):
+lege rijen tussen de data tellen mee, de validatie laat ze later vallen.
+"""
+
+import io
+import os
+import zipfile
+
+import openpyxl
+import pandas as pd
+
+from conftest import TEST_INPUT_DIR
+from validator.workbook_probe import WorkbookProbe, _first_sheet_xml_path, _scan_last_value_row, count_sheet_rows
+
+TEST7 = os.path.join(TEST_INPUT_DIR, "Test7.xlsx")
+
+
+def test_row_count_matches_max_row_with_empty_rows():
+    with open(TEST7, "rb") as f:
+        data = f.read()
+    with zipfile.ZipFile(io.BytesIO(data)) as archive, archive.open(_first_sheet_xml_path(archive)) as stream:
+        scanned = _scan_last_value_row(stream)
+    workbook = openpyxl.load_workbook(TEST7, read_only=True)
+    max_row = workbook.worksheets[0].max_row
+    workbook.close()
+    df = pd.read_excel(TEST7)
+
+    assert count_sheet_rows(data) == scanned == max_row
+    with WorkbookProbe(TEST7) as probe:
+        assert probe.row_count == max_row - 1 == len(df)
+    # Zeven lege rijen tussen de data; die vallen pas bij de validatie weg
+    assert len(df.dropna(how="all")) == len(df) - 7
@@ -2,12 +2,275 @@
 Configuratie Manager Module
 
 Deze module beheert het laden en normaliseren van alle configuratie bestanden.
+
+Config registry: elk JSON bestand wordt per proces één keer gelezen, gevalideerd en
+read-only gemaakt (FrozenDict/FrozenList), met als sleutel pad + mtime + SHA-256 van de
+inhoud. Alle aanroepers krijgen hetzelfde object terug; een gewijzigd bestand (andere
+inhoud) wordt automatisch opnieuw geladen. get_validation_snapshot bundelt de validatie
+config, reference lists, de v18-normalisatie en het gecompileerde validatieplan en bewaart
+die bundel als pickle, zodat een nieuw proces (app herstart, job worker, CLI) het parsen,
+normaliseren en compileren overslaat.
+
+Omgevingsvariabelen:
+- GHX_CONFIG_SNAPSHOT: "0" schakelt de pickle snapshots uit
+- GHX_CONFIG_SNAPSHOT_DIR: map voor snapshots (default <tempdir>/ghx_config_snapshots-<uid>).
+  Snapshots worden alleen geladen uit een map van de huidige gebruiker die niet door
+  anderen beschreven kan worden (zie utils.ensure_private_dir)
 """
 
+import hashlib
 import json
 import logging
 import os
-from typing import Dict, Any, Optional
+import pickle
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Tuple
+
+from .utils import ensure_private_dir, private_temp_dir
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_VALIDATION_CONFIG_PATH = os.path.join(PROJECT_ROOT, "field_validation_v20.json")
+TEMPLATE_GENERATOR_FILES_DIR = os.path.join(PROJECT_ROOT, "Template Generator Files")
+
+SNAPSHOT_ENABLED = os.environ.get("GHX_CONFIG_SNAPSHOT", "1") != "0"
+DEFAULT_SNAPSHOT_DIR = os.environ.get("GHX_CONFIG_SNAPSHOT_DIR") or private_temp_dir("ghx_config_snapshots")
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Modules waarvan de code bepaalt hoe een snapshot eruitziet (normalisatie, plan compilatie)
+_SNAPSHOT_CODE_MODULES = ("config_manager.py", "price_tool.py", "validation_plan.py",
+                          "vectorized_engine.py", "row_context.py")
+
+
+# -----------------------------
+# READ-ONLY CONFIG OBJECTEN
+# -----------------------------
+
+def _read_only(self, *args, **kwargs):
+    raise TypeError("Configuratie uit de config registry is read-only; gebruik thaw_config() voor een bewerkbare kopie")
+
+
+class FrozenDict(dict):
+    """Read-only dict voor gedeelde configuratie (blijft een dict voor isinstance en json.dump)."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list voor gedeelde configuratie; .copy() en list(...) geven een gewone list."""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze_config(value: Any) -> Any:
+    """Maakt een geladen JSON structuur recursief read-only."""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze_config(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze_config(item) for item in value)
+    return value
+
+
+def thaw_config(value: Any) -> Any:
+    """Geeft een bewerkbare (diepe) kopie van een config uit de registry."""
+    if isinstance(value, dict):
+        return {key: thaw_config(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [thaw_config(item) for item in value]
+    return value
+
+
+# -----------------------------
+# CONFIG REGISTRY
+# -----------------------------
+
+_REGISTRY_LOCK = threading.RLock()
+# abspath -> (mtime_ns, size, sha256, read-only config)
+_JSON_REGISTRY: Dict[str, Tuple[int, int, str, Any]] = {}
+# sha256 -> read-only config (zelfde inhoud onder een ander pad deelt het object)
+_JSON_BY_HASH: Dict[str, Any] = {}
+# snapshot sleutel -> ValidationConfigSnapshot
+_SNAPSHOTS: Dict[str, "ValidationConfigSnapshot"] = {}
+_SNAPSHOTS_MAX = 8
+
+
+def _registry_entry(path: str) -> Tuple[str, Any]:
+    """Geeft (sha256, config) voor een JSON bestand; leest alleen bij een gewijzigde mtime/grootte."""
+    abs_path = os.path.abspath(path)
+    stat = os.stat(abs_path)
+    with _REGISTRY_LOCK:
+        entry = _JSON_REGISTRY.get(abs_path)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2], entry[3]
+
+        with open(abs_path, "rb") as f:
+            raw_bytes = f.read()
+        digest = hashlib.sha256(raw_bytes).hexdigest()
+        config = _JSON_BY_HASH.get(digest)
+        if config is None:
+            config = freeze_config(json.loads(raw_bytes.decode("utf-8")))
+            _JSON_BY_HASH[digest] = config
+            logging.info(f"Configuratie geladen in registry: {abs_path}")
+        _JSON_REGISTRY[abs_path] = (stat.st_mtime_ns, stat.st_size, digest, config)
+        return digest, config
+
+
+def load_json_config(path: str) -> Any:
+    """
+    Laadt een JSON configuratie via de registry (read-only, gedeeld binnen het proces).
+
+    Raises:
+        FileNotFoundError: als het bestand niet bestaat
+        json.JSONDecodeError: bij ongeldige JSON
+    """
+    return _registry_entry(path)[1]
+
+
+def config_file_hash(path: str) -> str:
+    """SHA-256 van de inhoud van een configuratiebestand (uit de registry)."""
+    return _registry_entry(path)[0]
+
+
+@dataclass(frozen=True)
+class ValidationConfigSnapshot:
+    """Geladen en gecompileerde validatie configuratie voor validate_pricelist."""
+
+    key: str
+    raw: Any                      # field_validation_v20.json (read-only)
+    reference_lists: Any          # reference_lists.json of {} (read-only)
+    json_version: str             # "v20" of "v18"
+    normalized: Any               # v18-compatibele structuur (read-only)
+    plan: Optional[Dict[str, Any]] = None  # gecompileerd validatieplan (alleen v20)
+
+
+def _snapshot_code_version() -> str:
+    """Fingerprint van de code die de snapshot inhoud bepaalt (mtime + grootte per module)."""
+    parts = [str(SNAPSHOT_FORMAT_VERSION)]
+    module_dir = os.path.dirname(os.path.abspath(__file__))
+    for module_name in _SNAPSHOT_CODE_MODULES:
+        try:
+            stat = os.stat(os.path.join(module_dir, module_name))
+            parts.append(f"{module_name}:{stat.st_mtime_ns}:{stat.st_size}")
+        except OSError:
+            parts.append(f"{module_name}:-")
+    return "|".join(parts)
+
+
+def _build_validation_snapshot(key: str, raw: Any, reference_lists: Any) -> ValidationConfigSnapshot:
+    """Detecteert de versie, normaliseert en compileert het plan (eenmalig per inhoud)."""
+    from .price_tool import detect_json_version as detect_version, normalize_v20_to_v18_structure as normalize
+
+    json_version = detect_version(raw)
+    plan = None
+    if json_version == "v20":
+        normalized = freeze_config(normalize(raw, reference_lists))
+        from .validation_plan import compile_validation_plan
+        plan = compile_validation_plan(raw, reference_lists)
+    else:
+        normalized = raw
+    return ValidationConfigSnapshot(key, raw, reference_lists, json_version, normalized, plan)
+
+
+def _load_snapshot_file(path: str, key: str) -> Optional[ValidationConfigSnapshot]:
+    if not ensure_private_dir(os.path.dirname(path)):
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.load(f)
+        if isinstance(snapshot, ValidationConfigSnapshot) and snapshot.key == key:
+            return snapshot
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.warning(f"Config snapshot onbruikbaar, opnieuw opbouwen ({path}): {e}")
+    return None
+
+
+def _write_snapshot_file(path: str, snapshot: ValidationConfigSnapshot) -> None:
+    if not ensure_private_dir(os.path.dirname(path)):
+        return
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)  # Atomisch: parallelle processen zien nooit een half bestand
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    except Exception as e:
+        logging.warning(f"Config snapshot niet geschreven ({path}): {e}")
+
+
+def get_validation_snapshot(
+    validation_json_path: str,
+    reference_json_path: Optional[str] = None,
+    snapshot_dir: Optional[str] = None,
+) -> ValidationConfigSnapshot:
+    """
+    Geeft de geladen, genormaliseerde en gecompileerde validatie configuratie.
+
+    Binnen een proces krijgt elke aanroep met dezelfde bestandsinhoud hetzelfde object;
+    een nieuw proces laadt de pickle snapshot uit snapshot_dir (GHX_CONFIG_SNAPSHOT_DIR).
+
+    Args:
+        validation_json_path: Pad naar field_validation_v20.json
+        reference_json_path: Pad naar reference_lists.json (optioneel; ontbreekt = {})
+
+    Raises:
+        FileNotFoundError / json.JSONDecodeError: zoals bij het direct lezen van de JSON
+    """
+    validation_hash, raw = _registry_entry(validation_json_path)
+    reference_hash, reference_lists = "", FrozenDict()
+    if reference_json_path and os.path.exists(reference_json_path):
+        reference_hash, reference_lists = _registry_entry(reference_json_path)
+
+    key = hashlib.sha256(
+        f"{validation_hash}|{reference_hash}|{_snapshot_code_version()}".encode("utf-8")
+    ).hexdigest()
+
+    with _REGISTRY_LOCK:
+        snapshot = _SNAPSHOTS.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        snapshot_path = os.path.join(snapshot_dir or DEFAULT_SNAPSHOT_DIR, f"{key}.pkl")
+        if SNAPSHOT_ENABLED:
+            snapshot = _load_snapshot_file(snapshot_path, key)
+            if snapshot is not None:
+                logging.info(f"Config snapshot geladen: {snapshot_path}")
+                # Registry objecten vervangen door de (inhoudelijk gelijke) snapshot objecten
+                _JSON_BY_HASH[validation_hash] = snapshot.raw
+                _JSON_REGISTRY[os.path.abspath(validation_json_path)] = (
+                    *_JSON_REGISTRY[os.path.abspath(validation_json_path)][:3], snapshot.raw)
+                if reference_hash:
+                    _JSON_BY_HASH[reference_hash] = snapshot.reference_lists
+                    _JSON_REGISTRY[os.path.abspath(reference_json_path)] = (
+                        *_JSON_REGISTRY[os.path.abspath(reference_json_path)][:3], snapshot.reference_lists)
+
+        if snapshot is None:
+            snapshot = _build_validation_snapshot(key, raw, reference_lists)
+            if SNAPSHOT_ENABLED:
+                _write_snapshot_file(snapshot_path, snapshot)
+
+        if snapshot.plan is not None:
+            from .validation_plan import register_validation_plan
+            register_validation_plan(snapshot.plan, snapshot.raw, snapshot.reference_lists)
+        if len(_SNAPSHOTS) >= _SNAPSHOTS_MAX:
+            _SNAPSHOTS.pop(next(iter(_SNAPSHOTS)))
+        _SNAPSHOTS[key] = snapshot
+        return snapshot
 
 
 def load_field_mapping() -> Optional[Dict[str, Any]]:
@@ -19,17 +282,13 @@ def load_field_mapping() -> Optional[Dict[str, Any]]:
     """
     try:
         # Zoek field_validation_v20.json in project directory
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        mapping_path = os.path.join(base_dir, "field_validation_v20.json")
+        mapping_path = DEFAULT_VALIDATION_CONFIG_PATH
         
         if not os.path.exists(mapping_path):
             logging.error(f"Field mapping bestand niet gevonden: {mapping_path}")
             return None
         
-        with open(mapping_path, 'r', encoding='utf-8') as file:
-            config = json.load(file)
-            logging.info(f"Field mapping geladen uit: {mapping_path}")
-            return config
+        return load_json_config(mapping_path)
             
     except Exception as e:
         logging.error(f"Fout bij laden field mapping: {e}")
@@ -45,21 +304,19 @@ def load_institution_codes() -> Dict[str, str]:
     """
     try:
         # Zoek institution_codes.json in Template Generator Files directory
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        codes_path = os.path.join(base_dir, "Template Generator Files", "institution_codes.json")
+        codes_path = os.path.join(TEMPLATE_GENERATOR_FILES_DIR, "institution_codes.json")
         
         if os.path.exists(codes_path):
-            with open(codes_path, 'r', encoding='utf-8') as file:
-                config = json.load(file)
-                institution_mapping = config.get('institution_mapping', {})
-                
-                # Converteer naar simple code -> name mapping
-                simple_mapping = {}
-                for code, info in institution_mapping.items():
-                    simple_mapping[code] = info.get('name', code)
-                
-                logging.info(f"Institution codes geladen uit config: {len(simple_mapping)} instellingen")
-                return simple_mapping
+            config = load_json_config(codes_path)
+            institution_mapping = config.get('institution_mapping', {})
+            
+            # Converteer naar simple code -> name mapping
+            simple_mapping = {}
+            for code, info in institution_mapping.items():
+                simple_mapping[code] = info.get('name', code)
+            
+            logging.debug(f"Institution codes geladen uit config: {len(simple_mapping)} instellingen")
+            return simple_mapping
         else:
             logging.warning(f"Institution codes config niet gevonden: {codes_path}")
             return get_fallback_institution_codes()
@@ -0,0 +1,483 @@
+"""
+Incremental Validation Module
+
+Leveranciers sturen vaak een nieuwe versie van dezelfde prijslijst waarin maar een klein
+deel van de rijen gewijzigd is. Een volledige validatie controleert dan opnieuw
+honderdduizenden rijen die al eerder gecontroleerd zijn.
+
+Deze module bewaart na elke run een run state: per rij een hash van de gemapte en
+opgeschoonde rijwaarden plus de bijdrage van die rij aan de validatie (foutmeldingen,
+gevulde velden, per-rij Red Flags, UOM relatie meldingen). Bij de volgende run gaan
+alleen nieuwe of gewijzigde rijen door de vectorized engine; voor ongewijzigde rijen
+(ook als ze verschoven zijn) komt de bijdrage uit de state, met het nieuwe rijnummer.
+
+Cross-row checks gebruiken een index waarde -> rijen. Voor duplicate URLs met
+wisselende chemische gegevens wordt de beslissing per URL groep bewaard onder een
+signature van de groep (URL, aantal rijen, som van de rij hashes) en alleen voor
+gewijzigde groepen opnieuw berekend.
+
+De afronding (summary stats, Red Flags, errors_per_field) loopt via
+finalize_validation_state, zodat het rapport identiek is aan een volledige run.
+Een state is alleen bruikbaar bij dezelfde config, reference lists, kolom mapping,
+kolommen en template context, en (bij datum-relatieve regels zoals is_in_the_past) op
+dezelfde dag; anders wordt alles opnieuw gevalideerd. Alleen de
+vectorized engine met een native v20 config wordt ondersteund.
+
+Omgevingsvariabelen:
+- GHX_INCREMENTAL_DIR: directory voor run states (default <tempdir>/ghx_incremental-<uid>).
+  States zijn pickles en worden alleen gelezen uit een map van de huidige gebruiker die
+  anderen niet kunnen beschrijven (zie utils.ensure_private_dir)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .price_tool import (
+    CROSS_ROW_CHECKS,
+    DATE_RELATIVE_CONDITIONS,
+    check_duplicate_urls_with_varying_chemicals,
+    finalize_validation_state,
+    perform_cross_row_validations,
+    prepare_validation_state,
+    validation_today,
+)
+from .utils import ensure_private_dir, private_temp_dir
+from .validation_plan import get_validation_plan
+from .vectorized_engine import (
+    RIJ_OFFSET,
+    append_row_red_flags,
+    append_uom_red_flags,
+    uom_already_validated,
+    validate_rows_vectorized,
+    validate_uom_relationships_vectorized,
+)
+
+STATE_FORMAT_VERSION = 1
+DEFAULT_STATE_DIR = os.environ.get("GHX_INCREMENTAL_DIR") or private_temp_dir("ghx_incremental")
+
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)
+
+
+def default_state_path(name: str, state_dir: Optional[str] = None) -> str:
+    """Pad van de run state voor een prijslijst (op bestandsnaam, zodat een nieuwe versie hem terugvindt)."""
+    safe_name = re.sub(r'[^\w.-]+', '_', os.path.basename(str(name))) or "prijslijst"
+    return os.path.join(state_dir or DEFAULT_STATE_DIR, f"{safe_name}.state")
+
+
+def load_run_state(path: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Laadt een eerder opgeslagen run state; None als die ontbreekt of onleesbaar is."""
+    if not path or not os.path.exists(path):
+        return None
+    if not ensure_private_dir(os.path.dirname(os.path.abspath(path))):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if not isinstance(state, dict) or state.get('format') != STATE_FORMAT_VERSION:
+            logging.info(f"Incrementele validatie: state {path} heeft een ander formaat, wordt genegeerd")
+            return None
+        return state
+    except Exception as e:
+        logging.warning(f"Incrementele validatie: state {path} niet leesbaar: {e}")
+        return None
+
+
+def save_run_state(path: str, state: Dict[str, Any]) -> bool:
+    """Schrijft de run state atomair weg (eerst naar een tijdelijk bestand)."""
+    try:
+        directory = os.path.dirname(path) or "."
+        if not ensure_private_dir(directory):
+            return False
+        fd, temp_path = tempfile.mkstemp(prefix=".state-", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return True
+    except Exception as e:
+        logging.warning(f"Incrementele validatie: state niet opgeslagen in {path}: {e}")
+        return False
+
+
+# -----------------------------
+# RIJ HASHES EN SIGNATURE
+# -----------------------------
+
+def _text_hash(text: str) -> np.uint64:
+    return np.uint64(int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:16], 16))
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    64-bit hash per rij over alle kolommen.
+
+    Per kolom wordt pd.util.hash_pandas_object gebruikt, gemengd met de kolomnaam en
+    dtype: wijzigt een kolom van dtype (bv. int naar float door een lege cel) dan ziet
+    de validatie andere waarden ('1' wordt '1.0') en tellen alle rijen als gewijzigd.
+    Voor object kolommen tellen ook leeg (NaN vs de tekst 'nan') en het Python type
+    (1 vs '1') mee.
+    """
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        column_hash = pd.util.hash_pandas_object(series, index=False).to_numpy()
+        if series.dtype == object:
+            null = series.isna().to_numpy()
+            column_hash = column_hash ^ null.astype(np.uint64)
+            if pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+                # Alleen niet-tekst waarden krijgen een type hash, zodat een rij dezelfde
+                # hash houdt ongeacht welke andere waarden in de kolom (of chunk) staan
+                type_names = series.map(lambda value: '' if isinstance(value, str) else type(value).__name__)
+                plain = null | (type_names == '').to_numpy()
+                type_hash = pd.util.hash_pandas_object(type_names, index=False).to_numpy() * _HASH_MULTIPLIER
+                column_hash = column_hash ^ np.where(plain, np.uint64(0), type_hash)
+        hashes = hashes * _HASH_MULTIPLIER + (column_hash ^ _text_hash(f"{column!r}|{series.dtype}"))
+    return hashes
+
+
+def uses_reference_date(validation_config: dict) -> bool:
+    """True als een veldregel met de datum van vandaag vergelijkt (DATE_RELATIVE_CONDITIONS)."""
+    return any(
+        rule.get("condition") in DATE_RELATIVE_CONDITIONS
+        for field in validation_config.get("field_validations", {}).values()
+        for rule in field.get("rules", [])
+    )
+
+
+def run_signature(plan: Dict[str, Any], original_column_mapping: dict,
+                  template_context: Optional[Dict[str, Any]], columns: List[Any],
+                  reference_date: Optional[str] = None) -> str:
+    """
+    Signature van alles naast de rijwaarden dat de validatie per rij bepaalt.
+
+    reference_date (de datum van vandaag) hoort erbij als de config datum-relatieve regels
+    heeft: een rij die gisteren nog geldig was, kan vandaag verlopen zijn.
+    """
+    context = {k: v for k, v in (template_context or {}).items() if k != 'removed_rows_count'}
+    payload = json.dumps(
+        [STATE_FORMAT_VERSION, pd.__version__, plan.get('signature'),
+         sorted((str(k), str(v)) for k, v in original_column_mapping.items()),
+         context, [repr(c) for c in columns], reference_date],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _record(item: dict) -> Tuple[tuple, tuple]:
+    """Compacte opslag van een result dict (sleutelvolgorde blijft behouden)."""
+    return tuple(item.keys()), tuple(item.values())
+
+
+def _from_record(record: Tuple[tuple, tuple], excel_row_num: int) -> dict:
+    item = dict(zip(*record))
+    item["Rij"] = excel_row_num
+    return item
+
+
+# -----------------------------
+# INCREMENTELE RUN
+# -----------------------------
+
+class IncrementalRun:
+    """
+    Validatie van één prijslijst met hergebruik van de run state van een vorige versie.
+
+    validate_rows mag per chunk aangeroepen worden (streaming) zolang de index van de
+    chunks doorloopt; finish rondt af en to_state levert de state voor de volgende run.
+    """
+
+    def __init__(self, validation_config: dict, template_context: Optional[Dict[str, Any]] = None,
+                 reference_lists: Optional[dict] = None, previous_state: Optional[Dict[str, Any]] = None,
+                 plan: Optional[Dict[str, Any]] = None):
+        self.validation_config = validation_config
+        self.template_context = template_context
+        self.reference_lists = reference_lists
+        self.plan = plan or get_validation_plan(validation_config, reference_lists)
+        self.red_flags = validation_config.get("global_validations", [])
+        self.previous_state = previous_state
+        self.previous = None  # bruikbare vorige state, bepaald bij de eerste rijen
+        self.signature = None
+        self.original_column_mapping = {}
+        self.filled_fields = None
+        self.reused_rows = 0
+        self.validated_rows = 0
+        self._row_count = 0
+        self._hashes, self._filled, self._flags, self._uom_mismatch = [], [], [], []
+        self._row_results, self._uom_results = {}, {}
+        self._groups = {}
+        self._previous_keys = None
+        self._previous_first = None
+        self._previous_has = {}
+
+    def _start(self, original_column_mapping: dict, columns: List[Any]) -> None:
+        self.original_column_mapping = original_column_mapping
+        reference_date = str(validation_today()) if uses_reference_date(self.validation_config) else None
+        self.signature = run_signature(self.plan, original_column_mapping, self.template_context, columns,
+                                       reference_date)
+        previous = self.previous_state
+        if previous is None:
+            return
+        if previous.get('signature') != self.signature:
+            logging.info("Incrementele validatie: config, mapping, kolommen of datum gewijzigd, alle rijen worden gevalideerd")
+            return
+        self.previous = previous
+        self.filled_fields = list(previous['filled_fields'])
+        self._previous_keys, self._previous_first = np.unique(previous['hashes'], return_index=True)
+        for kind in ('row_results', 'uom_results'):
+            has_results = np.zeros(len(previous['hashes']), dtype=bool)
+            has_results[list(previous[kind])] = True
+            self._previous_has[kind] = has_results
+
+    def _lookup(self, hashes: np.ndarray) -> np.ndarray:
+        """Positie van elke rij hash in de vorige run, -1 voor nieuwe of gewijzigde rijen."""
+        if self.previous is None or len(self._previous_keys) == 0:
+            return np.full(len(hashes), -1, dtype=np.int64)
+        idx = np.minimum(np.searchsorted(self._previous_keys, hashes), len(self._previous_keys) - 1)
+        found = self._previous_keys[idx] == hashes
+        return np.where(found, self._previous_first[idx], -1)
+
+    def validate_rows(self, df: pd.DataFrame, original_column_mapping: dict,
+                      state: Dict[str, Any]) -> Tuple[list, list]:
+        """
+        Valideert nieuwe en gewijzigde rijen en neemt de rest over uit de vorige run.
+
+        Werkt de state bij zoals validate_rows_vectorized (filled_counts,
+        field_validation_results, red_flag_messages_list).
+
+        Returns:
+            (rij resultaten, UOM relatie resultaten) in de volgorde van de volledige run
+        """
+        if self.signature is None:
+            self._start(original_column_mapping, list(df.columns))
+        n_rows = len(df)
+        if n_rows == 0:
+            return [], []
+
+        hashes = row_hashes(df)
+        previous_positions = self._lookup(hashes)
+        changed = previous_positions < 0
+        reused = ~changed
+
+        details = {}
+        new_row_results, new_uom_results = {}, {}
+        if changed.any():
+            subset = df[changed]
+            scratch_state = prepare_validation_state(subset, self.validation_config, self.template_context)
+            for item in validate_rows_vectorized(subset, self.validation_config, original_column_mapping,
+                                                 scratch_state, self.reference_lists, self.plan, row_details=details):
+                new_row_results.setdefault(item["Rij"], []).append(item)
+            for item in validate_uom_relationships_vectorized(subset, [], self.validation_config,
+                                                              original_column_mapping, row_details=details):
+                if item.get("GHX Kolom") != "RED FLAG":
+                    new_uom_results.setdefault(item["Rij"], []).append(item)
+            if self.filled_fields is None:
+                self.filled_fields = list(details.get('filled', {}))
+
+        # Per-rij bijdragen: overgenomen uit de vorige run of net berekend
+        filled = np.zeros((n_rows, len(self.filled_fields)), dtype=bool)
+        flags = np.zeros((n_rows, len(self.red_flags)), dtype=bool)
+        uom_mismatch = np.zeros(n_rows, dtype=bool)
+        if reused.any():
+            source = previous_positions[reused]
+            filled[reused] = self.previous['filled'][source]
+            flags[reused] = self.previous['red_flags'][source]
+            uom_mismatch[reused] = self.previous['uom_description_mismatch'][source]
+        if changed.any():
+            for column, field in enumerate(self.filled_fields):
+                filled[changed, column] = details['filled'][field]
+            for flag_order, mask in details.get('red_flags', {}).items():
+                flags[changed, flag_order] = mask
+            if 'uom_description_mismatch' in details:
+                uom_mismatch[changed] = details['uom_description_mismatch']
+
+        filled_counts = state['filled_counts']
+        for field, count in zip(self.filled_fields, filled.sum(axis=0).tolist()):
+            filled_counts[field] = filled_counts.get(field, 0) + count
+
+        triggered_flags = []
+        for flag_order, flag in enumerate(self.red_flags):
+            positions = np.flatnonzero(flags[:, flag_order])
+            if len(positions):
+                triggered_flags.append((int(positions[0]), flag_order, flag))
+        append_row_red_flags(state['red_flag_messages_list'], triggered_flags)
+
+        # Resultaten in rij-volgorde, met het rijnummer van deze versie
+        excel_rows = df.index.to_numpy() + RIJ_OFFSET
+        row_results = self._collect_results(new_row_results, 'row_results', self._row_results,
+                                            excel_rows, changed, previous_positions)
+        uom_results = self._collect_results(new_uom_results, 'uom_results', self._uom_results,
+                                            excel_rows, changed, previous_positions)
+        field_validation_results = state['field_validation_results']
+        for item in row_results:
+            field_validation_results[item["GHX Kolom"]].append(item)
+
+        self._hashes.append(hashes)
+        self._filled.append(filled)
+        self._flags.append(flags)
+        self._uom_mismatch.append(uom_mismatch)
+        self._row_count += n_rows
+        self.reused_rows += int(reused.sum())
+        self.validated_rows += int(changed.sum())
+        return row_results, uom_results
+
+    def _collect_results(self, new_results: Dict[int, list], kind: str, stored: Dict[int, list],
+                         excel_rows: np.ndarray, changed: np.ndarray, previous_positions: np.ndarray) -> list:
+        """Combineert nieuwe en overgenomen resultaten van één soort en bewaart ze voor de volgende run."""
+        has_results = np.isin(excel_rows, list(new_results)) & changed
+        previous_results = self.previous[kind] if self.previous else {}
+        if previous_results:
+            has_results |= ~changed & self._previous_has[kind][previous_positions]
+
+        results = []
+        for position in np.flatnonzero(has_results).tolist():
+            excel_row_num = int(excel_rows[position])
+            if changed[position]:
+                items = new_results[excel_row_num]
+                stored[self._row_count + position] = [_record(item) for item in items]
+            else:
+                records = previous_results[int(previous_positions[position])]
+                items = [_from_record(record, excel_row_num) for record in records]
+                stored[self._row_count + position] = records
+            results.extend(items)
+        return results
+
+    def finish(self, df: pd.DataFrame, results: list, original_column_mapping: dict,
+               state: Dict[str, Any]) -> Tuple[list, dict, list, dict]:
+        """
+        Voegt de UOM Red Flags toe en rondt af via finalize_validation_state met de
+        geïndexeerde cross-row checks.
+
+        Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+        """
+        if self.signature is None:
+            self._start(original_column_mapping, list(df.columns))
+        description_mismatch = any(mismatch.any() for mismatch in self._uom_mismatch)
+        results = append_uom_red_flags(results, self.validation_config, bool(self._uom_results), description_mismatch)
+        output = finalize_validation_state(
+            df, results, self.validation_config, self.original_column_mapping, state,
+            uom_validator=uom_already_validated, cross_row_validator=self.cross_row_validations
+        )
+        logging.info(f"Incrementele validatie: {self.reused_rows} rijen hergebruikt, "
+                     f"{self.validated_rows} nieuwe of gewijzigde rijen gevalideerd")
+        return output
+
+    def cross_row_validations(self, df: pd.DataFrame, validation_config: dict, original_column_mapping: dict) -> list:
+        """perform_cross_row_validations met de groep beslissingen uit de vorige run."""
+        checks = dict(CROSS_ROW_CHECKS)
+        checks["duplicate_url_with_varying_chemicals"] = self._check_duplicate_urls_with_varying_chemicals
+        return perform_cross_row_validations(df, validation_config, original_column_mapping, checks=checks)
+
+    def _check_duplicate_urls_with_varying_chemicals(self, df: pd.DataFrame, url_field: str, rule: dict,
+                                                     original_column_mapping: dict) -> list:
+        """
+        Geïndexeerde variant van check_duplicate_urls_with_varying_chemicals.
+
+        Groepen met dezelfde signature als in de vorige run nemen de beslissing over;
+        alleen gewijzigde groepen gaan (samen) door de originele check.
+        """
+        hashes = np.concatenate(self._hashes) if self._hashes else np.zeros(0, dtype=np.uint64)
+        if len(hashes) != len(df):
+            logging.warning("Incrementele validatie: rij hashes passen niet bij het DataFrame, volledige cross-row check")
+            return check_duplicate_urls_with_varying_chemicals(df, url_field, rule, original_column_mapping)
+
+        # Zelfde default als check_duplicate_urls_with_varying_chemicals
+        threshold = rule.get("params", {}).get("threshold", 5)
+        urls = df[url_field]
+        has_url = (urls.notna() & (urls.astype(str).str.strip() != "")).to_numpy()
+        if not has_url.any():
+            return []
+        url_rows = np.flatnonzero(has_url)
+        previous_groups = self.previous.get('cross_row_groups', {}) if self.previous else {}
+
+        # Index URL -> rij posities, in dezelfde (gesorteerde) volgorde als groupby
+        groups, recompute = [], []
+        for url, group_positions in df.iloc[url_rows].groupby(url_field).indices.items():
+            if len(group_positions) < threshold:
+                continue
+            rows = url_rows[group_positions]
+            signature = (url_field, str(url), len(rows), int(hashes[rows].sum()))
+            groups.append((signature, rows))
+            if signature not in previous_groups:
+                recompute.append(rows)
+
+        computed = {}
+        if recompute:
+            subset = df.iloc[np.sort(np.concatenate(recompute))]
+            for item in check_duplicate_urls_with_varying_chemicals(subset, url_field, rule, original_column_mapping):
+                computed[item["Rij"]] = item
+
+        results = []
+        index_labels = df.index.to_numpy()
+        for signature, rows in groups:
+            excel_rows = (index_labels[rows] + RIJ_OFFSET).tolist()
+            if signature in previous_groups:
+                record = previous_groups[signature]
+                if record is not None:
+                    results.extend(_from_record(record, excel_row_num) for excel_row_num in excel_rows)
+                self._groups[signature] = record
+            else:
+                items = [computed[excel_row_num] for excel_row_num in excel_rows if excel_row_num in computed]
+                results.extend(items)
+                self._groups[signature] = _record(items[0]) if items else None
+        return results
+
+    def to_state(self) -> Dict[str, Any]:
+        """State voor de volgende run (zie load_run_state / save_run_state)."""
+        filled_fields = self.filled_fields or []
+        return {
+            'format': STATE_FORMAT_VERSION,
+            'signature': self.signature,
+            'created': time.time(),
+            'hashes': np.concatenate(self._hashes) if self._hashes else np.zeros(0, dtype=np.uint64),
+            'filled_fields': filled_fields,
+            'filled': np.concatenate(self._filled) if self._filled else np.zeros((0, len(filled_fields)), dtype=bool),
+            'red_flags': np.concatenate(self._flags) if self._flags else np.zeros((0, len(self.red_flags)), dtype=bool),
+            'uom_description_mismatch': np.concatenate(self._uom_mismatch) if self._uom_mismatch else np.zeros(0, dtype=bool),
+            'row_results': self._row_results,
+            'uom_results': self._uom_results,
+            'cross_row_groups': self._groups,
+        }
+
+
+def open_incremental_run(state_path: Optional[str], validation_config: dict,
+                         template_context: Optional[Dict[str, Any]] = None,
+                         reference_lists: Optional[dict] = None) -> Optional[IncrementalRun]:
+    """
+    Maakt een IncrementalRun met de state uit state_path (als die bestaat).
+
+    Returns None als de config geen native v20 config is; dan is alleen een
+    volledige validatie mogelijk.
+    """
+    if "field_validations" not in validation_config:
+        logging.info("Incrementele validatie alleen beschikbaar voor native v20 configuraties")
+        return None
+    previous_state = load_run_state(state_path)
+    if previous_state is not None:
+        logging.info(f"Incrementele validatie: vorige run state geladen uit {state_path} "
+                     f"({len(previous_state.get('hashes', []))} rijen)")
+    return IncrementalRun(validation_config, template_context, reference_lists, previous_state)
+
+
+def validate_dataframe_incremental(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict,
+                                   template_context: Optional[Dict[str, Any]], run: IncrementalRun) -> Tuple[list, dict, list, dict]:
+    """
+    Tegenhanger van validate_dataframe_vectorized die alleen gewijzigde rijen valideert.
+
+    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+    """
+    state = prepare_validation_state(df, validation_config, template_context)
+    row_results, uom_results = run.validate_rows(df, original_column_mapping, state)
+    return run.finish(df, row_results + uom_results, original_column_mapping, state)
@@ -5,17 +5,19 @@ Deze module bepaalt welke velden mandatory zijn voor verschillende template type
 """
 
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Union
 
+from .workbook_probe import WorkbookProbe, open_probe
 
-def determine_mandatory_fields_for_template(excel_path: str) -> List[str]:
+
+def determine_mandatory_fields_for_template(excel_path: Union[str, WorkbookProbe]) -> List[str]:
     """
     Hoofd entry point voor het bepalen van mandatory fields.
     
     Gebruikt de TG → N → O beslissingsboom om de juiste mandatory fields te bepalen.
     
     Args:
-        excel_path: Pad naar Excel template
+        excel_path: Pad naar Excel template of een al geopende WorkbookProbe
         
     Returns:
         Lijst van mandatory field names
@@ -33,7 +35,8 @@ def determine_mandatory_fields_for_template(excel_path: str) -> List[str]:
             logging.warning(f"🔍 DEBUG: Config fallback - returning {len(fallback_fields)} velden")
             return fallback_fields
         
-        # Bepaal template type via beslissingsboom
+        # Bepaal template type via beslissingsboom (één probe voor type en TG context)
+        excel_path = open_probe(excel_path)
         template_type = determine_template_type(excel_path)
         
         if template_type == "TG":
@@ -0,0 +1,192 @@
+"""
+Parallel Validation Module
+
+Ook na de vectorisatie blijven regels als uom_description_mismatch, mismatch_calculation
+en de woord/regex checks deels Python werk per unieke waarde. Deze module verdeelt het
+opgeschoonde DataFrame in shards van aaneengesloten rijen en valideert die in een
+ProcessPoolExecutor met de vectorized engine.
+
+Het gecompileerde validatieplan gaat één keer per worker proces mee (initializer), niet
+per taak. Op platforms met fork erft de worker ook het DataFrame en krijgt een taak
+alleen de rij grenzen mee; anders wordt per taak alleen de eigen shard gepickled.
+
+Shards worden in rij-volgorde samengevoegd: resultaten, filled_counts, per-rij Red Flags
+(op de eerste triggerende rij over alle shards) en UOM relatie meldingen. Cross-row en
+globale checks draaien daarna één keer in finalize_validation_state, zodat de uitvoer
+identiek is aan validate_dataframe_vectorized. Rij nummers (idx + 3) komen uit de index.
+
+Omgevingsvariabelen:
+- GHX_VALIDATION_WORKERS: aantal worker processen (default 1 = niet parallel)
+- GHX_VALIDATION_SHARD_ROWS: rijen per shard (default 20.000)
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .price_tool import prepare_validation_state, finalize_validation_state
+from .validation_plan import get_validation_plan
+from .validation_results import ValidationResults
+from .vectorized_engine import (
+    append_row_red_flags,
+    append_uom_red_flags,
+    uom_already_validated,
+    validate_dataframe_vectorized,
+    validate_rows_vectorized,
+    validate_uom_relationships_vectorized,
+)
+
+DEFAULT_WORKERS = int(os.environ.get("GHX_VALIDATION_WORKERS", "1"))
+DEFAULT_SHARD_ROWS = int(os.environ.get("GHX_VALIDATION_SHARD_ROWS", "20000"))
+
+# Gedeelde context per worker proces (gezet door _init_worker)
+_WORKER_CONTEXT: Dict[str, Any] = {}
+
+
+def resolve_workers(workers: Optional[int] = None) -> int:
+    """Aantal worker processen: expliciet, GHX_VALIDATION_WORKERS, of 0 voor alle cores."""
+    workers = DEFAULT_WORKERS if workers is None else workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _init_worker(context: Dict[str, Any]) -> None:
+    """Initializer: bewaart config, mapping, template context en plan één keer per proces."""
+    _WORKER_CONTEXT.clear()
+    _WORKER_CONTEXT.update(context)
+
+
+def _validate_shard(task: Tuple[int, int, Optional[pd.DataFrame]]) -> Dict[str, Any]:
+    """
+    Valideert één shard in een worker proces.
+
+    Returns:
+        Dict met results, uom_results (zonder Red Flags), filled_counts, triggered_flags
+        ((eerste rij positie in het hele DataFrame, index in global_validations)) en
+        uom_description_mismatch
+    """
+    start, stop, shard = task
+    context = _WORKER_CONTEXT
+    if shard is None:
+        shard = context['df'].iloc[start:stop]
+    validation_config = context['validation_config']
+    original_column_mapping = context['original_column_mapping']
+
+    state = prepare_validation_state(shard, validation_config, context['template_context'])
+    details = {}
+    results = validate_rows_vectorized(shard, validation_config, original_column_mapping, state,
+                                       context['reference_lists'], context['plan'], row_details=details)
+    uom_results = [
+        item for item in validate_uom_relationships_vectorized(shard, [], validation_config, original_column_mapping,
+                                                                row_details=details)
+        if item.get("GHX Kolom") != "RED FLAG"
+    ]
+
+    triggered_flags = []
+    for flag_order, mask in details.get('red_flags', {}).items():
+        positions = np.flatnonzero(mask)
+        if len(positions):
+            triggered_flags.append((start + int(positions[0]), flag_order))
+
+    return {
+        'results': results,
+        'uom_results': uom_results,
+        'filled_counts': state['filled_counts'],
+        'triggered_flags': triggered_flags,
+        'uom_description_mismatch': bool(np.any(details.get('uom_description_mismatch', False))),
+    }
+
+
+def _shard_bounds(n_rows: int, shard_rows: int) -> List[Tuple[int, int]]:
+    return [(start, min(start + shard_rows, n_rows)) for start in range(0, n_rows, shard_rows)]
+
+
+def validate_dataframe_parallel(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict,
+                                template_context: Dict[str, Any] = None,
+                                reference_lists: Optional[dict] = None,
+                                workers: Optional[int] = None,
+                                shard_rows: Optional[int] = None) -> Tuple[list, dict, list, dict]:
+    """
+    Valideert het DataFrame in row shards over meerdere processen.
+
+    Valt terug op validate_dataframe_vectorized bij één worker, één shard of als de
+    process pool niet gestart kan worden.
+
+    Args:
+        df: Opgeschoond DataFrame (index = rij positie, Rij = idx + 3)
+        validation_config: Native v20 validatie configuratie
+        original_column_mapping: Kolom mapping
+        template_context: Template Generator context (None voor default templates)
+        reference_lists: Geladen reference_lists.json
+        workers: Aantal processen (default GHX_VALIDATION_WORKERS; 0 = alle cores)
+        shard_rows: Rijen per shard (default GHX_VALIDATION_SHARD_ROWS)
+
+    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+    """
+    workers = resolve_workers(workers)
+    shard_rows = max(1, shard_rows or DEFAULT_SHARD_ROWS)
+    bounds = _shard_bounds(len(df), shard_rows)
+    plan = get_validation_plan(validation_config, reference_lists)
+    if workers <= 1 or len(bounds) <= 1:
+        return validate_dataframe_vectorized(df, validation_config, original_column_mapping,
+                                             template_context, reference_lists, plan)
+
+    context = {
+        'validation_config': validation_config,
+        'original_column_mapping': original_column_mapping,
+        'template_context': template_context,
+        'reference_lists': reference_lists,
+        'plan': plan,
+    }
+    # Met fork erft de worker het DataFrame; de taken bevatten dan alleen rij grenzen
+    inherit_df = multiprocessing.get_start_method(allow_none=True) in (None, 'fork')
+    if inherit_df:
+        context['df'] = df
+    tasks = [(start, stop, None if inherit_df else df.iloc[start:stop]) for start, stop in bounds]
+
+    start_time = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(bounds)),
+                                 initializer=_init_worker, initargs=(context,)) as executor:
+            shard_outputs = list(executor.map(_validate_shard, tasks))
+    except Exception as e:
+        logging.warning(f"Parallelle validatie mislukt ({e}), valideer in één proces")
+        return validate_dataframe_vectorized(df, validation_config, original_column_mapping,
+                                             template_context, reference_lists, plan)
+    logging.info(f"Parallelle validatie: {len(df)} rijen in {len(bounds)} shards over "
+                 f"{min(workers, len(bounds))} processen in {time.time() - start_time:.2f} sec")
+
+    # Samenvoegen in shard (= rij) volgorde
+    state = prepare_validation_state(df, validation_config, template_context)
+    filled_counts = state['filled_counts']
+    field_validation_results = state['field_validation_results']
+    results, uom_results = ValidationResults(), []
+    first_flag_rows = {}
+    description_mismatch = False
+    for output in shard_outputs:
+        for field, field_rows in output['results'].field_rows().items():
+            field_validation_results[field].append(field_rows)
+        results.extend(output['results'])
+        uom_results.extend(output['uom_results'])
+        for field, count in output['filled_counts'].items():
+            filled_counts[field] = filled_counts.get(field, 0) + count
+        for position, flag_order in output['triggered_flags']:
+            first_flag_rows.setdefault(flag_order, position)
+        description_mismatch = description_mismatch or output['uom_description_mismatch']
+
+    red_flags_config = validation_config.get("global_validations", [])
+    append_row_red_flags(state['red_flag_messages_list'],
+                         [(position, flag_order, red_flags_config[flag_order])
+                          for flag_order, position in first_flag_rows.items()])
+
+    results = append_uom_red_flags(results + uom_results, validation_config, bool(uom_results), description_mismatch)
+    return finalize_validation_state(
+        df, results, validation_config, original_column_mapping, state, uom_validator=uom_already_validated
+    )
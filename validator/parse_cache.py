@@ -0,0 +1,585 @@
+"""
+Parse Cache Module
+
+Leveranciers uploaden vaak hetzelfde bestand opnieuw (na een kleine correctie, of via
+de "Volledige Validatie" knop na Quick Mode). Het parsen van de XLSX is dan de duurste
+stap, terwijl de inhoud identiek is.
+
+Deze module bewaart het geparste werkblad (het resultaat van pd.read_excel met de dtype
+spec van validate_pricelist) als Parquet op schijf, samen met de probe metadata (A1/A2,
+ruwe header, sheet namen, defined names, aantal rijen). De sleutel is de SHA-256 van de
+upload bytes plus een config versie (dtype spec, cache formaat, pandas versie). Een
+herhaalde validatie krijgt een CachedWorkbookProbe en slaat het XLSX parsen volledig over.
+
+Structuur per entry: <cache_dir>/<sha256>-<config_versie>/ met meta.json en een of meer
+part-NNNNN.parquet bestanden (de streaming validatie schrijft één part per chunk).
+De cache wordt op totale grootte begrensd; de minst recent gebruikte entries gaan eruit.
+Een CachedWorkbookProbe houdt zolang hij open is een gedeelde lock op <entry>/.lease;
+entries waarvan een andere job de delen nog (lazy) leest, worden niet verwijderd.
+
+Omgevingsvariabelen:
+- GHX_PARSE_CACHE: "0" schakelt de cache uit
+- GHX_PARSE_CACHE_DIR: cache directory (default <tempdir>/ghx_parse_cache-<uid>). Entries
+  worden alleen gelezen uit en geschreven naar een map van de huidige gebruiker die anderen
+  niet kunnen beschrijven (zie utils.ensure_private_dir); de map wordt 0700 gezet
+- GHX_PARSE_CACHE_MAX_MB: maximale totale grootte (default 1024 MB)
+"""
+
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: zie _claim_entry
+    fcntl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow staat in requirements.txt
+    pa = None
+    pq = None
+
+from .utils import ensure_private_dir, private_temp_dir
+from .workbook_probe import WorkbookProbe, DataFrameProbe
+
+CACHE_FORMAT_VERSION = 1
+CACHE_ENABLED = os.environ.get("GHX_PARSE_CACHE", "1") != "0"
+DEFAULT_CACHE_DIR = os.environ.get("GHX_PARSE_CACHE_DIR") or private_temp_dir("ghx_parse_cache")
+DEFAULT_MAX_BYTES = int(float(os.environ.get("GHX_PARSE_CACHE_MAX_MB", "1024")) * 1024 * 1024)
+
+META_FILE = "meta.json"
+LEASE_FILE = ".lease"
+
+# Volgorde waarin gemengde object kolommen in getypeerde deelkolommen gesplitst worden
+_OBJECT_PARTS = ("str", "bool", "int", "float", "datetime", "time")
+
+
+def cache_available() -> bool:
+    """True als de cache aan staat en pyarrow beschikbaar is."""
+    return CACHE_ENABLED and pq is not None
+
+
+def _private_cache_dir(cache_dir: str) -> bool:
+    """
+    True als de cache map van de huidige gebruiker is. Een entry onder de SHA-256 van een
+    upload die een ander vooraf neerzet, zou anders gevalideerd worden in plaats van de upload.
+    """
+    if not ensure_private_dir(cache_dir):
+        return False
+    if hasattr(os, "getuid"):
+        try:
+            os.chmod(cache_dir, 0o700)  # Geparste leveranciersdata niet leesbaar voor anderen
+        except OSError as e:
+            logging.warning(f"Parse cache: kon {cache_dir} niet afschermen: {e}")
+            return False
+    return True
+
+
+def config_version(dtype: Optional[dict]) -> str:
+    """Versie van alles wat naast de bestandsinhoud het geparste resultaat bepaalt."""
+    payload = json.dumps(
+        [CACHE_FORMAT_VERSION, pd.__version__, sorted((str(k), str(v)) for k, v in (dtype or {}).items())],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def cache_key(probe: WorkbookProbe, dtype: Optional[dict]) -> str:
+    return f"{probe.sha256}-{config_version(dtype)}"
+
+
+# -----------------------------
+# FRAME (DE)CODERING
+# -----------------------------
+
+def _encode_name(name: Any) -> Any:
+    """Kolomnamen kunnen int/float zijn (kopteksten met getallen); bewaar het type."""
+    if isinstance(name, bool) or not isinstance(name, (int, float)):
+        return str(name)
+    return {"type": type(name).__name__, "value": name}
+
+
+def _decode_name(name: Any) -> Any:
+    if isinstance(name, dict):
+        return int(name["value"]) if name["type"] == "int" else float(name["value"])
+    return name
+
+
+def _value_part(value: Any) -> Optional[str]:
+    """Deelkolom voor één waarde uit een object kolom, None voor leeg."""
+    if value is None or (isinstance(value, float) and np.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, str):
+        return "str"
+    if isinstance(value, (bool, np.bool_)):
+        return "bool"
+    if isinstance(value, (int, np.integer)):
+        return "int"
+    if isinstance(value, (float, np.floating)):
+        return "float"
+    if isinstance(value, (dt.datetime, pd.Timestamp)):
+        return "datetime"
+    if isinstance(value, dt.time):
+        return "time"
+    return "str"
+
+
+def _encode_frame(df: pd.DataFrame):
+    """
+    Zet een ingelezen frame om naar een Parquet-geschikt frame plus een beschrijving.
+
+    Numerieke, bool en datetime kolommen gaan ongewijzigd mee. Object kolommen bevatten
+    bij Excel vaak gemengde types (bv. Artikelnummer als getal en als tekst); die worden
+    per type in deelkolommen gesplitst zodat de waarden exact terugkomen.
+    """
+    encoded = {}
+    specs = []
+    for position, column in enumerate(df.columns):
+        series = df.iloc[:, position]
+        key = f"c{position}"
+        if series.dtype != object:
+            encoded[key] = series.to_numpy()
+            specs.append({"key": key, "parts": None})
+            continue
+
+        values = series.to_numpy()
+        kinds = np.array([_value_part(v) for v in values], dtype=object)
+        parts = []
+        for part in _OBJECT_PARTS:
+            mask = kinds == part
+            if not mask.any():
+                continue
+            part_values = np.full(len(values), None, dtype=object)
+            if part == "str":
+                part_values[mask] = [str(v) for v in values[mask]]
+            else:
+                part_values[mask] = values[mask]
+            encoded[f"{key}|{part}"] = part_values
+            parts.append(part)
+        specs.append({"key": key, "parts": parts})
+    return pd.DataFrame(encoded, index=pd.RangeIndex(len(df))), specs
+
+
+def _decode_frame(table, specs: List[dict], columns: List[Any]) -> pd.DataFrame:
+    """Bouwt het originele frame terug uit een Parquet tabel (pyarrow.Table)."""
+    data = {}
+    for position, spec in enumerate(specs):
+        key = spec["key"]
+        if spec["parts"] is None:
+            data[position] = table.column(key).to_pandas()
+            continue
+        values = np.full(table.num_rows, np.nan, dtype=object)
+        for part in spec["parts"]:
+            # to_pylist geeft exacte Python waarden (ook ints in een kolom met nulls)
+            for i, value in enumerate(table.column(f"{key}|{part}").to_pylist()):
+                if value is None:
+                    continue
+                if part == "datetime" and isinstance(value, pd.Timestamp):
+                    value = value.to_pydatetime()
+                values[i] = value
+        data[position] = pd.Series(values, dtype=object)
+    frame = pd.DataFrame(data)
+    frame.columns = columns
+    return frame
+
+
+def _encode_dtype(dtype: Optional[dict]) -> Optional[list]:
+    if not dtype:
+        return None
+    return [[str(k), "str" if v is str else str(v)] for k, v in dtype.items()]
+
+
+def _decode_dtype(encoded: Optional[list]) -> Optional[dict]:
+    if not encoded:
+        return None
+    return {k: str if v == "str" else v for k, v in encoded}
+
+
+# -----------------------------
+# CACHE ENTRIES
+# -----------------------------
+
+def _probe_metadata(probe: WorkbookProbe) -> Dict[str, Any]:
+    """Metadata van het originele bestand die detectie nodig heeft zonder XLSX te parsen."""
+    raw_header = []
+    try:
+        raw = probe.head(1, header=None)
+        if len(raw):
+            raw_header = raw.iloc[0].tolist()
+    except Exception as e:
+        logging.debug(f"Parse cache: ruwe header niet beschikbaar: {e}")
+    return {
+        "a1": probe.a1,
+        "a2": probe.a2,
+        "raw_header": raw_header,
+        "sheet_names": probe.sheet_names,
+        "defined_names": probe.defined_names,
+        "row_count": probe.row_count,
+        "size_bytes": probe.size_bytes,
+        "source_name": os.path.basename(probe.path) if probe.path else None,
+    }
+
+
+class ParseCacheWriter:
+    """
+    Schrijft één cache entry, eventueel in delen (één part per streaming chunk).
+
+    De entry wordt in een tijdelijke directory opgebouwd en pas bij commit() met
+    meta.json erin op zijn plaats gezet, zodat een afgebroken run geen halve entry
+    achterlaat.
+    """
+
+    def __init__(self, probe: WorkbookProbe, dtype: Optional[dict], cache_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        self.key = cache_key(probe, dtype)
+        self._probe = probe
+        self._dtype = dtype
+        self._columns = None
+        self._parts: List[dict] = []
+        self._rows = 0
+        if not _private_cache_dir(self.cache_dir):
+            raise OSError(f"cache map {self.cache_dir} is niet privé")
+        self._work_dir = tempfile.mkdtemp(prefix=f".{self.key[:12]}-", dir=self.cache_dir)
+
+    def add_part(self, frame: pd.DataFrame) -> None:
+        """Voegt een deel van het geparste werkblad toe (in volgorde van de rijen)."""
+        if self._columns is None:
+            self._columns = [_encode_name(c) for c in frame.columns]
+        encoded, specs = _encode_frame(frame)
+        file_name = f"part-{len(self._parts):05d}.parquet"
+        pq.write_table(pa.Table.from_pandas(encoded, preserve_index=False),
+                       os.path.join(self._work_dir, file_name))
+        self._parts.append({"file": file_name, "rows": len(frame), "specs": specs})
+        self._rows += len(frame)
+
+    def commit(self) -> Optional[str]:
+        """Zet de entry definitief in de cache en ruimt daarna op tot max_bytes."""
+        try:
+            meta = {
+                "format": CACHE_FORMAT_VERSION,
+                "key": self.key,
+                "created": time.time(),
+                "rows": self._rows,
+                "columns": self._columns or [],
+                "dtype": _encode_dtype(self._dtype),
+                "parts": self._parts,
+                "probe": _probe_metadata(self._probe),
+            }
+            with open(os.path.join(self._work_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False, default=str)
+            entry_dir = os.path.join(self.cache_dir, self.key)
+            if os.path.exists(entry_dir) and not _remove_entry(entry_dir):
+                # Zelfde sleutel = zelfde inhoud; de entry die nog gelezen wordt blijft staan
+                logging.info(f"Parse cache: {self.key[:12]}... is in gebruik, bestaande entry behouden")
+                self.abort()
+                return entry_dir
+            os.replace(self._work_dir, entry_dir)
+            logging.info(f"Parse cache: {self._rows} rijen opgeslagen onder {self.key[:12]}...")
+            evict_lru(self.cache_dir, self.max_bytes)
+            return entry_dir
+        except Exception as e:
+            logging.warning(f"Parse cache: opslaan mislukt: {e}")
+            self.abort()
+            return None
+
+    def abort(self) -> None:
+        shutil.rmtree(self._work_dir, ignore_errors=True)
+
+
+def open_cache_writer(probe: WorkbookProbe, dtype: Optional[dict],
+                      cache_dir: Optional[str] = None) -> Optional[ParseCacheWriter]:
+    """Geeft een writer voor deze upload, of None als cachen niet kan (geen bytes / pyarrow)."""
+    if not cache_available() or isinstance(probe, DataFrameProbe) or not probe.sha256:
+        return None
+    try:
+        return ParseCacheWriter(probe, dtype, cache_dir)
+    except Exception as e:
+        logging.warning(f"Parse cache: writer niet beschikbaar: {e}")
+        return None
+
+
+def store_parsed_workbook(probe: WorkbookProbe, dtype: Optional[dict], df: pd.DataFrame,
+                          cache_dir: Optional[str] = None) -> Optional[str]:
+    """Slaat een volledig geparst werkblad (pd.read_excel resultaat) op in de cache."""
+    writer = open_cache_writer(probe, dtype, cache_dir)
+    if writer is None:
+        return None
+    try:
+        writer.add_part(df)
+    except Exception as e:
+        logging.warning(f"Parse cache: opslaan mislukt: {e}")
+        writer.abort()
+        return None
+    return writer.commit()
+
+
+class CachedWorkbookProbe(DataFrameProbe):
+    """
+    Probe op een cache entry: metadata direct uit meta.json, het frame pas bij de
+    eerste read. iter_parts() levert de opgeslagen delen los voor streaming validatie.
+    """
+
+    def __init__(self, entry_dir: str, meta: dict, path: Optional[str] = None, lease=None):
+        probe_meta = meta.get("probe", {})
+        self.path = path
+        self._lease = lease
+        self.size_bytes = probe_meta.get("size_bytes", 0)
+        self.entry_dir = entry_dir
+        # dtype spec waarmee de entry geparsed is
+        self.dtype = _decode_dtype(meta.get("dtype"))
+        self._meta = meta
+        self._frame = None
+        self._source_probe = None
+        self._frames: Dict[tuple, pd.DataFrame] = {}
+        self._stamp_cells = (probe_meta.get("a1"), probe_meta.get("a2"))
+        raw_header = probe_meta.get("raw_header") or None
+        self._header_row = raw_header if raw_header and len(raw_header) == len(meta.get("columns", [])) else None
+        self._row_count = probe_meta.get("row_count")
+        self._columns = [_decode_name(c) for c in meta.get("columns", [])]
+        logging.info(f"Parse cache hit: {meta.get('rows')} rijen voor {path or probe_meta.get('source_name')}")
+
+    def close(self) -> None:
+        """Geeft de frames en de lease op de entry vrij (daarna mag evict_lru hem opruimen)."""
+        super().close()
+        self._frame = None
+        if self._lease is not None:
+            self._lease.close()
+            self._lease = None
+
+    def __repr__(self) -> str:
+        return f"CachedWorkbookProbe({self.path or '<in-memory>'}, {self._meta.get('rows')} rijen)"
+
+    @property
+    def _df(self) -> pd.DataFrame:
+        if self._frame is None:
+            parts = list(self.iter_parts())
+            self._frame = pd.concat(parts, ignore_index=True) if len(parts) > 1 else (
+                parts[0] if parts else pd.DataFrame(columns=self._columns))
+            # De volledige read met de eigen dtype spec hoeft niet opnieuw geparsed te worden
+            dtype_key = tuple(sorted((str(k), str(v)) for k, v in self.dtype.items())) if self.dtype else None
+            self._frames[(None, 0, dtype_key)] = self._frame
+        return self._frame
+
+    @property
+    def sha256(self) -> Optional[str]:
+        return self._meta.get("key", "").split("-")[0] or None
+
+    @property
+    def sheet_names(self) -> List[str]:
+        return list(self._meta.get("probe", {}).get("sheet_names", []))
+
+    @property
+    def defined_names(self) -> List[str]:
+        return list(self._meta.get("probe", {}).get("defined_names", []))
+
+    def iter_parts(self) -> Iterator[pd.DataFrame]:
+        """Leest de opgeslagen delen één voor één (gelijk aan de read met de eigen dtype spec)."""
+        for part in self._meta.get("parts", []):
+            table = pq.read_table(os.path.join(self.entry_dir, part["file"]))
+            yield _decode_frame(table, part["specs"], self._columns)
+
+    def read(self, dtype: Optional[dict] = None, nrows: Optional[int] = None) -> pd.DataFrame:
+        self._df  # laadt en registreert de read met de eigen dtype spec
+        return super().read(dtype=dtype, nrows=nrows)
+
+    @property
+    def row_count(self) -> Optional[int]:
+        return self._row_count if self._row_count is not None else self._meta.get("rows")
+
+
+def _touch(entry_dir: str) -> None:
+    try:
+        now = time.time()
+        os.utime(entry_dir, (now, now))
+    except OSError:
+        pass
+
+
+def _acquire_lease(entry_dir: str):
+    """
+    Gedeelde lock op <entry>/.lease. Zolang het bestand open is, slaat evict_lru de entry
+    over; het OS geeft de lock ook vrij als het proces stopt.
+
+    Returns:
+        Open bestand (de lease), of None als de entry net verwijderd of vervangen wordt
+    """
+    lease_path = os.path.join(entry_dir, LEASE_FILE)
+    try:
+        lease = open(lease_path, 'a+b')
+    except OSError:
+        return None
+    if fcntl is not None:
+        try:
+            fcntl.flock(lease.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+            # Lock op een inmiddels verwijderd lease bestand telt niet
+            if os.fstat(lease.fileno()).st_ino != os.stat(lease_path).st_ino:
+                raise OSError("lease bestand vervangen")
+        except OSError:
+            lease.close()
+            return None
+    return lease
+
+
+def _claim_entry(entry_dir: str):
+    """
+    Exclusieve lock op de lease van een entry voor verwijderen.
+
+    Returns:
+        Open lease bestand (exclusief), True als er geen lock nodig/mogelijk is, of None
+        als de entry in gebruik is. Zonder fcntl (Windows) geldt een lease bestand dat niet
+        te verwijderen is als in gebruik, omdat een open bestand daar niet weg kan.
+    """
+    lease_path = os.path.join(entry_dir, LEASE_FILE)
+    if fcntl is None:
+        try:
+            os.remove(lease_path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return None
+        return True
+    try:
+        lease = open(lease_path, 'a+b')
+    except OSError:
+        return True
+    try:
+        fcntl.flock(lease.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lease.close()
+        return None
+    return lease
+
+
+def _remove_entry(entry_dir: str) -> bool:
+    """Verwijdert een entry als niemand hem leest. Returns False als hij in gebruik is."""
+    claim = _claim_entry(entry_dir)
+    if claim is None:
+        return False
+    try:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+    finally:
+        if claim is not True:
+            claim.close()
+    return True
+
+
+def _load_entry(entry_dir: str, path: Optional[str]) -> Optional[CachedWorkbookProbe]:
+    meta_path = os.path.join(entry_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return None
+    # Eerst de lease, dan meta.json: een entry die net verwijderd wordt is een cache miss
+    lease = _acquire_lease(entry_dir)
+    if lease is None:
+        return None
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get("format") != CACHE_FORMAT_VERSION:
+            lease.close()
+            return None
+        _touch(entry_dir)
+        return CachedWorkbookProbe(entry_dir, meta, path=path, lease=lease)
+    except Exception as e:
+        lease.close()
+        if not isinstance(e, FileNotFoundError):
+            logging.warning(f"Parse cache: entry {entry_dir} onleesbaar: {e}")
+        return None
+
+
+def load_cached_probe(probe: WorkbookProbe, dtype: Optional[dict],
+                      cache_dir: Optional[str] = None) -> Optional[CachedWorkbookProbe]:
+    """
+    Zoekt de cache entry voor deze upload en dtype spec.
+
+    Returns:
+        CachedWorkbookProbe (met het pad van de upload voor de output directory), of None
+    """
+    if isinstance(probe, CachedWorkbookProbe):
+        return probe
+    if not cache_available() or isinstance(probe, DataFrameProbe) or not probe.sha256:
+        return None
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    if not _private_cache_dir(cache_dir):
+        return None
+    return _load_entry(os.path.join(cache_dir, cache_key(probe, dtype)), probe.path)
+
+
+def find_cached_probe(probe: WorkbookProbe, cache_dir: Optional[str] = None) -> Optional[CachedWorkbookProbe]:
+    """
+    Zoekt een cache entry voor deze upload ongeacht de dtype spec (bv. voor de Quick Mode
+    probes in de app, die de validatie config niet kennen). De meest recente wint.
+    """
+    if isinstance(probe, CachedWorkbookProbe):
+        return probe
+    if not cache_available() or isinstance(probe, DataFrameProbe) or not probe.sha256:
+        return None
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    if not os.path.isdir(cache_dir) or not _private_cache_dir(cache_dir):
+        return None
+    candidates = [os.path.join(cache_dir, name) for name in os.listdir(cache_dir)
+                  if name.startswith(probe.sha256 + "-")]
+    for entry_dir in sorted(candidates, key=lambda d: os.path.getmtime(d), reverse=True):
+        cached = _load_entry(entry_dir, probe.path)
+        if cached is not None:
+            # read() met een andere dtype spec dan die van de entry parseert het frame opnieuw
+            return cached
+    return None
+
+
+def _entry_size(entry_dir: str) -> int:
+    total = 0
+    for root, _, files in os.walk(entry_dir):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict_lru(cache_dir: Optional[str] = None, max_bytes: Optional[int] = None) -> int:
+    """
+    Verwijdert de minst recent gebruikte entries tot de cache onder max_bytes zit.
+    Entries met een open CachedWorkbookProbe (lease) worden overgeslagen.
+
+    Returns:
+        Aantal verwijderde entries
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+    if not os.path.isdir(cache_dir) or not _private_cache_dir(cache_dir):
+        return 0
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        if name.startswith('.') or not os.path.isdir(entry_dir):
+            continue
+        entries.append((os.path.getmtime(entry_dir), _entry_size(entry_dir), entry_dir))
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    in_use = 0
+    for _, size, entry_dir in sorted(entries):
+        if total <= max_bytes:
+            break
+        if not _remove_entry(entry_dir):
+            in_use += 1
+            continue
+        total -= size
+        removed += 1
+    if removed or in_use:
+        logging.info(f"Parse cache: {removed} entries verwijderd (LRU), {in_use} in gebruik overgeslagen, "
+                     f"nog {total/1024/1024:.1f} MB")
+    return removed
@@ -2,20 +2,23 @@
 
 import os
 import json
+import numpy as np
 import pandas as pd
 import re
+import tempfile
 import time
 from datetime import datetime
-from typing import Dict, List, Tuple, Any, Optional, Union
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Any, Optional, Union, Callable, FrozenSet, NamedTuple
 import logging
 
 # Importeer de rapporteerfunctie (ervan uitgaande dat die in rapport_utils.py staat)
 try:
-    from .rapport_utils import genereer_rapport
+    from .rapport_utils import genereer_rapport, prepare_report_stats, resolve_report_profile
 except ImportError:
     # Fallback voor als het script direct wordt getest (minder relevant voor Streamlit run)
     try:
-        from rapport_utils import genereer_rapport
+        from rapport_utils import genereer_rapport, prepare_report_stats, resolve_report_profile
     except ImportError:
         logging.error("Kon genereer_rapport niet importeren. Zorg dat rapport_utils.py bestaat.")
         # Definieer een dummy functie om NameErrors te voorkomen als rapport_utils mist
@@ -24,30 +27,40 @@ except ImportError:
             print("FOUT: rapport_utils.py of genereer_rapport functie niet gevonden!")
             return None
 
+from .config_manager import DEFAULT_VALIDATION_CONFIG_PATH, TEMPLATE_GENERATOR_FILES_DIR, get_validation_snapshot, load_json_config
+from .workbook_probe import WorkbookProbe, DataFrameProbe, open_probe
+from .parse_cache import cache_available, load_cached_probe, open_cache_writer
+from .report_exports import resolve_output_formats, write_report_outputs
+from .validation_results import as_validation_results, count_unique_rows, select_field
+from .row_context import ROW_CONTEXT_KEY, evaluate_row_contexts, uses_row_context
+
 # -----------------------------
 # TEMPLATE-AWARE HELPER FUNCTIES
 # -----------------------------
 
-def determine_template_type(excel_path: str) -> str:
+def determine_template_type(excel_path: Union[str, WorkbookProbe]) -> str:
     """
     Bepaalt het type template: TG (Template Generator), DT (Default Template), of AT (Alternatieve Template).
     
+    Args:
+        excel_path: Pad naar Excel bestand of een al geopende WorkbookProbe
+    
     Returns:
         'TG' - Template Generator (met stamp metadata)
         'DT' - Default Template (standaard GHX zonder stamp) 
         'AT' - Alternatieve Template (afwijkende structuur)
     """
     try:
+        probe = open_probe(excel_path)
+
         # Check voor Template Generator stamp
-        if has_template_generator_stamp(excel_path):
+        if has_template_generator_stamp(probe):
             logging.info("Template type: TG (Template Generator) - stamp gedetecteerd")
             return "TG"
         
         # Check voor Default Template door kolom structuur te analyseren
-        import pandas as pd
         try:
-            df = pd.read_excel(excel_path, nrows=0)  # Alleen headers laden
-            columns = [str(col).strip().lower() for col in df.columns]
+            columns = [str(col).strip().lower() for col in probe.header]  # Alleen headers
             
             # GHX standaard velden die in DT template moeten aanwezig zijn
             required_dt_fields = [
@@ -75,7 +88,7 @@ def determine_template_type(excel_path: str) -> str:
         logging.error(f"Fout bij template type detectie: {e}")
         return "AT"  # Fallback
 
-def has_template_generator_stamp(excel_path: str) -> bool:
+def has_template_generator_stamp(excel_path: Union[str, WorkbookProbe]) -> bool:
     """
     NIEUWE IMPLEMENTATIE: Template Generator stamp detectie.
     
@@ -84,17 +97,10 @@ def has_template_generator_stamp(excel_path: str) -> bool:
     - A2: "Template versie:" + versie info
     """
     try:
-        import openpyxl
-        wb = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
-        
-        # Haal eerste sheet
-        sheet = wb.worksheets[0]
-        
-        # Lees A1 en A2
-        a1 = sheet["A1"].value
-        a2 = sheet["A2"].value
-        
-        wb.close()
+        # Lees A1 en A2 van het eerste werkblad
+        probe = open_probe(excel_path)
+        a1 = probe.a1
+        a2 = probe.a2
         
         # Template Generator check: beide cellen moeten de juiste tekst bevatten
         has_a1_stamp = (a1 and isinstance(a1, str) and "Deze code niet verwijderen:" in a1)
@@ -110,7 +116,7 @@ def has_template_generator_stamp(excel_path: str) -> bool:
         logging.error(f"Stamp detection error: {e}")
         return False
 
-def extract_dt_template_version(excel_path: str) -> Optional[Dict[str, str]]:
+def extract_dt_template_version(excel_path: Union[str, WorkbookProbe]) -> Optional[Dict[str, str]]:
     """
     Extraheert versie informatie uit DT (Default Template) A1 cel.
     
@@ -120,22 +126,14 @@ def extract_dt_template_version(excel_path: str) -> Optional[Dict[str, str]]:
     - A1 = andere inhoud → geen DT template
     
     Args:
-        excel_path: Pad naar DT Excel bestand
+        excel_path: Pad naar DT Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         Dict met versie informatie of None als geen DT template
     """
     try:
-        import openpyxl
-        wb = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
-        
-        # Haal eerste sheet
-        sheet = wb.worksheets[0]
-        
-        # Lees A1
-        a1 = sheet["A1"].value
-        
-        wb.close()
+        # Lees A1 van het eerste werkblad
+        a1 = open_probe(excel_path).a1
         
         if not a1 or not isinstance(a1, str):
             return None
@@ -165,7 +163,7 @@ def extract_dt_template_version(excel_path: str) -> Optional[Dict[str, str]]:
         logging.error(f"Fout bij DT versie detectie: {e}")
         return None
 
-def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, Any]]:
+def extract_template_generator_context(excel_path: Union[str, WorkbookProbe]) -> Optional[Dict[str, Any]]:
     """
     Extraheert Template Generator context uit A1 en A2 cellen.
     
@@ -176,20 +174,17 @@ def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, An
         Dictionary met template context of None bij fout
     """
     try:
-        import openpyxl
-        wb = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
+        probe = open_probe(excel_path)
         
-        if wb.worksheets:
-            first_sheet = wb.worksheets[0]
-            
+        if probe.sheet_names:
             # Parse A1 voor template code
-            cell_a1_value = first_sheet["A1"].value
+            cell_a1_value = probe.a1
             template_code = None
             if cell_a1_value and isinstance(cell_a1_value, str) and "Deze code niet verwijderen:" in cell_a1_value:
                 template_code = extract_template_code_from_a1(cell_a1_value)
             
             # Parse A2 voor versie info
-            cell_a2_value = first_sheet["A2"].value
+            cell_a2_value = probe.a2
             version_info = {}
             if cell_a2_value and isinstance(cell_a2_value, str) and "Template versie:" in cell_a2_value:
                 version_info = parse_version_line(cell_a2_value)
@@ -205,8 +200,7 @@ def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, An
                 if field_mapping:
                     # Laad Excel data voor depends_on evaluatie
                     try:
-                        import pandas as pd
-                        excel_data = pd.read_excel(excel_path, nrows=10)  # Sample eerste 10 rijen voor performance
+                        excel_data = probe.head(10)  # Sample eerste 10 rijen voor performance
                         field_results = apply_field_visibility(field_mapping, parsed_context, excel_data)
                         logging.info("Template Generator field visibility toegepast met Excel data")
                     except Exception as e:
@@ -242,11 +236,9 @@ def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, An
                     'field_mapping_applied': field_mapping is not None
                 }
                 
-                wb.close()
                 logging.info(f"Template Generator context gevonden: {template_code} ({version_info.get('version', 'unknown')})")
                 return tg_context
         
-        wb.close()
         logging.warning("Geen geldige Template Generator context gevonden")
         return None
         
@@ -378,18 +370,15 @@ def load_field_mapping() -> Optional[Dict[str, Any]]:
     """
     try:
         import os
-        import json
         
         # Path naar Template Generator Files
-        tg_files_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                     "Template Generator Files", "field_mapping.json")
+        tg_files_path = os.path.join(TEMPLATE_GENERATOR_FILES_DIR, "field_mapping.json")
         
         if not os.path.exists(tg_files_path):
             logging.error(f"Field mapping niet gevonden: {tg_files_path}")
             return None
             
-        with open(tg_files_path, 'r', encoding='utf-8') as f:
-            field_mapping = json.load(f)
+        field_mapping = load_json_config(tg_files_path)
             
         logging.info(f"Field mapping geladen: {len(field_mapping)} velden")
         return field_mapping
@@ -839,7 +828,7 @@ def get_context_mandatory_fields(template_config: Dict, context: Dict[str, Any])
     except Exception as e:
         logging.error(f"Fout bij bepalen context mandatory fields: {e}")
         # Fallback naar default
-        return template_config.get("default_template", {}).get("mandatory_fields", [])
+        return list(template_config.get("default_template", {}).get("mandatory_fields", []))
 
 def get_institution_mandatory_fields(institutions: List[str]) -> List[str]:
     """
@@ -855,10 +844,9 @@ def get_institution_mandatory_fields(institutions: List[str]) -> List[str]:
     
     try:
         # Laad institution rules uit field_validation_v20.json
-        validation_config_path = "field_validation_v20.json"
+        validation_config_path = DEFAULT_VALIDATION_CONFIG_PATH
         if os.path.exists(validation_config_path):
-            with open(validation_config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = load_json_config(validation_config_path)
             
             institution_rules = config.get("template_generator", {}).get("institution_mandatory_fields", {})
         else:
@@ -915,12 +903,11 @@ def get_collapsed_fields(template_context: Dict[str, Any]) -> List[str]:
         
         # Legacy logica voor oude TG templates of andere template types
         # Laad collapsed fields configuratie uit field_validation_v20.json
-        validation_config_path = "field_validation_v20.json"
+        validation_config_path = DEFAULT_VALIDATION_CONFIG_PATH
         collapsed_config = {}
         
         if os.path.exists(validation_config_path):
-            with open(validation_config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            config = load_json_config(validation_config_path)
             collapsed_config = config.get("template_generator", {}).get("collapsed_fields_by_context", {})
         
         # Check configuration section voor legacy TG templates
@@ -1037,13 +1024,14 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
         Dictionary met detectie resultaten voor debugging
     """
     try:
-        # Test template type detectie
-        template_type = determine_template_type(excel_path)
+        # Test template type detectie (één probe voor alle checks)
+        probe = open_probe(excel_path)
+        template_type = determine_template_type(probe)
         
         result = {
             'excel_path': excel_path,
             'template_type': template_type,
-            'has_stamp': has_template_generator_stamp(excel_path),
+            'has_stamp': has_template_generator_stamp(probe),
             'context': None,
             'mandatory_fields_count': 0,
             'visible_fields_count': 0,
@@ -1052,7 +1040,7 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
         
         # Test context extractie voor TG templates
         if template_type == 'TG':
-            context = extract_template_generator_context(excel_path)
+            context = extract_template_generator_context(probe)
             result['context'] = context
             
             if context:
@@ -1067,7 +1055,7 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
                 result['hidden_fields_count'] = decisions.get('hidden_fields', 0)
         
         # Test mandatory fields bepaling
-        mandatory_fields = determine_mandatory_fields_for_template(excel_path)
+        mandatory_fields = determine_mandatory_fields_for_template(probe)
         result['determined_mandatory_count'] = len(mandatory_fields)
         
         return result
@@ -1079,7 +1067,7 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
             'template_type': 'Error'
         }
 
-def determine_mandatory_fields_for_template(excel_path: str) -> List[str]:
+def determine_mandatory_fields_for_template(excel_path: Union[str, WorkbookProbe]) -> List[str]:
     """
     Bepaalt welke velden verplicht zijn voor de gegeven template.
     
@@ -1089,17 +1077,17 @@ def determine_mandatory_fields_for_template(excel_path: str) -> List[str]:
     - AT (Alternatieve Template): Gebruik aanwezige velden en fallback
     """
     try:
-        # Bepaal template type
+        # Bepaal template type (één probe voor type detectie en TG context)
+        excel_path = open_probe(excel_path)
         template_type = determine_template_type(excel_path)
         
         # Laad template configuratie uit field_validation_v20.json
-        validation_config_path = "field_validation_v20.json"
+        validation_config_path = DEFAULT_VALIDATION_CONFIG_PATH
         if not os.path.exists(validation_config_path):
             logging.warning(f"Validation config {validation_config_path} niet gevonden, gebruik fallback.")
             return get_fallback_mandatory_fields()
         
-        with open(validation_config_path, 'r', encoding='utf-8') as f:
-            template_config = json.load(f)
+        template_config = load_json_config(validation_config_path)
         
         if template_type == "TG":
             # Template Generator: gebruik TG metadata voor mandatory fields
@@ -1165,7 +1153,7 @@ def get_dt_mandatory_fields(template_config: Dict) -> List[str]:
         
         if mandatory_fields:
             logging.info(f"DT mandatory fields uit config: {len(mandatory_fields)} velden")
-            return mandatory_fields
+            return list(mandatory_fields)
         else:
             # Fallback naar hardcoded lijst
             return get_fallback_mandatory_fields()
@@ -1838,6 +1826,155 @@ def validate_uom_relationships(df: pd.DataFrame, validation_results: list, valid
     return validation_results
 
 
+# Datumnotaties die de datum regels (invalid_date_format, is_in_the_past, is_before_field)
+# accepteren, in deze volgorde geprobeerd. DD-MM-JJJJ is de notatie uit de template; de
+# ISO varianten zijn wat pandas/openpyxl van echte Excel datumcellen maakt.
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+# Compacte JJJJMMDD notatie (20250101, als Excel getal 20250101.0) uit ERP exports. Alleen
+# exact 8 cijfers: strptime accepteert bij %m/%d ook één cijfer ("202511" -> 1 jan 2025)
+COMPACT_DATE_FORMAT = "%Y%m%d"
+COMPACT_DATE_PATTERN = re.compile(r"(\d{8})(\.0+)?")
+# Excel serienummers (dagen sinds 30-12-1899) tellen alleen als datum tussen 1950 en 2099,
+# zodat gewone getallen zoals 1 of 250 geen geldige datum worden
+EXCEL_SERIAL_RANGE = (18264, 73050)
+EXCEL_SERIAL_PATTERN = re.compile(r"\d+(\.\d+)?")
+EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+# Regels die vergelijken met de datum van vandaag; hun uitkomst verandert zonder dat de rij
+# verandert (incrementele validatie neemt de datum daarom mee in de run signature)
+DATE_RELATIVE_CONDITIONS = frozenset({"is_in_the_past"})
+
+
+def validation_today() -> np.datetime64:
+    """Datum van vandaag (datetime64[D]) waarmee de datum-relatieve regels vergelijken."""
+    return np.datetime64(datetime.now().date(), "D")
+
+
+def parse_date_string(value_str: str) -> np.datetime64:
+    """
+    Strikte datum parse voor één gestripte celwaarde.
+
+    Probeert DATE_FORMATS, de compacte JJJJMMDD notatie en daarna een Excel serienummer.
+    Het resultaat is een datetime64[D] (tijd wordt genegeerd) zodat ook einddatums als
+    31-12-9999 geldig zijn; pd.to_datetime kan niet verder dan het jaar 2262.
+
+    Returns:
+        np.datetime64 (dag), of NaT als de waarde geen geldige datum is
+    """
+    for date_format in DATE_FORMATS:
+        try:
+            return np.datetime64(datetime.strptime(value_str, date_format).date(), "D")
+        except ValueError:
+            continue
+    compact = COMPACT_DATE_PATTERN.fullmatch(value_str)
+    if compact:
+        try:
+            return np.datetime64(datetime.strptime(compact.group(1), COMPACT_DATE_FORMAT).date(), "D")
+        except ValueError:
+            pass
+    if EXCEL_SERIAL_PATTERN.fullmatch(value_str):
+        serial = int(float(value_str))
+        if EXCEL_SERIAL_RANGE[0] <= serial <= EXCEL_SERIAL_RANGE[1]:
+            return EXCEL_EPOCH + np.timedelta64(serial, "D")
+    return np.datetime64("NaT", "D")
+
+
+def parse_date_strings(values: List[str]) -> np.ndarray:
+    """parse_date_string voor een lijst waarden (bv. de unieke waarden van een kolom)."""
+    return np.array([parse_date_string(v) for v in values], dtype="datetime64[D]")
+
+
+# Getal met duizendtallen scheiding ("1.234,56", "1,234.56", "1 234 567") als float() en
+# de komma-als-decimaal variant falen; het decimaalteken moet verschillen van de scheiding
+THOUSANDS_PATTERN = re.compile(
+    r"(?P<sign>[+-]?)(?P<integer>\d{1,3}(?P<sep>[.,' \u00a0])\d{3}(?:(?P=sep)\d{3})*)"
+    r"(?:(?P<decimal>[.,])(?P<fraction>\d+))?"
+)
+
+
+def parse_numeric_string(value_str: str) -> Optional[float]:
+    """
+    Numerieke parse voor één gestripte celwaarde, gedeeld door alle numerieke regels.
+
+    Volgorde: float(), daarna komma als decimaalteken ("12,5"), daarna een getal met
+    duizendtallen scheiding (THOUSANDS_PATTERN).
+
+    Returns:
+        De waarde als float, of None als de waarde niet numeriek is
+    """
+    try:
+        return float(value_str)
+    except (ValueError, TypeError):
+        pass
+    try:
+        return float(value_str.replace(',', '.'))
+    except (ValueError, TypeError, AttributeError):
+        pass
+    match = THOUSANDS_PATTERN.fullmatch(value_str) if isinstance(value_str, str) else None
+    if match and match.group("decimal") != match.group("sep"):
+        integer = re.sub(r"\D", "", match.group("integer"))
+        return float(f"{match.group('sign')}{integer}.{match.group('fraction') or '0'}")
+    return None
+
+
+def parse_numeric_strings(values: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    parse_numeric_string voor een lijst waarden (bv. de unieke waarden van een kolom).
+
+    Returns:
+        (valid, values): bool array en float64 array (NaN waar valid False is)
+    """
+    parsed = [parse_numeric_string(v) for v in values]
+    valid = np.fromiter((number is not None for number in parsed), dtype=bool, count=len(parsed))
+    numbers = np.fromiter((np.nan if number is None else number for number in parsed), dtype=float, count=len(parsed))
+    return valid, numbers
+
+
+# GS1 mod-10 gewichten voor de eerste 13 cijfers van een (links met nullen aangevulde) GTIN-14;
+# het controlecijfer is het 14e cijfer. Aanvullen met nullen verandert de som niet, dus
+# GTIN-8/12/13 (ook als Excel de voorloopnullen heeft weggehaald) gebruiken dezelfde gewichten
+GTIN_CHECK_WEIGHTS = np.array([3, 1] * 6 + [3], dtype=np.int32)
+GTIN_CHECK_LENGTHS = (8, 14)
+# Excel numerieke cellen komen als float64 binnen: 4022495755674 wordt "4022495755674.0"
+WHOLE_FLOAT_SUFFIX_PATTERN = r"^(\d+)\.0+$"
+
+
+def strip_whole_float_suffix(values: pd.Series) -> pd.Series:
+    """Haalt het ".0" achtervoegsel van gehele getallen af (float GTIN's uit Excel)."""
+    return values.str.replace(WHOLE_FLOAT_SUFFIX_PATTERN, r"\1", regex=True)
+
+
+def invalid_gtin_check_digits(values: List[str]) -> np.ndarray:
+    """
+    GTIN controlecijfer check (GS1 mod-10, gewichten 3/1) voor een hele lijst in één keer.
+
+    Alleen waarden van 8 t/m 14 ASCII cijfers worden gecontroleerd; andere waarden vallen
+    onder de lengte/numeriek regels en geven hier False. Gehele floats ("4022495755674.0")
+    tellen als de GTIN zonder ".0". De waarden worden aangevuld tot 14 tekens en als uint8
+    cijfermatrix (n x 14) met één matrix-vector product doorgerekend.
+
+    Returns:
+        bool array: True waar het controlecijfer niet klopt
+    """
+    strings = strip_whole_float_suffix(pd.Series(values, dtype=str)).to_numpy(dtype=str)
+    invalid = np.zeros(len(strings), dtype=bool)
+    if len(strings) == 0:
+        return invalid
+    lengths = np.char.str_len(strings)
+    candidate = (lengths >= GTIN_CHECK_LENGTHS[0]) & (lengths <= GTIN_CHECK_LENGTHS[1]) & np.char.isdigit(strings)
+    if not candidate.any():
+        return invalid
+
+    # '<U14' is UCS-4: één uint32 per teken, zonder kopie te lezen als code points
+    padded = np.char.zfill(strings[candidate], GTIN_CHECK_LENGTHS[1]).astype(f"<U{GTIN_CHECK_LENGTHS[1]}")
+    code_points = padded.view(np.uint32).reshape(-1, GTIN_CHECK_LENGTHS[1])
+    ascii_digits = (code_points <= ord("9")).all(axis=1)  # isdigit accepteert ook bv. Arabische cijfers
+    digits = (code_points - ord("0")).astype(np.uint8)
+
+    check_digits = (10 - (digits[:, :-1] @ GTIN_CHECK_WEIGHTS) % 10) % 10
+    invalid[np.flatnonzero(candidate)] = ascii_digits & (check_digits != digits[:, -1])
+    return invalid
+
+
 def validate_field_v20_native(field_name: str, value: Any, field_config: dict, invalid_values: list, row_data: dict = None, reference_lists: dict = None) -> list:
     """Native v20 validatie zonder conversie naar v18."""
     errors = []
@@ -1875,18 +2012,26 @@ def validate_field_v20_native(field_name: str, value: Any, field_config: dict, i
             should_trigger = is_empty_or_invalid
             
         elif condition == "is_not_numeric" and not is_empty_or_invalid:
-            # Check if value is numeric (support both . and , as decimal separator)
-            try:
-                # Try with original value first
-                float(value_str)
-                should_trigger = False
-            except (ValueError, TypeError):
-                try:
-                    # Try replacing comma with dot for Dutch/European format
-                    float(value_str.replace(',', '.'))
-                    should_trigger = False
-                except (ValueError, TypeError):
-                    should_trigger = True
+            # Punt of komma als decimaalteken, eventueel met duizendtallen scheiding
+            should_trigger = parse_numeric_string(value_str) is None
+
+        elif condition == "is_empty_or_not_numeric":
+            should_trigger = is_empty_or_invalid or parse_numeric_string(value_str) is None
+
+        elif condition == "is_not_integer" and not is_empty_or_invalid:
+            number = parse_numeric_string(value_str)
+            should_trigger = number is None or not float(number).is_integer()
+
+        elif condition in ("is_less_than_field", "is_less_than_or_equal_to_field") and not is_empty_or_invalid and row_data:
+            # Alleen als beide velden numeriek zijn; de 704 regels melden niet-numerieke waarden
+            if isinstance(params, list) and len(params) > 0:
+                number = parse_numeric_string(value_str)
+                other_number = parse_numeric_string(str(row_data.get(params[0])).strip())
+                if number is not None and other_number is not None:
+                    if condition == "is_less_than_field":
+                        should_trigger = number < other_number
+                    else:
+                        should_trigger = number <= other_number
                 
         elif condition == "value_not_in_list" and not is_empty_or_invalid:
             # Check for direct params list
@@ -1935,15 +2080,12 @@ def validate_field_v20_native(field_name: str, value: Any, field_config: dict, i
                 operator = params[1]     # "*"
                 field2_name = params[2]  # "Inhoud Basiseenheid"
                 
-                field1_value = row_data.get(field1_name)
-                field2_value = row_data.get(field2_name)
-                
+                current_value = parse_numeric_string(value_str)
+                val1 = parse_numeric_string(str(row_data.get(field1_name)).strip())
+                val2 = parse_numeric_string(str(row_data.get(field2_name)).strip())
+
                 try:
-                    current_value = float(value_str)
-                    val1 = float(field1_value) if field1_value not in [None, '', 'nan'] else None
-                    val2 = float(field2_value) if field2_value not in [None, '', 'nan'] else None
-                    
-                    if val1 is not None and val2 is not None:
+                    if current_value is not None and val1 is not None and val2 is not None:
                         if operator == "*":
                             calculated_value = val1 * val2
                         elif operator == "/":
@@ -1967,11 +2109,31 @@ def validate_field_v20_native(field_name: str, value: Any, field_config: dict, i
             if isinstance(params, (int, float)):
                 should_trigger = len(value_str) != params or not value_str.isdigit()
                 
-        elif condition == "is_duplicate_artikelnummer" and not is_empty_or_invalid and row_data:
-            # This would require additional context about other rows
-            # For now, we'll skip this complex validation
+        elif condition == "invalid_gtin_check_digit" and not is_empty_or_invalid:
+            should_trigger = bool(invalid_gtin_check_digits([value_str])[0])
+
+        elif condition in ("is_duplicate_artikelnummer", "is_duplicate_gtin"):
+            # Vergelijkt rijen met elkaar: draait als cross-row check (check_duplicate_values)
             should_trigger = False
-            
+
+        elif condition == "invalid_date_format" and not is_empty_or_invalid:
+            should_trigger = bool(np.isnat(parse_date_string(value_str)))
+
+        elif condition == "is_in_the_past" and not is_empty_or_invalid:
+            # Ongeldige datums meldt invalid_date_format; NaT vergelijkt altijd als False
+            should_trigger = bool(parse_date_string(value_str) < validation_today())
+
+        elif condition == "is_before_field" and not is_empty_or_invalid and row_data:
+            # Einddatum ligt voor de startdatum in params[0]; alleen als beide geldige datums zijn
+            if isinstance(params, list) and len(params) > 0:
+                other_str = str(row_data.get(params[0])).strip()
+                should_trigger = bool(parse_date_string(value_str) < parse_date_string(other_str))
+
+        elif condition == "is_empty_when_context" and is_empty_or_invalid and row_data:
+            # Context per rij is vooraf berekend (row_context.evaluate_row_contexts)
+            if isinstance(params, list) and len(params) > 0:
+                should_trigger = bool(row_data.get(ROW_CONTEXT_KEY, {}).get(params[0], False))
+
         elif condition == "uom_description_mismatch" and not is_empty_or_invalid and row_data:
             # Check if Omschrijving Verpakkingseenheid matches UOM fields
             should_trigger = False
@@ -2104,26 +2266,34 @@ def validate_field_v20_native(field_name: str, value: Any, field_config: dict, i
     
     return errors
 
-def perform_cross_row_validations(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict) -> list:
+def perform_cross_row_validations(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict,
+                                  checks: Optional[Dict[str, Callable]] = None) -> list:
     """
     Voert cross-row validaties uit die meerdere rijen vergelijken.
-    Bijvoorbeeld duplicate SDS URLs met verschillende chemische identifiers.
+    Bijvoorbeeld duplicate SDS URLs met verschillende chemische identifiers en
+    dubbele artikelnummers/GTIN's (703).
+
+    checks koppelt een rule condition aan de check functie
+    (df, veld, rule, original_column_mapping); default CROSS_ROW_CHECKS.
     """
     results = []
+    if checks is None:
+        checks = CROSS_ROW_CHECKS
     
-    # Zoek naar duplicate URL validaties in field_validations
+    # Zoek naar cross-row validaties (duplicate URLs, artikelnummers, GTIN's) in field_validations
     if "field_validations" in validation_config:
+        invalid_values = [str(val).lower() for val in validation_config.get("global_settings", {}).get("null_values", [])]
         for field_name, field_config in validation_config["field_validations"].items():
             if field_name in df.columns and "rules" in field_config:
                 for rule in field_config["rules"]:
-                    if rule.get("condition") == "duplicate_url_with_varying_chemicals":
-                        results.extend(check_duplicate_urls_with_varying_chemicals(
-                            df, field_name, rule, original_column_mapping
-                        ))
-                    elif rule.get("condition") == "duplicate_url_simple":
-                        results.extend(check_duplicate_urls_simple(
-                            df, field_name, rule, original_column_mapping
-                        ))
+                    condition = rule.get("condition")
+                    check = checks.get(condition)
+                    if check is None:
+                        continue
+                    if condition in DUPLICATE_VALUE_CONDITIONS:
+                        results.extend(check(df, field_name, rule, original_column_mapping, invalid_values))
+                    else:
+                        results.extend(check(df, field_name, rule, original_column_mapping))
     
     return results
 
@@ -2240,38 +2410,205 @@ def check_duplicate_urls_simple(df: pd.DataFrame, url_field: str, rule: dict, or
     
     if len(duplicate_urls) > 0:
         # Voeg error toe voor elke rij met een duplicate URL
+        # Index URL -> rij posities, zodat niet per URL de hele kolom opnieuw vergeleken wordt
+        url_positions = df_with_urls.groupby(url_field, sort=False).indices
+        url_values = df_with_urls[url_field].tolist()
         rij_offset = 3  # Consistent met hoofdvalidatie - Start rijnummer in Excel na headers
+        supplier_col = original_column_mapping.get(url_field, url_field)
         for url in duplicate_urls:
-            url_rows = df_with_urls[df_with_urls[url_field] == url]
-            for idx, row in url_rows.iterrows():
-                excel_row_num = idx + rij_offset  # GEFIXED - consistent met hoofdvalidatie
-                supplier_col = original_column_mapping.get(url_field, url_field)
+            for pos in url_positions[url]:
+                excel_row_num = df_with_urls.index[pos] + rij_offset  # GEFIXED - consistent met hoofdvalidatie
                 
                 results.append({
                     "Rij": excel_row_num,
                     "GHX Kolom": url_field,
                     "Supplier Kolom": supplier_col,
-                    "Veldwaarde": str(row[url_field]),
+                    "Veldwaarde": str(url_values[pos]),
                     "Foutmelding": message,
                     "code": code
                 })
     
     return results
 
-def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict, template_context: Dict[str, Any] = None) -> Tuple[list, dict, list, dict]:
+# Maximaal aantal rijnummers van duplicaten dat in één melding genoemd wordt
+DUPLICATE_ROWS_IN_MESSAGE = 10
+
+
+def normalize_duplicate_values(values: pd.Series, condition: str) -> pd.Series:
     """
-    Valideert het DataFrame en berekent template-aware statistieken.
-    
+    Normaliseert een kolom voor duplicaat detectie (gestript, hoofdletters).
+
+    Voor GTIN's tellen voorloopnullen en een float ".0" niet mee: een GTIN-13, dezelfde code
+    als GTIN-14 met een voorloopnul en dezelfde code als Excel getal zijn hetzelfde artikel.
+    """
+    normalized = values.astype(str).str.strip().str.upper()
+    if condition == "is_duplicate_gtin":
+        normalized = strip_whole_float_suffix(normalized)
+        is_digits = normalized.str.fullmatch(r"\d+")
+        normalized = normalized.where(~is_digits, normalized.str.lstrip("0"))
+    return normalized
+
+
+def check_duplicate_values(df: pd.DataFrame, field: str, rule: dict, original_column_mapping: dict,
+                           invalid_values=()) -> list:
+    """
+    Controleert of een waarde die uniek moet zijn (artikelnummer, GTIN) vaker voorkomt.
+
+    Eén hash index per kolom (genormaliseerde waarde -> rij posities) via pd.factorize,
+    dus O(n). Elke rij met een duplicaat krijgt een melding met de rijnummers van de
+    andere rijen met dezelfde waarde (maximaal DUPLICATE_ROWS_IN_MESSAGE).
+    """
+    results = []
+    column = df[field]
+    value_str = column.astype(str).str.strip()
+    # Lege en ongeldige waarden (null_values) zijn geen duplicaten van elkaar
+    is_filled = column.notna().to_numpy() & (value_str != "").to_numpy() & ~value_str.str.lower().isin(invalid_values).to_numpy()
+    if is_filled.sum() < 2:
+        return results
+
+    filled_positions = np.flatnonzero(is_filled)
+    codes, _ = pd.factorize(normalize_duplicate_values(column.iloc[filled_positions], rule.get("condition")), sort=False)
+    counts = np.bincount(codes)
+    is_duplicate = counts[codes] > 1
+    if not is_duplicate.any():
+        return results
+
+    # Rij posities per duplicaat groep, in rij volgorde
+    duplicate_positions = filled_positions[is_duplicate]
+    duplicate_codes = codes[is_duplicate]
+    order = np.argsort(duplicate_codes, kind="stable")
+    group_starts = np.flatnonzero(np.r_[True, np.diff(duplicate_codes[order]) != 0])
+    rij_offset = 3  # Consistent met hoofdvalidatie - Start rijnummer in Excel na headers
+    row_numbers = df.index.to_numpy()[duplicate_positions] + rij_offset
+    group_rows = {}
+    for group in np.split(order, group_starts[1:]):
+        group_rows[duplicate_codes[group[0]]] = row_numbers[group].tolist()
+
+    message = rule.get("message", "Een waarde die uniek moet zijn, is een duplicaat")
+    code = rule.get("code", "703")
+    rule_type = rule.get("type", "")
+    supplier_col = clean_supplier_header(original_column_mapping.get(field, field))
+    values = value_str.to_numpy()
+    for pos, excel_row_num, group_code in zip(duplicate_positions, row_numbers.tolist(), duplicate_codes):
+        group = group_rows[group_code]
+        # Alleen de eerste rijnummers nodig: geen O(k^2) bij grote groepen
+        others = [row for row in group[:DUPLICATE_ROWS_IN_MESSAGE + 1] if row != excel_row_num][:DUPLICATE_ROWS_IN_MESSAGE]
+        listed = ", ".join(map(str, others))
+        if len(group) - 1 > DUPLICATE_ROWS_IN_MESSAGE:
+            listed += f" en {len(group) - 1 - DUPLICATE_ROWS_IN_MESSAGE} andere"
+        results.append({
+            "Rij": excel_row_num,
+            "GHX Kolom": field,
+            "Supplier Kolom": supplier_col,
+            "Veldwaarde": values[pos],
+            "Foutmelding": f"{message} (ook in rij {listed})",
+            "code": code,
+            "type": rule_type,
+        })
+
+    logging.info(f"Duplicaat check {field}: {len(results)} rijen in {len(group_rows)} groepen")
+    return results
+
+
+# Cross-row checks per rule condition (zie perform_cross_row_validations)
+CROSS_ROW_CHECKS = {
+    "duplicate_url_with_varying_chemicals": check_duplicate_urls_with_varying_chemicals,
+    "duplicate_url_simple": check_duplicate_urls_simple,
+    "is_duplicate_artikelnummer": check_duplicate_values,
+    "is_duplicate_gtin": check_duplicate_values,
+}
+# Checks die de null_values uit de config nodig hebben (lege/ongeldige waarden overslaan)
+DUPLICATE_VALUE_CONDITIONS = frozenset({"is_duplicate_artikelnummer", "is_duplicate_gtin"})
+
+# Beschikbare validatie engines voor validate_dataframe:
+#   "vectorized" - kolomgebaseerde boolean masks (validator/vectorized_engine.py)
+#   "iterrows"   - oorspronkelijke rij-voor-rij loop met validate_field_v20_native
+#   "compare"    - draait beide engines, logt verschillen en retourneert de iterrows uitvoer
+VALIDATION_ENGINES = ("vectorized", "iterrows", "compare")
+DEFAULT_VALIDATION_ENGINE = os.environ.get("GHX_VALIDATION_ENGINE", "vectorized")
+
+
+class ActiveField(NamedTuple):
+    """Eén veld dat voor dit bestand gevalideerd wordt."""
+
+    order: int                  # Positie in fields_config (bepaalt de volgorde van meldingen)
+    name: str
+    rules: Any                  # Regels uit fields_config
+    is_mandatory: bool          # importance == 'Verplicht'
+    position: Optional[int]     # Kolompositie in df; None = niet aanwezig (of dubbele kolomnaam)
+
+
+@dataclass(frozen=True)
+class ActiveFieldPlan:
+    """
+    Velden om te valideren, eenmalig per bestand bepaald uit template context, ingeklapte
+    velden en de DataFrame kolommen. Validatie, statistieken en de rij-loops lopen over dit
+    plan in plaats van per cel should_validate_field en een lijst-lookup uit te voeren.
+    """
+
+    fields: Tuple[ActiveField, ...]     # Template-actief (zichtbaar, niet ingeklapt), in config volgorde
+    present: Tuple[ActiveField, ...]    # Idem, en aanwezig als kolom in df
+    names: FrozenSet[str]               # Namen van present
+
+
+def resolve_active_fields(fields_config: Dict[str, Any], columns, template_context: Dict[str, Any] = None,
+                          collapsed_fields: List[str] = ()) -> ActiveFieldPlan:
+    """Bepaalt het ActiveFieldPlan voor deze config, template context en kolommen."""
+    collapsed = frozenset(collapsed_fields)
+    column_set = set(columns)
+    fields = []
+    for order, (field_name, rules) in enumerate(fields_config.items()):
+        # Template-aware field filtering
+        if not should_validate_field(field_name, template_context):
+            logging.debug(f"Overslaan veld (niet zichtbaar in template): {field_name}")
+            continue
+        # Skip ingeklapte velden in Template Generator templates
+        if field_name in collapsed:
+            logging.debug(f"Overslaan ingeklapt veld: {field_name}")
+            continue
+
+        position = None
+        if field_name in column_set:
+            loc = columns.get_loc(field_name)
+            position = loc if isinstance(loc, int) else None
+        is_present = field_name in column_set
+        fields.append((ActiveField(order, field_name, rules, rules.get('importance') == 'Verplicht', position), is_present))
+
+    present = tuple(field for field, is_present in fields if is_present)
+    return ActiveFieldPlan(
+        fields=tuple(field for field, _ in fields),
+        present=present,
+        names=frozenset(field.name for field in present),
+    )
+
+
+def build_active_field_plan(validation_config: dict, columns, template_context: Dict[str, Any] = None) -> ActiveFieldPlan:
+    """
+    ActiveFieldPlan direct uit de (v18 of v20) validatie config, voor aanroepers zonder
+    validatie-state, zoals het rapport na de validatie.
+    """
+    if "field_validations" in validation_config:
+        fields_config = validation_config.get("field_validations", {})
+    else:
+        fields_config = validation_config.get("fields", {})
+    collapsed_fields = get_collapsed_fields(template_context) if template_context else []
+    return resolve_active_fields(fields_config, columns, template_context, collapsed_fields)
+
+
+def prepare_validation_state(df: pd.DataFrame, validation_config: dict, template_context: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Bereidt de gedeelde validatie-state voor die door alle engines wordt gebruikt.
+
     Args:
         df: DataFrame om te valideren
-        validation_config: Validatie configuratie
-        original_column_mapping: Kolom mapping
+        validation_config: Validatie configuratie (v18 of v20)
         template_context: Template Generator context (None voor default templates)
-    
-    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+
+    Returns:
+        Dict met fields_config, invalid_values, filled_counts, field_validation_results,
+        red_flag_messages_list, summary_stats, collapsed_fields, active_fields (ActiveFieldPlan)
+        en total_rows
     """
-    results = [] # Lijst met alle individuele fout/warning dicts
-    
     # Detect v20 vs v18 structure
     if "field_validations" in validation_config:
         # v20 structure
@@ -2283,37 +2620,35 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
         invalid_values_config = validation_config.get("invalid_values", [])
     invalid_values = [str(val).lower() for val in invalid_values_config]
     filled_counts = {} # Houdt telling bij per veld
-    field_validation_results = {} # Houdt per veld een lijst van error dicts bij
-    red_flag_messages_list = [] # Verzamelt Red Flag berichten met codes: [{"message": str, "code": str}, ...]
+    field_validation_results = {} # Per veld: error dicts (iterrows) of arrays met Rij nummers (vectorized)
     total_rows = len(df)
-    rij_offset = 3 # Start rijnummer in Excel na header(s)/instructie(s)
 
     # Bepaal template-aware veld filtering
     collapsed_fields = []
     visible_fields = None
     template_type = template_context.get('template_type', 'Unknown') if template_context else 'Unknown'
-    
+
     if template_context:
         collapsed_fields = get_collapsed_fields(template_context)
         visible_fields = get_visible_fields(template_context)
-        
+
         if template_type == 'TG' and visible_fields:
             logging.info(f"TG template: {len(visible_fields)} velden zichtbaar, {len(collapsed_fields)} verborgen")
         else:
             logging.info(f"Template type {template_type}: {len(collapsed_fields)} velden uitgesloten van statistieken")
-    
+
     # Initialiseer summary_stats (zal worden geretourneerd als filled_percentages)
     summary_stats = {
         'counts_mandatory': {
-            'correct_fields': 0, 
-            'incorrect_fields': 0, 
-            'not_present_fields': 0, 
+            'correct_fields': 0,
+            'incorrect_fields': 0,
+            'not_present_fields': 0,
             'total_defined_mandatory_fields': 0
         },
         'counts_optional': {
-            'filled_occurrences': 0, 
-            'empty_occurrences': 0, 
-            'total_defined_optional_fields': 0, 
+            'filled_occurrences': 0,
+            'empty_occurrences': 0,
+            'total_defined_optional_fields': 0,
             'total_possible_optional_occurrences': 0
         },
         'total_rows_in_df': total_rows,
@@ -2324,108 +2659,129 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
         'template_aware_filtering': template_type == 'TG'
     }
 
+    # Velden om te valideren: één keer per bestand, daarna alleen nog dit plan
+    active_fields = resolve_active_fields(fields_config, df.columns, template_context, collapsed_fields)
+
     # Initialiseer tellers en resultaatlijsten
-    for field_name in fields_config:
-        # Template-aware field filtering
-        if not should_validate_field(field_name, template_context):
-            logging.debug(f"Overslaan veld (niet zichtbaar in template): {field_name}")
-            continue
-            
-        # Skip ingeklapte velden in Template Generator templates
-        if field_name in collapsed_fields:
-            logging.debug(f"Overslaan ingeklapt veld: {field_name}")
-            continue
-            
+    for field in active_fields.fields:
         # Controleer of 'importance' bestaat en 'Verplicht' is, anders default naar optioneel
-        rules = fields_config[field_name]
-        is_mandatory = rules.get('importance') == 'Verplicht'
-        
-        if is_mandatory:
+        if field.is_mandatory:
             summary_stats['counts_mandatory']['total_defined_mandatory_fields'] += 1
         else:
             summary_stats['counts_optional']['total_defined_optional_fields'] += 1
 
-        if field_name in df.columns:
-            filled_counts[field_name] = 0
-            field_validation_results[field_name] = []
+    for field in active_fields.present:
+        filled_counts[field.name] = 0
+        field_validation_results[field.name] = []
+
+    return {
+        'fields_config': fields_config,
+        'invalid_values': invalid_values,
+        'filled_counts': filled_counts,
+        'field_validation_results': field_validation_results,
+        'red_flag_messages_list': [], # Verzamelt Red Flag berichten met codes: [{"message": str, "code": str}, ...]
+        'summary_stats': summary_stats,
+        'collapsed_fields': collapsed_fields,
+        'active_fields': active_fields,
+        'template_context': template_context,
+        'total_rows': total_rows,
+    }
+
+
+def validate_rows_iterrows(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict, state: Dict[str, Any]) -> list:
+    """
+    Oorspronkelijke rij-voor-rij validatie (iterrows engine).
+
+    Vult filled_counts, field_validation_results en red_flag_messages_list in de state
+    en retourneert de lijst met fout/warning dicts.
+    """
+    results = [] # Lijst met alle individuele fout/warning dicts
+    invalid_values = state['invalid_values']
+    filled_counts = state['filled_counts']
+    field_validation_results = state['field_validation_results']
+    red_flag_messages_list = state['red_flag_messages_list']
+    active_fields = state['active_fields'].present
+    total_rows = state['total_rows']
+    rij_offset = 3 # Start rijnummer in Excel na header(s)/instructie(s)
+
+    # Row contexts (is_medical_device, ...) één keer per frame, voor is_empty_when_context
+    row_contexts = None
+    if uses_row_context(validation_config, (field.name for field in active_fields)):
+        row_contexts = pd.DataFrame(evaluate_row_contexts(
+            df, validation_config, state['template_context'],
+            globals().get('loaded_reference_lists', None), invalid_values
+        )).to_dict('records')
 
     # --- Hoofd loop door rijen ---
     logging.info(f"Start validatie van {total_rows} rijen...")
-    for idx, row in df.iterrows():
+    for row_position, (idx, row) in enumerate(df.iterrows()):
         excel_row_num = idx + rij_offset
         row_data = row.to_dict() # Voor dependency checks
+        if row_contexts is not None:
+            row_data[ROW_CONTEXT_KEY] = row_contexts[row_position]
+
+        # Valideer elk actief veld in de rij (template filtering en aanwezigheid al bepaald)
+        for _, field, rules, _, position in active_fields:
+            value = row.iat[position] if position is not None else row[field]
+            value_str = '' if pd.isnull(value) else str(value).strip()
+
+            # Tel gevulde velden - met UOM conditional logic
+            is_gevuld = value_str != '' and value_str.lower() not in invalid_values
+
+            # UOM CONDITIONAL LOGIC: UOM velden alleen tellen als Omschrijving Verpakkingseenheid gevuld is
+            uom_fields = [
+                'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
+                'UOM Code Basiseenheid', 'Inhoud Basiseenheid',
+                'UOM Code Inhoud Basiseenheid'
+            ]
 
-        # Valideer elk veld in de rij
-        for field, rules in fields_config.items():
-            # Template-aware field filtering
-            if not should_validate_field(field, template_context):
-                continue
-                
-            # Skip ingeklapte velden in Template Generator templates
-            if field in collapsed_fields:
-                continue
-                
-            if field in df.columns:
-                value = row[field]
-                value_str = '' if pd.isnull(value) else str(value).strip()
+            if is_gevuld:
+                if field in uom_fields:
+                    logging.debug(f"DEBUG PRICE_TOOL: UOM field {field} is gevuld: {value_str} (rij {excel_row_num})")
+                    # Voor UOM velden: alleen tellen als Omschrijving Verpakkingseenheid ook gevuld is
+                    if 'Omschrijving Verpakkingseenheid' in row_data:
+                        omschrijving_value = row_data.get('Omschrijving Verpakkingseenheid', '')
+                        omschrijving_str = '' if pd.isnull(omschrijving_value) else str(omschrijving_value).strip()
+                        omschrijving_gevuld = omschrijving_str != '' and omschrijving_str.lower() not in invalid_values
 
-                # Tel gevulde velden - met UOM conditional logic
-                is_gevuld = value_str != '' and value_str.lower() not in invalid_values
-                
-                # UOM CONDITIONAL LOGIC: UOM velden alleen tellen als Omschrijving Verpakkingseenheid gevuld is
-                uom_fields = [
-                    'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
-                    'UOM Code Basiseenheid', 'Inhoud Basiseenheid', 
-                    'UOM Code Inhoud Basiseenheid'
-                ]
-                
-                if is_gevuld:
-                    if field in uom_fields:
-                        logging.debug(f"DEBUG PRICE_TOOL: UOM field {field} is gevuld: {value_str} (rij {excel_row_num})")
-                        # Voor UOM velden: alleen tellen als Omschrijving Verpakkingseenheid ook gevuld is
-                        if 'Omschrijving Verpakkingseenheid' in row_data:
-                            omschrijving_value = row_data.get('Omschrijving Verpakkingseenheid', '')
-                            omschrijving_str = '' if pd.isnull(omschrijving_value) else str(omschrijving_value).strip()
-                            omschrijving_gevuld = omschrijving_str != '' and omschrijving_str.lower() not in invalid_values
-                            
-                            logging.debug(f"DEBUG PRICE_TOOL: Omschrijving = '{omschrijving_str}', gevuld: {omschrijving_gevuld}")
-                            
-                            if omschrijving_gevuld:
-                                filled_counts[field] = filled_counts.get(field, 0) + 1
-                                logging.debug(f"DEBUG PRICE_TOOL: {field} COUNTED, new count: {filled_counts[field]}")
-                            else:
-                                logging.debug(f"DEBUG PRICE_TOOL: {field} NOT COUNTED - no Omschrijving")
-                            # Als geen Omschrijving gevuld: UOM veld NIET tellen als gevuld (conditioneel niet verplicht)
-                    else:
-                        # Niet-UOM velden: normale telling
-                        filled_counts[field] = filled_counts.get(field, 0) + 1
-
-                # Voer validatie uit - gebruik v20 native als rules array aanwezig is
-                if "rules" in rules:
-                    # v20 native validation
-                    # Reference lists uit global scope halen 
-                    reference_lists_data = globals().get('loaded_reference_lists', None)
-                    errors = validate_field_v20_native(field, value_str if is_gevuld else value, rules, invalid_values, row_data, reference_lists_data)
+                        logging.debug(f"DEBUG PRICE_TOOL: Omschrijving = '{omschrijving_str}', gevuld: {omschrijving_gevuld}")
+
+                        if omschrijving_gevuld:
+                            filled_counts[field] = filled_counts.get(field, 0) + 1
+                            logging.debug(f"DEBUG PRICE_TOOL: {field} COUNTED, new count: {filled_counts[field]}")
+                        else:
+                            logging.debug(f"DEBUG PRICE_TOOL: {field} NOT COUNTED - no Omschrijving")
+                        # Als geen Omschrijving gevuld: UOM veld NIET tellen als gevuld (conditioneel niet verplicht)
                 else:
-                    # v18 legacy validation
-                    errors = validate_field(field, value_str if is_gevuld else value, rules, invalid_values, row_data)
-
-                # Verwerk gevonden fouten
-                if errors:
-                     for err in errors:
-                         if err.get("message") and str(err.get("message")).strip():
-                             result_item = {
-                                 "Rij": excel_row_num,
-                                 "GHX Kolom": field,
-                                 "Supplier Kolom": clean_supplier_header(original_column_mapping.get(field, field)),
-                                 "Veldwaarde": value_str, # Altijd de string waarde opslaan
-                                 "Foutmelding": err.get('message', ''),
-                                 "code": err.get('code', ''),
-                                 "type": err.get('type', '')
-                             }
-                             results.append(result_item)
-                             if field in field_validation_results:
-                                 field_validation_results[field].append(result_item)
+                    # Niet-UOM velden: normale telling
+                    filled_counts[field] = filled_counts.get(field, 0) + 1
+
+            # Voer validatie uit - gebruik v20 native als rules array aanwezig is
+            if "rules" in rules:
+                # v20 native validation
+                # Reference lists uit global scope halen
+                reference_lists_data = globals().get('loaded_reference_lists', None)
+                errors = validate_field_v20_native(field, value_str if is_gevuld else value, rules, invalid_values, row_data, reference_lists_data)
+            else:
+                # v18 legacy validation
+                errors = validate_field(field, value_str if is_gevuld else value, rules, invalid_values, row_data)
+
+            # Verwerk gevonden fouten
+            if errors:
+                 for err in errors:
+                     if err.get("message") and str(err.get("message")).strip():
+                         result_item = {
+                             "Rij": excel_row_num,
+                             "GHX Kolom": field,
+                             "Supplier Kolom": clean_supplier_header(original_column_mapping.get(field, field)),
+                             "Veldwaarde": value_str, # Altijd de string waarde opslaan
+                             "Foutmelding": err.get('message', ''),
+                             "code": err.get('code', ''),
+                             "type": err.get('type', '')
+                         }
+                         results.append(result_item)
+                         if field in field_validation_results:
+                             field_validation_results[field].append(result_item)
 
         # --- Red Flag Checks per rij (uit JSON config) ---
         # Support both v18 red_flags and v20 global_validations
@@ -2462,7 +2818,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                                 code = flag.get("code", "800")  # v20 en v18 ondersteuning
                                 red_flag_messages_list.append({"message": message, "code": code})
                                 logging.debug(f"Red flag '{condition}' getriggerd voor rij {excel_row_num}")
-                
+
                 elif condition == "uom_match" or condition == "uom_match_if_base_and_orderable":
                     # Check of UOM codes gelijk moeten zijn als base=orderable beide 1 zijn
                     required_fields = ["Is BestelbareEenheid", "Is BasisEenheid", "UOM Code Verpakkingseenheid", "UOM Code Basiseenheid"]
@@ -2471,7 +2827,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                         is_orderable = str(row_data.get("Is BestelbareEenheid", "")).strip()
                         uom_trade = str(row_data.get("UOM Code Verpakkingseenheid", "")).strip()
                         uom_base = str(row_data.get("UOM Code Basiseenheid", "")).strip()
-                        
+
                         if is_base == "1" and is_orderable == "1":
                             if uom_trade and uom_base and uom_trade != uom_base:
                                 existing_messages = [item["message"] for item in red_flag_messages_list]
@@ -2479,7 +2835,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                                     code = flag.get("code", "801")  # v20 en v18 ondersteuning
                                     red_flag_messages_list.append({"message": message, "code": code})
                                     logging.debug(f"Red flag UOM mismatch getriggerd voor rij {excel_row_num}: {uom_trade} != {uom_base}")
-                
+
                 elif condition == "content_match" or condition == "content_match_if_base_and_orderable":
                     # Check of Inhoud velden gelijk moeten zijn als base=orderable beide 1 zijn
                     required_fields = ["Is BestelbareEenheid", "Is BasisEenheid", "Inhoud Verpakkingseenheid", "Inhoud Basiseenheid"]
@@ -2488,7 +2844,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                         is_orderable = str(row_data.get("Is BestelbareEenheid", "")).strip()
                         content_trade = str(row_data.get("Inhoud Verpakkingseenheid", "")).strip()
                         content_base = str(row_data.get("Inhoud Basiseenheid", "")).strip()
-                        
+
                         if is_base == "1" and is_orderable == "1":
                             if content_trade and content_base and content_trade != content_base:
                                 existing_messages = [item["message"] for item in red_flag_messages_list]
@@ -2496,17 +2852,17 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                                     code = flag.get("code", "805")  # v20 en v18 ondersteuning
                                     red_flag_messages_list.append({"message": message, "code": code})
                                     logging.debug(f"Red flag Content mismatch getriggerd voor rij {excel_row_num}: {content_trade} != {content_base}")
-                
+
                 elif condition == "uom_relation" or condition == "uom_relation_conflict":
                     # Check voor UOM relatie conflicten - wordt al gehandeld door validate_uom_relationships
                     # Deze flag wordt toegevoegd in validate_uom_relationships functie als er UOM errors zijn
                     pass
-                    
+
                 elif condition == "uom_description_format" or condition == "uom_description_format_mismatch":
                     # Check wordt al gehandeld in validate_uom_relationships functie
                     # Slaat deze check over om dubbele meldingen te voorkomen
                     pass
-                                    
+
                 elif condition == "incomplete_dimensions" or condition == "incomplete_set":
                     # Check of afmetingen set compleet is
                     required_fields = ["Hoogte", "Breedte", "Diepte"]
@@ -2516,10 +2872,10 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                         for field in available_fields:
                             value = str(row_data.get(field, "")).strip()
                             values.append(value)
-                        
+
                         # Tel hoeveel velden ingevuld zijn (niet leeg en niet invalid)
                         filled_count = sum(1 for v in values if v and v.lower() not in invalid_values)
-                        
+
                         # Als er minimaal 1 ingevuld is maar niet alle beschikbare velden
                         if filled_count > 0 and filled_count < len(available_fields):
                             existing_messages = [item["message"] for item in red_flag_messages_list]
@@ -2527,7 +2883,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                                 code = flag.get("code", "804")  # v20 en v18 ondersteuning
                                 red_flag_messages_list.append({"message": message, "code": code})
                                 logging.debug(f"Red flag Incomplete dimensions voor rij {excel_row_num}")
-                
+
                 # Voeg hier checks toe voor andere per-rij condities indien nodig
 
             except Exception as e:
@@ -2535,30 +2891,55 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                 continue
 
     logging.info("Validatie per rij voltooid.")
+    return results
+
+
+def finalize_validation_state(df: pd.DataFrame, results: list, validation_config: dict, original_column_mapping: dict,
+                              state: Dict[str, Any], uom_validator=None,
+                              cross_row_validator=None) -> Tuple[list, dict, list, dict]:
+    """
+    Gedeelde afronding na de rij-validatie: UOM relaties, summary_stats, Red Flags,
+    errors_per_field en cross-row validaties.
+
+    Args:
+        df: Gevalideerde DataFrame
+        results: Resultaten uit de rij-validatie
+        validation_config: Validatie configuratie
+        original_column_mapping: Kolom mapping
+        state: State uit prepare_validation_state, gevuld door de rij-validatie
+        uom_validator: Functie voor UOM relatie validatie (default validate_uom_relationships)
+        cross_row_validator: Functie voor cross-row validaties (default perform_cross_row_validations)
+
+    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+    """
+    filled_counts = state['filled_counts']
+    field_validation_results = state['field_validation_results']
+    red_flag_messages_list = state['red_flag_messages_list']
+    summary_stats = state['summary_stats']
+    total_rows = state['total_rows']
+    if uom_validator is None:
+        uom_validator = validate_uom_relationships
+    if cross_row_validator is None:
+        cross_row_validator = perform_cross_row_validations
+
     # --- Na de hoofd loop ---
 
     # 1. Roep UOM validatie aan
     logging.info("Starten UOM relatie validatie...")
     # Geef original_column_mapping mee aan UOM validatie voor betere supplier kolom info
     # Let op: validate_uom_relationships past 'results' direct aan en voegt eventueel RED FLAGS toe
-    results = validate_uom_relationships(df, results, validation_config, original_column_mapping) # Pass mapping
+    results = uom_validator(df, results, validation_config, original_column_mapping) # Pass mapping
     logging.info("UOM relatie validatie voltooid.")
 
 
     # 2. Bereken summary_stats NA ALLE validaties ---
     logging.info("Berekenen template-aware vullingspercentages...")
-    for field_name, rules in fields_config.items():
-        # Template-aware field filtering
-        if not should_validate_field(field_name, template_context):
-            continue
-            
-        # Skip ingeklapte velden in Template Generator templates
-        if field_name in collapsed_fields:
-            continue
-            
-        is_mandatory = rules.get('importance') == 'Verplicht'
+    active_fields = state['active_fields']
+    for field in active_fields.fields:
+        field_name = field.name
+        is_mandatory = field.is_mandatory
 
-        if field_name in df.columns:
+        if field_name in active_fields.names:
             if is_mandatory:
                 # Heeft dit veld fouten?
                 if not field_validation_results.get(field_name): # Geen lijst met errors voor dit veld
@@ -2579,7 +2960,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
 
     logging.info("Verwerken Red Flag berichten...")
     # Verwerk Red Flags die door UOM validatie zijn toegevoegd aan validation_results
-    validation_red_flags_dicts = [r for r in results if r.get("GHX Kolom") == "RED FLAG"]
+    validation_red_flags_dicts = select_field(results, "RED FLAG")
     for flag_dict in validation_red_flags_dicts:
          msg = flag_dict.get("Foutmelding")
          existing_messages = [item["message"] for item in red_flag_messages_list]
@@ -2604,7 +2985,7 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
                    red_flag_messages_list.append({"message": msg, "code": code})
 
     # Template check conditie: controleer of alle vereiste kolommen voor de nieuwe template aanwezig zijn
-    template_check_flag = next((flag for flag in flags_for_global 
+    template_check_flag = next((flag for flag in flags_for_global
                               if flag.get("condition") in ["template_check", "template_column_missing"]), None)
     if template_check_flag:
         template_fields = template_check_flag.get("fields", [])
@@ -2636,51 +3017,198 @@ def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_colum
     logging.info("Berekenen fouten per veld...")
     errors_per_field = {}
     for field_name, field_errors_list in field_validation_results.items():
-        # Tel alleen unieke rijen met fouten voor dit veld
-        unique_error_rows = set(res["Rij"] for res in field_errors_list)
-        error_count = len(unique_error_rows)
+        # Tel alleen unieke rijen met fouten voor dit veld (result dicts of arrays met Rij nummers)
+        error_count = count_unique_rows(field_errors_list)
         # Aantal fouten kan niet groter zijn dan aantal gevulde velden
         errors_per_field[field_name] = min(error_count, filled_counts.get(field_name, 0))
 
     # 4. Cross-row validaties (zoals duplicate SDS URLs)
-    cross_row_errors = perform_cross_row_validations(df, validation_config, original_column_mapping)
+    cross_row_errors = cross_row_validator(df, validation_config, original_column_mapping)
     results.extend(cross_row_errors)
 
-    # Retourneer alle berekende informatie
-    return results, filled_percentages, red_flag_messages, errors_per_field
+    # Retourneer alle berekende informatie; de meldingen kolomgewijs (zie validation_results.py)
+    return as_validation_results(results), filled_percentages, red_flag_messages, errors_per_field
+
+
+def validate_dataframe(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict, template_context: Dict[str, Any] = None,
+                       engine: Optional[str] = None, workers: Optional[int] = None) -> Tuple[list, dict, list, dict]:
+    """
+    Valideert het DataFrame en berekent template-aware statistieken.
+
+    Args:
+        df: DataFrame om te valideren
+        validation_config: Validatie configuratie
+        original_column_mapping: Kolom mapping
+        template_context: Template Generator context (None voor default templates)
+        engine: "vectorized", "iterrows" of "compare" (default DEFAULT_VALIDATION_ENGINE)
+        workers: Aantal processen voor de vectorized engine (default GHX_VALIDATION_WORKERS;
+            >1 valideert row shards parallel, zie validator/parallel_validation.py)
+
+    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+    """
+    engine = engine or DEFAULT_VALIDATION_ENGINE
+    if engine not in VALIDATION_ENGINES:
+        logging.warning(f"Onbekende validatie engine '{engine}', gebruik 'iterrows'")
+        engine = "iterrows"
+
+    # De vectorized engine ondersteunt alleen de native v20 structuur
+    if engine != "iterrows" and "field_validations" in validation_config:
+        from .vectorized_engine import validate_dataframe_vectorized, compare_validation_outputs
+        reference_lists_data = globals().get('loaded_reference_lists', None)
+
+        if engine == "vectorized":
+            from .parallel_validation import resolve_workers, validate_dataframe_parallel
+            if resolve_workers(workers) > 1:
+                return validate_dataframe_parallel(
+                    df, validation_config, original_column_mapping, template_context, reference_lists_data,
+                    workers=workers
+                )
+            return validate_dataframe_vectorized(
+                df, validation_config, original_column_mapping, template_context, reference_lists_data
+            )
+
+        # engine == "compare": draai beide engines en log de verschillen
+        start_time = time.time()
+        legacy_output = validate_dataframe(df, validation_config, original_column_mapping, template_context, engine="iterrows")
+        legacy_time = time.time() - start_time
+        start_time = time.time()
+        vectorized_output = validate_dataframe_vectorized(
+            df, validation_config, original_column_mapping, template_context, reference_lists_data
+        )
+        vectorized_time = time.time() - start_time
+        differences = compare_validation_outputs(legacy_output, vectorized_output)
+        if differences:
+            logging.warning(f"Validatie engines verschillen ({len(differences)} verschillen):")
+            for difference in differences[:20]:
+                logging.warning(f"  {difference}")
+        else:
+            logging.info("Validatie engines geven identieke uitvoer.")
+        logging.info(f"Engine timing: iterrows {legacy_time:.2f} sec, vectorized {vectorized_time:.2f} sec")
+        return legacy_output
+
+    state = prepare_validation_state(df, validation_config, template_context)
+    results = validate_rows_iterrows(df, validation_config, original_column_mapping, state)
+    return finalize_validation_state(df, results, validation_config, original_column_mapping, state)
 
 
 # -----------------------------
 # HOOFDFUNCTIE VOOR AANROEP VANUIT STREAMLIT
 # -----------------------------
 
+def _new_report_dir(report_subdir: str) -> str:
+    """
+    Maakt report_<timestamp> in report_subdir. Runs in dezelfde seconde (bv. twee CLI
+    aanroepen vanuit één map) krijgen elk een eigen map met een volgnummer erachter.
+    """
+    base = os.path.join(report_subdir, "report_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
+    candidate = base
+    attempt = 1
+    while True:
+        try:
+            os.makedirs(candidate)
+            return candidate
+        except FileExistsError:
+            attempt += 1
+            candidate = f"{base}_{attempt}"
+
+
 def validate_pricelist(
-    input_excel_path: str,
+    input_excel_path: Optional[Union[str, WorkbookProbe]],
     mapping_json_path: str,
     validation_json_path: str,
     original_input_filename: str,
     reference_json_path: Optional[str] = None,
     max_rows: Optional[int] = None,
     total_rows: Optional[int] = None,
+    validation_engine: Optional[str] = None,
+    streaming: bool = False,
+    chunk_size: Optional[int] = None,
+    input_df: Optional[pd.DataFrame] = None,
+    header_row: Optional[List[Any]] = None,
+    stamp_cells: Optional[tuple] = None,
+    use_parse_cache: Optional[bool] = None,
+    incremental_state: Optional[str] = None,
+    validation_workers: Optional[int] = None,
+    progress_callback: Optional[Callable[[str, float], None]] = None,
+    output_formats: Optional[Union[str, List[str]]] = None,
+    report_profile: Optional[str] = None,
+    output_paths: Optional[Dict[str, str]] = None,
 ) -> Optional[str]:
     """
     Valideert een Excel prijslijst en genereert een Excel validatierapport.
     Retourneert het pad naar het rapport, of None bij een fout.
+
+    validation_engine kiest de engine voor validate_dataframe ("vectorized", "iterrows"
+    of "compare"); None gebruikt DEFAULT_VALIDATION_ENGINE.
+
+    streaming=True leest en valideert het werkblad in chunks van chunk_size rijen
+    (default GHX_STREAMING_CHUNK_ROWS) zodat ook zeer grote prijslijsten volledig
+    gevalideerd kunnen worden zonder het hele werkblad dubbel in het geheugen.
+
+    input_excel_path mag ook een WorkbookProbe zijn die de aanroeper al geopend heeft;
+    anders wordt het bestand hier één keer geopend en voor alle detectie en de
+    volledige read hergebruikt.
+
+    input_df is een alternatieve invoer: een DataFrame dat de aanroeper al ingelezen
+    heeft (zoals pd.read_excel(path) zonder dtype, bv. de Quick Mode head). Samen met de
+    ruwe header rij en de stamp cellen (A1, A2) wordt daar een DataFrameProbe omheen
+    gezet, zodat er geen tijdelijk xlsx bestand geschreven en opnieuw geparsed hoeft te
+    worden. input_excel_path mag dan een probe of pad van het origineel zijn (metadata,
+    output directory) of None.
+
+    use_parse_cache (default: aan tenzij GHX_PARSE_CACHE=0) hergebruikt een eerder
+    geparst werkblad van dezelfde upload uit de parse cache en vult die na een volledige
+    read (zie validator/parse_cache.py).
+
+    incremental_state is het pad van een run state (zie validator/incremental_validation.py).
+    Bestaat die van een vorige versie van de prijslijst, dan worden alleen nieuwe of
+    gewijzigde rijen gevalideerd; na de validatie wordt de state van deze run daar
+    opgeslagen. Alleen voor een volledige validatie met de vectorized engine.
+
+    validation_workers (default GHX_VALIDATION_WORKERS) verdeelt de vectorized validatie
+    over meerdere processen in row shards (zie validator/parallel_validation.py).
+
+    progress_callback(fase, fractie) wordt per fase aangeroepen (laden, lezen, valideren,
+    rapport), bv. door de job queue in validator/validation_jobs.py.
+
+    output_formats (default GHX_OUTPUT_FORMATS, "xlsx") kiest de outputs: "xlsx", "parquet",
+    "json" en/of "ndjson", als lijst of komma-gescheiden string (zie validator/report_exports.py).
+    Zonder "xlsx" wordt het Excel rapport niet gebouwd en is het retourpad dat van de
+    eerste andere output (de overige staan ernaast in dezelfde map).
+
+    report_profile (default GHX_REPORT_PROFILE, "full") kiest de sheets van het Excel rapport:
+    "full", "summary", "errors-only" of "dataset-only" (zie REPORT_PROFILES in rapport_utils.py).
+
+    output_paths: optionele dict die gevuld wordt met formaat -> pad van elke geschreven
+    output (ook "xlsx"), zodat aanroepers zoals cli_validate.py precies de bestanden van
+    deze run oppakken.
     """
+    def report_progress(phase: str, fraction: float) -> None:
+        if progress_callback is None:
+            return
+        try:
+            progress_callback(phase, fraction)
+        except Exception as e:
+            logging.debug(f"Progress callback fout: {e}")
+
+    formats = resolve_output_formats(output_formats)  # Ongeldig formaat of profiel: ValueError vóór het werk
+    resolve_report_profile(report_profile)
+
+    owns_probe = not isinstance(input_excel_path, WorkbookProbe)
+    probe = None
+    cache_writer = None
     try:
         # 1. Laad configuraties
         logging.info("Laden configuratiebestanden...")
+        report_progress("Configuratie laden", 0.05)
         try:
-            with open(mapping_json_path, 'r', encoding='utf-8') as f:
-                header_mapping_config = json.load(f)
-            with open(validation_json_path, 'r', encoding='utf-8') as f:
-                validation_config_raw = json.load(f)
-            
-            # Laad reference lists indien beschikbaar
-            reference_lists = {}
-            if reference_json_path and os.path.exists(reference_json_path):
-                with open(reference_json_path, 'r', encoding='utf-8') as f:
-                    reference_lists = json.load(f)
+            # Config registry: elk bestand wordt per proces één keer geladen, genormaliseerd en
+            # gecompileerd (read-only objecten, gedeeld met alle volgende validaties)
+            header_mapping_config = load_json_config(mapping_json_path)
+            config_snapshot = get_validation_snapshot(validation_json_path, reference_json_path)
+            validation_config_raw = config_snapshot.raw
+            reference_lists = config_snapshot.reference_lists
+            if reference_lists:
                 logging.info("Reference lists geladen.")
             
             # Maak reference_lists beschikbaar in global scope voor v20 native validation
@@ -2694,34 +3222,63 @@ def validate_pricelist(
             logging.error(f"Fout bij lezen JSON configuratie: {e}")
             raise # Gooi error door
 
-        # Detecteer JSON versie en normaliseer indien nodig
-        json_version = detect_json_version(validation_config_raw)
+        # JSON versie en v18-compatibele structuur komen uit de snapshot
+        json_version = config_snapshot.json_version
         logging.info(f"JSON versie gedetecteerd: {json_version}")
-        
-        if json_version == "v20":
-            # Converteer v20 naar v18-compatibele structuur
-            validation_config = normalize_v20_to_v18_structure(validation_config_raw, reference_lists)
-            logging.info("JSON v2.0 geconverteerd naar v18-compatibele structuur.")
-        else:
-            # Gebruik v18 structuur as-is
-            validation_config = validation_config_raw
+        validation_config = config_snapshot.normalized
         
         # Haal mapping dictionary op
         header_mapping_dict = {k: v["alternatives"] for k, v in header_mapping_config.get("standard_headers", {}).items()}
         
+        # Kolommen die als string gelezen moeten worden
+        string_columns = [field for field, rules in validation_config.get("fields", {}).items()
+                          if rules.get("read_as_string")]
+        dtype_spec = {col: str for col in string_columns}
+
+        # Voeg expliciete dtype mappings toe voor problematische kolomnamen in de originele Excel
+        # Voor UNSPSC Code (zowel GHX als supplier-kolomnamen)
+        dtype_spec["UNSPSC CODE (UNITED NATIONS STANDARD PRODUCTS AND SERVICES CODE)"] = str
+        dtype_spec["UNSPSC Code"] = str
+
+        # Voor GTIN en andere kolommen die numeriek lijken maar string moeten zijn
+        dtype_spec["BARCODENUMMER (EAN/ GTIN/ HIBC)"] = str
+        dtype_spec["GTIN Verpakkingseenheid"] = str
+
+        # Open de werkmap één keer voor alle detectie en de volledige read
+        if use_parse_cache is None:
+            use_parse_cache = cache_available()
+        if input_df is not None:
+            source_probe = input_excel_path if isinstance(input_excel_path, WorkbookProbe) else None
+            source_path = os.fspath(input_excel_path) if isinstance(input_excel_path, (str, os.PathLike)) else None
+            probe = DataFrameProbe(input_df, header_row=header_row, stamp_cells=stamp_cells,
+                                   source_probe=source_probe, path=source_path)
+            owns_probe = True
+        else:
+            probe = open_probe(input_excel_path)
+            if use_parse_cache:
+                # Zelfde upload + config al eerder geparsed: XLSX parsen overslaan
+                cached_probe = load_cached_probe(probe, dtype_spec)
+                if cached_probe is not None and cached_probe is not probe:
+                    if owns_probe:
+                        probe.close()
+                    probe = cached_probe
+                    owns_probe = True
+                elif cached_probe is None and max_rows is None:
+                    cache_writer = open_cache_writer(probe, dtype_spec)
+
         # Template type detectie en configuratie (met caching voor performance)
         logging.info(f"⚡ Detectie template type voor validatie...")
-        template_type = determine_template_type(input_excel_path)
+        template_type = determine_template_type(probe)
         logging.info(f"Template type gedetecteerd: {template_type}")
         
         # Template-aware mandatory fields bepaling (gebruik gecachte template_type)
-        ghx_mandatory_fields = determine_mandatory_fields_for_template(input_excel_path)
+        ghx_mandatory_fields = determine_mandatory_fields_for_template(probe)
         logging.info(f"Verplichte velden geladen: {len(ghx_mandatory_fields)} velden voor {template_type} template")
         
         # Template context extraheren voor rapportage
         template_context = None
         if template_type == "TG":
-            template_context = extract_template_generator_context(input_excel_path)
+            template_context = extract_template_generator_context(probe)
             if template_context:
                 # Voeg template type toe aan context
                 template_context['type'] = template_type  # Voeg 'type' toe voor consistentie
@@ -2759,7 +3316,7 @@ def validate_pricelist(
             # Voor AT templates: detecteer automatisch chemical fields
             if template_type == "AT":
                 from .template_context import detect_chemical_fields_in_template
-                has_chemicals = detect_chemical_fields_in_template(input_excel_path)
+                has_chemicals = detect_chemical_fields_in_template(probe)
                 if has_chemicals:
                     template_context['configuration']['has_chemicals'] = True
                     logging.info(f"AT template: Chemical fields gedetecteerd - heeft chemicals vlag ingesteld")
@@ -2768,121 +3325,177 @@ def validate_pricelist(
             
             logging.info(f"Template type {template_type}: basis context aangemaakt voor rapportage")
 
-        # 2. Lees Excel in
-        logging.info(f"Lezen Excel bestand: {input_excel_path}")
-        try:
-            string_columns = [field for field, rules in validation_config.get("fields", {}).items()
-                              if rules.get("read_as_string")]
-            dtype_spec = {col: str for col in string_columns}
-            
-            # Voeg expliciete dtype mappings toe voor problematische kolomnamen in de originele Excel
-            # Voor UNSPSC Code (zowel GHX als supplier-kolomnamen)
-            dtype_spec["UNSPSC CODE (UNITED NATIONS STANDARD PRODUCTS AND SERVICES CODE)"] = str
-            dtype_spec["UNSPSC Code"] = str
-            
-            # Voor GTIN en andere kolommen die numeriek lijken maar string moeten zijn
-            dtype_spec["BARCODENUMMER (EAN/ GTIN/ HIBC)"] = str
-            dtype_spec["GTIN Verpakkingseenheid"] = str
-            
-            # Lees Excel in - limiteer rijen indien Quick Mode
-            logging.debug(f"🔍 DEBUG: max_rows parameter = {max_rows} (type: {type(max_rows)})")
-            if max_rows is not None:
-                logging.info(f"✅ Quick Mode: limiteer tot {max_rows} rijen")
-                start_time = time.time()
-                df = pd.read_excel(input_excel_path, dtype=dtype_spec, nrows=max_rows)
-                end_time = time.time()
-                logging.info(f"⚡ Quick Mode Excel read: {df.shape} in {end_time-start_time:.2f} sec")
+        # Gebruik native v20 als beschikbaar, anders v18
+        config_for_validation = validation_config_raw if json_version == "v20" else validation_config
+
+        # Incrementele validatie: hergebruik de resultaten van ongewijzigde rijen uit een vorige run
+        incremental_run = None
+        if incremental_state and max_rows is None:
+            if (validation_engine or DEFAULT_VALIDATION_ENGINE) == "vectorized":
+                from .incremental_validation import open_incremental_run
+                incremental_run = open_incremental_run(incremental_state, config_for_validation,
+                                                       template_context, reference_lists)
             else:
-                logging.info(f"⚠️  Volledige bestand lezen (max_rows is None)")
-                start_time = time.time()
-                df = pd.read_excel(input_excel_path, dtype=dtype_spec)
-                end_time = time.time()
-                logging.info(f"⚡ Volledig Excel read: {df.shape} in {end_time-start_time:.2f} sec")
-            df_original = df.copy()
-            
-            # DEBUG: Log de ruwe, onbewerkte headers (debug level)
-            logging.debug("=== STAP 1: RUWE HEADERS ===")
-            for i, col in enumerate(df.columns):
-                # Toon exacte string inclusief verborgen karakters
-                col_repr = repr(col)
-                logging.debug(f"Ruwe header {i}: {col_repr}")
-                # Toon specifiek problematische headers
-                if "hoogte" in str(col).lower() or "inhoud basiseenheid" in str(col).lower():
-                    logging.debug(f"PROBLEMATISCHE HEADER {i}: {col_repr}")
-            
-            # STAP 1.5: PREPROCESSING - Normaliseer nieuwe GHX template headers
-            logging.info("Normaliseren van nieuwe GHX template headers...")
-            original_columns = df.columns.tolist()
-            normalized_columns = []
-            
-            for col in original_columns:
-                # Check of dit een nieuwe template header is (bevat newlines en underscores scheidingslijn)
-                if isinstance(col, str) and '\n' in col and '_' in col:
-                    normalized = normalize_template_header(col)
-                    if normalized != col:
-                        logging.debug(f"Header genormaliseerd: {repr(col[:50])}... → {repr(normalized)}")
-                    normalized_columns.append(normalized)
+                logging.info("Incrementele validatie vereist de vectorized engine, volledige validatie")
+
+        if streaming:
+            # 2-5. Streaming: lees, map, schoon op en valideer per chunk met begrensd geheugen
+            logging.info(f"Streaming validatie van {probe} in chunks van {chunk_size or 'default'} rijen...")
+            report_progress("Lezen en valideren in chunks", 0.2)
+            from .streaming_validation import validate_excel_streaming
+            df, df_original, original_column_mapping, removed_rows_count, validation_output = validate_excel_streaming(
+                probe, header_mapping_config, config_for_validation, template_context,
+                dtype=dtype_spec, chunk_size=chunk_size, max_rows=max_rows,
+                engine=validation_engine, reference_lists=reference_lists, cache_writer=cache_writer,
+                incremental_run=incremental_run,
+            )
+            cache_writer = None  # door de streaming reader afgerond
+            results, filled_percentages, red_flag_messages, errors_per_field = validation_output
+        else:
+            # 2. Lees Excel in
+            logging.info(f"Lezen Excel bestand: {probe}")
+            report_progress("Excel lezen", 0.2)
+            try:
+                # Lees Excel in - limiteer rijen indien Quick Mode
+                logging.debug(f"🔍 DEBUG: max_rows parameter = {max_rows} (type: {type(max_rows)})")
+                if max_rows is not None:
+                    logging.info(f"✅ Quick Mode: limiteer tot {max_rows} rijen")
+                    start_time = time.time()
+                    df = probe.read(dtype=dtype_spec, nrows=max_rows)
+                    end_time = time.time()
+                    logging.info(f"⚡ Quick Mode Excel read: {df.shape} in {end_time-start_time:.2f} sec")
                 else:
-                    normalized_columns.append(col)
+                    logging.info(f"⚠️  Volledige bestand lezen (max_rows is None)")
+                    start_time = time.time()
+                    df = probe.read(dtype=dtype_spec)
+                    end_time = time.time()
+                    logging.info(f"⚡ Volledig Excel read: {df.shape} in {end_time-start_time:.2f} sec")
+                df_original = df.copy()
+                if cache_writer is not None:
+                    # Bewaar de geparste read (nog met originele headers) voor een volgende upload
+                    try:
+                        cache_writer.add_part(df_original)
+                        cache_writer.commit()
+                    except Exception as cache_error:
+                        logging.warning(f"Parse cache niet bijgewerkt: {cache_error}")
+                        cache_writer.abort()
+                    cache_writer = None
+            
+                # DEBUG: Log de ruwe, onbewerkte headers (debug level)
+                logging.debug("=== STAP 1: RUWE HEADERS ===")
+                for i, col in enumerate(df.columns):
+                    # Toon exacte string inclusief verborgen karakters
+                    col_repr = repr(col)
+                    logging.debug(f"Ruwe header {i}: {col_repr}")
+                    # Toon specifiek problematische headers
+                    if "hoogte" in str(col).lower() or "inhoud basiseenheid" in str(col).lower():
+                        logging.debug(f"PROBLEMATISCHE HEADER {i}: {col_repr}")
+            
+                # STAP 1.5: PREPROCESSING - Normaliseer nieuwe GHX template headers
+                logging.info("Normaliseren van nieuwe GHX template headers...")
+                original_columns = df.columns.tolist()
+                normalized_columns = []
+            
+                for col in original_columns:
+                    # Check of dit een nieuwe template header is (bevat newlines en underscores scheidingslijn)
+                    if isinstance(col, str) and '\n' in col and '_' in col:
+                        normalized = normalize_template_header(col)
+                        if normalized != col:
+                            logging.debug(f"Header genormaliseerd: {repr(col[:50])}... → {repr(normalized)}")
+                        normalized_columns.append(normalized)
+                    else:
+                        normalized_columns.append(col)
             
-            # Vervang de kolomnamen in de DataFrame
-            df.columns = normalized_columns
+                # Vervang de kolomnamen in de DataFrame
+                df.columns = normalized_columns
             
-            logging.info(f"Excel succesvol gelezen: {df.shape[0]} rijen, {df.shape[1]} kolommen.")
-        except Exception as e:
-            logging.error(f"Fout bij lezen Excel bestand: {e}")
-            raise # Gooi error door
+                logging.info(f"Excel succesvol gelezen: {df.shape[0]} rijen, {df.shape[1]} kolommen.")
+            except Exception as e:
+                logging.error(f"Fout bij lezen Excel bestand: {e}")
+                raise # Gooi error door
 
 
-        # 3. Headers mappen
-        logging.info("Mappen van headers...")
-        df, unrecognized, duplicates, original_column_mapping = map_headers(df, header_mapping_config, return_mapping=True)
-        logging.info(f"Header mapping voltooid. Onherkend: {len(unrecognized)}, Duplicaten: {len(duplicates)}.")
-        if unrecognized:
-             logging.warning(f"Onherkende headers gevonden: {unrecognized}")
-             # Hier zou je eventueel de lijst 'unrecognized' kunnen teruggeven of loggen
+            # 3. Headers mappen
+            logging.info("Mappen van headers...")
+            df, unrecognized, duplicates, original_column_mapping = map_headers(df, header_mapping_config, return_mapping=True)
+            logging.info(f"Header mapping voltooid. Onherkend: {len(unrecognized)}, Duplicaten: {len(duplicates)}.")
+            if unrecognized:
+                 logging.warning(f"Onherkende headers gevonden: {unrecognized}")
+                 # Hier zou je eventueel de lijst 'unrecognized' kunnen teruggeven of loggen
 
 
-        # 4. Data opschonen
-        logging.info("Opschonen DataFrame...")
-        df, removed_rows_count = clean_dataframe(df)
-        if df.empty:
-             logging.warning("DataFrame is leeg na opschonen.")
-             # Overweeg hier te stoppen of een leeg rapport te maken
-        else:
-             logging.info(f"DataFrame opgeschoond. Resterende rijen: {len(df)}")
+            # 4. Data opschonen
+            logging.info("Opschonen DataFrame...")
+            df, removed_rows_count = clean_dataframe(df)
+            if df.empty:
+                 logging.warning("DataFrame is leeg na opschonen.")
+                 # Overweeg hier te stoppen of een leeg rapport te maken
+            else:
+                 logging.info(f"DataFrame opgeschoond. Resterende rijen: {len(df)}")
         
-        # Voeg removed_rows_count toe aan template_context voor Sheet 7 rijnummering
-        if template_context:
-            template_context['removed_rows_count'] = removed_rows_count
+            # Voeg removed_rows_count toe aan template_context voor Sheet 7 rijnummering
+            if template_context:
+                template_context['removed_rows_count'] = removed_rows_count
 
 
-        # 5. Valideer data
-        logging.info("Starten validatie DataFrame...")
+            # 5. Valideer data
+            logging.info("Starten validatie DataFrame...")
+            report_progress("Valideren", 0.4)
         
-        # Gebruik native v20 als beschikbaar, anders v18
-        config_for_validation = validation_config_raw if json_version == "v20" else validation_config
-        
-        results, filled_percentages, red_flag_messages, errors_per_field = validate_dataframe(
-            df, config_for_validation, original_column_mapping, template_context
-        )
+            if incremental_run is not None:
+                from .incremental_validation import validate_dataframe_incremental
+                results, filled_percentages, red_flag_messages, errors_per_field = validate_dataframe_incremental(
+                    df, config_for_validation, original_column_mapping, template_context, incremental_run
+                )
+            else:
+                results, filled_percentages, red_flag_messages, errors_per_field = validate_dataframe(
+                    df, config_for_validation, original_column_mapping, template_context, engine=validation_engine,
+                    workers=validation_workers
+                )
+
+        if incremental_run is not None:
+            from .incremental_validation import save_run_state
+            save_run_state(incremental_state, incremental_run.to_state())
 
 
         # 6. Bepaal bestandsnaam en output directory voor het rapport
         report_base_name = original_input_filename # Gebruik de doorgegeven originele naam
         # Output directory strategie: submap in dezelfde map als input
-        output_dir_base = os.path.dirname(input_excel_path)
+        output_dir_base = os.path.dirname(probe.path) if probe.path else tempfile.gettempdir()
         # Maak een submap 'validation_reports' als die nog niet bestaat
         report_subdir = os.path.join(output_dir_base, "validation_reports")
         os.makedirs(report_subdir, exist_ok=True)
         # Voeg timestamp toe aan de mapnaam binnen de submap
-        output_dir_timestamped = os.path.join(report_subdir, "report_" + datetime.now().strftime("%Y%m%d_%H%M%S"))
-        os.makedirs(output_dir_timestamped, exist_ok=True)
+        output_dir_timestamped = _new_report_dir(report_subdir)
         logging.info(f"Output directory voor rapport: {output_dir_timestamped}")
 
 
-        # 7. Genereer rapport met alle benodigde argumenten
+        # 7. Machine-leesbare outputs (Parquet/JSON/NDJSON) uit dezelfde statistieken als het rapport
+        report_stats = None
+        written_outputs = {}
+        if any(fmt != "xlsx" for fmt in formats):
+            report_progress("Outputs schrijven", 0.65)
+            report_stats = prepare_report_stats(
+                results, df, ghx_mandatory_fields, errors_per_field, validation_config,
+                template_context=template_context, excel_path=probe, max_rows=max_rows, total_rows=total_rows,
+            )
+            written_outputs = write_report_outputs(
+                results, report_stats, output_dir_timestamped, report_base_name, formats,
+                processed_rows=len(df), total_rows=total_rows, max_rows=max_rows,
+            )
+            if output_paths is not None:
+                output_paths.update(written_outputs)
+        if "xlsx" not in formats:
+            output_path = next((written_outputs[fmt] for fmt in formats if fmt in written_outputs), None)
+            if output_path is None:
+                logging.error("Geen van de gevraagde outputs kon geschreven worden.")
+            return output_path
+
+        # 8. Genereer rapport met alle benodigde argumenten
         logging.info("Genereren validatierapport...")
+        report_progress("Rapport genereren", 0.7)
+        # Zelfde veldselectie als de validatie, ook voor de dataset- en mapping sheets
+        active_fields = build_active_field_plan(validation_config, df.columns, template_context)
         # Roep de geïmporteerde functie aan
         output_path = genereer_rapport(
             validation_results=results,
@@ -2899,13 +3512,18 @@ def validate_pricelist(
             summary_data=filled_percentages,  # Doorgeven van summary_data
             validation_config=validation_config,  # Genormaliseerde config in plaats van validation_config_raw
             template_context=template_context,  # Template Generator context voor rapportage
-            excel_path=input_excel_path,  # Pad naar origineel Excel bestand voor template detectie
+            excel_path=probe,  # Geopende werkmap (probe) van het origineel voor template detectie
             max_rows=max_rows,
             total_rows=total_rows,
+            report_stats=report_stats,
+            report_profile=report_profile,
+            active_fields=active_fields,
         )
 
         if output_path:
             logging.info(f"Rapport succesvol gegenereerd: {output_path}")
+            if output_paths is not None:
+                output_paths["xlsx"] = output_path
             return output_path
         else:
             logging.error("Genereren van rapport is mislukt (genereer_rapport gaf None terug).")
@@ -2920,6 +3538,12 @@ def validate_pricelist(
     except Exception as e:
         logging.error(f"Een onverwachte fout is opgetreden tijdens validate_pricelist: {e}", exc_info=True)
         raise # Gooi de error opnieuw op zodat Streamlit het kan tonen
+    finally:
+        if cache_writer is not None:
+            cache_writer.abort()
+        # Alleen een zelf geopende probe sluiten; een doorgegeven probe is van de aanroeper
+        if owns_probe and probe is not None:
+            probe.close()
 
 def debug_header_mapping(input_excel_path: str) -> Dict[str, Any]:
     """
@@ -1,24 +1,43 @@
 # rapport_utils.py
 
+import numpy as np
 import pandas as pd
 import logging
 import os
 import json
 import xlsxwriter  # Nodig voor pd.ExcelWriter engine en grafieken
 from datetime import datetime
-from typing import Dict, List, Tuple, Any  # Type hints zijn goed om te behouden
+from typing import Dict, List, Tuple, Any, Union  # Type hints zijn goed om te behouden
+
+from .config_manager import load_json_config
+from .report_matrix import (
+    CATEGORY_CORRECT,
+    CATEGORY_EMPTY_MANDATORY,
+    CATEGORY_ERROR,
+    CATEGORY_ERROR_OPTIONAL,
+    CATEGORY_UOM_CONFLICT,
+    build_cell_matrix,
+    column_color_counts,
+    dataset_categories,
+    display_values,
+    iter_format_runs,
+)
+from .report_stats import ReportStats, compute_report_stats, errors_without_red_flags
+from .validation_log import append_validation_log, default_store_path
+from .validation_results import results_dataframe
+from .workbook_probe import WorkbookProbe, open_probe
 
 # -----------------------------
 # HELPER FUNCTIONS
 # -----------------------------
 
-def detect_data_start_row(excel_path: str) -> int:
+def detect_data_start_row(excel_path: Union[str, WorkbookProbe]) -> int:
     """
     Detecteert op welke rij de data daadwerkelijk begint in het Excel bestand.
     Voor TG templates kan dit rij 4 zijn, voor DT templates rij 3.
     
     Args:
-        excel_path: Pad naar het Excel bestand
+        excel_path: Pad naar het Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         int: Rijnummer waar data begint (1-indexed, zoals Excel)
@@ -27,7 +46,7 @@ def detect_data_start_row(excel_path: str) -> int:
         logging.info(f"DEBUG Sheet 7: Detecteer data start row voor {excel_path}")
         
         # Lees de eerste paar rijen om de structuur te analyseren
-        df_peek = pd.read_excel(excel_path, nrows=10, header=None)
+        df_peek = open_probe(excel_path).head(10, header=None)
         
         # Zoek naar de eerste rij die echte data bevat
         # Data begint meestal na de header rij
@@ -61,12 +80,19 @@ def detect_data_start_row(excel_path: str) -> int:
 # NEW INTUITIVE SCORE CALCULATION
 # -----------------------------
 
+# (pad, mtime) -> geladen UOM penalty config; alleen opnieuw lezen als het bestand wijzigt
+_UOM_PENALTY_CONFIG_CACHE = {}
+
 def load_uom_penalty_config():
-    """Laad UOM penalty configuratie."""
+    """Laad UOM penalty configuratie (gecachet zolang het bestand niet wijzigt)."""
     try:
         config_path = os.path.join(os.path.dirname(__file__), '..', 'uom_penalty_config.json')
-        with open(config_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        cache_key = (os.path.abspath(config_path), os.path.getmtime(config_path))
+        if cache_key not in _UOM_PENALTY_CONFIG_CACHE:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                _UOM_PENALTY_CONFIG_CACHE.clear()
+                _UOM_PENALTY_CONFIG_CACHE[cache_key] = json.load(f)
+        return _UOM_PENALTY_CONFIG_CACHE[cache_key]
     except Exception as e:
         logging.error(f"Kon UOM penalty config niet laden: {e}")
         # Fallback config
@@ -76,7 +102,7 @@ def load_uom_penalty_config():
             "template_penalties": {"TG": 0, "DT": 0, "AT": -25}
         }
 
-def calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows):
+def calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows, code_counts=None):
     """
     Berekent UOM penalty's op basis van foutcodes en hun frequentie.
     
@@ -84,6 +110,7 @@ def calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows):
         df_errors_mand: DataFrame met mandatory field errors
         df_errors_non_mand: DataFrame met non-mandatory field errors  
         total_rows: Totaal aantal rijen in dataset
+        code_counts: Voorgetelde fouten per code (ReportStats); de DataFrames worden dan genegeerd
         
     Returns:
         int: Totale penalty punten (negatief getal)
@@ -92,8 +119,11 @@ def calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows):
         config = load_uom_penalty_config()
         uom_codes = set(config["uom_penalty_codes"])
         penalty_struct = config["penalty_structure"]
-        
-        total_penalty = 0
+
+        if code_counts is not None:
+            if total_rows == 0:
+                return 0
+            return _uom_penalty_for_counts(code_counts.items(), uom_codes, penalty_struct, total_rows)
         
         # Combineer alle errors
         all_errors = pd.concat([df_errors_mand, df_errors_non_mand], ignore_index=True) if len(df_errors_mand) > 0 or len(df_errors_non_mand) > 0 else pd.DataFrame()
@@ -117,27 +147,32 @@ def calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows):
             
         code_counts = all_errors[code_column].value_counts()
         
-        for error_code, count in code_counts.items():
-            if str(error_code) in uom_codes:
-                error_percentage = (count / total_rows) * 100
-                
-                if error_percentage >= 25:
-                    penalty = penalty_struct["penalty_25_percent"]
-                elif error_percentage >= 10:
-                    penalty = penalty_struct["penalty_10_percent"]
-                else:
-                    penalty = penalty_struct["penalty_single"]
-                    
-                total_penalty += penalty
-                logging.info(f"UOM penalty - Code {error_code}: {count} fouten ({error_percentage:.1f}%) → {penalty} punten")
-        
-        return total_penalty
+        return _uom_penalty_for_counts(code_counts.items(), uom_codes, penalty_struct, total_rows)
         
     except Exception as e:
         logging.error(f"Fout bij UOM penalty berekening: {e}")
         return 0
 
-def calculate_new_intuitive_score(M_found, total_mandatory, df_errors_mand, df_errors_non_mand, total_rows, template_type, volledigheids_percentage=None, juistheid_percentage=None):
+def _uom_penalty_for_counts(code_counts, uom_codes, penalty_struct, total_rows):
+    """Telt de penalty's op voor (foutcode, aantal) paren."""
+    total_penalty = 0
+    for error_code, count in code_counts:
+        if str(error_code) in uom_codes:
+            error_percentage = (count / total_rows) * 100
+            
+            if error_percentage >= 25:
+                penalty = penalty_struct["penalty_25_percent"]
+            elif error_percentage >= 10:
+                penalty = penalty_struct["penalty_10_percent"]
+            else:
+                penalty = penalty_struct["penalty_single"]
+                
+            total_penalty += penalty
+            logging.info(f"UOM penalty - Code {error_code}: {count} fouten ({error_percentage:.1f}%) → {penalty} punten")
+    
+    return total_penalty
+
+def calculate_new_intuitive_score(M_found, total_mandatory, df_errors_mand, df_errors_non_mand, total_rows, template_type, volledigheids_percentage=None, juistheid_percentage=None, code_counts=None):
     """
     Berekent de nieuwe intuïtieve score volgens de formule:
     Core = ROUND((M% × J%) ÷ 100) - UOM_Penalty's - Template_Penalty
@@ -151,6 +186,7 @@ def calculate_new_intuitive_score(M_found, total_mandatory, df_errors_mand, df_e
         template_type: Template type (TG, DT, AT)
         volledigheids_percentage: Voorberekend volledigheids percentage (optioneel)
         juistheid_percentage: Voorberekend juistheid percentage (optioneel)
+        code_counts: Voorgetelde fouten per code voor de UOM penalty's (optioneel)
         
     Returns:
         dict: Score components (M_percentage, J_percentage, core_score, penalties, final_score, grade)
@@ -193,7 +229,7 @@ def calculate_new_intuitive_score(M_found, total_mandatory, df_errors_mand, df_e
         core_score = round((M_percentage * J_percentage) / 100)
         
         # UOM Penalty's
-        uom_penalties = calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows)
+        uom_penalties = calculate_uom_penalties(df_errors_mand, df_errors_non_mand, total_rows, code_counts=code_counts)
         
         # Template Penalty
         template_penalty = config["template_penalties"].get(template_type, 0)
@@ -245,6 +281,140 @@ def calculate_new_intuitive_score(M_found, total_mandatory, df_errors_mand, df_e
             'grade': 'F'
         }
 
+def build_report_stats(
+    df: pd.DataFrame,
+    df_errors: pd.DataFrame,
+    ghx_mandatory_fields: List[str],
+    errors_per_field: Dict[str, int],
+    config: dict,
+    template_type: str,
+    template_context: dict = None,
+    max_rows: int = None,
+    total_rows: int = None,
+) -> ReportStats:
+    """
+    Bepaalt de verplichte/optionele kolommen voor dit template en berekent de ReportStats.
+
+    Gedeeld door genereer_rapport en de machine-leesbare outputs (report_exports.py),
+    zodat de score in beide gelijk is, ook als er geen Excel rapport gemaakt wordt.
+    """
+    # Check voor v20 vs v18 structuur voor non_mandatory_fields
+    if "field_validations" in config:
+        all_fields = list(config.get("field_validations", {}).keys())
+    else:
+        all_fields = list(config.get("fields", {}).keys())
+    non_mandatory_fields = [f for f in all_fields if f not in ghx_mandatory_fields]
+
+    # Voor TG templates: gebruik template_context mandatory_list
+    # Voor ALT/DT templates: gebruik ghx_mandatory_fields
+    if template_type == "TG" and template_context and "decisions" in template_context:
+        mandatory_list = template_context["decisions"]["mandatory_list"]
+    else:
+        mandatory_list = ghx_mandatory_fields
+    present_mandatory_columns = [f for f in mandatory_list if f in df.columns]
+    missing_mandatory_columns = [f for f in mandatory_list if f not in df.columns]
+
+    invalid_values = [str(val).lower() for val in config.get("invalid_values", [])]
+
+    # Bij Quick Mode: gebruik verwerkte rijen, anders total_rows
+    # BELANGRIJK: Gebruik len(df) voor het maximum aantal verplichte velden, niet total_rows!
+    processed_rows = len(df)
+    if total_rows is None:
+        total_rows = processed_rows
+    rows_for_calculation = processed_rows if max_rows is not None else total_rows
+    total_possible_mandatory_fields = len(mandatory_list) * processed_rows
+
+    return compute_report_stats(
+        df,
+        df_errors,
+        errors_per_field,
+        ghx_mandatory_fields,
+        non_mandatory_fields,
+        present_mandatory_columns,
+        missing_mandatory_columns,
+        invalid_values,
+        rows_for_calculation,
+        total_possible_mandatory_fields,
+        template_type,
+        calculate_new_intuitive_score,
+    )
+
+def prepare_report_stats(
+    validation_results: list,
+    df: pd.DataFrame,
+    ghx_mandatory_fields: List[str],
+    errors_per_field: Dict[str, int],
+    validation_config: dict,
+    template_context: dict = None,
+    excel_path: Union[str, WorkbookProbe] = None,
+    max_rows: int = None,
+    total_rows: int = None,
+) -> ReportStats:
+    """
+    ReportStats met dezelfde template detectie als genereer_rapport, zonder Excel rapport.
+    Het resultaat kan als report_stats aan genereer_rapport doorgegeven worden.
+    """
+    template_type, _ = determine_template_type(df, excel_path)
+    df_errors = errors_without_red_flags(results_dataframe(validation_results))
+    return build_report_stats(
+        df, df_errors, ghx_mandatory_fields, errors_per_field or {}, validation_config, template_type,
+        template_context=template_context, max_rows=max_rows, total_rows=total_rows,
+    )
+
+# Helper functies voor Template Generator header matching
+def normalize_header_for_matching(header):
+    """Normalize complex Template Generator headers to match mandatory field names"""
+    if pd.isna(header) or not str(header).strip():
+        return header
+
+    # Voor Template Generator: neem eerste regel en clean het op
+    cleaned = str(header).split("\n")[0].strip()
+
+    # Verwijder trailing spaties en extra karakters
+    cleaned = cleaned.rstrip()
+
+    # Specifieke fixes voor bekende problemen
+    # Fix: "verpakkingseenheid" -> "Verpakkingseenheid" (kapitaal V)
+    if "verpakkingseenheid" in cleaned.lower():
+        cleaned = cleaned.replace("verpakkingseenheid", "Verpakkingseenheid")
+        cleaned = cleaned.replace("VERPAKKINGSEENHEID", "Verpakkingseenheid")
+
+    return cleaned
+
+def find_matching_column(mandatory_field, df_columns):
+    """Find a Template Generator column that matches the mandatory field name"""
+    # Probeer eerst exacte match
+    if mandatory_field in df_columns:
+        return mandatory_field
+
+    # Voor Template Generator: probeer normalized matching
+    normalized_mandatory = mandatory_field.strip()
+
+    for col in df_columns:
+        normalized_col = normalize_header_for_matching(col)
+        if normalized_col == normalized_mandatory:
+            return col
+
+        # Extra check: probeer ook zonder haakjes inhoud te matchen
+        # bijv. "Brutoprijs" zou matchen met "Brutoprijs (extra tekst)"
+        base_mandatory = normalized_mandatory.split("(")[0].strip()
+        base_col = normalized_col.split("(")[0].strip() 
+        if base_mandatory and base_col == base_mandatory:
+            return col
+
+    return None
+
+def match_template_mandatory_columns(mandatory_fields: List[str], df_columns) -> Tuple[List[str], List[str]]:
+    """Splitst de TG verplichte velden in (gevonden, ontbrekend) via find_matching_column."""
+    matched_fields = []
+    missing_fields = []
+    for mandatory_field in mandatory_fields:
+        if find_matching_column(mandatory_field, df_columns):
+            matched_fields.append(mandatory_field)
+        else:
+            missing_fields.append(mandatory_field)
+    return matched_fields, missing_fields
+
 # -----------------------------
 # EXCEL ERROR SUPPRESSION HELPER
 # -----------------------------
@@ -290,7 +460,7 @@ def suppress_excel_errors(worksheet, max_row=1000, max_col=50):
 # TEMPLATE DETECTIE FUNCTIES  
 # -----------------------------
 
-def has_template_generator_stamp(df: pd.DataFrame, excel_path: str = None) -> bool:
+def has_template_generator_stamp(df: pd.DataFrame, excel_path: Union[str, WorkbookProbe] = None) -> bool:
     """
     Detecteert of een DataFrame een Template Generator stamp heeft.
     
@@ -298,14 +468,11 @@ def has_template_generator_stamp(df: pd.DataFrame, excel_path: str = None) -> bo
     """
     if excel_path:
         try:
-            import openpyxl
-            wb = openpyxl.load_workbook(excel_path, data_only=True, read_only=True)
+            probe = open_probe(excel_path)
             
             # Check voor _GHX_META sheet en GHX_STAMP named range
-            has_meta_sheet = "_GHX_META" in wb.sheetnames
-            has_stamp_range = "GHX_STAMP" in wb.defined_names
-            
-            wb.close()
+            has_meta_sheet = "_GHX_META" in probe.sheet_names
+            has_stamp_range = "GHX_STAMP" in probe.defined_names
             
             # Template Generator stamp vereist beide
             if has_meta_sheet and has_stamp_range:
@@ -427,7 +594,7 @@ def is_old_template(df: pd.DataFrame) -> bool:
     """
     return not is_new_template(df)
 
-def determine_template_type(df: pd.DataFrame, excel_path: str = None) -> Tuple[str, Dict[str, Any]]:
+def determine_template_type(df: pd.DataFrame, excel_path: Union[str, WorkbookProbe] = None) -> Tuple[str, Dict[str, Any]]:
     """
     Bepaalt het template type op basis van DataFrame kolommen en extraheert metadata.
     
@@ -445,7 +612,7 @@ def determine_template_type(df: pd.DataFrame, excel_path: str = None) -> Tuple[s
         from .price_tool import extract_template_generator_context
         
         if excel_path:
-            # Gebruik de nieuwe implementatie uit price_tool.py
+            # Gebruik de nieuwe implementatie uit price_tool.py (pad of WorkbookProbe)
             template_type = new_determine_template_type(excel_path)
             
             if template_type == 'TG':
@@ -589,20 +756,145 @@ ENABLE_VALIDATION_LOG = True  # True = logging aan, False = logging uit
 # in de omgeving waar de code draait! Een hardcoded pad is meestal niet ideaal.
 # Voor nu nemen we het pad uit je notebook over als voorbeeld.
 VALIDATION_LOG_FILE = "/Users/ghxnielscroiset/Library/CloudStorage/OneDrive-GlobalHealthcareExchange/GHX ValidatieRapporten/validaties_overzicht.xlsx"
+# Append-only store waarin elke validatie één regel toevoegt (SQLite, of NDJSON bij een
+# .ndjson pad); GHX_VALIDATION_LOG_STORE overschrijft het pad. VALIDATION_LOG_FILE is het
+# opgemaakte overzicht dat export_validation_log daaruit rendert.
+VALIDATION_LOG_STORE = default_store_path(VALIDATION_LOG_FILE)
 
 # Constanten voor rapportage limieten (uit notebook Code 5)
 ERROR_LIMIT = 50000  # Maximaal aantal errors per sheet
 ERROR_START = 0  # Begin vanaf deze rij (voor slicing bij limiet)
 ERROR_END = ERROR_LIMIT  # Eindig bij deze rij (voor slicing bij limiet) # Aangepast voor duidelijkheid
 
+# Werkbladen waarvan de grootte meegroeit met het aantal rijen (3, 5 en 7) in xlsxwriter
+# constant_memory modus schrijven: elke rij gaat direct naar een tijdelijk bestand in plaats
+# van dat alle cellen tot het sluiten in het geheugen blijven. GHX_REPORT_CONSTANT_MEMORY=0 zet dit uit.
+REPORT_CONSTANT_MEMORY = os.environ.get("GHX_REPORT_CONSTANT_MEMORY", "1") != "0"
+# Sheet 7 rendert per blok van zoveel rijen (begrenst de vooraf berekende waarden array)
+DATASET_ROW_BLOCK = 10000
+
+# Rapport profielen: welke sheets genereer_rapport bouwt (in rapportvolgorde). De data
+# voorbereiding van een sheet (fout tabellen, cel matrix, header vergelijking) draait alleen
+# als die sheet in het profiel zit. GHX_REPORT_PROFILE kiest het default profiel.
+REPORT_SHEETS = (
+    "dashboard",          # 1. Dashboard
+    "inleiding",          # 2. Inleiding
+    "verplichte_fouten",  # 3. Verplichte Fouten
+    "verplichte_perc",    # 4. Verplichte %
+    "optionele_fouten",   # 5. Optionele Fouten
+    "optionele_perc",     # 6. Optionele %
+    "dataset",            # 7. Dataset Validatie
+    "mapping",            # 8. Kolom Mapping (alleen O/AT templates)
+)
+REPORT_PROFILES = {
+    "full": REPORT_SHEETS,
+    "summary": ("dashboard", "inleiding", "verplichte_perc", "optionele_perc"),
+    "errors-only": ("dashboard", "verplichte_fouten", "optionele_fouten"),
+    "dataset-only": ("dataset",),
+}
+DEFAULT_REPORT_PROFILE = os.environ.get("GHX_REPORT_PROFILE", "full")
+
+
+def resolve_report_profile(report_profile: str = None) -> Tuple[str, ...]:
+    """
+    Sheets van een rapport profiel (None = GHX_REPORT_PROFILE).
+
+    Raises:
+        ValueError: bij een onbekend profiel
+    """
+    profile = (report_profile or DEFAULT_REPORT_PROFILE).strip().lower()
+    if profile not in REPORT_PROFILES:
+        raise ValueError(f"Onbekend rapport profiel '{profile}' (kies uit {', '.join(REPORT_PROFILES)})")
+    return REPORT_PROFILES[profile]
+
+# Tabel stijlen van de foutsheets nagebootst voor constant_memory werkbladen
+# (add_table wordt daar niet ondersteund): (header kleur, band kleur)
+TABLE_STYLE_COLORS = {
+    "Table Style Medium 7": ("#F79646", "#FDE9D9"),
+    "Table Style Medium 10": ("#C0504D", "#F2DCDB"),
+}
+
+
+def add_report_worksheet(workbook, name: str, constant_memory: bool = False):
+    """
+    Voegt een werkblad toe aan het rapport, optioneel in constant_memory modus.
+
+    xlsxwriter leest de constant_memory optie van de workbook bij add_worksheet; de optie
+    wordt daarom alleen voor dit werkblad aangezet. Cellen van zo'n werkblad moeten strikt
+    rij voor rij (oplopend) geschreven worden; add_table wordt niet ondersteund.
+    """
+    previous = workbook.constant_memory
+    workbook.constant_memory = constant_memory
+    try:
+        return workbook.add_worksheet(name)
+    finally:
+        workbook.constant_memory = previous
+
+
+def write_error_table(workbook, worksheet, df_display: pd.DataFrame, header_row: int, table_style: str,
+                      fmt_col_c, fmt_col_d, row_height: int = 15) -> None:
+    """
+    Schrijft een foutentabel (sheet 3 en 5) rij voor rij: header op header_row, daarna de data.
+
+    Kolom C en D krijgen hun eigen opmaak en een lege Veldwaarde wordt een spatie. Normale
+    werkbladen krijgen een Excel tabel; constant_memory werkbladen een header in de kleur
+    van de tabel stijl, autofilter en gebande rijen via conditional formatting.
+    """
+    constant_memory = getattr(worksheet, "constant_memory", False)
+    n_rows, n_cols = df_display.shape
+    last_row = header_row + n_rows
+
+    if constant_memory:
+        header_color, band_color = TABLE_STYLE_COLORS.get(table_style, ("#C0504D", "#F2DCDB"))
+        fmt_header = workbook.add_format({"bold": True, "font_color": "#FFFFFF", "bg_color": header_color})
+        for col_idx, header in enumerate(df_display.columns):
+            worksheet.write(header_row, col_idx, header, fmt_header)
+
+    for offset, values in enumerate(df_display.itertuples(index=False, name=None)):
+        excel_row = header_row + 1 + offset
+        for col_idx, value in enumerate(values):
+            if col_idx == 2:
+                worksheet.write(excel_row, col_idx, value, fmt_col_c)
+            elif col_idx == 3:
+                if value == '':
+                    worksheet.write_string(excel_row, col_idx, ' ', fmt_col_d)  # Spatie als leeg
+                else:
+                    worksheet.write(excel_row, col_idx, value, fmt_col_d)
+            else:
+                worksheet.write(excel_row, col_idx, value)
+        # Vaste rijhoogte tegen auto-resize; in constant_memory modus is 15 al de standaard en
+        # zou een set_row per rij het geheugen weer laten meegroeien
+        if not constant_memory:
+            worksheet.set_row(excel_row, row_height)
+
+    if constant_memory:
+        worksheet.autofilter(header_row, 0, last_row, n_cols - 1)
+        if n_rows:
+            worksheet.conditional_format(header_row + 1, 0, last_row, n_cols - 1, {
+                "type": "formula",
+                "criteria": f"=MOD(ROW()-{header_row + 1},2)=1",
+                "format": workbook.add_format({"bg_color": band_color}),
+            })
+    else:
+        worksheet.add_table(
+            header_row,
+            0,
+            last_row,
+            n_cols - 1,
+            {
+                "columns": [{"header": col} for col in df_display.columns],
+                "style": table_style,
+                "header_row": True,
+            },
+        )
+
 # --- Hulpfuncties (Overgenomen uit Code 5) ---
 
 
 def load_validation_config(json_path):
-    """Laad validatieconfiguratie vanuit JSON-bestand."""
+    """Laad validatieconfiguratie vanuit JSON-bestand (via de config registry, read-only)."""
     try:
-        with open(json_path, "r", encoding="utf-8") as file:
-            return json.load(file)
+        return load_json_config(json_path)
     except FileNotFoundError:
         logging.error(f"Validatie configuratiebestand niet gevonden op {json_path}")
         # Je zou hier kunnen kiezen om een lege config terug te geven of de error te raisen
@@ -634,8 +926,8 @@ def update_validation_log(
     total_leeg_non_mand=0,
 ):
     """
-    Houdt een overzicht bij van alle uitgevoerde validaties in een centraal Excel-bestand.
-    Gebruikt nu globale constanten ENABLE_VALIDATION_LOG en VALIDATION_LOG_FILE.
+    Houdt een overzicht bij van alle uitgevoerde validaties in het centrale logboek.
+    Gebruikt de globale constanten ENABLE_VALIDATION_LOG en VALIDATION_LOG_STORE.
     """
     if not ENABLE_VALIDATION_LOG:
         return
@@ -724,80 +1016,10 @@ def update_validation_log(
     }
 
     try:
-        if os.path.exists(VALIDATION_LOG_FILE):
-            try:
-                existing_df = pd.read_excel(VALIDATION_LOG_FILE)
-                # Zorg dat alle kolommen bestaan, voeg toe indien nodig
-                for col in new_row_data.keys():
-                    if col not in existing_df.columns:
-                        existing_df[col] = pd.NA  # Gebruik NA voor missende waarden
-            except Exception as e:
-                logging.warning(
-                    f"Kon bestaand validatielogboek niet lezen ({VALIDATION_LOG_FILE}): {e}"
-                )
-                existing_df = pd.DataFrame(columns=list(new_row_data.keys()))
-        else:
-            existing_df = pd.DataFrame(columns=list(new_row_data.keys()))
-
-        # Voeg de nieuwe regel toe
-        new_row_df = pd.DataFrame([new_row_data])
-
-        # Zorg dat kolomvolgorde consistent is
-        combined_df = pd.concat([existing_df, new_row_df], ignore_index=True)[
-            list(new_row_data.keys())
-        ]
-
-        # Sorteer op datum (nieuwste eerst)
-        if "Datum" in combined_df.columns:
-            combined_df["Datum"] = pd.to_datetime(
-                combined_df["Datum"]
-            )  # Zorg voor datetime object
-            combined_df = combined_df.sort_values(
-                by="Datum", ascending=False
-            ).reset_index(drop=True)
-            # Converteer datum terug naar string voor Excel weergave indien gewenst
-            combined_df["Datum"] = combined_df["Datum"].dt.strftime("%Y-%m-%d %H:%M:%S")
-
-        # Schrijf naar Excel met opmaak
-        with pd.ExcelWriter(VALIDATION_LOG_FILE, engine="xlsxwriter") as writer:
-            combined_df.to_excel(writer, index=False, sheet_name="Validatie Overzicht")
-
-            # Pas kolombreedtes aan (voorbeeld)
-            worksheet = writer.sheets["Validatie Overzicht"]
-            # Zet breedtes zoals in je notebook of pas aan naar behoefte
-            worksheet.set_column("A:A", 20)  # Datum
-            worksheet.set_column("B:B", 40)  # Bestandsnaam
-            worksheet.set_column("C:C", 12)  # Score
-            # ... voeg hier de rest van je kolombreedte instellingen toe ...
-            worksheet.set_column("D:W", 18)  # Generieke breedte voor de rest
-
-            # Header opmaak (GHX oranje)
-            header_format = writer.book.add_format(
-                {
-                    "bold": True,
-                    "bg_color": "#f79645",
-                    "font_color": "white",
-                    "border": 1,
-                }
-            )
-            for col_num, value in enumerate(combined_df.columns.values):
-                worksheet.write(0, col_num, value, header_format)
-
-            # Voeg tabel stijl toe
-            (max_row, max_col) = combined_df.shape
-            worksheet.add_table(
-                0,
-                0,
-                max_row,
-                max_col - 1,
-                {
-                    "columns": [{"header": col} for col in combined_df.columns],
-                    "style": "Table Style Medium 2",  # Stijl kan aangepast
-                    "first_column": True,  # Benadruk eerste kolom
-                },
-            )
-
-        logging.info(f"Validatie toegevoegd aan logboek: {VALIDATION_LOG_FILE}")
+        # Eén insert in de append-only store; het opgemaakte overzicht (VALIDATION_LOG_FILE)
+        # wordt op verzoek gerenderd met export_validation_log
+        store_path = append_validation_log(new_row_data, VALIDATION_LOG_STORE)
+        logging.info(f"Validatie toegevoegd aan logboek: {store_path}")
 
     except Exception as e:
         logging.error(f"Fout bij het bijwerken van het validatielogboek: {e}")
@@ -813,8 +1035,22 @@ def add_colored_dataset_sheet(
     validation_config=None,
     template_context=None,
     excel_path=None,
+    constant_memory=False,
+    cell_matrix=None,
+    active_fields=None,
 ):
-    """Voeg een sheet toe met de volledige dataset in kleurcodering."""
+    """
+    Voeg een sheet toe met de volledige dataset in kleurcodering.
+
+    cell_matrix is de cel matrix uit report_matrix.build_cell_matrix; genereer_rapport
+    bouwt die één keer en deelt hem met de dashboard chart.
+
+    active_fields is het ActiveFieldPlan van de validatie; bij Template Generator bestanden
+    toont de sheet dan precies de gevalideerde kolommen (zonder ingeklapte velden).
+
+    Alle cellen worden strikt rij voor rij geschreven (legenda, waarschuwing, header, data),
+    zodat het werkblad met constant_memory=True direct naar een tijdelijk bestand stroomt.
+    """
     # Gebruik de doorgegeven validation_config of val terug op laden van bestand
     if validation_config:
         config = validation_config
@@ -843,7 +1079,7 @@ def add_colored_dataset_sheet(
     logging.info("Genereren Dataset Validatie sheet voor alle template types.")
 
     try:
-        worksheet = workbook.add_worksheet("7. Dataset Validatie")
+        worksheet = add_report_worksheet(workbook, "7. Dataset Validatie", constant_memory)
         
         # Onderdruk Excel groene driehoekjes
         suppress_excel_errors(worksheet, max_row=len(df)+10, max_col=len(df.columns)+5)
@@ -932,76 +1168,24 @@ def add_colored_dataset_sheet(
         # Stel kolom A breedte in (25)
         worksheet.set_column(0, 0, 25)
         
-        # Legenda
-        worksheet.write("A1", "Legenda:", legenda_title_format)
-        worksheet.write("A2", "Correct/Optioneel leeg", correct_format_legend)
-        worksheet.write("A3", "Foutief ingevuld (verplicht)", error_format_legend)
-        worksheet.write("A4", "Foutief ingevuld/Flags", error_optional_format_legend)
-        worksheet.write("A5", "Verplicht veld leeg", empty_mandatory_format_legend)
-        worksheet.write("A6", "UOM-relatie conflict", uom_relation_error_format_legend)
         start_row = 7
 
-        # Maak error lookups
-        error_lookup = {}  # Voor normale fouten
-        flag_lookup = {}  # Voor flags (speciale roze kleur)
-        uom_relation_error_lookup = {}  # Voor code 724, 801, 805 fouten (UOM relatie conflicten)
-
-        for error in validation_results:
-            if error["GHX Kolom"] == "RED FLAG":
-                continue
-            # Gebruik dezelfde rij index logica als in validate_dataframe
-            row_idx = error["Rij"] - 3
-            col_name = error["GHX Kolom"]
-            error_code = error.get("code", "")
-
-            if col_name in df.columns:
-                col_idx = df.columns.get_loc(col_name)
-                if 0 <= row_idx < len(df):
-                    # UOM relatie fouten (724, 801, 805) krijgen speciale behandeling
-                    # Voor codes 801 en 805 moeten we beide gerelateerde velden kleuren
-                    if error_code in ["724", "801", "805"]:
-                        if row_idx not in uom_relation_error_lookup:
-                            uom_relation_error_lookup[row_idx] = set()
-                        uom_relation_error_lookup[row_idx].add(col_idx)
-                        
-                        # Voor code 801 (UOM match): kleur ook het gerelateerde UOM veld
-                        if error_code == "801":
-                            if col_name == "UOM Code Verpakkingseenheid" and "UOM Code Basiseenheid" in df.columns:
-                                related_col_idx = df.columns.get_loc("UOM Code Basiseenheid")
-                                uom_relation_error_lookup[row_idx].add(related_col_idx)
-                            elif col_name == "UOM Code Basiseenheid" and "UOM Code Verpakkingseenheid" in df.columns:
-                                related_col_idx = df.columns.get_loc("UOM Code Verpakkingseenheid")
-                                uom_relation_error_lookup[row_idx].add(related_col_idx)
-                        
-                        # Voor code 805 (Content match): kleur ook het gerelateerde Inhoud veld
-                        elif error_code == "805":
-                            if col_name == "Inhoud Verpakkingseenheid" and "Inhoud Basiseenheid" in df.columns:
-                                related_col_idx = df.columns.get_loc("Inhoud Basiseenheid")
-                                uom_relation_error_lookup[row_idx].add(related_col_idx)
-                            elif col_name == "Inhoud Basiseenheid" and "Inhoud Verpakkingseenheid" in df.columns:
-                                related_col_idx = df.columns.get_loc("Inhoud Verpakkingseenheid")
-                                uom_relation_error_lookup[row_idx].add(related_col_idx)
-                    else:
-                        # Check of dit een flag is
-                        error_type = error.get("type", "")
-                        if error_type == "flag":
-                            # Flags krijgen speciale behandeling
-                            if row_idx not in flag_lookup:
-                                flag_lookup[row_idx] = set()
-                            flag_lookup[row_idx].add(col_idx)
-                        else:
-                            # Normale fouten (rejection/correction)
-                            if row_idx not in error_lookup:
-                                error_lookup[row_idx] = set()
-                            error_lookup[row_idx].add(col_idx)
+        # Cel matrix (gedeeld met de dashboard chart); alleen zelf bouwen als die niet is meegegeven
+        if cell_matrix is None:
+            cell_matrix = build_cell_matrix(
+                df, validation_results, ghx_mandatory_fields, validation_config if validation_config else config
+            )
 
         # Bepaal welke kolommen zichtbaar zijn (Template Generator filtering)
         visible_columns = list(df.columns)
         if template_context and template_context.get("decisions"):
-            decisions = template_context.get("decisions", {})
-            visible_list = decisions.get("visible_list", [])
-            # Filter kolommen gebaseerd op visible_list uit Template Generator  
-            visible_columns = [col for col in df.columns if col in visible_list or col == "Legenda:"]
+            if active_fields is not None:
+                visible_set = frozenset(field.name for field in active_fields.fields)
+            else:
+                decisions = template_context.get("decisions", {})
+                visible_set = frozenset(decisions.get("visible_list", []))
+            # Filter kolommen gebaseerd op de Template Generator velden
+            visible_columns = [col for col in df.columns if col in visible_set or col == "Legenda:"]
             # Template Generator kolom filtering toegepast
         else:
             # Template Generator filtering overgeslagen
@@ -1010,18 +1194,17 @@ def add_colored_dataset_sheet(
         # Filter uit instructie/algemene tekst kolommen die niet in dataset horen
         visible_columns = [col for col in visible_columns if not col.startswith("ALGEMEEN")]
         
-        # Schrijf alleen zichtbare headers
-        # Voeg eerst de rijnummer kolom toe
-        worksheet.write(start_row, 0, "Regelnummer template", header_format)
-        
-        # Schrijf de rest van de headers vanaf kolom 1
-        for col, header in enumerate(visible_columns):
-            worksheet.write(start_row, col + 1, str(header), header_format)
-
-        # Schrijf data met kleuren (limiteer rijen)
+        # Alles rij voor rij schrijven (constant_memory): legenda, waarschuwing, titel, headers, data
         max_rows_sheet = min(len(df), ERROR_LIMIT)  # Gebruik limiet
+
+        # Legenda
+        worksheet.write("A1", "Legenda:", legenda_title_format)
+        worksheet.write("A2", "Correct/Optioneel leeg", correct_format_legend)
+        worksheet.write("A3", "Foutief ingevuld (verplicht)", error_format_legend)
+        worksheet.write("A4", "Foutief ingevuld/Flags", error_optional_format_legend)
+        worksheet.write("A5", "Verplicht veld leeg", empty_mandatory_format_legend)
         if len(df) > max_rows_sheet:
-            # Plaats mooie waarschuwing in C5:E6 met kleur en rand
+            # Plaats mooie waarschuwing in C5:E6 met kleur en rand (na A5, vóór A6)
             warning_format = workbook.add_format({
                 "bold": True, 
                 "color": "red", 
@@ -1038,6 +1221,22 @@ def add_colored_dataset_sheet(
                 f"LET OP: Weergave beperkt tot de eerste {max_rows_sheet} rijen.",
                 warning_format
             )
+        worksheet.write("A6", "UOM-relatie conflict", uom_relation_error_format_legend)
+
+        worksheet.write(
+            start_row - 1,
+            0,
+            "Dataset Validatie:",
+            workbook.add_format({"bold": True, "font_size": 12}),
+        )
+
+        # Schrijf alleen zichtbare headers
+        # Voeg eerst de rijnummer kolom toe
+        worksheet.write(start_row, 0, "Regelnummer template", header_format)
+        
+        # Schrijf de rest van de headers vanaf kolom 1
+        for col, header in enumerate(visible_columns):
+            worksheet.write(start_row, col + 1, str(header), header_format)
 
         # SIMPEL: Check hoeveel rijen zijn verwijderd uit originele Excel file
         # Default: data begint op rij 2 (na headers), +1 voor elke verwijderde rij
@@ -1051,69 +1250,41 @@ def add_colored_dataset_sheet(
         data_start_row = 2 + removed_rows  # Headers op rij 1, dan +removed rows
         logging.info(f"Sheet 7: Data start berekening = rij 2 (base) + {removed_rows} (verwijderd) = rij {data_start_row}")
         
-        for row_idx in range(max_rows_sheet):
-            # Schrijf eerst het template rijnummer in kolom A (0) - nu dynamisch
-            template_row_number = row_idx + data_start_row
-            worksheet.write(start_row + 1 + row_idx, 0, template_row_number, correct_format)
-            
-            for col_idx, field_name in enumerate(visible_columns):
-                # Get original column index for df.iloc
-                orig_col_idx = df.columns.get_loc(field_name)
-                value = df.iloc[row_idx, orig_col_idx]
-                value_str = "" if pd.isna(value) else str(value).strip()
-                is_empty = value_str == ""
-
-                is_mandatory = field_name in ghx_mandatory_fields
-
-                # Dependency check (vereenvoudigd uit Code 5)
-                has_dependency = False
-                # Gebruik validation_config als beschikbaar, anders config
-                active_config = validation_config if validation_config else config
-                if is_empty and active_config and "fields" in active_config and field_name in active_config["fields"]:
-                    field_config = active_config["fields"][field_name]
-                    if "depends_on" in field_config:
-                        cond = field_config["depends_on"].get("condition")
-                        related_fields = field_config["depends_on"].get("fields", [])
-                        if cond == "1" and len(related_fields) > 0:
-                            related_field_name = related_fields[0]
-                            if related_field_name in df.columns:
-                                related_value = str(
-                                    df.iloc[
-                                        row_idx, df.columns.get_loc(related_field_name)
-                                    ]
-                                ).strip()
-                                has_dependency = related_value == "1"
-
-                # Kleur bepalen
-                cell_format = correct_format  # Default
-                if (
-                    row_idx in uom_relation_error_lookup
-                    and orig_col_idx in uom_relation_error_lookup[row_idx]
-                ):
-                    cell_format = uom_relation_error_format
-                elif is_empty and (is_mandatory or has_dependency):
-                    # PRIORITEIT: Verplichte velden die leeg zijn zijn ALTIJD geel
-                    cell_format = empty_mandatory_format
-                elif row_idx in flag_lookup and orig_col_idx in flag_lookup[row_idx]:
-                    # Flags krijgen altijd roze kleur (error_optional_format)
-                    cell_format = error_optional_format  # Roze voor flags
-                elif row_idx in error_lookup and orig_col_idx in error_lookup[row_idx]:
-                    # Lege optionele velden NOOIT kleuren, ook niet bij fouten
-                    if is_empty and not is_mandatory and not has_dependency:
-                        cell_format = correct_format  # Wit voor lege optionele velden
-                    # Onderscheid maken tussen verplichte en niet-verplichte fouten
-                    elif is_mandatory:
-                        cell_format = error_format  # Rood voor verplichte fouten
-                    else:
-                        cell_format = error_optional_format  # Roze voor niet-verplichte fouten
-
-                # Schrijf waarde met bepaalde opmaak (shift 1 kolom naar rechts voor rijnummer kolom)
-                worksheet.write(
-                    start_row + row_idx + 1, col_idx + 1, value_str, cell_format
-                )
-            
-            # Stel rijhoogte in op 15 voor elke data rij (geen terugloop)
-            worksheet.set_row(start_row + row_idx + 1, 15)
+        # Bulk rendering: per blok rijen de getoonde waarden en format ids (kleur uit de cel
+        # matrix, zie report_matrix.dataset_categories) vooraf berekenen en elke rij in runs
+        # met hetzelfde format wegschrijven. Kolom A is het template rijnummer (correct_format).
+        category_formats = {
+            CATEGORY_CORRECT: correct_format,
+            CATEGORY_ERROR: error_format,  # Rood voor verplichte fouten
+            CATEGORY_ERROR_OPTIONAL: error_optional_format,  # Roze voor flags en niet-verplichte fouten
+            CATEGORY_EMPTY_MANDATORY: empty_mandatory_format,  # Geel voor lege verplichte velden
+            CATEGORY_UOM_CONFLICT: uom_relation_error_format,  # Blauw voor UOM relatie conflicten
+        }
+        visible_positions = [df.columns.get_loc(field_name) for field_name in visible_columns]
+
+        for block_start in range(0, max_rows_sheet, DATASET_ROW_BLOCK):
+            block_stop = min(block_start + DATASET_ROW_BLOCK, max_rows_sheet)
+            row_numbers = np.arange(block_start, block_stop) + data_start_row
+            values = np.column_stack([
+                row_numbers.astype(object),
+                display_values(df, visible_positions, block_start, block_stop),
+            ])
+            format_ids = np.column_stack([
+                np.full(block_stop - block_start, CATEGORY_CORRECT, dtype=np.uint8),
+                dataset_categories(cell_matrix[block_start:block_stop, visible_positions]),
+            ])
+
+            for offset, runs in iter_format_runs(format_ids):
+                excel_row = start_row + 1 + block_start + offset
+                row_values = values[offset].tolist()
+                for col_start, col_stop, format_id in runs:
+                    worksheet.write_row(excel_row, col_start, row_values[col_start:col_stop],
+                                        category_formats[format_id])
+
+                # Stel rijhoogte in op 15 voor elke data rij (geen terugloop); in constant_memory
+                # modus is 15 al de standaard en zou een set_row per rij het geheugen laten meegroeien
+                if not constant_memory:
+                    worksheet.set_row(excel_row, 15)
 
         # Stel kolombreedte in - alle kolommen op 30 (zoals template)
         worksheet.set_column(0, 0, 30)  # Rijnummer kolom ook 30
@@ -1126,13 +1297,6 @@ def add_colored_dataset_sheet(
         last_row = start_row + max_rows_sheet  # start_row + aantal data rijen
         worksheet.autofilter(start_row, 0, last_row, last_col)
 
-        worksheet.write(
-            start_row - 1,
-            0,
-            "Dataset Validatie:",
-            workbook.add_format({"bold": True, "font_size": 12}),
-        )
-
     except Exception as e:
         logging.error(f"Fout tijdens genereren gekleurde dataset sheet: {e}")
         # Optioneel: voeg een sheet toe met de foutmelding
@@ -1145,2248 +1309,2560 @@ def add_colored_dataset_sheet(
             pass  # Voorkom errors in de error handling
 
 
-# --- Hoofdfunctie voor Rapport Generatie (VOLLEDIGE EN AANGEPASTE VERSIE) ---
-
-
-def genereer_rapport(
-    validation_results: list,
-    output_dir: str,
-    bestandsnaam: str,
-    ghx_mandatory_fields: list,
-    original_column_mapping: dict,
-    df: pd.DataFrame,
-    header_mapping: dict,
-    df_original: pd.DataFrame,
-    red_flag_messages: list,
-    JSON_CONFIG_PATH: str,  # Pad nodig om config te laden
-    summary_data: dict,  # VERWIJDERDE PARAMETER TERUGGEZET
-    errors_per_field: dict = None,
-    validation_config: dict = None,  # Geconverteerde config voor Sheet 9
-    template_context: dict = None,  # Template Generator context
-    excel_path: str = None,  # Pad naar origineel Excel bestand voor template detectie
-    max_rows: int = None,
-    total_rows: int = None,
-):
-    """
-    Genereert het volledige Excel validatierapport, inclusief alle sheets,
-    gebaseerd op notebook Code 5 en aangepast dashboard layout.
-    """
-    if errors_per_field is None:
-        errors_per_field = {}  # Voorkom None errors
-
-    # Early Template Type Detectie (voorkom UnboundLocalError)
-    template_type, template_info = determine_template_type(df, excel_path)
+# --- Hulpfuncties voor de rapport sheets ---
+
+
+# Helper functie voor schone headers - gebruik dezelfde logica als price_tool.py
+def clean_header(header):
+    from .price_tool import clean_column_name
+    # Verwijder newlines en splits op dash om Nederlandse naam vóór de dash te behouden
+    clean = str(header).split("\n")[0].strip()
+    # Split op " - " en neem het Nederlandse deel (vóór de dash)
+    if " - " in clean:
+        clean = clean.split(" - ")[0].strip()
+    # Nu pas clean_column_name toe voor consistente normalisatie
+    return clean_column_name(clean)
+
+# Helper functie voor kolomkoppen in rapporten (behoudt Nederlandse naam zonder normalisatie)
+def clean_header_for_display(header):
+    if pd.isna(header) or not str(header).strip():
+        return header
+    # Verwijder newlines en neem eerste regel
+    clean = str(header).split("\n")[0].strip()
+    # Split op " - " en neem het Nederlandse deel (vóór de dash)
+    if " - " in clean:
+        clean = clean.split(" - ")[0].strip()
+    return clean
+
+# Helper functie om error codes naar categorieën te mappen
+def get_error_category(error_code):
+    if pd.isna(error_code) or str(error_code).strip() == "":
+        return "Onbekend"
     
-    # Quick Mode detectie (voorkom UnboundLocalError)
-    quick_mode = (max_rows is not None)
-
-    # Constanten voor rapportage limieten (uit notebook Code 5)
-    ERROR_LIMIT = 50000  # Maximaal aantal errors per sheet
-    ERROR_START = 0  # Begin vanaf deze rij (voor slicing bij limiet)
-    ERROR_END = ERROR_LIMIT  # Eindig bij deze rij (voor slicing bij limiet)
-
+    code_str = str(error_code).strip()
     try:
-        # Helper functie voor schone headers - gebruik dezelfde logica als price_tool.py
-        def clean_header(header):
-            from .price_tool import clean_column_name
-            # Verwijder newlines en splits op dash om Nederlandse naam vóór de dash te behouden
-            clean = str(header).split("\n")[0].strip()
-            # Split op " - " en neem het Nederlandse deel (vóór de dash)
-            if " - " in clean:
-                clean = clean.split(" - ")[0].strip()
-            # Nu pas clean_column_name toe voor consistente normalisatie
-            return clean_column_name(clean)
+        code_int = int(float(code_str))  # Handle both int and float strings
         
-        # Helper functie voor kolomkoppen in rapporten (behoudt Nederlandse naam zonder normalisatie)
-        def clean_header_for_display(header):
-            if pd.isna(header) or not str(header).strip():
-                return header
-            # Verwijder newlines en neem eerste regel
-            clean = str(header).split("\n")[0].strip()
-            # Split op " - " en neem het Nederlandse deel (vóór de dash)
-            if " - " in clean:
-                clean = clean.split(" - ")[0].strip()
-            return clean
+        # Specifieke flag codes die verkeerd zouden worden geclassificeerd
+        flag_codes = {703, 720, 751, 752, 753, 756, 758, 759, 760, 761, 762, 763, 764, 765, 766, 769, 770, 771, 773, 774, 775}
         
-        # Helper functie om error codes naar categorieën te mappen
-        def get_error_category(error_code):
-            if pd.isna(error_code) or str(error_code).strip() == "":
-                return "Onbekend"
-            
-            code_str = str(error_code).strip()
-            try:
-                code_int = int(float(code_str))  # Handle both int and float strings
-                
-                # Specifieke flag codes die verkeerd zouden worden geclassificeerd
-                flag_codes = {703, 720, 751, 752, 753, 756, 758, 759, 760, 761, 762, 763, 764, 765, 766, 769, 770, 771, 773, 774, 775}
-                
-                # Categorisering op basis van code ranges
-                if code_int in flag_codes:
-                    return "Vlag"
-                elif 700 <= code_int <= 749:
-                    if code_int == 724:  # Speciale uitzondering voor conflict
-                        return "Conflict"
-                    return "Afkeuring"
-                elif code_int == 772:  # Speciale uitzondering voor correction
-                    return "Aanpassing"
-                elif 750 <= code_int <= 799:
-                    return "Vlag"
-                elif 800 <= code_int <= 899:
-                    return "Vlag"  # Global flags zijn ook vlaggen
-                else:
-                    return "Onbekend"
-            except (ValueError, TypeError):
-                return "Onbekend"
+        # Categorisering op basis van code ranges
+        if code_int in flag_codes:
+            return "Vlag"
+        elif 700 <= code_int <= 749:
+            if code_int == 724:  # Speciale uitzondering voor conflict
+                return "Conflict"
+            return "Afkeuring"
+        elif code_int == 772:  # Speciale uitzondering voor correction
+            return "Aanpassing"
+        elif 750 <= code_int <= 799:
+            return "Vlag"
+        elif 800 <= code_int <= 899:
+            return "Vlag"  # Global flags zijn ook vlaggen
+        else:
+            return "Onbekend"
+    except (ValueError, TypeError):
+        return "Onbekend"
+
+def get_error_category_with_type(row):
+    """Bepaal error category op basis van type field (indien beschikbaar) of code."""
+    # Probeer eerst het type field te gebruiken (nieuw systeem)
+    if 'type' in row and pd.notna(row['type']) and str(row['type']).strip():
+        error_type = str(row['type']).strip().lower()
+        if error_type == 'flag':
+            return "Vlag"
+        elif error_type == 'correction':
+            return "Aanpassing"
+        elif error_type == 'rejection':
+            return "Afkeuring"
+    
+    # Fallback naar oude code-based logica
+    return get_error_category(row.get('Foutcode', row.get('code', '')))
+
+def get_error_category_optional(row):
+    """Speciale versie voor optionele fouten - gebruikt 'Incorrect' in plaats van 'Afkeuring'."""
+    # Probeer eerst het type field te gebruiken (nieuw systeem)
+    if 'type' in row and pd.notna(row['type']) and str(row['type']).strip():
+        error_type = str(row['type']).strip().lower()
+        if error_type == 'flag':
+            return "Vlag"
+        elif error_type == 'correction':
+            return "Aanpassing"
+        elif error_type == 'rejection':
+            return "Incorrect"  # Voor optionele fouten: "Incorrect" i.p.v. "Afkeuring"
+    
+    # Fallback naar code-based logica maar met aangepaste terminologie
+    error_code = row.get('Foutcode', row.get('code', ''))
+    if pd.isna(error_code) or str(error_code).strip() == "":
+        return "Onbekend"
+    
+    code_str = str(error_code).strip()
+    try:
+        code_int = int(float(code_str))
         
-        def get_error_category_with_type(row):
-            """Bepaal error category op basis van type field (indien beschikbaar) of code."""
-            # Probeer eerst het type field te gebruiken (nieuw systeem)
-            if 'type' in row and pd.notna(row['type']) and str(row['type']).strip():
-                error_type = str(row['type']).strip().lower()
-                if error_type == 'flag':
-                    return "Vlag"
-                elif error_type == 'correction':
-                    return "Aanpassing"
-                elif error_type == 'rejection':
-                    return "Afkeuring"
-            
-            # Fallback naar oude code-based logica
-            return get_error_category(row.get('Foutcode', row.get('code', '')))
+        # Specifieke flag codes
+        flag_codes = {703, 720, 751, 752, 753, 756, 758, 759, 760, 761, 762, 763, 764, 765, 766, 769, 770, 771, 773, 774, 775}
         
-        def get_error_category_optional(row):
-            """Speciale versie voor optionele fouten - gebruikt 'Incorrect' in plaats van 'Afkeuring'."""
-            # Probeer eerst het type field te gebruiken (nieuw systeem)
-            if 'type' in row and pd.notna(row['type']) and str(row['type']).strip():
-                error_type = str(row['type']).strip().lower()
-                if error_type == 'flag':
-                    return "Vlag"
-                elif error_type == 'correction':
-                    return "Aanpassing"
-                elif error_type == 'rejection':
-                    return "Incorrect"  # Voor optionele fouten: "Incorrect" i.p.v. "Afkeuring"
-            
-            # Fallback naar code-based logica maar met aangepaste terminologie
-            error_code = row.get('Foutcode', row.get('code', ''))
-            if pd.isna(error_code) or str(error_code).strip() == "":
-                return "Onbekend"
-            
-            code_str = str(error_code).strip()
-            try:
-                code_int = int(float(code_str))
-                
-                # Specifieke flag codes
-                flag_codes = {703, 720, 751, 752, 753, 756, 758, 759, 760, 761, 762, 763, 764, 765, 766, 769, 770, 771, 773, 774, 775}
-                
-                if code_int in flag_codes:
-                    return "Vlag"
-                elif 700 <= code_int <= 749:
-                    if code_int == 724:
-                        return "Conflict"
-                    return "Incorrect"  # Voor optionele fouten
-                elif code_int == 772:
-                    return "Aanpassing"
-                elif 750 <= code_int <= 799:
-                    return "Vlag"
-                elif 800 <= code_int <= 899:
-                    return "Vlag"
-                else:
-                    return "Onbekend"
-            except (ValueError, TypeError):
-                return "Onbekend"
+        if code_int in flag_codes:
+            return "Vlag"
+        elif 700 <= code_int <= 749:
+            if code_int == 724:
+                return "Conflict"
+            return "Incorrect"  # Voor optionele fouten
+        elif code_int == 772:
+            return "Aanpassing"
+        elif 750 <= code_int <= 799:
+            return "Vlag"
+        elif 800 <= code_int <= 899:
+            return "Vlag"
+        else:
+            return "Onbekend"
+    except (ValueError, TypeError):
+        return "Onbekend"
 
-        # Bestandsnaam zonder extensie voor output naamgeving
-        bestandsnaam_zonder_extensie = os.path.splitext(bestandsnaam)[0]
 
-        # --- Data Voorbereiding & Berekeningen (Begin) ---
-        # Voor Quick Mode: gebruik originele total_rows parameter, anders processed data lengte
-        if total_rows is None:
-            total_rows = len(df)  # Normale modus: gebruik processed data lengte
-        # Anders: behoud originele total_rows parameter (Quick Mode)
-        
-        # Voor berekeningen: gebruik altijd een numerieke waarde
-        numeric_total_rows = len(df) if total_rows == "5000+" else (total_rows if isinstance(total_rows, int) else len(df))
-        
-        processed_rows = len(df)  # Aantal verwerkte rijen (voor berekeningen)
-        total_cols = len(df.columns)  # Kolommen in verwerkte df
-        total_original_cols = len(df_original.columns)  # Kolommen in origineel bestand
+def add_dashboard_sheet(
+    workbook,
+    writer,
+    *,
+    JSON_CONFIG_PATH,
+    M_found,
+    M_missing,
+    bestandsnaam,
+    cell_matrix,
+    config,
+    df,
+    df_errors,
+    excel_path,
+    fmt_error_table_cell,
+    fmt_error_table_cell_right,
+    fmt_error_table_code,
+    fmt_header_blue,
+    fmt_header_red,
+    fmt_label_green,
+    fmt_value_green,
+    ghx_mandatory_fields,
+    max_rows,
+    missing_mandatory_columns,
+    numeric_total_rows,
+    percentage_ingevuld_incl_missing,
+    red_flag_messages,
+    score_result,
+    stats,
+    summary_data,
+    template_context,
+    template_display_info,
+    template_type,
+    total_original_cols,
+    total_rows,
+    validation_results,
+):
+    """Sheet 1: Dashboard met scores, statistieken, foutmeldingen en de grafiek."""
+    # Tellingen uit ReportStats
+    M_found_columns = stats.M_found_columns
+    total_filled_in_present = stats.total_filled_in_present
+    empty_in_present = stats.empty_in_present
+    total_errors_in_present = stats.total_errors_in_present
+    totaal_juist = stats.totaal_juist
+    total_filled_non_mand = stats.total_filled_non_mand
+    total_errors_non_mand = stats.total_errors_non_mand
+
+    ws_dash = workbook.add_worksheet("1. Dashboard")
+    suppress_excel_errors(ws_dash)
+    writer.sheets["1. Dashboard"] = ws_dash
+    # Verberg rij 1
+    ws_dash.set_row(0, None, None, {"hidden": True})  # Verberg rij 1 (index 0)
+
+    # --- Kolombreedtes Instellen - Kolom opschuiving: nieuwe kolom A (gutter) ---
+    ws_dash.set_column("A:A", 5)    # NIEUWE lege gutter kolom (5 pixels)
+    # ALLE OUDE KOLOMMEN SCHUIVEN 1 NAAR RECHTS:
+    # LINKER KANT (B-F): Statistieken + Foutmeldingen (was A-E)
+    ws_dash.set_column("B:B", 90)   # Statistieken/ontbrekende (was A: 90 pixels)
+    ws_dash.set_column("C:C", 10)   # Statistieken waarden (was B: 10 pixels)  
+    ws_dash.set_column("D:D", 5)    # Smaller column D (was C: 5 pixels)
+    # FOUTMELDINGEN KOLOMMEN: Aangepaste breedtes voor nieuwe layout (alles +1)
+    ws_dash.set_column("E:E", 40)   # Beschrijving deel 1 (was D: 40 pixels)
+    ws_dash.set_column("F:F", 40)   # Beschrijving deel 2 (was E: 40 pixels)
+    ws_dash.set_column("G:G", 40)   # Beschrijving deel 3 (was F: 40 pixels)
+    ws_dash.set_column("H:H", 10)   # Aantal (was G: 10 pixels)
+    ws_dash.set_column("I:I", 15)   # Type (was H: 15 pixels)
+    ws_dash.set_column("J:J", 15)   # Type Sheet (was I: 15 pixels)
+    ws_dash.set_column("K:K", 10)   # Foutcode (was J: 10 pixels)
+    ws_dash.set_column("L:L", 20)   # Aandachtspunten deel 5 (was K: 20 pixels)
+    ws_dash.set_column("M:M", 45)   # Aandachtspunten deel 6 (was L: 45 pixels)
+    ws_dash.set_column("N:N", 10)   # Foutcode kolom aandachtspunten (was M: 10 pixels)
+
+    # --- TOPMARGE & LOGO: Start content op rij 9+ ---
+    # Reserveer B2:G6 voor logo headerzone (rijen 1-6)  
+    current_row = 8  # Start content op rij 9 (0-based index 8)
+
+    # Voeg GAX logo toe op B2 (rij 1, kolom 1)
+    try:
+        logo_path = "/Users/ncroiset/Vibe Coding Projecten/Cursor Projecten/Project GHX Prijstemplate Validatie Tool/static/ghx_logo_2.png"
+        # Plaats logo op B2 met aspect ratio lock en niet gekoppeld aan cellen
+        ws_dash.insert_image("B2", logo_path, {
+            'positioning': 0,  # Move & size with cells = OFF (absolute positioning)
+            'x_scale': 0.35,   # Schaal logo naar 35% voor kleinere pasvorm (rijen 1-6)
+            'y_scale': 0.35,   # Behoud aspect ratio 
+        })
+    except Exception as logo_err:
+        # Log error maar ga door met rapport generatie
+        logging.warning(f"Logo kon niet worden toegevoegd: {logo_err}")
+
+    # --- SCORE BADGE RECHTSBOVEN (H2:K6) ---
+    # Maak formats voor de score badge
+    fmt_score_badge_bg = workbook.add_format({
+        'bg_color': '#F2F2F2',  # Zachte neutrale achtergrond
+        'border': 1,
+        'border_color': '#D0D0D0',  # Subtiele rand
+        'align': 'center',
+        'valign': 'vcenter'
+    })
+
+
+    fmt_score_label = workbook.add_format({
+        'font_size': 12,  # Klein label
+        'font_color': '#1F1F1F',
+        'bold': True,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#F2F2F2',
+        'border': 1,
+        'border_color': '#D0D0D0'
+    })
+
+    fmt_score_description = workbook.add_format({
+        'font_size': 10,  # Kleine toelichting
+        'font_color': '#1F1F1F',
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#F2F2F2',
+        'border': 1,
+        'border_color': '#D0D0D0'
+    })
+
+    # Bereken scores eerst voor weergave (zonder Config sheet links om pop-up te voorkomen)
+    # === GEBRUIK NIEUWE SCORE VOOR SHEET 1 DISPLAY ===
+    # Gebruik dezelfde score als filename (consistent!)
+    totale_score_display = score_result['final_score']
+    score_grade = score_result['grade']
+
+    # Bepaal randkleur: groen voor B/A/A+, oranje voor C/D, rood voor E/F
+    if score_grade in ["B", "A", "A+"]:
+        border_color = "#4f6229"  # Groen
+    elif score_grade in ["C", "D"]:
+        border_color = "#FF5E1A"  # Oranje
+    else:  # E, F
+        border_color = "#c00000"  # Rood
+
+    # Update format voor KWALITEITSCORE met dynamische randkleur en tekstkleur
+    fmt_score_number = workbook.add_format({
+        'font_size': 26,
+        'font_color': border_color,  # Tekstkleur matcht randkleur
+        'bold': True,
+        'align': 'center',
+        'valign': 'vcenter',
+        'bg_color': '#FFFFFF',
+        'top': 2, 'left': 2, 'right': 2,  # Alleen boven/links/rechts rand
+        'top_color': border_color,
+        'left_color': border_color,
+        'right_color': border_color
+    })
+
+    # Hoofdscore cel E3:F4 (alleen kolommen E en F)
+    ws_dash.merge_range("E3:F4", f"KWALITEITSCORE: {totale_score_display}/100 - CIJFER {score_grade}", fmt_score_number)
+
+    # Cijfertoekenning regel (E4:F4) - bold, zwart, groter, met dynamische randkleur
+    fmt_score_small = workbook.add_format({
+        'font_size': 11,
+        'bold': True,
+        'align': 'center',
+        'valign': 'vcenter',
+        'font_color': '#000000',
+        'bg_color': '#FFFFFF',  # Witte achtergrond
+        'bottom': 2, 'left': 2, 'right': 2,  # Alleen onder/links/rechts rand
+        'bottom_color': border_color,
+        'left_color': border_color,
+        'right_color': border_color
+    })
+    ws_dash.merge_range("E5:F5", "Voor meer informatie over de kwaliteitscore en hoe het berekend wordt, ga naar sheet 2.", fmt_score_small)
+
+    # --- NIEUWE LAYOUT: Links Statistieken, Rechts Actiepunten ---
+
+    # --- APARTE TEMPLATE TABEL (voor alle template types) ---
+    template_table_end_row = current_row - 1  # Default: geen template tabel
+
+    # === QUICK MODE TABEL (rij 8-9 indien actief) ===
+    quick_mode_active = (max_rows is not None)
+
+    if quick_mode_active:
+        # Quick Mode tabel op vaste positie: rij 8-9
+        quick_mode_start_row = 7  # 0-based = Excel rij 8
+
+        # Formats voor Quick Mode tabel
+        fmt_quickmode_header = workbook.add_format({
+            'bold': True,
+            'font_color': '#FFFFFF',
+            'font_size': 14,
+            'bg_color': '#FF0000',  # Rood
+            'border': 1,
+            'border_color': '#000000',
+            'align': 'left',
+            'valign': 'vcenter',
+            'indent': 1
+        })
 
-        # DEBUG: Log template context
-        if template_context:
-            logging.info(f"DEBUG Sheet 1: Template context aanwezig, type: {template_context.get('type', 'Unknown')}")
-            if template_context.get('type') == 'TG':
-                logging.info(f"DEBUG Sheet 1: TG Template gedetecteerd met {template_context.get('visible_fields', '?')} zichtbare velden")
-        else:
-            logging.info("DEBUG Sheet 1: Geen template context (waarschijnlijk DT/AT template)")
-        
-        # Gebruik de doorgegeven validation_config of val terug op laden van bestand
-        if validation_config:
-            config = validation_config
-            logging.info(f"DEBUG Sheet 1: validation_config gebruikt (niet van file)")
-        else:
-            config = load_validation_config(JSON_CONFIG_PATH)
-            logging.info(f"DEBUG Sheet 1: config geladen van file: {JSON_CONFIG_PATH}")
-            if not config:
-                logging.error("Kan rapport niet genereren zonder validatie configuratie.")
-                return None
+        fmt_quickmode_data = workbook.add_format({
+            "font_size": 12, 
+            "bg_color": "#FFE6E6",  # Licht rood
+            "font_color": "#000000",
+            "border": 1,
+            "border_color": "#000000",
+            "indent": 1
+        })
 
-        # Check voor v20 vs v18 structuur voor non_mandatory_fields
-        if "field_validations" in config:
-            # v20 structuur
-            all_fields = list(config.get("field_validations", {}).keys())
-        else:
-            # v18 structuur (fallback)
-            all_fields = list(config.get("fields", {}).keys())
-            
-        non_mandatory_fields = [
-            f for f in all_fields if f not in ghx_mandatory_fields
-        ]
-        # Voor TG templates: gebruik template_context mandatory_list
-        # Voor ALT/DT templates: gebruik ghx_mandatory_fields
-        if template_type == "TG" and template_context and "decisions" in template_context:
-            template_mandatory_fields = template_context["decisions"]["mandatory_list"]
-            present_mandatory_columns = [f for f in template_mandatory_fields if f in df.columns]
-            missing_mandatory_columns = [
-                f for f in template_mandatory_fields if f not in df.columns
-            ]
+        # Rij 8: Header (alleen B8:C8)
+        ws_dash.merge_range(
+            f"B{quick_mode_start_row + 1}:C{quick_mode_start_row + 1}",
+            "QUICK MODE VALIDATIE",
+            fmt_quickmode_header,
+        )
+        ws_dash.set_row(quick_mode_start_row, 18)
+
+        # Rij 9: Beschrijving (alleen B9:C9)
+        if total_rows and total_rows != "5000+":
+            quick_text = f"Alleen de eerste {max_rows:,} van {total_rows:,} rijen zijn gevalideerd"
         else:
-            # ALT/DT templates: gebruik ghx_mandatory_fields
-            present_mandatory_columns = [f for f in ghx_mandatory_fields if f in df.columns]
-            missing_mandatory_columns = [
-                f for f in ghx_mandatory_fields if f not in df.columns
-            ]
-        
-        # M_found = aantal CORRECT ingevulde mandatory fields, niet alleen aanwezige kolommen
-        # Initialiseer M_found voorlopig met aantal aanwezige kolommen, wordt later herberekend
-        M_found_columns = len(present_mandatory_columns)  # Bewaar voor later gebruik
-        M_found = M_found_columns  # Tijdelijke waarde, wordt later herberekend na corrected_errors
-        M_missing = len(missing_mandatory_columns)
-
-        # Herbereken filled_counts en empty/errors voor consistentie hier
-        filled_counts = {}
-        invalid_values_config = config.get("invalid_values", [])
-        invalid_values = [str(val).lower() for val in invalid_values_config]
-        
-        # UOM velden voor conditional logic
-        uom_fields = [
-            'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
-            'UOM Code Basiseenheid', 'Inhoud Basiseenheid', 
-            'UOM Code Inhoud Basiseenheid'
-        ]
-        
-        for f in present_mandatory_columns:
-            # Normale filled count berekening
-            basic_filled = (
-                df[f].notna()
-                & (
-                    ~df[f]
-                    .astype(str)
-                    .str.strip()
-                    .str.lower()
-                    .isin(["nan", ""] + invalid_values)
-                )
-            ).sum()
-            
-            # UOM CONDITIONAL LOGIC: Voor UOM velden, alleen tellen als Omschrijving gevuld is
-            if f in uom_fields and 'Omschrijving Verpakkingseenheid' in df.columns:
-                # PER RIJ: UOM veld telt alleen als die rij ook Omschrijving Verpakkingseenheid heeft
-                omschrijving_mask = (
-                    df['Omschrijving Verpakkingseenheid'].notna()
-                    & (
-                        ~df['Omschrijving Verpakkingseenheid']
-                        .astype(str)
-                        .str.strip()
-                        .str.lower()
-                        .isin(["nan", ""] + invalid_values)
-                    )
-                )
-                
-                uom_field_mask = (
-                    df[f].notna()
-                    & (
-                        ~df[f]
-                        .astype(str)
-                        .str.strip()
-                        .str.lower()
-                        .isin(["nan", ""] + invalid_values)
-                    )
-                )
-                
-                # Tel alleen UOM velden waar ZOWEL UOM veld als Omschrijving gevuld zijn
-                filled_counts[f] = (omschrijving_mask & uom_field_mask).sum()
-            else:
-                filled_counts[f] = basic_filled
+            quick_text = f"Alleen de eerste {max_rows:,} van 5000+ rijen zijn gevalideerd"
 
-        total_filled_in_present = sum(
-            filled_counts.get(f, 0) for f in present_mandatory_columns
+        ws_dash.merge_range(
+            f"B{quick_mode_start_row + 2}:C{quick_mode_start_row + 2}",
+            quick_text,
+            fmt_quickmode_data,
         )
-        # Bij Quick Mode: gebruik processed_rows, anders total_rows
-        rows_for_calculation = processed_rows if max_rows is not None else total_rows
-        empty_in_present = (M_found_columns * rows_for_calculation) - total_filled_in_present
-
-        corrected_errors = {}
-        for f in present_mandatory_columns:
-            field_filled = filled_counts.get(f, 0)
-            field_errors = errors_per_field.get(f, 0)  # Gebruik doorgegeven errors
-            
-            # UOM CONDITIONAL CORRECTION: Voor UOM velden, corrigeer voor conditionele validatie
-            uom_fields = [
-                'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
-                'UOM Code Basiseenheid', 'Inhoud Basiseenheid', 
-                'UOM Code Inhoud Basiseenheid'
-            ]
-            
-            if f in uom_fields:
-                # Voor UOM velden: alleen errors tellen waar Omschrijving Verpakkingseenheid gevuld is
-                # Dit corrigeert het probleem dat lege UOM velden als fout werden geteld
-                omschrijving_filled = filled_counts.get('Omschrijving Verpakkingseenheid', 0)
-                if omschrijving_filled < field_filled:
-                    # Er zijn meer UOM velden gevuld dan omschrijvingen - dit zou niet mogen
-                    # Corrigeer de error count naar realistisch aantal
-                    field_errors = min(field_errors, omschrijving_filled)
-            
-            corrected_errors[f] = min(field_errors, field_filled)
-        total_errors_in_present = sum(corrected_errors.values())
-        totaal_juist = total_filled_in_present - total_errors_in_present
-        
-        # Fix voor Olaf's bug: M_found = aantal CORRECT ingevulde mandatory fields
-        # Niet aantal aanwezige kolommen, maar aantal correct ingevulde velden
-        M_found = totaal_juist  # Dit is de juiste waarde voor volledigheid score
+        ws_dash.set_row(quick_mode_start_row + 1, 16)
 
-        # Bereken percentage fouten van ingevulde verplichte velden
-        percentage_incorrect_of_filled_present = (
-            (total_errors_in_present / total_filled_in_present * 100)
-            if total_filled_in_present > 0
-            else 0
+        # Schuif alle andere content 3 rijen naar beneden
+        base_content_start_row = 11  # Was 8, nu 11
+        logging.info(f"Quick Mode tabel toegevoegd op rijen 8-9. Content start op rij {base_content_start_row}")
+    else:
+        # Normale modus: content start op rij 8
+        base_content_start_row = 8
+        logging.info("Normale validatie: geen Quick Mode tabel")
+
+    # Template-tabel ALTIJD tonen (voor TG, TD, ALT) 
+    if True:  # Altijd uitvoeren
+        # Template start op base_content_start_row (rij 8 normaal, rij 11 met Quick Mode)
+        template_start_row = base_content_start_row - 1  # 0-based
+
+        # Template tabel header format - zelfde thema als statistieken
+        fmt_template_header = workbook.add_format({
+            'bold': True,
+            'font_color': '#FFFFFF',
+            'font_size': 14,
+            'bg_color': '#4F6229',  # Zelfde groen als statistieken
+            'border': 1,
+            'border_color': '#000000',
+            'align': 'left',
+            'valign': 'vcenter',
+            'indent': 1
+        })
+
+        # Template data format - zelfde als statistieken data
+        fmt_template_label = workbook.add_format({
+            "font_size": 12, 
+            "bg_color": "#E2EFDA",  # Zelfde groen als statistieken
+            "font_color": "#000000",
+            "border": 1,
+            "border_color": "#000000",
+            "indent": 1
+        })
+        fmt_template_value = workbook.add_format({
+            "font_size": 12,
+            "bg_color": "#E2EFDA",  # Zelfde groen als statistieken
+            "font_color": "#000000",
+            "border": 1,
+            "border_color": "#000000",
+            "align": "left",  # Links uitlijnen voor template info
+            "indent": 1  # Inspringen zoals andere tabellen
+        })
+
+        # Template tabel header - VASTE POSITIE rij 8 (Excel rij 8)
+        ws_dash.merge_range(
+            f"B{template_start_row + 1}:C{template_start_row + 1}",  # Excel 1-based, rij 8
+            "Template",
+            fmt_template_header,
+        )
+        ws_dash.set_row(template_start_row, 18)
+
+        # ALTIJD EERSTE REGEL: Bestandsnaam 
+        template_filename_row = base_content_start_row
+        ws_dash.merge_range(
+            f"B{template_filename_row + 1}:C{template_filename_row + 1}",  # Excel 1-based
+            bestandsnaam,  # Gebruik originele bestandsnaam
+            fmt_template_value,
         )
 
-        # Statistieken voor Blok 2 ("Actiepunten" uit origineel)
-        aantal_leeg_incl_missing = empty_in_present + (M_missing * numeric_total_rows)
-        
-        # Voor TG templates: gebruik template_mandatory_fields count
-        # Voor ALT/DT templates: gebruik ghx_mandatory_fields count
-        # BELANGRIJK: Gebruik len(df) voor processed data, niet total_rows!
-        processed_rows = len(df)
-        if template_type == "TG" and template_context and "decisions" in template_context:
-            total_possible_mandatory_fields = len(template_context["decisions"]["mandatory_list"]) * processed_rows
+        # ALTIJD TWEEDE REGEL: Template Type (alleen het type, geen code)
+        template_type_row = base_content_start_row + 1
+        # Template Type informatie genereren - alleen het basis type
+        if template_type == "TG":
+            template_type_display = "Template Generator"
+        elif template_type == "DT": 
+            template_type_display = "Default Template"
+        elif template_type == "AT":
+            template_type_display = "Onbekende Template"
+        elif template_type == "N": 
+            template_type_display = "Nieuw GHX Template"
+        elif template_type == "O":
+            template_type_display = "Oud/Leverancier Template"
         else:
-            total_possible_mandatory_fields = len(ghx_mandatory_fields) * processed_rows
-        percentage_ingevuld_incl_missing = (
-            (total_filled_in_present / total_possible_mandatory_fields * 100)
-            if total_possible_mandatory_fields > 0
-            else 0
+            template_type_display = f"Template Type {template_type}"
+
+        ws_dash.merge_range(
+            f"B{template_type_row + 1}:C{template_type_row + 1}",  # Excel 1-based
+            template_type_display,
+            fmt_template_value,
         )
 
-        # Fouten per veld non-mandatory (voor info in Aandachtspunten/Acties blok van 'new')
-        present_non_mandatory_columns = [
-            f for f in non_mandatory_fields if f in df.columns
-        ]
-        filled_counts_non_mand = {}
-        for f in present_non_mandatory_columns:
-            filled_counts_non_mand[f] = (
-                df[f].notna()
-                & (
-                    ~df[f]
-                    .astype(str)
-                    .str.strip()
-                    .str.lower()
-                    .isin(["nan", ""] + invalid_values)
+        # DERDE REGEL: Template Versie (alleen voor TG en DT templates)
+        current_template_row = base_content_start_row + 2  # Start na Template Type
+
+        # Extracteer en toon versie alleen voor TG en DT templates
+        if template_type == "TG" and template_context:
+            # TG: uit A2 cel via template_context
+            version_info = template_context.get("version_info", {})
+            template_version = version_info.get("version", "Onbekend")
+            version_display = f"Versie: {template_version}"
+            ws_dash.merge_range(
+                f"B{current_template_row + 1}:C{current_template_row + 1}",
+                version_display,
+                fmt_template_value,
+            )
+            current_template_row += 1
+        elif template_type == "DT":
+            # DT: uit A1 cel 
+            from .price_tool import extract_dt_template_version
+            try:
+                dt_version_info = extract_dt_template_version(excel_path)
+                if dt_version_info:
+                    template_version = dt_version_info.get("version", "Onbekend")
+                else:
+                    template_version = "Onbekend"
+            except Exception as e:
+                logging.warning(f"Fout bij DT versie extractie: {e}")
+                template_version = "Onbekend"
+    
+            version_display = f"Versie: {template_version}"
+            ws_dash.merge_range(
+                f"B{current_template_row + 1}:C{current_template_row + 1}",
+                version_display,
+                fmt_template_value,
+            )
+            current_template_row += 1
+        # AT templates: geen versie regel - "Onbekende Template" is al duidelijk genoeg
+
+        # VIERDE REGEL: Generatie Tijd (alleen voor TG templates)
+        if template_type == "TG" and template_context:
+            # Extracteer generatie tijd uit version_info
+            version_info = template_context.get("version_info", {})
+            generation_time = version_info.get("release_date")
+    
+            # Als geen release_date, probeer generated veld
+            if not generation_time:
+                generated_text = version_info.get("generated", "")
+                if generated_text:
+                    # Extracteer alleen de eerste regel (de datum/tijd)
+                    first_line = generated_text.split('\n')[0].strip()
+                    # Check of het een datum/tijd format is
+                    import re
+                    if re.match(r'\d{2}-\d{2}-\d{4} \d{2}:\d{2}', first_line):
+                        generation_time = first_line
+    
+            # Toon generatie tijd indien beschikbaar
+            if generation_time:
+                time_display = f"Gegenereerd op: {generation_time}"
+                ws_dash.merge_range(
+                    f"B{current_template_row + 1}:C{current_template_row + 1}",
+                    time_display,
+                    fmt_template_value,
                 )
-            ).sum()
-        total_filled_non_mand = sum(filled_counts_non_mand.values())
-
-        errors_per_field_non_mand = {}
-        df_errors_all = pd.DataFrame(validation_results)
-        df_errors = (
-            df_errors_all[df_errors_all["GHX Kolom"] != "RED FLAG"].copy()
-            if not df_errors_all.empty
-            else pd.DataFrame()
-        )
-        df_errors_mand = pd.DataFrame()  # Initialize as empty
-        df_errors_non_mand = pd.DataFrame()  # Initialize as empty
-
-        if not df_errors.empty:
-            # Check if 'GHX Kolom' exists before filtering
-            if "GHX Kolom" in df_errors.columns:
-                # Define mandatory errors dataframe
-                df_errors_mand = df_errors[
-                    df_errors["GHX Kolom"].isin(ghx_mandatory_fields)
-                ].copy()
-
-                # Define non-mandatory errors dataframe
-                df_errors_non_mand = df_errors[
-                    df_errors["GHX Kolom"].isin(non_mandatory_fields)
-                ].copy()
-
-                # Recalculate errors_per_field_non_mand using df_errors_non_mand
-                errors_per_field_non_mand = {}  # Reset
-                if "Rij" in df_errors_non_mand.columns:
-                    for field in present_non_mandatory_columns:
-                        errors_for_this_field = df_errors_non_mand[
-                            df_errors_non_mand["GHX Kolom"] == field
-                        ]
-                        unique_rows = errors_for_this_field["Rij"].nunique()
-                        errors_per_field_non_mand[field] = min(
-                            unique_rows, filled_counts_non_mand.get(field, 0)
-                        )
-                else:  # Handle case where 'Rij' column is missing
-                    logging.warning(
-                        "'Rij' kolom niet gevonden in gefilterde non-mandatory errors."
-                    )
-                    for field in present_non_mandatory_columns:
-                        errors_per_field_non_mand[field] = (
-                            0  # Or some other default handling
-                        )
-            else:  # Handle case where 'GHX Kolom' is missing
-                logging.warning("'GHX Kolom' niet gevonden in df_errors.")
-                for field in present_non_mandatory_columns:
-                    errors_per_field_non_mand[field] = 0  # Default if column missing
+                current_template_row += 1
+
+        # TG-SPECIFIEKE CONTENT: Template Code en Categorie
+        if template_type == "TG" and template_context:
+            # Template Code (zoals S-LM-0-0-0-umcu-V77-M19)  
+            # Probeer eerst uit template_context, anders uit enhanced template display
+            template_code = template_context.get("template_code")
+            if not template_code and template_display_info:
+                # Parse uit type_description als het daar in staat
+                type_desc = template_display_info.get("type_description", "")
+                if "(" in type_desc and ")" in type_desc:
+                    # Bijvoorbeeld: "Template Generator (S-LM-0-0-0-umcu-V77-M19)"
+                    template_code = type_desc.split("(")[1].split(")")[0]
+    
+            if not template_code:
+                template_code = "Onbekende Template Code"
+        
+            ws_dash.merge_range(
+                f"B{current_template_row + 1}:C{current_template_row + 1}",
+                template_code,
+                fmt_template_value,
+            )
+            current_template_row += 1
+    
+            # Template categorie info - nuttige informatie voor gebruiker
+            # Probeer eerst uit configuration (nieuwe structuur)
+            config = template_context.get("configuration", {})
+            product_types = config.get("product_types", template_context.get("product_types", []))
+            institutions = config.get("institutions", template_context.get("institutions", []))
+    
+            # Categorie informatie (product types)
+            if product_types:
+                if isinstance(product_types, list):
+                    # Nederlandse namen voor product types
+                    product_names = []
+                    for pt in product_types:
+                        if pt.lower() == 'lab':
+                            product_names.append('Laboratorium')
+                        elif pt.lower() == 'medisch':
+                            product_names.append('Medisch')
+                        elif pt.lower() == 'facilitair':
+                            product_names.append('Facilitair')
+                        elif pt.lower() == 'overige':
+                            product_names.append('Overige')
+                        else:
+                            product_names.append(pt.title())
+                    categorie_str = ", ".join(product_names)
+                else:
+                    categorie_str = str(product_types).title()
+        
+                ws_dash.merge_range(
+                    f"B{current_template_row + 1}:C{current_template_row + 1}",
+                    f"Categorie: {categorie_str}",
+                    fmt_template_value,
+                )
+                current_template_row += 1
+    
+            # Organisaties informatie - gebruik korte codes indien beschikbaar
+            institution_codes = config.get("institution_codes", template_context.get("institution_codes", []))
+            if institution_codes:
+                # Gebruik korte codes zoals ze in de Template Generator stamp staan
+                if isinstance(institution_codes, list):
+                    inst_str = ", ".join([code.upper() for code in institution_codes])
+                else:
+                    inst_str = str(institution_codes).upper()
+            elif institutions:
+                # Fallback naar volledige namen
+                if isinstance(institutions, list):
+                    inst_str = ", ".join([inst.upper() for inst in institutions])
+                else:
+                    inst_str = str(institutions).upper()
+            else:
+                inst_str = None
+        
+            if inst_str:
+                ws_dash.merge_range(
+                    f"B{current_template_row + 1}:C{current_template_row + 1}",
+                    f"Organisaties: {inst_str}",
+                    fmt_template_value,
+                )
+                current_template_row += 1
+    
+            # Template velden info
+            if template_context.get("decisions"):
+                visible_count = template_context["decisions"].get("visible_fields", 0)
+                # Gebruik de mandatory_fields waarde uit Template Generator code (M18=18)
+                mandatory_count = template_context["decisions"].get("mandatory_fields", 0)
+                velden_info = f"Velden: {visible_count} zichtbaar, {mandatory_count} verplicht"
+                ws_dash.merge_range(
+                    f"B{current_template_row + 1}:C{current_template_row + 1}",
+                    velden_info,
+                    fmt_template_value,
+                )
+                current_template_row += 1
+
+        # Template tabel eindigt op huidige rij
+        template_table_end_row = current_template_row
+
+        # Bereken current_row gebaseerd op Template-tabel grootte
+        # Voor TG: rij 9 (bestandsnaam) + 10 (template type) + extra regels
+        # Voor TD/ALT: rij 9 (bestandsnaam) + 10 (template type)
+        current_row = template_table_end_row + 1  # Stats header na Template-tabel + 1 witregel
+
+    # Nieuw format voor Statistieken header - groen volgens specificaties
+    fmt_header_stats = workbook.add_format({
+        'bold': True,
+        'font_color': '#FFFFFF',
+        'font_size': 14,
+        'bg_color': '#4F6229',  # Groen header
+        'border': 1,
+        'border_color': '#000000',  # Zwarte rand
+        'align': 'left',
+        'valign': 'vcenter',
+        'indent': 1
+    })
+
+    # LINKER KANT: Statistieken (B{current_row}-C{current_row}, A blijft gutter)
+    ws_dash.merge_range(
+        f"B{current_row+1}:C{current_row+1}",  # B tot C op huidige rij Excel-style (1-based)
+        "Belangrijkste Statistieken",
+        fmt_header_stats,
+    )
+    ws_dash.set_row(current_row + 1, 18)  # Hoogte header rij (correct rij)
+
+    # RECHTER KANT: Foutmeldingen header ALTIJD op rij 7 (Excel rij 8) - BLIJFT ONGEWIJZIGD
+    fout_header_row = 7  # VAST: rechterkant verandert niet
+    ws_dash.merge_range(
+        f"E{fout_header_row + 1}:K{fout_header_row + 1}",  # E tot K op rij 8 (Excel 1-based)
+        "Foutmeldingen",
+        fmt_header_blue,  # Blauwe header voor foutmeldingen
+    )
 
-        total_errors_non_mand = sum(errors_per_field_non_mand.values())
+    # Voeg grijze subheader toe - ALLEEN voor foutmeldingen rechts
+    fmt_subheader_grey = workbook.add_format({
+        "bold": True,
+        "bg_color": "#D9D9D9",  # Grijs subheader volgens spec
+        "font_color": "#000000",  # Zwarte tekst
+        "border": 1,
+        "border_color": "#000000",  # Zwarte rand
+        "font_size": 12,
+        "align": "left",
+        "valign": "vcenter",
+        "indent": 1
+    })
+
+    # RECHTER KANT: Foutmeldingen subheaders ALTIJD op rij 8 (Excel rij 9) - BLIJFT ONGEWIJZIGD
+    fout_subheader_row = 8  # VAST: rechterkant verandert niet
+    # Beschrijving spreidt over E, F, G (was D, E, F)
+    ws_dash.merge_range(
+        f"E{fout_subheader_row + 1}:G{fout_subheader_row + 1}",  # E-G voor Beschrijving op rij 10
+        "Beschrijving",
+        fmt_subheader_grey
+    )
+    ws_dash.write(fout_subheader_row, 7, "Aantal", fmt_subheader_grey)         # H op rij 10
+    ws_dash.write(fout_subheader_row, 8, "Type", fmt_subheader_grey)           # I op rij 10
+    ws_dash.write(fout_subheader_row, 9, "Type (Sheet)", fmt_subheader_grey)   # J op rij 10
+    ws_dash.write(fout_subheader_row, 10, "Foutcode", fmt_subheader_grey)      # K op rij 10
+    ws_dash.set_row(current_row, 18)  # Normale rijhoogte
 
-        # BEREKEN HIER DE MISSENDE VARIABELE (Percentage gevuld van AANWEZIGE verplichte velden):
-        perc_verpl_gevuld = (
-            (total_filled_in_present / (M_found * numeric_total_rows) * 100)
-            if (M_found * numeric_total_rows) > 0
-            else 0
+    # Statistieken data begint direct na header op rij 10 (header is rij 9)
+    stats_start_row = current_row + 1  # Rij 10 (direct na header rij 9)
+
+    # GEEN current_row increment hier - data moet DIRECT na header
+    aantal_velden_totaal = numeric_total_rows * total_original_cols
+
+    # CORRECTIE: "Aantal aanwezige/afwezige verplichte velden" betekent KOLOMMEN, niet velden
+    # Voor alle template types: tel alleen kolommen (niet kolommen * rijen)
+    aantal_aanw_verpl_velden = M_found_columns  # Aantal verplichte KOLOMMEN die aanwezig zijn
+    aantal_afw_verpl_velden = M_missing         # Aantal verplichte KOLOMMEN die afwezig zijn
+    aantal_aanw_lege_verpl_velden = empty_in_present
+
+    # Tel rejection errors (afkeuringen) - alleen regels die door Gatekeeper zouden worden afgewezen
+    # (unieke rijen met codes 700-749, voorgeteld in ReportStats)
+    aantal_afkeuringen = stats.rejection_rows
+
+    # Enhanced Template informatie met parsed code support
+    if template_type == "TG":
+        # Gebruik enhanced template display info
+        template_type_info = template_display_info.get("type_description", "Template Generator")
+
+        # Voeg code info toe indien beschikbaar
+        if template_display_info.get("code_info"):
+            template_type_info += f" | {template_display_info['code_info']}"
+
+        # Voeg context info toe indien beschikbaar
+        if template_display_info.get("context_info"):
+            template_type_info += f" | {template_display_info['context_info']}"
+
+        # Voeg institution info toe indien beschikbaar
+        if template_display_info.get("institution_info"):
+            template_type_info += f" | {template_display_info['institution_info']}"
+
+        # Voeg statistics info toe indien beschikbaar
+        if template_display_info.get("statistics_info"):
+            template_type_info += f" | {template_display_info['statistics_info']}"
+
+        # Voeg ingeklapte velden informatie toe
+        collapsed_count = summary_data.get('collapsed_fields_count', 0)
+        if collapsed_count > 0:
+            template_type_info += f" | {collapsed_count} velden ingeklapt"
+    
+        # Fallback naar legacy template_context indien geen enhanced info
+        if not template_display_info.get("type_description") and template_context:
+            template_choice = template_context.get("template_choice", "standard")
+            product_types = template_context.get("product_types", ["facilitair"])
+            institutions = template_context.get("institutions", [])
+    
+            if isinstance(product_types, list):
+                product_types_str = ", ".join(product_types)
+            else:
+                product_types_str = str(product_types)
+    
+            template_type_info = "TG"  # Template Generator (kort)
+        
+    elif template_type == "N":
+        template_type_info = "DT"  # Default Template (kort)
+    
+    elif template_type == "O":
+        template_type_info = "ALT"  # Alternatief Template (kort)
+    else:
+        template_type_info = "UNK"  # Unknown
+
+    # Voor Template Generator: maak aparte Template tabel (geen Template info in stats)
+    # Voor andere templates: voeg Template Type toe aan statistieken
+    if template_type == "TG" and template_context and template_context.get("decisions"):
+        # Template Generator: start statistieken ZONDER Template info
+        stats_data_original = []
+        # Voor TG templates: M_found/M_missing zijn vóór het dashboard via header matching
+        # bepaald (match_template_mandatory_columns)
+        aantal_aanw_verpl_velden = M_found
+        aantal_afw_verpl_velden = M_missing
+
+        # Voeg statistieken toe met correcte labels voor Quick Mode
+        quick_mode_suffix = f" (over de eerste {max_rows} regels)" if max_rows is not None else ""
+        # Voor aantal rijen: toon "5000+" als total_rows None is in Quick Mode
+        display_rows = total_rows if total_rows is not None else "5000+"
+        stats_data_original.extend([
+            ("Aantal rijen", display_rows),
+            ("Aantal kolommen", total_original_cols),  # Nu gefilterde kolom count voor TG
+            ("Aantal aanwezige verplichte kolommen", aantal_aanw_verpl_velden),  # Nu consistent
+            ("Aantal afwezige verplichte kolommen", aantal_afw_verpl_velden),    # Nu consistent
+            (f"Aantal velden{quick_mode_suffix}", aantal_velden_totaal),  # Verplaatst naar beneden
+            (f"Aantal gevulde verplichte velden{quick_mode_suffix}", total_filled_in_present),
+            (f"Aantal aanwezige lege verplichte velden{quick_mode_suffix}", aantal_aanw_lege_verpl_velden),
+        ])
+    else:
+        # Voor andere templates: start ZONDER Template Type (die staat nu in Template-tabel)
+        stats_data_original = []
+
+        # Voeg reguliere statistieken toe met correcte labels voor Quick Mode
+        quick_mode_suffix = f" (over de eerste {max_rows} regels)" if max_rows is not None else ""
+        # Voor aantal rijen: toon "5000+" als total_rows None is in Quick Mode
+        display_rows = total_rows if total_rows is not None else "5000+"
+        stats_data_original.extend([
+            ("Aantal rijen", display_rows),
+            ("Aantal kolommen", total_original_cols),
+            ("Aantal aanwezige verplichte kolommen", aantal_aanw_verpl_velden),
+            ("Aantal afwezige verplichte kolommen", aantal_afw_verpl_velden),
+            (f"Aantal velden{quick_mode_suffix}", aantal_velden_totaal),  # Verplaatst naar beneden
+            (f"Aantal gevulde verplichte velden{quick_mode_suffix}", total_filled_in_present),
+            (f"Aantal aanwezige lege verplichte velden{quick_mode_suffix}", aantal_aanw_lege_verpl_velden),
+        ])
+    # SIMPELE STATISTIEKEN DATA LOGICA - FINAL CORRECTIE
+    # Header staat op current_row+1, data moet DIRECT daaronder op current_row+1  
+    data_row = current_row + 1  # Start DIRECT na header 
+
+    for i, (key, value) in enumerate(stats_data_original):
+        row = data_row + i  # Gewoon i toevoegen aan startpositie
+        # Simple mapping: item naar Excel rij
+
+        # Schrijf label en waarde
+        ws_dash.write(row, 1, key, fmt_label_green)
+        if isinstance(value, (int, float)):
+            ws_dash.write_number(row, 2, value, fmt_value_green)
+        else:
+            ws_dash.write(row, 2, str(value), fmt_value_green)
+    stats_end_row = data_row + len(stats_data_original) - 1
+
+    # Gebruik actions_end_row van de nieuwe A-B Actiepunten voor aandachtspunten positionering
+
+    # --- LINKER KANT: Ontbrekende verplichte kolommen onder Statistieken (A-B) ---
+    # Definieer format eerst - met inspringing
+    fmt_missing_col_header = workbook.add_format({
+        'bold': True, 
+        'font_color': '#FFFFFF',  # Witte tekst
+        'font_size': 14, 
+        'bg_color': '#E26B09',  # Oranje header volgens spec
+        'border': 1,
+        'border_color': '#000000',  # Zwarte rand
+        'align': 'left', 
+        'indent': 1
+    })
+
+    # Positioneer met extra lege rij tussen statistieken en ontbrekende kolommen
+    missing_start_row = stats_end_row + 2  # 1 lege rij onder statistieken + 1 voor header
+    ws_dash.merge_range(
+        f"B{missing_start_row+1}:C{missing_start_row+1}",  # B-C, A blijft gutter
+        "Ontbrekende verplichte kolommen",
+        fmt_missing_col_header,  # Rode header
+    )
+    ws_dash.set_row(missing_start_row, 18)
+
+    # Data onder header: schrijf de ontbrekende kolommen
+    fmt_missing_col_item = workbook.add_format({
+        'font_color': '#000000',  # Zwarte tekst
+        'bg_color': '#FBD5B5',  # Oranje data achtergrond volgens spec
+        'font_size': 12, 
+        'border': 1,
+        'border_color': '#000000',  # Zwarte rand
+        'align': 'left', 
+        'indent': 1
+    })
+
+    missing_data_row = missing_start_row + 1  # Direct onder header
+    if M_missing > 0 and missing_mandatory_columns:
+        for col_name in missing_mandatory_columns:
+            # Merge rijen B-C net zoals de header
+            ws_dash.merge_range(
+                f"B{missing_data_row+1}:C{missing_data_row+1}",
+                col_name,
+                fmt_missing_col_item
+            )
+            ws_dash.set_row(missing_data_row, 18)
+            missing_data_row += 1
+    else:
+        # Merge ook de "Geen ontbrekende kolommen" regel
+        ws_dash.merge_range(
+            f"B{missing_data_row+1}:C{missing_data_row+1}",
+            "Geen ontbrekende kolommen",
+            fmt_missing_col_item
         )
+        missing_data_row += 1
 
-        # Score berekening - Enhanced Template Type Detectie (al gedaan aan begin functie)
-        template_display_info = get_template_display_info(template_type, template_info)
+    missing_end_row = missing_data_row
 
-        # Voor Template Generator: gebruik gefilterde kolom count
-        if template_context and template_context.get("decisions"):
-            visible_fields_count = template_context["decisions"].get("visible_fields", len(df.columns))
-            total_original_cols = visible_fields_count  # Use filtered count for TG templates
+    # --- LINKER KANT: Belangrijkste Actiepunten onder Ontbrekende (B-C) ---
+    # Header voor Actiepunten - 1 witte regel onder Ontbrekende kolommen
+    actions_start_row = missing_end_row + 1  # 1 witte regel tussen
+    ws_dash.merge_range(
+        f"B{actions_start_row+1}:C{actions_start_row+1}",  # B-C (was A-B)
+        "Belangrijkste Actiepunten",
+        fmt_missing_col_header,  # Zelfde rode header als Ontbrekende kolommen
+    )
+    ws_dash.set_row(actions_start_row, 18)
+
+    # Data voor Actiepunten - direct onder header
+    actions_data_row = actions_start_row + 1  # Direct onder header
+    actions_data_original = [
+        (
+            "Percentage ingevulde verplichte velden (incl. ontbrekende)",
+            percentage_ingevuld_incl_missing / 100,
+        ),
+        (f"Aantal regels mogelijk afgewezen door Gatekeeper{quick_mode_suffix}", aantal_afkeuringen),
+    ]
+
+    # Format voor Actiepunten data - met inspringing
+    fmt_action_label = workbook.add_format({
+        'font_color': '#000000',  # Zwarte tekst
+        'bg_color': '#FBD5B5',  # Oranje data achtergrond zoals ontbrekende kolommen
+        'font_size': 12, 
+        'border': 1,
+        'border_color': '#000000',  # Zwarte rand
+        'align': 'left', 
+        'indent': 1
+    })
+    fmt_action_value = workbook.add_format({
+        'font_color': '#000000',  # Zwarte tekst
+        'bg_color': '#FBD5B5',  # Oranje data achtergrond
+        'font_size': 12, 
+        'border': 1,
+        'border_color': '#000000',  # Zwarte rand
+        'align': 'right'
+    })
+
+    for key, value in actions_data_original:
+        # Kolom B voor beschrijving, Kolom C voor waarde (was A,B)
+        ws_dash.write(actions_data_row, 1, key, fmt_action_label)  # Kolom B (was A)
+
+        # Controleer of het de percentage regel is
+        if "Percentage" in key:
+            # Formatteer als percentage string
+            value_str = f"{value * 100:.2f}%"
+            ws_dash.write_string(actions_data_row, 2, value_str, fmt_action_value)  # Kolom C (was B)
         else:
-            total_original_cols = len(df.columns)  # Use actual columns for other templates
+            # Schrijf als getal
+            ws_dash.write_number(actions_data_row, 2, value, fmt_action_value)  # Kolom C (was B)
+    
+        ws_dash.set_row(actions_data_row, 18)
+        actions_data_row += 1
+
+    actions_end_row = actions_data_row
+
+    # Load error code descriptions - support both v18 and v20 structure
+    # DEBUG: Log config structure
+    logging.info(f"DEBUG Sheet 1: Config keys beschikbaar: {list(config.keys()) if config else 'Config is None'}")
 
-        percentage_correct = 0
-        volledigheids_percentage = 0
-        juistheid_percentage = 0
-        if total_filled_in_present > 0:
-            volledigheids_percentage = (
-                (total_filled_in_present / total_possible_mandatory_fields) * 100
-                if total_possible_mandatory_fields > 0
-                else 0
+    # Voor TG templates: config bevat alleen template settings, niet validation rules
+    # We moeten error descriptions direct uit JSON file laden
+    if template_context and template_context.get('type') == 'TG':
+        # TG Template: laad error descriptions direct uit JSON file
+        logging.info("DEBUG Sheet 1: TG Template - laad error descriptions uit JSON file")
+        try:
+            full_config = load_json_config(JSON_CONFIG_PATH)
+    
+            if "global_settings" in full_config and "error_code_descriptions" in full_config["global_settings"]:
+                error_code_desc = full_config["global_settings"]["error_code_descriptions"]
+                logging.info(f"DEBUG Sheet 1: {len(error_code_desc)} error codes geladen uit JSON file voor TG")
+            else:
+                error_code_desc = {}
+                logging.warning("DEBUG Sheet 1: Geen error descriptions in JSON file voor TG")
+        except Exception as e:
+            logging.error(f"DEBUG Sheet 1: Fout bij laden JSON voor TG: {e}")
+            error_code_desc = {}
+    elif "global_settings" in config and "error_code_descriptions" in config["global_settings"]:
+        # v20 structure (original JSON)
+        error_code_desc = config["global_settings"]["error_code_descriptions"]
+        logging.info(f"DEBUG Sheet 1: Gebruikt v20 structure, {len(error_code_desc)} error codes geladen")
+    elif "error_code_descriptions" in config:
+        # v18 structure (normalized or original v18)
+        error_code_desc = config["error_code_descriptions"]
+        logging.info(f"DEBUG Sheet 1: Gebruikt v18 structure, {len(error_code_desc)} error codes geladen")
+    else:
+        # Fallback: empty dict
+        error_code_desc = {}
+        logging.warning("DEBUG Sheet 1: Geen error code descriptions gevonden in config!")
+
+    if "724" not in error_code_desc:
+        error_code_desc["724"] = "UOM-relatie conflict"
+    if "721" not in error_code_desc:
+        error_code_desc["721"] = (
+            "Formaat Omschrijving Verp.eenheid (Waarschuwing)"
+        )
+
+    df_foutcodes_top = pd.DataFrame()
+    # Voor foutmeldingen tabel - VASTE POSITIES (rechterkant blijft ongewijzigd)
+    table_subheader_row = 8  # VAST: rechterkant verandert niet
+    table_start_row = 9  # VAST: rechterkant verandert niet
+    table_end_row = table_start_row + 1  # Default end row
+    if not df_errors.empty:
+        # Check of 'code' kolom bestaat voor we verder gaan
+        if "code" in df_errors.columns:
+            # Simpel: alle fouten alleen per code (voorgeteld in ReportStats, gesorteerd op code)
+            df_foutcodes = pd.DataFrame(
+                {"code": list(stats.code_counts.keys()), "Aantal": list(stats.code_counts.values())}
             )
-            juistheid_percentage = (totaal_juist / total_filled_in_present) * 100
-            percentage_correct = round(
-                (volledigheids_percentage * juistheid_percentage) / 100
+    
+            # Filter lege codes uit
+            df_foutcodes = df_foutcodes[df_foutcodes["code"] != ""]
+    
+            # Maak beschrijving op basis van de foutcode en verwijder FLAG: prefix
+            # DEBUG: Log foutcodes en beschrijvingen
+            logging.info(f"DEBUG Sheet 1: Aantal foutcodes gevonden: {len(df_foutcodes)}")
+            if not df_foutcodes.empty:
+                logging.info(f"DEBUG Sheet 1: Eerste paar foutcodes: {df_foutcodes['code'].head().tolist()}")
+    
+            df_foutcodes["Beschrijving"] = df_foutcodes["code"].apply(
+                lambda x: error_code_desc.get(str(x).strip(), f"Code: {x}").replace("FLAG: ", "")
             )
-        elif M_found > 0 and total_possible_mandatory_fields > 0:
-            percentage_correct = 0
-        else:
-            percentage_correct = 0
-        # === NIEUWE INTUÏTIEVE SCORE BEREKENING ===
-        # Bereken aantal verwerkte rijen voor penalty berekening
-        processed_rows_for_calc = len(df) if len(df) > 0 else 1
+    
+            # DEBUG: Log beschrijvingen
+            if not df_foutcodes.empty:
+                logging.info(f"DEBUG Sheet 1: Eerste beschrijving: '{df_foutcodes['Beschrijving'].iloc[0] if len(df_foutcodes) > 0 else 'Geen'}'")
+                # Check of beschrijvingen leeg zijn
+                empty_desc = df_foutcodes[df_foutcodes["Beschrijving"].str.strip() == ""]
+                if not empty_desc.empty:
+                    logging.warning(f"DEBUG Sheet 1: {len(empty_desc)} lege beschrijvingen gevonden voor codes: {empty_desc['code'].tolist()}")
+
+            # --- NIEUWE CODE: Bepaal sets van error codes VOOR de helper functie ---
+            mandatory_error_codes = set(stats.mandatory_code_counts)
+            non_mandatory_error_codes = set(stats.non_mandatory_code_counts)
+            # --- EINDE NIEUWE CODE ---
+
+            # --- AANGEPASTE HELPER FUNCTIE ---
+            def get_error_type(code):
+                types = set()
+                # Gebruik nu de vooraf berekende sets
+                if code in mandatory_error_codes:
+                    types.add("Zie sheet 3")  # Tekst aangepast
+                if code in non_mandatory_error_codes:
+                    types.add("Zie sheet 5")  # Tekst aangepast
+                if not types:
+                    return ""
+                # Als beide aanwezig zijn, retourneer "Zie sheet 3 & 5", anders de enige aanwezige
+                if len(types) == 2:
+                    return "Zie sheet 3 & 5"
+                else:
+                    return list(types)[0]  # Retourneer het enige element
+
+            # --- EINDE AANGEPASTE HELPER ---
+            df_foutcodes["Type (Sheet)"] = df_foutcodes.apply(
+                lambda row: get_error_type(row["code"]), axis=1
+            )  # Nu per foutcode, maar kan verder worden uitgebreid naar veld+code indien nodig
+    
+            # Voeg Type categorisering kolom toe
+            df_foutcodes["Type"] = df_foutcodes["code"].apply(get_error_category)
+            df_foutcodes = df_foutcodes.sort_values(
+                "Aantal", ascending=False
+            ).reset_index(drop=True)
+            df_foutcodes_top = df_foutcodes.head(10)
+            # Herschik en hernoem kolommen pas na het berekenen van Type (Sheet) en Type
+            df_foutcodes_top = df_foutcodes_top[
+                ["Beschrijving", "Aantal", "Type", "Type (Sheet)", "code"]
+            ]
+            df_foutcodes_top = df_foutcodes_top.rename(
+                columns={"code": "Foutcode"}
+            )
+
+            table_header_row = table_subheader_row + 1  # Start direct na subheader
+            # Data wordt direct geschreven met nieuwe kolom mapping
+            # Nieuwe mapping: Beschrijving=E-G(merged), Aantal=H(7), Type=I(8), Type(Sheet)=J(9), Foutcode=K(10)
+            for r_idx, row_data in df_foutcodes_top.iterrows():
+                current_table_row = table_header_row + r_idx
+        
+                # Set row height for better readability
+                ws_dash.set_row(current_table_row, 18)
         
-        # Gebruik nieuwe score functie met voorberekende percentages
-        score_result = calculate_new_intuitive_score(
-            M_found=M_found,
-            total_mandatory=len(ghx_mandatory_fields),
-            df_errors_mand=df_errors_mand,
-            df_errors_non_mand=df_errors_non_mand,
-            total_rows=processed_rows_for_calc,  # Gebruik verwerkte rijen voor score berekening
-            template_type=template_type,
-            volledigheids_percentage=volledigheids_percentage,
-            juistheid_percentage=juistheid_percentage
+                # Custom kolom mapping voor nieuwe layout
+                for c_idx, cell_value in enumerate(row_data):
+                    col_name = df_foutcodes_top.columns[c_idx]
+            
+                    # Ensure cell_value is never None or NaN
+                    if pd.isna(cell_value) or cell_value is None:
+                        cell_value = ""
+            
+                    fmt = (
+                        fmt_error_table_code
+                        if col_name == "Foutcode"
+                        else fmt_error_table_cell_right
+                        if col_name == "Aantal"
+                        else fmt_error_table_cell
+                    )
+            
+                    try:
+                        if col_name == "Beschrijving":
+                            # Beschrijving spreidt over E-G (kolommen 4-6, was 3-5)
+                            ws_dash.merge_range(
+                                f"E{current_table_row+1}:G{current_table_row+1}",
+                                str(cell_value),
+                                fmt
+                            )
+                        elif col_name == "Aantal":
+                            # Aantal naar kolom H (7, was 6)
+                            try:
+                                if cell_value != "":
+                                    num_val = int(float(str(cell_value)))  # Handle float strings
+                                    ws_dash.write_number(current_table_row, 7, num_val, fmt)
+                                else:
+                                    ws_dash.write_string(current_table_row, 7, "0", fmt)
+                            except (ValueError, TypeError):
+                                ws_dash.write_string(current_table_row, 7, str(cell_value), fmt)
+                        elif col_name == "Type":
+                            # Type naar kolom I (8, was 7)
+                            ws_dash.write_string(current_table_row, 8, str(cell_value), fmt)
+                        elif col_name == "Type (Sheet)":
+                            # Type (Sheet) naar kolom J (9, was 8)
+                            ws_dash.write_string(current_table_row, 9, str(cell_value), fmt)
+                        elif col_name == "Foutcode":
+                            # Foutcode naar kolom K (10, was 9)
+                            try:
+                                if cell_value != "":
+                                    num_val = int(float(str(cell_value)))  # Handle float strings
+                                    ws_dash.write_number(current_table_row, 10, num_val, fmt)
+                                else:
+                                    ws_dash.write_string(current_table_row, 10, "", fmt)
+                            except (ValueError, TypeError):
+                                ws_dash.write_string(current_table_row, 10, str(cell_value), fmt)
+                    except Exception as e:
+                        # Fallback: write as string if any formatting fails
+                        logging.warning(f"Error formatting cell {col_name} at row {current_table_row}: {e}")
+                        ws_dash.write_string(current_table_row, 7 if col_name == "Aantal" else 8 if col_name == "Type" else 9 if col_name == "Type (Sheet)" else 10, str(cell_value), fmt_error_table_cell)
+                
+            table_end_row = table_header_row + len(df_foutcodes_top)
+        else:
+            # 'code' kolom mist - schrijf over E-G (merged)
+            ws_dash.merge_range(
+                f"E{table_subheader_row + 2}:G{table_subheader_row + 2}",  # Na subheader, E-G merged (was D-F)
+                "'code' kolom mist in validatieresultaten.",
+                fmt_error_table_cell,
+            )
+            table_end_row = table_subheader_row + 1
+    else:
+        # Geen fouten - schrijf DOORLOPEND over E-K (hele breedte) 
+        # GEBRUIK EEN ANDERE RIJ dan de error data om conflicten te voorkomen
+        geen_fouten_row = table_subheader_row + 2  # Dit is rij 10 (Excel rij 11)
+        ws_dash.merge_range(
+            f"E{geen_fouten_row + 1}:K{geen_fouten_row + 1}",  # E11:K11 om conflicten te vermijden
+            "Geen fouten gevonden",
+            fmt_error_table_cell
         )
+        table_end_row = geen_fouten_row
+
+
+    # DYNAMISCHE POSITIE voor Aandachtspunten: bereken based op einde van Foutmeldingen data
+    # Minimaal 2 regels ruimte tussen Foutmeldingen en Aandachtspunten
+    if validation_results:
+        # Bereken het einde van de Foutmeldingen tabel
+        foutmeldingen_end_row = table_header_row + len(df_foutcodes_top) - 1  # -1 omdat we bij 0 starten
+        attention_start_row = foutmeldingen_end_row + 2  # 1 lege regel + 1 voor de header
+    else:
+        # Als er geen fouten zijn, start vanaf de "Geen fouten gevonden" regel + 2
+        foutmeldingen_end_row = table_subheader_row + 3  # "Geen fouten gevonden" is nu op rij 11
+        attention_start_row = foutmeldingen_end_row + 2
+
+    # Schrijf hoofdheader voor Aandachtspunten (E-K)
+    ws_dash.merge_range(
+        f"E{attention_start_row+1}:K{attention_start_row+1}",  # E-K voor Aandachtspunten (was D-J)
+        "Aandachtspunten",
+        fmt_header_red,  # Behoud donkerrode hoofdheader
+    )
+    ws_dash.set_row(attention_start_row, 18)  # Hoofdheader hoogte
+
+    # Voeg GRIJZE subheaders toe - melding over E-J, foutcode alleen in K (was D-I, J)
+    attention_subheader_row = attention_start_row + 1
+    ws_dash.merge_range(
+        f"E{attention_subheader_row+1}:J{attention_subheader_row+1}",  # E-J voor Melding (was D-I, 6 kolommen)
+        "Melding",
+        fmt_subheader_grey  # Gebruik grijze subheader zoals bij foutmeldingen
+    )
+    ws_dash.write(attention_subheader_row, 10, "Foutcode", fmt_subheader_grey)  # K voor Foutcode (was J)
+    ws_dash.set_row(attention_subheader_row, 18)  # Normale rijhoogte
+
+    attention_data_start_row = attention_subheader_row + 1  # Start van data
+
+    # Format met RODE rand, font size (aanpassen?), wrap, etc.
+    fmt_attention_item = workbook.add_format({
+        "font_size": 12,
+        "bg_color": "#F2DCDB",  # Identieke kleur als Foutmeldingen data (was #F4CCCC)
+        "font_color": "#000000",  # Zwarte tekst
+        "border": 1,
+        "border_color": "#000000",  # Zwarte rand
+        "text_wrap": True,
+        "align": "left",
+        "valign": "top",
+        "indent": 1
+    })
+
+    # Controleer of er aandachtspunten zijn
+    current_attention_row = attention_data_start_row
+    if red_flag_messages:
+        # Loop door elke individuele melding (nu dict met message + code)
+        for item in red_flag_messages:
+            try:
+                if isinstance(item, dict):
+                    msg = item.get("message", str(item))
+                    code = item.get("code", "")
+                else:
+                    # Backward compatibility - als het nog een string is
+                    msg = str(item)
+                    code = ""
+        
+                # Clean up message and code
+                if pd.isna(msg) or msg is None:
+                    msg = ""
+                if pd.isna(code) or code is None:
+                    code = ""
+            
+                # Vaste rijhoogte voor alle Aandachtspunten regels
+                ws_dash.set_row(current_attention_row, 18)  # Increased from 16 for better readability
+
+                # Schrijf bericht over kolommen E-J (laat K vrij voor foutcode, was D-I)
+                ws_dash.merge_range(
+                    f"E{current_attention_row+1}:J{current_attention_row+1}",
+                    str(msg),
+                    fmt_attention_item,
+                )
         
-        # Extract values voor filename en display
-        M_percentage = score_result['M_percentage']
-        J_percentage = score_result['J_percentage']
-        score_int_file = score_result['final_score']
-        score_grade_file = score_result['grade']
+                # Format voor foutcode kolom - rechts uitgelijnd en niet bold
+                fmt_code_item = workbook.add_format(
+                    {
+                        "font_size": 12,
+                        "bg_color": "#F2DCDB",  # Licht rood (zelfde als message)
+                        "border": 1,
+                        "align": "right",  # Rechts uitlijnen voor codes
+                        "valign": "vcenter",
+                        "bold": False,  # Niet bold
+                    }
+                )
         
-        # Nieuwe filename format: TG_M86_J75_65(C) (J% terug zoals gevraagd)
-        score_suffix = f"_{template_type}_M{M_percentage}_J{J_percentage}_{score_int_file}({score_grade_file})"
+                # Schrijf foutcode in kolom K
+                code_value = str(code) if code else "N/A"
+                ws_dash.write_string(
+                    current_attention_row, 10,  # Kolom K (10, was 9)
+                    code_value,
+                    fmt_code_item
+                )
 
-        # --- Output Bestandsnaam ---
-        quick_mode_suffix = "_QM" if quick_mode else ""
-        output_filename = (
-            f"{bestandsnaam_zonder_extensie}_VR{quick_mode_suffix}{score_suffix}.xlsx"
+                current_attention_row += 1  # Ga naar de volgende rij
+        
+            except Exception as e:
+                logging.warning(f"Error formatting attention point: {e}")
+                # Write fallback message
+                ws_dash.set_row(current_attention_row, 18)
+                ws_dash.merge_range(
+                    f"E{current_attention_row+1}:J{current_attention_row+1}",
+                    "Error formatting attention point",
+                    fmt_attention_item,
+                )
+                ws_dash.write_string(current_attention_row, 10, "ERROR", fmt_attention_item)
+                current_attention_row += 1
+    else:
+        # Geen meldingen: schrijf over kolom E-J (consistent met de rest)
+        ws_dash.set_row(current_attention_row, 18)  # Vaste hoogte 18pt
+        ws_dash.merge_range(
+            f"E{current_attention_row+1}:K{current_attention_row+1}",  # E-K doorlopend (hele breedte)
+            "Geen specifieke aandachtspunten gevonden.",
+            fmt_attention_item,
         )
-        output_path = os.path.join(output_dir, output_filename)
+        current_attention_row += 1
+
+    # Onthoud de laatst gebruikte rij-index (0-based)
+    attention_end_row = current_attention_row - 1
+    # --- Einde Aandachtspunten ---
+
+
+    # ============================
+    # Grafieken Data Voorbereiding
+    # ============================
+
+    chart_data_start_row = 500
+    ws_dash.write(
+        chart_data_start_row,
+        0,
+        "Chart Data Area",
+        workbook.add_format({"bold": True}),
+    ) 
+
+    # 1. Stacked Bar Data
+    bar_chart_row = chart_data_start_row + 2
+    bar_headers = ["Veld", "Juist", "Foutief", "Leeg", "Kolom Missing", "UOM Conflict"]
+    ws_dash.write_row(bar_chart_row, 0, bar_headers)
+    bar_chart_data = []
+    # NIEUWE SIMPELE CHART LOGICA: Gebruik Sheet 7 kleuren
+    chart_rows = len(df)
+
+    # Kolomsommen over de gedeelde cel matrix (zelfde kleuren als Sheet 7)
+    column_counts = column_color_counts(cell_matrix)
+    col_positions = {name: idx for idx, name in enumerate(df.columns)}
+    for i, f in enumerate(ghx_mandatory_fields):
+        row_num = bar_chart_row + 1 + i
+        if f in col_positions:
+            col_idx = col_positions[f]
+            colors = {key: int(counts[col_idx]) for key, counts in column_counts.items()}
+            colors["missing"] = 0
+        else:
+            colors = {"correct": 0, "error": 0, "empty": 0, "conflict": 0, "missing": chart_rows}
+
+        # Write to worksheet - exact same layout as before
+        ws_dash.write(row_num, 0, f)
+        ws_dash.write(row_num, 1, colors["correct"])
+        ws_dash.write(row_num, 2, colors["error"])
+        ws_dash.write(row_num, 3, colors["empty"])
+        ws_dash.write(row_num, 4, colors["missing"])
+        ws_dash.write(row_num, 5, colors["conflict"])
+        bar_chart_data.append([f, colors["correct"], colors["error"], colors["empty"], colors["missing"], colors["conflict"]])
+    last_bar_data_row = bar_chart_row + len(ghx_mandatory_fields)
+
+    # 2. Donut Mandatory Data
+    donut_mand_row = last_bar_data_row + 2
+    missing_mandatory_count = M_missing * numeric_total_rows
+    donut_mand_data = [
+        ["Status", "Aantal"],
+        ["Juist ingevuld", totaal_juist],
+        ["Foutief ingevuld", total_errors_in_present],
+        ["Leeg", empty_in_present],
+        ["Kolom niet aanwezig", missing_mandatory_count],
+    ]
+    ws_dash.write_row(donut_mand_row, 0, donut_mand_data[0])
+    ws_dash.write_row(donut_mand_row + 1, 0, donut_mand_data[1])
+    ws_dash.write_row(donut_mand_row + 2, 0, donut_mand_data[2])
+    ws_dash.write_row(donut_mand_row + 3, 0, donut_mand_data[3])
+    ws_dash.write_row(donut_mand_row + 4, 0, donut_mand_data[4])
+    total_donut_mand = sum(item[1] for item in donut_mand_data[1:])
+
+    # 3. Donut All Data
+    donut_all_row = donut_mand_row + 6
+    total_all_fields_in_config = len(config.get("fields", {}))
+    total_all_fields_possible = numeric_total_rows * total_all_fields_in_config
+    total_all_filled = total_filled_in_present + total_filled_non_mand
+    total_all_errors = total_errors_in_present + total_errors_non_mand
+    total_all_correct = total_all_filled - total_all_errors
+    total_all_empty_or_missing = total_all_fields_possible - total_all_filled
+
+    donut_all_data = [
+        ["Status", "Aantal"],
+        ["Correct ingevuld", max(0, total_all_correct)],
+        ["Foutief ingevuld", total_all_errors],
+        ["Leeg / Kolom niet aanwezig", max(0, total_all_empty_or_missing)],
+    ]
+    ws_dash.write_row(donut_all_row, 0, donut_all_data[0])
+    ws_dash.write_row(donut_all_row + 1, 0, donut_all_data[1])
+    ws_dash.write_row(donut_all_row + 2, 0, donut_all_data[2])
+    ws_dash.write_row(donut_all_row + 3, 0, donut_all_data[3])
+    total_donut_all = sum(item[1] for item in donut_all_data[1:])
+
+    # --- VERBETERDE Grafieken Positionering ---
+    # Scheid linker en rechter kolom voor betere ruimtebenutting
+    left_table_end_rows = [
+        template_table_end_row,  # Template tabel (indien aanwezig)
+        stats_end_row,      # Statistieken tabel (linksboven)
+        missing_end_row,    # Missing data tabel (links midden)  
+        actions_end_row,    # Actions tabel (links onder)
+    ]
+    right_table_end_rows = [
+        table_end_row,      # Foutmeldingen tabel (rechts boven)
+        attention_end_row   # Aandachtspunten tabel (rechts onder)
+    ]
 
-        logging.info(f"Schrijven rapport naar: {output_path}")
-        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
-            workbook = writer.book
-            workbook.set_size(2500, 1500)
+    left_max_row = max(left_table_end_rows)
+    right_max_row = max(right_table_end_rows)
 
-            # --- Formaten Definiëren ---
-            fmt_header_green = workbook.add_format(
-                {
-                    "bold": True,
-                    "font_size": 14,
-                    "font_color": "#006100",
-                    "bg_color": "#C6EFCE",
-                    "border": 1,
-                    "valign": "vcenter",
-                }
-            )
-            fmt_header_red = workbook.add_format({
-                "bold": True,
-                "font_size": 14,
-                "font_color": "#FFFFFF",  # Witte tekst
-                "bg_color": "#C00000",  # Identieke donkere rood als Foutmeldingen (was #E06666)
-                "border": 1,
-                "border_color": "#000000",  # Zwarte rand
-                "valign": "vcenter",
-                "align": "left",
-                "indent": 1
-            })
-            fmt_header_blue = workbook.add_format({
-                "bold": True,
-                "font_size": 14,
-                "font_color": "#FFFFFF",  # Witte tekst
-                "bg_color": "#C00000",  # Rood header voor Foutmeldingen volgens spec
-                "border": 1,
-                "border_color": "#000000",  # Zwarte rand
-                "align": "left",
-                "valign": "vcenter",
-                "indent": 1
-            })
-            fmt_label_green = workbook.add_format({
-                "font_size": 12, 
-                "bg_color": "#E2EFDA",  # Groen data achtergrond
-                "font_color": "#000000",  # Zwarte tekst
-                "border": 1,
-                "border_color": "#000000",  # Zwarte rand
-                "indent": 1
-            })
-            fmt_value_green = workbook.add_format({
-                "font_size": 12,
-                "bg_color": "#E2EFDA",  # Groen data achtergrond
-                "font_color": "#000000",  # Zwarte tekst
-                "border": 1,
-                "border_color": "#000000",  # Zwarte rand
-                "align": "right",
-                "num_format": "#,##0"
-            })
-            fmt_label_red = workbook.add_format(
-                {"font_size": 12, "bg_color": "#F2DCDB", "border": 1, "indent": 1}
-            )  # Zorg dat label format ook bestaat
-            fmt_value_red = workbook.add_format(
-                {
-                    "font_size": 12,
-                    "bg_color": "#F2DCDB",
-                    "border": 1,
-                    "align": "right",
-                    "num_format": "#,##0",
-                }
-            )
-            fmt_value_red_perc = workbook.add_format(
-                {
-                    "font_size": 12,
-                    "bg_color": "#F2DCDB",
-                    "border": 1,
-                    "align": "right",
-                    "num_format": "0.00%",
-                }
-            )
-            fmt_attention_text = workbook.add_format(
-                {
-                    "font_size": 12,
-                    "bg_color": "#F2DCDB",
-                    "border": 1,
-                    "text_wrap": True,
-                    "valign": "top",
-                    "indent": 1,
-                }
-            )
-            fmt_error_table_header = workbook.add_format(
-                {
-                    "bold": True,
-                    "font_size": 14,
-                    "bg_color": "#D9D9D9",
-                    "border": 1,
-                    "align": "left",
-                    "indent": 1,
-                }
-            )
-            fmt_error_table_cell = workbook.add_format({"font_size": 12, "border": 1, "align": "left", "indent": 1, "bg_color": "#F2DCDB"})
-            fmt_error_table_cell_right = workbook.add_format({"font_size": 12, "border": 1, "align": "right", "indent": 1, "bg_color": "#F2DCDB"})
-            fmt_error_table_code = workbook.add_format(
-                {"font_size": 12, "border": 1, "align": "right", "bg_color": "#F2DCDB"}
+    # Chart positionering volgens gebruikerswens:
+    # "2 regels onder belangrijkste actiepunten, tenzij aandachtspunten lager is"
+    if attention_end_row > actions_end_row:
+        # Aandachtspunten tabel eindigt lager, dus gebruik die als basis
+        chart_start_row = attention_end_row + 3  # 3 voor 2 lege regels
+    else:
+        # Belangrijkste actiepunten eindigt lager of gelijk, gebruik die als basis
+        chart_start_row = actions_end_row + 3  # 3 voor 2 lege regels
+
+    # Chart positionering logica toegepast
+
+    # Grafiek 1: Stacked Bar Verplichte Velden (MET GECORRIGEERDE LEGENDA)
+    stacked_chart = workbook.add_chart({"type": "column", "subtype": "stacked"})
+    legend_labels = {
+        1: "Juist ingevuld",
+        2: "Foutief",
+        3: "Leeg",
+        4: "Kolom niet aanwezig",
+        5: "UOM Conflict",
+    }
+    colors = {1: "#70AD47", 2: "#FF0000", 3: "#FFC000", 4: "#000000", 5: "#ADD8E6"}
+    for i in range(1, 6):
+        stacked_chart.add_series(
+            {
+                "name": legend_labels[i],  # <-- Correcte naam direct hier
+                "categories": [
+                    "1. Dashboard",
+                    bar_chart_row + 1,
+                    0,
+                    last_bar_data_row,
+                    0,
+                ],
+                "values": [
+                    "1. Dashboard",
+                    bar_chart_row + 1,
+                    i,
+                    last_bar_data_row,
+                    i,
+                ],
+                "fill": {"color": colors[i]},
+            }
+        )
+    stacked_chart.set_title({"name": "Verplichte Kolommen Overzicht"})
+    stacked_chart.set_x_axis(
+        {"name": "Verplichte Velden", "num_font": {"rotation": -45, "size": 11}}
+    )
+    stacked_chart.set_y_axis(
+        {"name": "Aantal", "major_gridlines": {"visible": False}}
+    )
+    stacked_chart.set_legend({"position": "bottom", "font": {"size": 11}})
+    # Breedte geoptimaliseerd voor A-J kolommen (totaal ~280px * 7 = ~2000px voor goede proportie)  
+    stacked_chart.set_size({"width": 2000, "height": 500})  # Optimaal voor A-J breedte
+    # Voeg een subtiele rand toe rond de chart
+    stacked_chart.set_chartarea({
+        'border': {'color': '#D32F2F', 'width': 2},  # Rode rand, 2px
+        'fill':   {'color': '#FFFFFF'}  # Witte achtergrond
+    })
+    ws_dash.insert_chart(f"B{chart_start_row + 1}", stacked_chart)  # Kolom B (na gutter A)
+
+    # Donut charts verwijderd - alleen tabellen blijven bestaan voor overzicht
+    # Data blijft beschikbaar in donut_mand_row en donut_all_row tabellen
+
+    # --- EINDE DASHBOARD: Nu rijhoogtes forceren voor content rijen (vanaf rij 11) ---
+    # Eerste 50 rijen van content (rij 11-60) krijgen hoogte 18
+    for row in range(10, 60):  # Rijen 11-60 (0-based: 10-59) - content area
+        ws_dash.set_row(row, 18)
+
+    # Header area (rijen 1-10) blijft standaard hoogte voor logo ruimte
+    for row in range(0, 10):  # Rijen 1-10 (0-based: 0-9) - header area
+        ws_dash.set_row(row, None)  # Standaard rijhoogte
+
+
+def add_inleiding_sheet(
+    workbook,
+    writer,
+    *,
+    M_found,
+    ghx_mandatory_fields,
+    report_sheets,
+    score_result,
+    template_type,
+):
+    """Sheet 2: Inleiding met uitleg over het rapport en de onderdelen van dit profiel."""
+    ws_inleiding = workbook.add_worksheet("2. Inleiding")
+    suppress_excel_errors(ws_inleiding)
+    writer.sheets["2. Inleiding"] = ws_inleiding
+    ws_inleiding.hide_gridlines(2)  # Gridlines verbergen
+    ws_inleiding.set_column("A:A", 125)  # Kolombreedte aangepast naar 125
+
+    # --- Definieer Formats (ALLE formats hier, font_size 12, indent) ---
+    fmt_title = workbook.add_format(
+        {  # <<<< DEFINITIE STAAT NU HIER BOVENAAN
+            "font_name": "Arial",
+            "font_size": 20,
+            "bold": True,
+            "align": "left",
+            "valign": "vcenter",
+            "bg_color": "#16365C",  # Gewijzigd naar blauw
+            "font_color": "white",
+            "border": 1,
+        }
+    )
+    fmt_score = workbook.add_format(
+        {
+            "font_name": "Arial",
+            "font_size": 12,
+            "text_wrap": True,  # Size 12
+            "align": "left",
+            "valign": "top",
+            "indent": 1,  # Indent 1
+            "bg_color": "#E6F2FF",
+            "border": 1,
+            "border_color": "#CCCCCC",
+        }
+    )
+    fmt_filename = workbook.add_format(
+        {"font_size": 12, "indent": 2, "bold": True}
+    )  # Size 12, Indent 2, Bold toegevoegd
+    # fmt_standard nu size 12 MET INDENT
+    fmt_standard = workbook.add_format(
+        {
+            "font_size": 12,
+            "text_wrap": True,
+            "align": "left",
+            "valign": "top",
+            "indent": 4,
+        }
+    )  # << Indent verhoogd naar 4
+    fmt_section_header = workbook.add_format(
+        {"font_size": 14, "indent": 2, "bold": True}
+    )
+    # Format for URL (based on standard, maar blauw/onderstreept + indent)
+    fmt_url = workbook.add_format(
+        {"font_size": 12, "font_color": "blue", "underline": 1, "indent": 4}
+    )
+
+    # --- Schrijf Inhoud stap voor stap ---
+    current_row_intro = 0  # Start bovenaan
+
+    # Titel (Excel rij 1-3)
+    # Gebruik NU de correct gedefinieerde fmt_title9
+    ws_inleiding.merge_range(
+        f"A{current_row_intro+1}:B{current_row_intro+1}",
+        "  GHX TEMPLATE VALIDATIE RAPPORT",
+        fmt_title,
+    )  # Merge A1:B1
+    ws_inleiding.set_row(current_row_intro, 40)  # Stel hoogte in voor titelrij
+    current_row_intro = 1  # Start volgende blok op rij 4
+
+    # Extra witregel VOOR het scoreblok (om het op rij 5 te laten beginnen)
+    current_row_intro += 1
+
+    # <<<<<< DE TWEEDE (FOUTE) DEFINITIE VAN fmt_title IS HIER VERWIJDERD >>>>>>
+
+    # === GEBRUIK NIEUWE SCORE VOOR SHEET 2 DISPLAY ===
+    # Gebruik dezelfde score als filename en Sheet 1 (consistent!)
+    score_int_uitleg = score_result['final_score']
+    score_grade_uitleg = score_result['grade']
+
+    # Bepaal kleuren voor Sheet 2 score display
+    if score_grade_uitleg in ["B", "A", "A+"]:
+        score_text_color = "#4f6229"  # Groen
+        score_bg_color = "#E8F4E8"    # Licht groen
+        score_border_color = "#4f6229"  # Groen
+    elif score_grade_uitleg in ["C", "D"]:
+        score_text_color = "#FF5E1A"  # Oranje
+        score_bg_color = "#FFF4E6"    # Licht oranje
+        score_border_color = "#FF5E1A"  # Oranje
+    else:  # E, F
+        score_text_color = "#c00000"  # Rood
+        score_bg_color = "#FFE6E6"    # Licht rood
+        score_border_color = "#c00000"  # Rood
+
+    # Maak aparte formats voor mooiere opmaak
+    fmt_score_title = workbook.add_format({
+        'bold': True,
+        'font_size': 14,
+        'font_color': score_text_color,
+        'bg_color': score_bg_color,
+        'border': 1,
+        'border_color': score_border_color,
+        'align': 'left',
+        'valign': 'vcenter',
+        'text_wrap': True,
+        'indent': 1
+    })
+
+    fmt_score_body = workbook.add_format({
+        'font_size': 12,
+        'font_color': '#000000',
+        'bg_color': score_bg_color,  # Gebruik dezelfde achtergrondkleur als de titel
+        'border': 1,
+        'border_color': score_border_color,  # Gebruik dezelfde randkleur als de titel
+        'align': 'left',
+        'valign': 'top',
+        'text_wrap': True,
+        'indent': 1
+    })
+
+    # Titel apart (bold en groot)
+    score_title = f"KWALITEITSSCORE: {score_int_uitleg}/100 - CIJFER {score_grade_uitleg}"
+
+    # Gedetailleerde score berekening uitleg
+    M_percentage = score_result['M_percentage']
+    J_percentage = score_result['J_percentage']
+    core_score = score_result['core_score']
+    uom_penalties = score_result['uom_penalties']
+    template_penalty = score_result['template_penalty']
+
+    # Template type beschrijving voor gebruikersvriendelijke tekst
+    if template_type == "TG":
+        template_type_description = "nieuwe GHX Template Generator"
+    elif template_type == "DT": 
+        template_type_description = "standaard GHX Default Template"
+    else:  # AT
+        template_type_description = "een onbekende template, ofwel niet een nieuwe GHX Prijstemplate"
+
+    score_body_tekst = f"""BEREKENING:
+• Volledigheid (M): {M_percentage}% ({M_found}/{len(ghx_mandatory_fields)} verplichte velden ingevuld)
+• Juistheid (J): {J_percentage}% (correcte data van ingevulde velden)
+• Core score: {M_percentage}% × {J_percentage}% = {core_score}%
+• Template penalty: {template_penalty} ({template_type_description})
+• UOM penalties: {uom_penalties} (foutcodes in UOM kolommen)
+• Eindscore: {core_score} + {template_penalty} + {uom_penalties} = {score_int_uitleg}
+
+Kwaliteitscore Uitleg:
+• A+ (≥95): Uitstekend - gereed voor Gatekeeper, minimale verbeteringen nodig
+• A (90-94): Zeer goed - kleine verbeteringen mogelijk  
+• B (80-89): Goed - enkele verbeterpunten aanwezig
+• C (70-79): Voldoende - aandacht vereist voor verbeteringen
+• D (60-69): Onvoldoende - significante verbeteringen nodig
+• E (50-59): Slecht - grote problemen aanwezig
+• F (<50): Zeer slecht - uitgebreide herziening vereist"""
+    # Titel (bold en groot) - 2 rijen
+    ws_inleiding.merge_range(
+        f"A{current_row_intro+1}:B{current_row_intro + 2}",
+        score_title,
+        fmt_score_title,
+    )
+    current_row_intro += 3  # 2 rijen titel + 1 witregel
+
+    # Body tekst (extra ruimte voor volledige uitleg tot regel 20+)
+    ws_inleiding.merge_range(
+        f"A{current_row_intro+1}:B{current_row_intro + 18}",
+        score_body_tekst,
+        fmt_score_body,
+    )
+    current_row_intro += 18
+
+    # Witregel
+    current_row_intro += 1
+
+    # Bestandsnaam wordt nu getoond in Sheet 1 Template-tabel
+    # Geen bestandsnaam meer in Sheet 2
+
+    # Witregel (behouden voor spacing)
+    current_row_intro += 1
+
+    # Beknopte introductie - verwijst naar Sheet 1 voor details
+    ws_inleiding.write(
+        f"A{current_row_intro+1}", "Geachte leverancier,", fmt_standard
+    )
+    current_row_intro += 1
+    ws_inleiding.write(
+        f"A{current_row_intro+1}",
+        "Hartelijk dank voor de aangeleverde GHX-prijslijsttemplate. In dit rapport vindt u de validatieresultaten en interpretatie van uw gegevens.",
+        fmt_standard,
+    )
+    current_row_intro += 1
+
+    # Witregel voor ademruimte
+    current_row_intro += 1
+
+    # Rapport Onderdelen - dynamisch gebaseerd op template type
+    ws_inleiding.write(
+        f"A{current_row_intro+1}",
+        "Dit rapport bestaat uit de volgende onderdelen:",
+        fmt_section_header,
+    )
+    current_row_intro += 1
+
+    # Basis onderdelen (altijd aanwezig)
+    rapport_onderdelen = [
+        ("dashboard", "1. Dashboard\n   Belangrijkste statistieken en aandachtspunten in één oogopslag."),
+        ("inleiding", "2. Inleiding\n   Score-interpretatie en gebruiksinstructies."),
+        ("verplichte_fouten", "3. Verplichte Fouten\n   Gedetailleerde lijst van fouten in verplichte velden."),
+        ("verplichte_perc", "4. Verplichte %\n   Statistieken over volledigheid verplichte velden."),
+        ("optionele_fouten", "5. Optionele Fouten\n   Overzicht van fouten in optionele velden."),
+        ("optionele_perc", "6. Optionele %\n   Statistieken over volledigheid optionele velden."),
+    ]
+
+    # Sheet 7 altijd toevoegen (Dataset Validatie)
+    rapport_onderdelen.append(("dataset", "7. Dataset Validatie\n   Visueel overzicht dataset met kleurcodering."))
+
+    # Conditioneel: voeg Sheet 8 toe voor oude/leverancier templates  
+    if template_type in ["O", "AT"]:
+        rapport_onderdelen.append(("mapping", "8. Kolom Mapping\n   Mapping tussen GHX-standaard en uw kolomnamen."))
+
+    # Alleen de sheets van het gekozen rapport profiel
+    rapport_onderdelen = [onderdeel for sheet, onderdeel in rapport_onderdelen if sheet in report_sheets]
+    for onderdeel in rapport_onderdelen:
+        ws_inleiding.write(
+            f"A{current_row_intro+1}", onderdeel, fmt_standard
+        )
+        current_row_intro += 1
+
+    # Witregel
+    current_row_intro += 1
+
+    # Gebruiksinstructies toevoegen
+    ws_inleiding.write(
+        f"A{current_row_intro+1}",
+        "HOE DIT RAPPORT GEBRUIKEN:",
+        fmt_section_header,
+    )
+    current_row_intro += 1
+
+    gebruiks_instructies = [
+        "1. Bekijk eerst Sheet 1 voor het overzicht en volledige scores",
+        "2. Controleer Sheet 3-5 voor specifieke foutmeldingen",  
+        "3. Gebruik de aandachtspunten om prioriteiten te stellen"
+    ]
+
+    for instructie in gebruiks_instructies:
+        ws_inleiding.write(
+            f"A{current_row_intro+1}", instructie, fmt_standard
+        )
+        current_row_intro += 1
+
+    # Witregel
+    current_row_intro += 1
+    # Nieuwe template link
+    ws_inleiding.write(
+        f"A{current_row_intro+1}",
+        "We vragen u om altijd gebruik te maken van de nieuwste versie van de GHX-template, welke te downloaden is via de volgende link:",
+        fmt_standard,
+    )
+    current_row_intro += 1
+    ws_inleiding.write_url(
+        f"A{current_row_intro+1}",
+        "https://ghxnl.ghxeurope.com/synqeps/webroot/upload/GHXstandaardTemplate2.xlsx",
+        fmt_url,
+        string="https://ghxnl.ghxeurope.com/synqeps/webroot/upload/GHXstandaardTemplate2.xlsx",
+    )
+    current_row_intro += 1
+
+    # Witregel
+    current_row_intro += 1
+
+    # Beknopte afsluiting
+    ws_inleiding.write(
+        f"A{current_row_intro+1}",
+        "Wij verzoeken u vriendelijk eventuele fouten te corrigeren, ontbrekende informatie aan te vullen, en volledig lege verplichte kolommen te voorzien van data, zodat de prijslijst succesvol kan worden verwerkt.",
+        fmt_standard,
+    )
+    current_row_intro += 1
+    current_row_intro += 1  # Witregel
+    ws_inleiding.write(
+        f"A{current_row_intro+1}", "Met vriendelijke groet,", fmt_standard
+    )
+    current_row_intro += 1
+    current_row_intro += 1  # Witregel
+    ws_inleiding.write(
+        f"A{current_row_intro+1}", "GHX", fmt_standard
+    )
+    current_row_intro += 1
+
+
+def add_verplichte_fouten_sheet(
+    workbook,
+    writer,
+    *,
+    constant_memory,
+    df_errors_mand,
+    required_cols_err,
+):
+    """Sheet 3: Foutregels in verplichte velden."""
+    ws_mand_err = add_report_worksheet(workbook, "3. Verplichte Fouten", constant_memory)
+    suppress_excel_errors(ws_mand_err)
+    writer.sheets["3. Verplichte Fouten"] = ws_mand_err
+    if not df_errors_mand.empty and all(
+        c in df_errors_mand.columns for c in required_cols_err
+    ):
+        df_errors_mand_sheet = df_errors_mand[required_cols_err].copy()
+        df_errors_mand_sheet = df_errors_mand_sheet.rename(
+            columns={"code": "Foutcode"}
+        )
+
+        # Voeg Type kolom toe
+        df_errors_mand_sheet["Type"] = df_errors_mand_sheet.apply(get_error_category_with_type, axis=1)
+        df_errors_mand_sheet = df_errors_mand_sheet.sort_values(
+            by=["Rij", "GHX Kolom"]
+        )
+        df_errors_mand_sheet = df_errors_mand_sheet.fillna(
+            ""
+        )  # Vul NaN etc. met lege string
+
+        # Schoon de "Supplier Kolom" headers op (alleen Nederlandse namen)
+        if "Supplier Kolom" in df_errors_mand_sheet.columns:
+            df_errors_mand_sheet["Supplier Kolom"] = df_errors_mand_sheet["Supplier Kolom"].apply(
+                clean_header_for_display
             )
-            fmt_chart_title = workbook.add_format({"bold": True, "font_size": 12})
-            fmt_perc_table = workbook.add_format(
-                {"border": 1, "font_size": 12, "num_format": "0.00%"}
+
+        # Limiet toepassen
+        limit_message_format = workbook.add_format(
+            {"bold": True, "color": "red", "font_size": 10}
+        )
+        # Gebruik een aparte naam voor de DataFrame die daadwerkelijk naar Excel gaat (ivm slicing)
+        df_errors_mand_sheet_display = df_errors_mand_sheet
+        if len(df_errors_mand_sheet) > ERROR_LIMIT:
+            ws_mand_err.write(
+                0,
+                0,
+                f"LET OP: Weergave beperkt tot de eerste {ERROR_LIMIT} fouten.",
+                limit_message_format,
             )
-            fmt_default_table = workbook.add_format({"border": 1, "font_size": 12})
-            fmt_header_orange = workbook.add_format(
-                {
-                    "bold": True,
-                    "bg_color": "#f79645",
-                    "font_color": "white",
-                    "border": 1,
-                    "font_size": 14,
-                }
-            )  # Voor andere tabellen
+            # Maak een slice en BELANGRIJK: een .copy() om SettingWithCopyWarning te voorkomen
+            df_errors_mand_sheet_display = df_errors_mand_sheet.iloc[
+                ERROR_START:ERROR_END
+            ].copy()
+            startrow_err = 1  # Data start op rij 2 (index 1) omdat rij 1 het limiet-bericht bevat
+        else:
+            startrow_err = 0  # Data start op rij 1 (index 0)
+
+        # Schrijf header en data rij voor rij (header op startrow_err, data daaronder)
+        fmt_col_c_wrap_override = workbook.add_format({"valign": "top"})
+        fmt_col_d_basic = workbook.add_format({'valign': 'top'})
+        write_error_table(workbook, ws_mand_err, df_errors_mand_sheet_display, startrow_err,
+                          "Table Style Medium 10", fmt_col_c_wrap_override, fmt_col_d_basic)
+
+        # Kolombreedtes instellen
+        ws_mand_err.set_column(0, 0, 8)  # Rij
+        ws_mand_err.set_column(1, 1, 30)  # GHX Kolom
+        ws_mand_err.set_column(
+            2, 2, 30
+        )  # Supplier Kolom << Kolom die moet wrappen
+        ws_mand_err.set_column(3, 3, 45)  # Veldwaarde
+        ws_mand_err.set_column(4, 4, 150)  # Foutmelding
+        ws_mand_err.set_column(5, 5, 10)  # Foutcode
+        ws_mand_err.set_column(6, 6, 12)  # Type
+    else:
+        # Schrijf 'geen fouten' bericht
+        fmt_default_table = workbook.add_format(
+            {"font_size": 10}
+        )  # Basic format
+        ws_mand_err.write(
+            0, 0, "Geen fouten gevonden in verplichte velden.", fmt_default_table
+        )
+        ws_mand_err.set_column("A:A", 50)
 
-            # ==================================================================
-            # START CODE VOOR SHEET 1: DASHBOARD
-            # ==================================================================
-            ws_dash = workbook.add_worksheet("1. Dashboard")
-            suppress_excel_errors(ws_dash)
-            writer.sheets["1. Dashboard"] = ws_dash
-            # Verberg rij 1
-            ws_dash.set_row(0, None, None, {"hidden": True})  # Verberg rij 1 (index 0)
-
-            # --- Kolombreedtes Instellen - Kolom opschuiving: nieuwe kolom A (gutter) ---
-            ws_dash.set_column("A:A", 5)    # NIEUWE lege gutter kolom (5 pixels)
-            # ALLE OUDE KOLOMMEN SCHUIVEN 1 NAAR RECHTS:
-            # LINKER KANT (B-F): Statistieken + Foutmeldingen (was A-E)
-            ws_dash.set_column("B:B", 90)   # Statistieken/ontbrekende (was A: 90 pixels)
-            ws_dash.set_column("C:C", 10)   # Statistieken waarden (was B: 10 pixels)  
-            ws_dash.set_column("D:D", 5)    # Smaller column D (was C: 5 pixels)
-            # FOUTMELDINGEN KOLOMMEN: Aangepaste breedtes voor nieuwe layout (alles +1)
-            ws_dash.set_column("E:E", 40)   # Beschrijving deel 1 (was D: 40 pixels)
-            ws_dash.set_column("F:F", 40)   # Beschrijving deel 2 (was E: 40 pixels)
-            ws_dash.set_column("G:G", 40)   # Beschrijving deel 3 (was F: 40 pixels)
-            ws_dash.set_column("H:H", 10)   # Aantal (was G: 10 pixels)
-            ws_dash.set_column("I:I", 15)   # Type (was H: 15 pixels)
-            ws_dash.set_column("J:J", 15)   # Type Sheet (was I: 15 pixels)
-            ws_dash.set_column("K:K", 10)   # Foutcode (was J: 10 pixels)
-            ws_dash.set_column("L:L", 20)   # Aandachtspunten deel 5 (was K: 20 pixels)
-            ws_dash.set_column("M:M", 45)   # Aandachtspunten deel 6 (was L: 45 pixels)
-            ws_dash.set_column("N:N", 10)   # Foutcode kolom aandachtspunten (was M: 10 pixels)
-
-            # --- TOPMARGE & LOGO: Start content op rij 9+ ---
-            # Reserveer B2:G6 voor logo headerzone (rijen 1-6)  
-            current_row = 8  # Start content op rij 9 (0-based index 8)
-            
-            # Voeg GAX logo toe op B2 (rij 1, kolom 1)
-            try:
-                logo_path = "/Users/ncroiset/Vibe Coding Projecten/Cursor Projecten/Project GHX Prijstemplate Validatie Tool/static/ghx_logo_2.png"
-                # Plaats logo op B2 met aspect ratio lock en niet gekoppeld aan cellen
-                ws_dash.insert_image("B2", logo_path, {
-                    'positioning': 0,  # Move & size with cells = OFF (absolute positioning)
-                    'x_scale': 0.35,   # Schaal logo naar 35% voor kleinere pasvorm (rijen 1-6)
-                    'y_scale': 0.35,   # Behoud aspect ratio 
-                })
-            except Exception as logo_err:
-                # Log error maar ga door met rapport generatie
-                logging.warning(f"Logo kon niet worden toegevoegd: {logo_err}")
-            
-            # --- SCORE BADGE RECHTSBOVEN (H2:K6) ---
-            # Maak formats voor de score badge
-            fmt_score_badge_bg = workbook.add_format({
-                'bg_color': '#F2F2F2',  # Zachte neutrale achtergrond
-                'border': 1,
-                'border_color': '#D0D0D0',  # Subtiele rand
-                'align': 'center',
-                'valign': 'vcenter'
-            })
-            
-            
-            fmt_score_label = workbook.add_format({
-                'font_size': 12,  # Klein label
-                'font_color': '#1F1F1F',
-                'bold': True,
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#F2F2F2',
-                'border': 1,
-                'border_color': '#D0D0D0'
-            })
-            
-            fmt_score_description = workbook.add_format({
-                'font_size': 10,  # Kleine toelichting
-                'font_color': '#1F1F1F',
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#F2F2F2',
-                'border': 1,
-                'border_color': '#D0D0D0'
-            })
-            
-            # Bereken scores eerst voor weergave (zonder Config sheet links om pop-up te voorkomen)
-            # Zorg voor fallback waarden - gebruik try/except voor veilige toegang tot variabelen
-            try:
-                M_found_safe = M_found
-            except NameError:
-                M_found_safe = 0
-            
-            try:
-                ghx_mandatory_fields_safe = ghx_mandatory_fields
-            except NameError:
-                ghx_mandatory_fields_safe = []
-            
-            try:
-                df_errors_mand_safe = df_errors_mand
-            except NameError:
-                df_errors_mand_safe = pd.DataFrame()
-            
-            try:
-                df_errors_non_mand_safe = df_errors_non_mand
-            except NameError:
-                df_errors_non_mand_safe = pd.DataFrame()
-            
-            try:
-                total_rows_safe = total_rows
-            except NameError:
-                total_rows_safe = 0
-            
-            # === GEBRUIK NIEUWE SCORE VOOR SHEET 1 DISPLAY ===
-            # Gebruik dezelfde score als filename (consistent!)
-            totale_score_display = score_result['final_score']
-            score_grade = score_result['grade']
-            
-            # Bepaal randkleur: groen voor B/A/A+, oranje voor C/D, rood voor E/F
-            if score_grade in ["B", "A", "A+"]:
-                border_color = "#4f6229"  # Groen
-            elif score_grade in ["C", "D"]:
-                border_color = "#FF5E1A"  # Oranje
-            else:  # E, F
-                border_color = "#c00000"  # Rood
-            
-            # Update format voor KWALITEITSCORE met dynamische randkleur en tekstkleur
-            fmt_score_number = workbook.add_format({
-                'font_size': 26,
-                'font_color': border_color,  # Tekstkleur matcht randkleur
-                'bold': True,
-                'align': 'center',
-                'valign': 'vcenter',
-                'bg_color': '#FFFFFF',
-                'top': 2, 'left': 2, 'right': 2,  # Alleen boven/links/rechts rand
-                'top_color': border_color,
-                'left_color': border_color,
-                'right_color': border_color
-            })
-            
-            # Hoofdscore cel E3:F4 (alleen kolommen E en F)
-            ws_dash.merge_range("E3:F4", f"KWALITEITSCORE: {totale_score_display}/100 - CIJFER {score_grade}", fmt_score_number)
-            
-            # Cijfertoekenning regel (E4:F4) - bold, zwart, groter, met dynamische randkleur
-            fmt_score_small = workbook.add_format({
-                'font_size': 11,
-                'bold': True,
-                'align': 'center',
-                'valign': 'vcenter',
-                'font_color': '#000000',
-                'bg_color': '#FFFFFF',  # Witte achtergrond
-                'bottom': 2, 'left': 2, 'right': 2,  # Alleen onder/links/rechts rand
-                'bottom_color': border_color,
-                'left_color': border_color,
-                'right_color': border_color
-            })
-            ws_dash.merge_range("E5:F5", "Voor meer informatie over de kwaliteitscore en hoe het berekend wordt, ga naar sheet 2.", fmt_score_small)
-            
-            # --- NIEUWE LAYOUT: Links Statistieken, Rechts Actiepunten ---
-            
-            # --- APARTE TEMPLATE TABEL (voor alle template types) ---
-            template_table_end_row = current_row - 1  # Default: geen template tabel
-            
-            # === QUICK MODE TABEL (rij 8-9 indien actief) ===
-            quick_mode_active = (max_rows is not None)
 
-            if quick_mode_active:
-                # Quick Mode tabel op vaste positie: rij 8-9
-                quick_mode_start_row = 7  # 0-based = Excel rij 8
-                
-                # Formats voor Quick Mode tabel
-                fmt_quickmode_header = workbook.add_format({
-                    'bold': True,
-                    'font_color': '#FFFFFF',
-                    'font_size': 14,
-                    'bg_color': '#FF0000',  # Rood
-                    'border': 1,
-                    'border_color': '#000000',
-                    'align': 'left',
-                    'valign': 'vcenter',
-                    'indent': 1
-                })
-                
-                fmt_quickmode_data = workbook.add_format({
-                    "font_size": 12, 
-                    "bg_color": "#FFE6E6",  # Licht rood
-                    "font_color": "#000000",
-                    "border": 1,
-                    "border_color": "#000000",
-                    "indent": 1
-                })
-                
-                # Rij 8: Header (alleen B8:C8)
-                ws_dash.merge_range(
-                    f"B{quick_mode_start_row + 1}:C{quick_mode_start_row + 1}",
-                    "QUICK MODE VALIDATIE",
-                    fmt_quickmode_header,
-                )
-                ws_dash.set_row(quick_mode_start_row, 18)
-                
-                # Rij 9: Beschrijving (alleen B9:C9)
-                if total_rows and total_rows != "5000+":
-                    quick_text = f"Alleen de eerste {max_rows:,} van {total_rows:,} rijen zijn gevalideerd"
-                else:
-                    quick_text = f"Alleen de eerste {max_rows:,} van 5000+ rijen zijn gevalideerd"
-                
-                ws_dash.merge_range(
-                    f"B{quick_mode_start_row + 2}:C{quick_mode_start_row + 2}",
-                    quick_text,
-                    fmt_quickmode_data,
-                )
-                ws_dash.set_row(quick_mode_start_row + 1, 16)
-                
-                # Schuif alle andere content 3 rijen naar beneden
-                base_content_start_row = 11  # Was 8, nu 11
-                logging.info(f"Quick Mode tabel toegevoegd op rijen 8-9. Content start op rij {base_content_start_row}")
-            else:
-                # Normale modus: content start op rij 8
-                base_content_start_row = 8
-                logging.info("Normale validatie: geen Quick Mode tabel")
-
-            # Template-tabel ALTIJD tonen (voor TG, TD, ALT) 
-            if True:  # Altijd uitvoeren
-                # Template start op base_content_start_row (rij 8 normaal, rij 11 met Quick Mode)
-                template_start_row = base_content_start_row - 1  # 0-based
-                
-                # Template tabel header format - zelfde thema als statistieken
-                fmt_template_header = workbook.add_format({
-                    'bold': True,
-                    'font_color': '#FFFFFF',
-                    'font_size': 14,
-                    'bg_color': '#4F6229',  # Zelfde groen als statistieken
-                    'border': 1,
-                    'border_color': '#000000',
-                    'align': 'left',
-                    'valign': 'vcenter',
-                    'indent': 1
-                })
-                
-                # Template data format - zelfde als statistieken data
-                fmt_template_label = workbook.add_format({
-                    "font_size": 12, 
-                    "bg_color": "#E2EFDA",  # Zelfde groen als statistieken
-                    "font_color": "#000000",
-                    "border": 1,
-                    "border_color": "#000000",
-                    "indent": 1
-                })
-                fmt_template_value = workbook.add_format({
-                    "font_size": 12,
-                    "bg_color": "#E2EFDA",  # Zelfde groen als statistieken
-                    "font_color": "#000000",
-                    "border": 1,
-                    "border_color": "#000000",
-                    "align": "left",  # Links uitlijnen voor template info
-                    "indent": 1  # Inspringen zoals andere tabellen
-                })
-                
-                # Template tabel header - VASTE POSITIE rij 8 (Excel rij 8)
-                ws_dash.merge_range(
-                    f"B{template_start_row + 1}:C{template_start_row + 1}",  # Excel 1-based, rij 8
-                    "Template",
-                    fmt_template_header,
-                )
-                ws_dash.set_row(template_start_row, 18)
-                
-                # ALTIJD EERSTE REGEL: Bestandsnaam 
-                template_filename_row = base_content_start_row
-                ws_dash.merge_range(
-                    f"B{template_filename_row + 1}:C{template_filename_row + 1}",  # Excel 1-based
-                    bestandsnaam,  # Gebruik originele bestandsnaam
-                    fmt_template_value,
-                )
-                
-                # ALTIJD TWEEDE REGEL: Template Type (alleen het type, geen code)
-                template_type_row = base_content_start_row + 1
-                # Template Type informatie genereren - alleen het basis type
-                if template_type == "TG":
-                    template_type_display = "Template Generator"
-                elif template_type == "DT": 
-                    template_type_display = "Default Template"
-                elif template_type == "AT":
-                    template_type_display = "Onbekende Template"
-                elif template_type == "N": 
-                    template_type_display = "Nieuw GHX Template"
-                elif template_type == "O":
-                    template_type_display = "Oud/Leverancier Template"
-                else:
-                    template_type_display = f"Template Type {template_type}"
-                
-                ws_dash.merge_range(
-                    f"B{template_type_row + 1}:C{template_type_row + 1}",  # Excel 1-based
-                    template_type_display,
-                    fmt_template_value,
-                )
-                
-                # DERDE REGEL: Template Versie (alleen voor TG en DT templates)
-                current_template_row = base_content_start_row + 2  # Start na Template Type
-                
-                # Extracteer en toon versie alleen voor TG en DT templates
-                if template_type == "TG" and template_context:
-                    # TG: uit A2 cel via template_context
-                    version_info = template_context.get("version_info", {})
-                    template_version = version_info.get("version", "Onbekend")
-                    version_display = f"Versie: {template_version}"
-                    ws_dash.merge_range(
-                        f"B{current_template_row + 1}:C{current_template_row + 1}",
-                        version_display,
-                        fmt_template_value,
-                    )
-                    current_template_row += 1
-                elif template_type == "DT":
-                    # DT: uit A1 cel 
-                    from .price_tool import extract_dt_template_version
-                    try:
-                        dt_version_info = extract_dt_template_version(excel_path)
-                        if dt_version_info:
-                            template_version = dt_version_info.get("version", "Onbekend")
-                        else:
-                            template_version = "Onbekend"
-                    except Exception as e:
-                        logging.warning(f"Fout bij DT versie extractie: {e}")
-                        template_version = "Onbekend"
-                    
-                    version_display = f"Versie: {template_version}"
-                    ws_dash.merge_range(
-                        f"B{current_template_row + 1}:C{current_template_row + 1}",
-                        version_display,
-                        fmt_template_value,
-                    )
-                    current_template_row += 1
-                # AT templates: geen versie regel - "Onbekende Template" is al duidelijk genoeg
-                
-                # VIERDE REGEL: Generatie Tijd (alleen voor TG templates)
-                if template_type == "TG" and template_context:
-                    # Extracteer generatie tijd uit version_info
-                    version_info = template_context.get("version_info", {})
-                    generation_time = version_info.get("release_date")
-                    
-                    # Als geen release_date, probeer generated veld
-                    if not generation_time:
-                        generated_text = version_info.get("generated", "")
-                        if generated_text:
-                            # Extracteer alleen de eerste regel (de datum/tijd)
-                            first_line = generated_text.split('\n')[0].strip()
-                            # Check of het een datum/tijd format is
-                            import re
-                            if re.match(r'\d{2}-\d{2}-\d{4} \d{2}:\d{2}', first_line):
-                                generation_time = first_line
-                    
-                    # Toon generatie tijd indien beschikbaar
-                    if generation_time:
-                        time_display = f"Gegenereerd op: {generation_time}"
-                        ws_dash.merge_range(
-                            f"B{current_template_row + 1}:C{current_template_row + 1}",
-                            time_display,
-                            fmt_template_value,
-                        )
-                        current_template_row += 1
-                
-                # TG-SPECIFIEKE CONTENT: Template Code en Categorie
-                if template_type == "TG" and template_context:
-                    # Template Code (zoals S-LM-0-0-0-umcu-V77-M19)  
-                    # Probeer eerst uit template_context, anders uit enhanced template display
-                    template_code = template_context.get("template_code")
-                    if not template_code and template_display_info:
-                        # Parse uit type_description als het daar in staat
-                        type_desc = template_display_info.get("type_description", "")
-                        if "(" in type_desc and ")" in type_desc:
-                            # Bijvoorbeeld: "Template Generator (S-LM-0-0-0-umcu-V77-M19)"
-                            template_code = type_desc.split("(")[1].split(")")[0]
-                    
-                    if not template_code:
-                        template_code = "Onbekende Template Code"
-                        
-                    ws_dash.merge_range(
-                        f"B{current_template_row + 1}:C{current_template_row + 1}",
-                        template_code,
-                        fmt_template_value,
-                    )
-                    current_template_row += 1
-                    
-                    # Template categorie info - nuttige informatie voor gebruiker
-                    # Probeer eerst uit configuration (nieuwe structuur)
-                    config = template_context.get("configuration", {})
-                    product_types = config.get("product_types", template_context.get("product_types", []))
-                    institutions = config.get("institutions", template_context.get("institutions", []))
-                    
-                    # Categorie informatie (product types)
-                    if product_types:
-                        if isinstance(product_types, list):
-                            # Nederlandse namen voor product types
-                            product_names = []
-                            for pt in product_types:
-                                if pt.lower() == 'lab':
-                                    product_names.append('Laboratorium')
-                                elif pt.lower() == 'medisch':
-                                    product_names.append('Medisch')
-                                elif pt.lower() == 'facilitair':
-                                    product_names.append('Facilitair')
-                                elif pt.lower() == 'overige':
-                                    product_names.append('Overige')
-                                else:
-                                    product_names.append(pt.title())
-                            categorie_str = ", ".join(product_names)
-                        else:
-                            categorie_str = str(product_types).title()
-                        
-                        ws_dash.merge_range(
-                            f"B{current_template_row + 1}:C{current_template_row + 1}",
-                            f"Categorie: {categorie_str}",
-                            fmt_template_value,
-                        )
-                        current_template_row += 1
-                    
-                    # Organisaties informatie - gebruik korte codes indien beschikbaar
-                    institution_codes = config.get("institution_codes", template_context.get("institution_codes", []))
-                    if institution_codes:
-                        # Gebruik korte codes zoals ze in de Template Generator stamp staan
-                        if isinstance(institution_codes, list):
-                            inst_str = ", ".join([code.upper() for code in institution_codes])
-                        else:
-                            inst_str = str(institution_codes).upper()
-                    elif institutions:
-                        # Fallback naar volledige namen
-                        if isinstance(institutions, list):
-                            inst_str = ", ".join([inst.upper() for inst in institutions])
-                        else:
-                            inst_str = str(institutions).upper()
-                    else:
-                        inst_str = None
-                        
-                    if inst_str:
-                        ws_dash.merge_range(
-                            f"B{current_template_row + 1}:C{current_template_row + 1}",
-                            f"Organisaties: {inst_str}",
-                            fmt_template_value,
-                        )
-                        current_template_row += 1
-                    
-                    # Template velden info
-                    if template_context.get("decisions"):
-                        visible_count = template_context["decisions"].get("visible_fields", 0)
-                        # Gebruik de mandatory_fields waarde uit Template Generator code (M18=18)
-                        mandatory_count = template_context["decisions"].get("mandatory_fields", 0)
-                        velden_info = f"Velden: {visible_count} zichtbaar, {mandatory_count} verplicht"
-                        ws_dash.merge_range(
-                            f"B{current_template_row + 1}:C{current_template_row + 1}",
-                            velden_info,
-                            fmt_template_value,
-                        )
-                        current_template_row += 1
-                
-                # Template tabel eindigt op huidige rij
-                template_table_end_row = current_template_row
-                
-                # Bereken current_row gebaseerd op Template-tabel grootte
-                # Voor TG: rij 9 (bestandsnaam) + 10 (template type) + extra regels
-                # Voor TD/ALT: rij 9 (bestandsnaam) + 10 (template type)
-                current_row = template_table_end_row + 1  # Stats header na Template-tabel + 1 witregel
-            
-            # Nieuw format voor Statistieken header - groen volgens specificaties
-            fmt_header_stats = workbook.add_format({
-                'bold': True,
-                'font_color': '#FFFFFF',
-                'font_size': 14,
-                'bg_color': '#4F6229',  # Groen header
-                'border': 1,
-                'border_color': '#000000',  # Zwarte rand
-                'align': 'left',
-                'valign': 'vcenter',
-                'indent': 1
-            })
-            
-            # LINKER KANT: Statistieken (B{current_row}-C{current_row}, A blijft gutter)
-            ws_dash.merge_range(
-                f"B{current_row+1}:C{current_row+1}",  # B tot C op huidige rij Excel-style (1-based)
-                "Belangrijkste Statistieken",
-                fmt_header_stats,
-            )
-            ws_dash.set_row(current_row + 1, 18)  # Hoogte header rij (correct rij)
-            
-            # RECHTER KANT: Foutmeldingen header ALTIJD op rij 7 (Excel rij 8) - BLIJFT ONGEWIJZIGD
-            fout_header_row = 7  # VAST: rechterkant verandert niet
-            ws_dash.merge_range(
-                f"E{fout_header_row + 1}:K{fout_header_row + 1}",  # E tot K op rij 8 (Excel 1-based)
-                "Foutmeldingen",
-                fmt_header_blue,  # Blauwe header voor foutmeldingen
+def add_verplichte_perc_sheet(
+    workbook,
+    writer,
+    *,
+    corrected_errors,
+    df,
+    filled_counts,
+    fmt_header_orange,
+    ghx_mandatory_fields,
+    numeric_total_rows,
+    original_column_mapping,
+):
+    """Sheet 4: Vulling en foutpercentages per verplicht veld."""
+    ws_mand_perc = workbook.add_worksheet("4. Verplichte %")
+    suppress_excel_errors(ws_mand_perc)
+    writer.sheets["4. Verplichte %"] = ws_mand_perc
+    # Bereken df_percentages hier opnieuw of gebruik een doorgegeven versie
+    # Voor nu, herbruik berekening van eerder in deze functie
+    field_stats_perc = []
+    for f in ghx_mandatory_fields:
+        aanwezig = "Ja" if f in df.columns else "Nee"
+        filled = filled_counts.get(f, 0)
+        field_filled_percentage = (
+            (filled / numeric_total_rows * 100) if numeric_total_rows > 0 else 0
+        )
+        field_errors = corrected_errors.get(f, 0)
+        percentage_fout_field = (
+            (field_errors / filled * 100) if filled > 0 else 0
+        )
+        field_juist = max(0, filled - field_errors)
+        field_stats_perc.append(
+            {
+                "GHX Header": f,
+                "Supplier Header": clean_header(
+                    original_column_mapping.get(f, "")
+                ),
+                "Aanwezig": aanwezig,
+                "FilledPercentage": field_filled_percentage
+                / 100,  # Deel door 100 voor format
+                "PercentageFout": percentage_fout_field
+                / 100,  # Deel door 100 voor format
+                "Aantal juist ingevuld": field_juist,
+            }
+        )
+    df_percentages_sheet = pd.DataFrame(field_stats_perc)
+    df_percentages_sheet = df_percentages_sheet[
+        [
+            "GHX Header",
+            "Supplier Header",
+            "Aanwezig",
+            "FilledPercentage",
+            "PercentageFout",
+            "Aantal juist ingevuld",
+        ]
+    ]
+
+    df_percentages_sheet.to_excel(
+        writer, sheet_name="4. Verplichte %", index=False
+    )
+    # Definieer percentage opmaak
+    percentage_format = writer.book.add_format({'num_format': '0.00%'})
+
+    ws_mand_perc.set_column(0, 0, 30)
+    ws_mand_perc.set_column(1, 1, 30)
+    ws_mand_perc.set_column(2, 2, 12)
+    ws_mand_perc.set_column(3, 3, 18, percentage_format)  # Filled %
+    ws_mand_perc.set_column(4, 4, 18, percentage_format)  # Fout %
+    ws_mand_perc.set_column(5, 5, 20)  # Aantal Juist
+    # Pas format toe op percentage kolommen
+    # (Let op: De set_column hieronder leek overbodig/dubbel in de originele code, ik laat hem weg
+    # tenzij er problemen ontstaan)
+    # ws_mand_perc.set_column(3, 4, 18)  # fmt_perc_table verwijderd?
+    (max_row_mp, max_col_mp) = df_percentages_sheet.shape
+    # Header format
+    for c_idx, value in enumerate(df_percentages_sheet.columns.values):
+        ws_mand_perc.write(0, c_idx, value, fmt_header_orange)
+    # Tabel stijl
+    ws_mand_perc.add_table(
+        0,
+        0,
+        max_row_mp,
+        max_col_mp - 1,
+        {
+            "columns": [{"header": col} for col in df_percentages_sheet.columns],
+            "header_row": True,  # Gebruik de geschreven header
+            "style": "Table Style Medium 1",
+        },
+    )
+
+
+def add_optionele_fouten_sheet(
+    workbook,
+    writer,
+    *,
+    constant_memory,
+    df_errors_non_mand,
+    required_cols_err,
+):
+    """Sheet 5: Foutregels in optionele velden."""
+    ws_opt_err = add_report_worksheet(workbook, "5. Optionele Fouten", constant_memory)
+    suppress_excel_errors(ws_opt_err)
+    writer.sheets["5. Optionele Fouten"] = ws_opt_err
+    if not df_errors_non_mand.empty and all(
+        c in df_errors_non_mand.columns for c in required_cols_err
+    ):
+        df_errors_non_mand_sheet = df_errors_non_mand[required_cols_err].copy()
+        df_errors_non_mand_sheet = df_errors_non_mand_sheet.rename(
+            columns={"code": "Foutcode"}
+        )
+
+        # Voeg Type kolom toe (speciale versie voor optionele fouten)
+        df_errors_non_mand_sheet["Type"] = df_errors_non_mand_sheet.apply(get_error_category_optional, axis=1)
+        df_errors_non_mand_sheet = df_errors_non_mand_sheet.sort_values(
+            by=["Rij", "GHX Kolom"]
+        )
+        df_errors_non_mand_sheet = df_errors_non_mand_sheet.fillna("")
+
+        # Schoon de "Supplier Kolom" headers op (alleen Nederlandse namen)
+        if "Supplier Kolom" in df_errors_non_mand_sheet.columns:
+            df_errors_non_mand_sheet["Supplier Kolom"] = df_errors_non_mand_sheet["Supplier Kolom"].apply(
+                clean_header_for_display
             )
-            
-            # Voeg grijze subheader toe - ALLEEN voor foutmeldingen rechts
-            fmt_subheader_grey = workbook.add_format({
-                "bold": True,
-                "bg_color": "#D9D9D9",  # Grijs subheader volgens spec
-                "font_color": "#000000",  # Zwarte tekst
-                "border": 1,
-                "border_color": "#000000",  # Zwarte rand
-                "font_size": 12,
-                "align": "left",
-                "valign": "vcenter",
-                "indent": 1
-            })
-            
-            # RECHTER KANT: Foutmeldingen subheaders ALTIJD op rij 8 (Excel rij 9) - BLIJFT ONGEWIJZIGD
-            fout_subheader_row = 8  # VAST: rechterkant verandert niet
-            # Beschrijving spreidt over E, F, G (was D, E, F)
-            ws_dash.merge_range(
-                f"E{fout_subheader_row + 1}:G{fout_subheader_row + 1}",  # E-G voor Beschrijving op rij 10
-                "Beschrijving",
-                fmt_subheader_grey
+        # Gebruik een aparte naam voor de DataFrame die daadwerkelijk naar Excel gaat (ivm slicing)
+        df_errors_non_mand_sheet_display = df_errors_non_mand_sheet
+        if len(df_errors_non_mand_sheet) > ERROR_LIMIT:
+            ws_opt_err.write(
+                0,
+                0,
+                f"LET OP: Weergave beperkt tot de eerste {ERROR_LIMIT} fouten.",
+                workbook.add_format({"bold": True, "color": "red"}),
             )
-            ws_dash.write(fout_subheader_row, 7, "Aantal", fmt_subheader_grey)         # H op rij 10
-            ws_dash.write(fout_subheader_row, 8, "Type", fmt_subheader_grey)           # I op rij 10
-            ws_dash.write(fout_subheader_row, 9, "Type (Sheet)", fmt_subheader_grey)   # J op rij 10
-            ws_dash.write(fout_subheader_row, 10, "Foutcode", fmt_subheader_grey)      # K op rij 10
-            ws_dash.set_row(current_row, 18)  # Normale rijhoogte
-            
-            # Statistieken data begint direct na header op rij 10 (header is rij 9)
-            stats_start_row = current_row + 1  # Rij 10 (direct na header rij 9)
-            
-            # GEEN current_row increment hier - data moet DIRECT na header
-            aantal_velden_totaal = numeric_total_rows * total_original_cols
-            
-            # CORRECTIE: "Aantal aanwezige/afwezige verplichte velden" betekent KOLOMMEN, niet velden
-            # Voor alle template types: tel alleen kolommen (niet kolommen * rijen)
-            aantal_aanw_verpl_velden = M_found_columns  # Aantal verplichte KOLOMMEN die aanwezig zijn
-            aantal_afw_verpl_velden = M_missing         # Aantal verplichte KOLOMMEN die afwezig zijn
-            aantal_aanw_lege_verpl_velden = empty_in_present
-
-            # Tel rejection errors (afkeuringen) - alleen regels die door Gatekeeper zouden worden afgewezen
-            aantal_afkeuringen = 0
-            if not df_errors.empty and "code" in df_errors.columns:
-                # Tel unieke rijen met rejection errors (codes 700-749)
-                rejection_rows = df_errors[
-                    df_errors["code"].apply(lambda x: str(x).strip().isdigit() and 700 <= int(float(str(x).strip())) <= 749)
-                ]["Rij"].nunique()
-                aantal_afkeuringen = rejection_rows
-
-            # Enhanced Template informatie met parsed code support
-            if template_type == "TG":
-                # Gebruik enhanced template display info
-                template_type_info = template_display_info.get("type_description", "Template Generator")
-                
-                # Voeg code info toe indien beschikbaar
-                if template_display_info.get("code_info"):
-                    template_type_info += f" | {template_display_info['code_info']}"
-                
-                # Voeg context info toe indien beschikbaar
-                if template_display_info.get("context_info"):
-                    template_type_info += f" | {template_display_info['context_info']}"
-                
-                # Voeg institution info toe indien beschikbaar
-                if template_display_info.get("institution_info"):
-                    template_type_info += f" | {template_display_info['institution_info']}"
-                
-                # Voeg statistics info toe indien beschikbaar
-                if template_display_info.get("statistics_info"):
-                    template_type_info += f" | {template_display_info['statistics_info']}"
-                
-                # Voeg ingeklapte velden informatie toe
-                collapsed_count = summary_data.get('collapsed_fields_count', 0)
-                if collapsed_count > 0:
-                    template_type_info += f" | {collapsed_count} velden ingeklapt"
-                    
-                # Fallback naar legacy template_context indien geen enhanced info
-                if not template_display_info.get("type_description") and template_context:
-                    template_choice = template_context.get("template_choice", "standard")
-                    product_types = template_context.get("product_types", ["facilitair"])
-                    institutions = template_context.get("institutions", [])
-                    
-                    if isinstance(product_types, list):
-                        product_types_str = ", ".join(product_types)
-                    else:
-                        product_types_str = str(product_types)
-                    
-                    template_type_info = "TG"  # Template Generator (kort)
-                        
-            elif template_type == "N":
-                template_type_info = "DT"  # Default Template (kort)
-                    
-            elif template_type == "O":
-                template_type_info = "ALT"  # Alternatief Template (kort)
+            # Maak een slice en BELANGRIJK: een .copy() om SettingWithCopyWarning te voorkomen
+            df_errors_non_mand_sheet_display = df_errors_non_mand_sheet.iloc[
+                ERROR_START:ERROR_END
+            ].copy()
+            startrow_opt_err = 1  # Data start op rij 2 (index 1) omdat rij 1 het limiet-bericht bevat
+        else:
+            startrow_opt_err = 0  # Data start op rij 1 (index 0)
+
+        # Schrijf header en data rij voor rij (header op startrow_opt_err, data daaronder)
+        fmt_col_c_no_wrap_oe = workbook.add_format({'valign': 'top'}) # ZONDER text_wrap
+        fmt_col_d_basic_oe = workbook.add_format({'valign': 'top'})
+        write_error_table(workbook, ws_opt_err, df_errors_non_mand_sheet_display, startrow_opt_err,
+                          "Table Style Medium 7", fmt_col_c_no_wrap_oe, fmt_col_d_basic_oe)
+        # Opmaak
+        ws_opt_err.set_column(0, 0, 8)   # Rij
+        ws_opt_err.set_column(1, 1, 30)  # GHX Kolom
+        ws_opt_err.set_column(2, 2, 30)  # Supplier Kolom
+        ws_opt_err.set_column(3, 3, 45)  # Veldwaarde
+        ws_opt_err.set_column(4, 4, 150)  # Foutmelding
+        ws_opt_err.set_column(5, 5, 10)  # Foutcode
+        ws_opt_err.set_column(6, 6, 12)  # Type
+    else:
+        # Schrijf 'geen fouten' bericht
+        fmt_default_table = workbook.add_format(
+            {"font_size": 10}
+        )  # Basic format
+        ws_opt_err.write(
+            0, 0, "Geen fouten gevonden in optionele velden.", fmt_default_table
+        )
+        ws_opt_err.set_column("A:A", 50)
+
+
+def add_optionele_perc_sheet(
+    workbook,
+    writer,
+    *,
+    df,
+    errors_per_field_non_mand,
+    filled_counts_non_mand,
+    fmt_default_table,
+    fmt_header_orange,
+    non_mandatory_fields,
+    numeric_total_rows,
+    original_column_mapping,
+):
+    """Sheet 6: Vulling en foutpercentages per optioneel veld."""
+    ws_opt_perc = workbook.add_worksheet("6. Optionele %")
+    suppress_excel_errors(ws_opt_perc)
+    writer.sheets["6. Optionele %"] = ws_opt_perc
+    # Bereken df_percentages_non_mand hier
+    field_stats_non_mand_perc = []
+    for (
+        f
+    ) in non_mandatory_fields:  # Loop door *alle* optionele velden uit config
+        aanwezig = "Ja" if f in df.columns else "Nee"
+        filled_nm = filled_counts_non_mand.get(f, 0)  # 0 als kolom mist
+        field_filled_percentage_nm = (
+            (filled_nm / numeric_total_rows * 100) if numeric_total_rows > 0 else 0
+        )
+        field_errors_nm = errors_per_field_non_mand.get(
+            f, 0
+        )  # 0 als kolom mist
+        percentage_fout_field_nm = (
+            (field_errors_nm / filled_nm * 100) if filled_nm > 0 else 0
+        )
+        field_juist_nm = max(0, filled_nm - field_errors_nm)
+        field_stats_non_mand_perc.append(
+            {
+                "GHX Header": f,
+                "Supplier Header": clean_header(
+                    original_column_mapping.get(f, "")
+                ),
+                "Aanwezig": aanwezig,
+                "FilledPercentage": field_filled_percentage_nm
+                / 100,  # Deel door 100
+                "PercentageFout": percentage_fout_field_nm
+                / 100,  # Deel door 100
+                "Aantal juist ingevuld": field_juist_nm,
+            }
+        )
+    df_percentages_non_mand_sheet = pd.DataFrame(field_stats_non_mand_perc)
+
+    # Check if DataFrame is not empty before column selection
+    if not df_percentages_non_mand_sheet.empty:
+        df_percentages_non_mand_sheet = df_percentages_non_mand_sheet[
+            [
+                "GHX Header",
+                "Supplier Header",
+                "Aanwezig",
+                "FilledPercentage",
+                "PercentageFout",
+                "Aantal juist ingevuld",
+            ]
+        ]
+    else:
+        # Create empty DataFrame with correct columns
+        df_percentages_non_mand_sheet = pd.DataFrame(columns=[
+            "GHX Header",
+            "Supplier Header", 
+            "Aanwezig",
+            "FilledPercentage",
+            "PercentageFout",
+            "Aantal juist ingevuld"
+        ])
+
+    if not df_percentages_non_mand_sheet.empty:
+        df_percentages_non_mand_sheet.to_excel(
+            writer, sheet_name="6. Optionele %", index=False
+        )
+        # Definieer percentage opmaak (als het nog niet bestaat of voor de zekerheid opnieuw)
+        percentage_format = writer.book.add_format({'num_format': '0.00%'})
+
+        ws_opt_perc.set_column(0, 0, 30)
+        ws_opt_perc.set_column(1, 1, 30)
+        ws_opt_perc.set_column(2, 2, 12)
+        ws_opt_perc.set_column(3, 3, 18, percentage_format)  # Filled %
+        ws_opt_perc.set_column(4, 4, 18, percentage_format)  # Fout %
+        ws_opt_perc.set_column(5, 5, 20)  # Aantal Juist
+        # De onderstaande regel is nu overbodig door de expliciete format hierboven
+        # ws_opt_perc.set_column(3, 4, 18)  # fmt_perc_table verwijderd
+        (max_row_op, max_col_op) = df_percentages_non_mand_sheet.shape
+        # Header format
+        for c_idx, value in enumerate(
+            df_percentages_non_mand_sheet.columns.values
+        ):
+            ws_opt_perc.write(0, c_idx, value, fmt_header_orange)
+        # Tabel stijl
+        ws_opt_perc.add_table(
+            0,
+            0,
+            max_row_op,
+            max_col_op - 1,
+            {
+                "columns": [{"header": col} for col in df_percentages_non_mand_sheet.columns],
+                "header_row": True,
+                "style": "Table Style Medium 1",
+            },
+        )
+    else:
+        ws_opt_perc.write(
+            0,
+            0,
+            "Geen optionele velden gevonden of van toepassing.",
+            fmt_default_table,
+        )
+        ws_opt_perc.set_column("A:A", 50)
+
+
+def add_mapping_sheet(
+    workbook,
+    writer,
+    *,
+    df_original,
+    fmt_header_orange,
+    ghx_mandatory_fields,
+    original_column_mapping,
+    template_context,
+    template_type,
+    validation_config,
+    active_fields=None,
+):
+    """
+    Sheet 8: Kolom mapping tussen GHX-standaard en de kolomnamen van de leverancier.
+
+    Met active_fields (ActiveFieldPlan) volgen de ontbrekende verplichte velden bij Template
+    Generator bestanden dezelfde veldselectie als de validatie.
+    """
+    # SKIP Sheet 8 voor Template Generator bestanden - kolom mapping is niet relevant
+    mapping_data_map = []  # Initialize outside of if/else scope
+    ws_map = None  # Initialize ws_map to prevent UnboundLocalError
+
+    if (template_context and template_context.get("decisions")) or template_type == "N":
+        # Skip Sheet 8 voor:
+        # - Template Generator (TG): hebben al correcte kolommen
+        # - Nieuwe GHX templates (N): standaard GHX kolommen, geen mapping nodig
+        # Alleen oude/leverancier templates (O) krijgen Sheet 8
+        pass
+    elif template_type in ["O", "AT"]:
+        # Import normalize function voor header vergelijking
+        from .price_tool import normalize_template_header
+
+        ws_map = workbook.add_worksheet("8. Kolom Mapping")
+        suppress_excel_errors(ws_map)
+        writer.sheets["8. Kolom Mapping"] = ws_map
+    mapped_originals = set()
+
+    # 1. Toon alle succesvol gemapte headers in GHX template volgorde
+    # Gebruik visible_headers volgorde i.p.v. original_column_mapping volgorde
+    if validation_config:
+        # Check voor v20 vs v18 structuur
+        if "field_validations" in validation_config:
+            # v20 structuur - gebruik field_validations volgorde
+            template_ordered_headers = list(validation_config.get("field_validations", {}).keys())
+        else:
+            # v18 structuur (fallback)
+            template_ordered_headers = list(validation_config.get("fields", {}).keys())
+
+        # Ga door ALLE GHX headers in template volgorde (103 totaal)
+        for ghx_header in template_ordered_headers:
+            # Check of deze header gemapt is
+            if ghx_header in original_column_mapping:
+                original_header = original_column_mapping[ghx_header]
+        
+                # Check of dit veld zichtbaar is in Template Generator context
+                is_visible = True
+                if template_context and template_context.get("_decisions"):
+                    decisions = template_context.get("_decisions", {})
+                    is_visible = decisions.get(ghx_header, {}).get("visible", True)
+        
+                # Voeg toe met supplier header (voor zichtbare velden)
+                if is_visible:
+                    mapping_data_map.append({
+                        "GHX Header": ghx_header,
+                        "Supplier Header": original_header,
+                    })
+                    # Normaliseer originele header voor vergelijking
+                    from .price_tool import normalize_template_header
+                    normalized_original = normalize_template_header(original_header)
+                    mapped_originals.add(normalized_original)
+                else:
+                    # Veld is niet zichtbaar in context - toon als ontbrekend
+                    mapping_data_map.append({
+                        "GHX Header": ghx_header,
+                        "Supplier Header": "— ONTBREKEND (VERBORGEN) —",
+                    })
             else:
-                template_type_info = "UNK"  # Unknown
-            
-            # Helper functie voor Template Generator header matching
-            def normalize_header_for_matching(header):
-                """Normalize complex Template Generator headers to match mandatory field names"""
-                if pd.isna(header) or not str(header).strip():
-                    return header
-                
-                # Voor Template Generator: neem eerste regel en clean het op
-                cleaned = str(header).split("\n")[0].strip()
-                
-                # Verwijder trailing spaties en extra karakters
-                cleaned = cleaned.rstrip()
-                
-                # Specifieke fixes voor bekende problemen
-                # Fix: "verpakkingseenheid" -> "Verpakkingseenheid" (kapitaal V)
-                if "verpakkingseenheid" in cleaned.lower():
-                    cleaned = cleaned.replace("verpakkingseenheid", "Verpakkingseenheid")
-                    cleaned = cleaned.replace("VERPAKKINGSEENHEID", "Verpakkingseenheid")
-                
-                return cleaned
-            
-            def find_matching_column(mandatory_field, df_columns):
-                """Find a Template Generator column that matches the mandatory field name"""
-                # Probeer eerst exacte match
-                if mandatory_field in df_columns:
-                    return mandatory_field
-                    
-                # Voor Template Generator: probeer normalized matching
-                normalized_mandatory = mandatory_field.strip()
-                
-                for col in df_columns:
-                    normalized_col = normalize_header_for_matching(col)
-                    if normalized_col == normalized_mandatory:
-                        return col
-                        
-                    # Extra check: probeer ook zonder haakjes inhoud te matchen
-                    # bijv. "Brutoprijs" zou matchen met "Brutoprijs (extra tekst)"
-                    base_mandatory = normalized_mandatory.split("(")[0].strip()
-                    base_col = normalized_col.split("(")[0].strip() 
-                    if base_mandatory and base_col == base_mandatory:
-                        return col
-                        
-                return None
+                # Geen mapping gevonden - toon als ontbrekend/optioneel
+                mapping_data_map.append({
+                    "GHX Header": ghx_header,
+                    "Supplier Header": "— ONTBREKEND (OPTIONEEL) —",
+                })
+    else:
+        # Fallback naar oude methode als geen validation_config
+        for ghx_header, original_header in original_column_mapping.items():
+            # Check of dit veld zichtbaar is in Template Generator context
+            is_visible = True
+            if template_context and template_context.get("_decisions"):
+                decisions = template_context.get("_decisions", {})
+                is_visible = decisions.get(ghx_header, {}).get("visible", True)
+    
+            # Alleen toevoegen als het veld zichtbaar is
+            if is_visible:
+                mapping_data_map.append({
+                    "GHX Header": ghx_header,
+                    "Supplier Header": original_header,
+                })
+                # Normaliseer originele header voor vergelijking
+                from .price_tool import normalize_template_header
+                normalized_original = normalize_template_header(original_header)
+                mapped_originals.add(normalized_original)
 
-            # Voor Template Generator: maak aparte Template tabel (geen Template info in stats)
-            # Voor andere templates: voeg Template Type toe aan statistieken
-            if template_type == "TG" and template_context and template_context.get("decisions"):
-                # Template Generator: start statistieken ZONDER Template info
-                stats_data_original = []
-                # Voor TG templates: gebruik alleen mandatory_list uit decisions
-                tg_mandatory_fields = template_context["decisions"].get("mandatory_list", [])
-                
-                # NIEUWE SLIMME MATCHING voor Template Generator headers
-                matched_fields = []
-                missing_fields = []
-                
-                for mandatory_field in tg_mandatory_fields:
-                    matching_col = find_matching_column(mandatory_field, df.columns)
-                    if matching_col:
-                        matched_fields.append(mandatory_field)
-                        # TG match gevonden voor verplicht veld
-                    else:
-                        missing_fields.append(mandatory_field)
-                        # TG verplicht veld niet gevonden
-                
-                tg_aanwezige_verpl = len(matched_fields)
-                tg_ontbrekende_verpl = len(missing_fields)
-                
-                # Update ook de globale missing_mandatory_columns voor TG templates
-                missing_mandatory_columns = missing_fields
-                present_mandatory_columns = matched_fields
-                
-                # Voor TG templates: gebruik template_context mandatory fields voor berekeningen
-                # Update M_found en M_missing met TG specifieke getallen
-                M_found = tg_aanwezige_verpl      # Voor consistentie met globale variabelen 
-                M_missing = tg_ontbrekende_verpl  # Voor actiepunten en missing kolommen lijst
-                
-                # Nu gebruiken we dezelfde berekening als voor andere templates (maar met updated M_found/M_missing)
-                aantal_aanw_verpl_velden = M_found   # Nu correct omdat M_found is bijgewerkt voor TG
-                aantal_afw_verpl_velden = M_missing  # Nu correct omdat M_missing is bijgewerkt voor TG
-                
-                # Voeg statistieken toe met correcte labels voor Quick Mode
-                quick_mode_suffix = f" (over de eerste {max_rows} regels)" if max_rows is not None else ""
-                # Voor aantal rijen: toon "5000+" als total_rows None is in Quick Mode
-                display_rows = total_rows if total_rows is not None else "5000+"
-                stats_data_original.extend([
-                    ("Aantal rijen", display_rows),
-                    ("Aantal kolommen", total_original_cols),  # Nu gefilterde kolom count voor TG
-                    ("Aantal aanwezige verplichte kolommen", aantal_aanw_verpl_velden),  # Nu consistent
-                    ("Aantal afwezige verplichte kolommen", aantal_afw_verpl_velden),    # Nu consistent
-                    (f"Aantal velden{quick_mode_suffix}", aantal_velden_totaal),  # Verplaatst naar beneden
-                    (f"Aantal gevulde verplichte velden{quick_mode_suffix}", total_filled_in_present),
-                    (f"Aantal aanwezige lege verplichte velden{quick_mode_suffix}", aantal_aanw_lege_verpl_velden),
-                ])
+    # 2. Toon verplichte velden die ontbreken (gefilterd voor Template Generator)
+    if not validation_config:
+        logging.warning("validation_config is None, kan Sheet 8 niet volledig genereren.")
+    else:
+        # Check voor v20 vs v18 structuur
+        if "field_validations" in validation_config:
+            # v20 structuur
+            ghx_headers_in_config = list(validation_config.get("field_validations", {}).keys())
+        else:
+            # v18 structuur (fallback)  
+            ghx_headers_in_config = list(validation_config.get("fields", {}).keys())
+
+        # Filter headers voor Template Generator templates - alleen zichtbare velden
+        visible_headers = ghx_headers_in_config
+
+        if template_context and template_context.get("decisions"):
+            # Use Template Generator decisions om ingeklapte velden uit te filteren
+            if active_fields is not None:
+                visible_headers = [field.name for field in active_fields.fields]
             else:
-                # Voor andere templates: start ZONDER Template Type (die staat nu in Template-tabel)
-                stats_data_original = []
-                
-                # Voeg reguliere statistieken toe met correcte labels voor Quick Mode
-                quick_mode_suffix = f" (over de eerste {max_rows} regels)" if max_rows is not None else ""
-                # Voor aantal rijen: toon "5000+" als total_rows None is in Quick Mode
-                display_rows = total_rows if total_rows is not None else "5000+"
-                stats_data_original.extend([
-                    ("Aantal rijen", display_rows),
-                    ("Aantal kolommen", total_original_cols),
-                    ("Aantal aanwezige verplichte kolommen", aantal_aanw_verpl_velden),
-                    ("Aantal afwezige verplichte kolommen", aantal_afw_verpl_velden),
-                    (f"Aantal velden{quick_mode_suffix}", aantal_velden_totaal),  # Verplaatst naar beneden
-                    (f"Aantal gevulde verplichte velden{quick_mode_suffix}", total_filled_in_present),
-                    (f"Aantal aanwezige lege verplichte velden{quick_mode_suffix}", aantal_aanw_lege_verpl_velden),
-                ])
-            # SIMPELE STATISTIEKEN DATA LOGICA - FINAL CORRECTIE
-            # Header staat op current_row+1, data moet DIRECT daaronder op current_row+1  
-            data_row = current_row + 1  # Start DIRECT na header 
-            
-            for i, (key, value) in enumerate(stats_data_original):
-                row = data_row + i  # Gewoon i toevoegen aan startpositie
-                # Simple mapping: item naar Excel rij
-                
-                # Schrijf label en waarde
-                ws_dash.write(row, 1, key, fmt_label_green)
-                if isinstance(value, (int, float)):
-                    ws_dash.write_number(row, 2, value, fmt_value_green)
+                decisions = template_context.get("decisions", {})
+                visible_set = frozenset(decisions.get("visible_list", []))
+                visible_headers = [header for header in ghx_headers_in_config if header in visible_set]
+            # Template Generator kolom filtering toegepast voor Sheet 8
+        else:
+            # Template Generator filtering overgeslagen voor Sheet 8
+            pass
+
+        # Toon ALLE GHX headers met mapping status voor AT templates  
+        for ghx_header in visible_headers:
+            if ghx_header not in original_column_mapping:
+                # Bepaal status: verplicht of optioneel
+                if ghx_header in ghx_mandatory_fields:
+                    status = "--- ONTBREKEND (VERPLICHT) ---"
                 else:
-                    ws_dash.write(row, 2, str(value), fmt_value_green)
-            stats_end_row = data_row + len(stats_data_original) - 1
-
-            # Gebruik actions_end_row van de nieuwe A-B Actiepunten voor aandachtspunten positionering
-
-            # --- LINKER KANT: Ontbrekende verplichte kolommen onder Statistieken (A-B) ---
-            # Definieer format eerst - met inspringing
-            fmt_missing_col_header = workbook.add_format({
-                'bold': True, 
-                'font_color': '#FFFFFF',  # Witte tekst
-                'font_size': 14, 
-                'bg_color': '#E26B09',  # Oranje header volgens spec
-                'border': 1,
-                'border_color': '#000000',  # Zwarte rand
-                'align': 'left', 
-                'indent': 1
-            })
-            
-            # Positioneer met extra lege rij tussen statistieken en ontbrekende kolommen
-            missing_start_row = stats_end_row + 2  # 1 lege rij onder statistieken + 1 voor header
-            ws_dash.merge_range(
-                f"B{missing_start_row+1}:C{missing_start_row+1}",  # B-C, A blijft gutter
-                "Ontbrekende verplichte kolommen",
-                fmt_missing_col_header,  # Rode header
-            )
-            ws_dash.set_row(missing_start_row, 18)
+                    status = "--- ONTBREKEND (OPTIONEEL) ---"
             
-            # Data onder header: schrijf de ontbrekende kolommen
-            fmt_missing_col_item = workbook.add_format({
-                'font_color': '#000000',  # Zwarte tekst
-                'bg_color': '#FBD5B5',  # Oranje data achtergrond volgens spec
-                'font_size': 12, 
-                'border': 1,
-                'border_color': '#000000',  # Zwarte rand
-                'align': 'left', 
-                'indent': 1
+                mapping_data_map.append({
+                    "GHX Header": ghx_header,
+                    "Supplier Header": status,
+                })
+
+    # 3. Vind alle originele headers die NIET gemapt werden
+    for original_header in df_original.columns:
+        if original_header.lower().startswith("algemeen"):
+            continue  # Skip algemeen kolommen
+    
+        # Normaliseer en vergelijk
+        normalized_original = normalize_template_header(original_header) 
+        if normalized_original not in mapped_originals:
+            mapping_data_map.append({
+                "GHX Header": "--- ONBEKEND / NIET GEMAPT ---",
+                "Supplier Header": normalized_original,
             })
-            
-            missing_data_row = missing_start_row + 1  # Direct onder header
-            if M_missing > 0 and missing_mandatory_columns:
-                for col_name in missing_mandatory_columns:
-                    # Merge rijen B-C net zoals de header
-                    ws_dash.merge_range(
-                        f"B{missing_data_row+1}:C{missing_data_row+1}",
-                        col_name,
-                        fmt_missing_col_item
-                    )
-                    ws_dash.set_row(missing_data_row, 18)
-                    missing_data_row += 1
-            else:
-                # Merge ook de "Geen ontbrekende kolommen" regel
-                ws_dash.merge_range(
-                    f"B{missing_data_row+1}:C{missing_data_row+1}",
-                    "Geen ontbrekende kolommen",
-                    fmt_missing_col_item
-                )
-                missing_data_row += 1
-            
-            missing_end_row = missing_data_row
+    mapping_df_sheet = pd.DataFrame(mapping_data_map)
 
-            # --- LINKER KANT: Belangrijkste Actiepunten onder Ontbrekende (B-C) ---
-            # Header voor Actiepunten - 1 witte regel onder Ontbrekende kolommen
-            actions_start_row = missing_end_row + 1  # 1 witte regel tussen
-            ws_dash.merge_range(
-                f"B{actions_start_row+1}:C{actions_start_row+1}",  # B-C (was A-B)
-                "Belangrijkste Actiepunten",
-                fmt_missing_col_header,  # Zelfde rode header als Ontbrekende kolommen
-            )
-            ws_dash.set_row(actions_start_row, 18)
-            
-            # Data voor Actiepunten - direct onder header
-            actions_data_row = actions_start_row + 1  # Direct onder header
-            actions_data_original = [
-                (
-                    "Percentage ingevulde verplichte velden (incl. ontbrekende)",
-                    percentage_ingevuld_incl_missing / 100,
-                ),
-                (f"Aantal regels mogelijk afgewezen door Gatekeeper{quick_mode_suffix}", aantal_afkeuringen),
-            ]
+    # Alleen Sheet 8 schrijven voor oude/leverancier templates (O/AT)
+    if template_type in ["O", "AT"]:
+        mapping_df_sheet.to_excel(
+            writer, sheet_name="8. Kolom Mapping", index=False
+        )
+        ws_map.set_column(0, 0, 45)
+        ws_map.set_column(1, 1, 75)
+        (max_row_map, max_col_map) = mapping_df_sheet.shape
+        # Header format
+        for c_idx, value in enumerate(mapping_df_sheet.columns.values):
+            ws_map.write(0, c_idx, value, fmt_header_orange)
+        # Tabel stijl
+        ws_map.add_table(
+            0,
+            0,
+            max_row_map,
+            max_col_map - 1,
+            {
+                "columns": [{"header": col} for col in mapping_df_sheet.columns],
+                "header_row": True,
+                "style": "Table Style Medium 1",
+            },
+        )
 
-            # Format voor Actiepunten data - met inspringing
-            fmt_action_label = workbook.add_format({
-                'font_color': '#000000',  # Zwarte tekst
-                'bg_color': '#FBD5B5',  # Oranje data achtergrond zoals ontbrekende kolommen
-                'font_size': 12, 
-                'border': 1,
-                'border_color': '#000000',  # Zwarte rand
-                'align': 'left', 
-                'indent': 1
-            })
-            fmt_action_value = workbook.add_format({
-                'font_color': '#000000',  # Zwarte tekst
-                'bg_color': '#FBD5B5',  # Oranje data achtergrond
-                'font_size': 12, 
-                'border': 1,
-                'border_color': '#000000',  # Zwarte rand
-                'align': 'right'
-            })
 
-            for key, value in actions_data_original:
-                # Kolom B voor beschrijving, Kolom C voor waarde (was A,B)
-                ws_dash.write(actions_data_row, 1, key, fmt_action_label)  # Kolom B (was A)
-                
-                # Controleer of het de percentage regel is
-                if "Percentage" in key:
-                    # Formatteer als percentage string
-                    value_str = f"{value * 100:.2f}%"
-                    ws_dash.write_string(actions_data_row, 2, value_str, fmt_action_value)  # Kolom C (was B)
-                else:
-                    # Schrijf als getal
-                    ws_dash.write_number(actions_data_row, 2, value, fmt_action_value)  # Kolom C (was B)
-                    
-                ws_dash.set_row(actions_data_row, 18)
-                actions_data_row += 1
-            
-            actions_end_row = actions_data_row
+# --- Hoofdfunctie voor Rapport Generatie (VOLLEDIGE EN AANGEPASTE VERSIE) ---
 
-            # Load error code descriptions - support both v18 and v20 structure
-            # DEBUG: Log config structure
-            logging.info(f"DEBUG Sheet 1: Config keys beschikbaar: {list(config.keys()) if config else 'Config is None'}")
-            
-            # Voor TG templates: config bevat alleen template settings, niet validation rules
-            # We moeten error descriptions direct uit JSON file laden
-            if template_context and template_context.get('type') == 'TG':
-                # TG Template: laad error descriptions direct uit JSON file
-                logging.info("DEBUG Sheet 1: TG Template - laad error descriptions uit JSON file")
-                try:
-                    import json
-                    with open(JSON_CONFIG_PATH, 'r', encoding='utf-8') as f:
-                        full_config = json.load(f)
-                    
-                    if "global_settings" in full_config and "error_code_descriptions" in full_config["global_settings"]:
-                        error_code_desc = full_config["global_settings"]["error_code_descriptions"]
-                        logging.info(f"DEBUG Sheet 1: {len(error_code_desc)} error codes geladen uit JSON file voor TG")
-                    else:
-                        error_code_desc = {}
-                        logging.warning("DEBUG Sheet 1: Geen error descriptions in JSON file voor TG")
-                except Exception as e:
-                    logging.error(f"DEBUG Sheet 1: Fout bij laden JSON voor TG: {e}")
-                    error_code_desc = {}
-            elif "global_settings" in config and "error_code_descriptions" in config["global_settings"]:
-                # v20 structure (original JSON)
-                error_code_desc = config["global_settings"]["error_code_descriptions"]
-                logging.info(f"DEBUG Sheet 1: Gebruikt v20 structure, {len(error_code_desc)} error codes geladen")
-            elif "error_code_descriptions" in config:
-                # v18 structure (normalized or original v18)
-                error_code_desc = config["error_code_descriptions"]
-                logging.info(f"DEBUG Sheet 1: Gebruikt v18 structure, {len(error_code_desc)} error codes geladen")
-            else:
-                # Fallback: empty dict
-                error_code_desc = {}
-                logging.warning("DEBUG Sheet 1: Geen error code descriptions gevonden in config!")
-            
-            if "724" not in error_code_desc:
-                error_code_desc["724"] = "UOM-relatie conflict"
-            if "721" not in error_code_desc:
-                error_code_desc["721"] = (
-                    "Formaat Omschrijving Verp.eenheid (Waarschuwing)"
-                )
 
-            df_foutcodes_top = pd.DataFrame()
-            # Voor foutmeldingen tabel - VASTE POSITIES (rechterkant blijft ongewijzigd)
-            table_subheader_row = 8  # VAST: rechterkant verandert niet
-            table_start_row = 9  # VAST: rechterkant verandert niet
-            table_end_row = table_start_row + 1  # Default end row
-            if not df_errors.empty:
-                # Check of 'code' kolom bestaat voor we verder gaan
-                if "code" in df_errors.columns:
-                    # Simpel: groepeer alle fouten alleen op code, net als in het notebook
-                    df_foutcodes = df_errors.groupby("code").size().reset_index(name="Aantal")
-                    
-                    # Filter lege codes uit
-                    df_foutcodes = df_foutcodes[df_foutcodes["code"] != ""]
-                    
-                    # Maak beschrijving op basis van de foutcode en verwijder FLAG: prefix
-                    # DEBUG: Log foutcodes en beschrijvingen
-                    logging.info(f"DEBUG Sheet 1: Aantal foutcodes gevonden: {len(df_foutcodes)}")
-                    if not df_foutcodes.empty:
-                        logging.info(f"DEBUG Sheet 1: Eerste paar foutcodes: {df_foutcodes['code'].head().tolist()}")
-                    
-                    df_foutcodes["Beschrijving"] = df_foutcodes["code"].apply(
-                        lambda x: error_code_desc.get(str(x).strip(), f"Code: {x}").replace("FLAG: ", "")
-                    )
-                    
-                    # DEBUG: Log beschrijvingen
-                    if not df_foutcodes.empty:
-                        logging.info(f"DEBUG Sheet 1: Eerste beschrijving: '{df_foutcodes['Beschrijving'].iloc[0] if len(df_foutcodes) > 0 else 'Geen'}'")
-                        # Check of beschrijvingen leeg zijn
-                        empty_desc = df_foutcodes[df_foutcodes["Beschrijving"].str.strip() == ""]
-                        if not empty_desc.empty:
-                            logging.warning(f"DEBUG Sheet 1: {len(empty_desc)} lege beschrijvingen gevonden voor codes: {empty_desc['code'].tolist()}")
-
-                    # --- NIEUWE CODE: Bepaal sets van error codes VOOR de helper functie ---
-                    mandatory_error_codes = set()
-                    if not df_errors_mand.empty and "code" in df_errors_mand.columns:
-                        mandatory_error_codes = set(df_errors_mand["code"].unique())
-
-                    non_mandatory_error_codes = set()
-                    if not df_errors_non_mand.empty and "code" in df_errors_non_mand.columns:
-                        non_mandatory_error_codes = set(df_errors_non_mand["code"].unique())
-                    # Gebruik df_errors_non_mand die *eerder* in genereer_rapport is gedefinieerd
-                    if (
-                        not df_errors_non_mand.empty
-                        and "code" in df_errors_non_mand.columns
-                    ):
-                        non_mandatory_error_codes = set(
-                            df_errors_non_mand["code"].unique()
-                        )
-                    # --- EINDE NIEUWE CODE ---
-
-                    # --- AANGEPASTE HELPER FUNCTIE ---
-                    def get_error_type(code):
-                        types = set()
-                        # Gebruik nu de vooraf berekende sets
-                        if code in mandatory_error_codes:
-                            types.add("Zie sheet 3")  # Tekst aangepast
-                        if code in non_mandatory_error_codes:
-                            types.add("Zie sheet 5")  # Tekst aangepast
-                        if not types:
-                            return ""
-                        # Als beide aanwezig zijn, retourneer "Zie sheet 3 & 5", anders de enige aanwezige
-                        if len(types) == 2:
-                            return "Zie sheet 3 & 5"
-                        else:
-                            return list(types)[0]  # Retourneer het enige element
-
-                    # --- EINDE AANGEPASTE HELPER ---
-                    df_foutcodes["Type (Sheet)"] = df_foutcodes.apply(
-                        lambda row: get_error_type(row["code"]), axis=1
-                    )  # Nu per foutcode, maar kan verder worden uitgebreid naar veld+code indien nodig
-                    
-                    # Voeg Type categorisering kolom toe
-                    df_foutcodes["Type"] = df_foutcodes["code"].apply(get_error_category)
-                    df_foutcodes = df_foutcodes.sort_values(
-                        "Aantal", ascending=False
-                    ).reset_index(drop=True)
-                    df_foutcodes_top = df_foutcodes.head(10)
-                    # Herschik en hernoem kolommen pas na het berekenen van Type (Sheet) en Type
-                    df_foutcodes_top = df_foutcodes_top[
-                        ["Beschrijving", "Aantal", "Type", "Type (Sheet)", "code"]
-                    ]
-                    df_foutcodes_top = df_foutcodes_top.rename(
-                        columns={"code": "Foutcode"}
-                    )
+def genereer_rapport(
+    validation_results: list,
+    output_dir: str,
+    bestandsnaam: str,
+    ghx_mandatory_fields: list,
+    original_column_mapping: dict,
+    df: pd.DataFrame,
+    header_mapping: dict,
+    df_original: pd.DataFrame,
+    red_flag_messages: list,
+    JSON_CONFIG_PATH: str,  # Pad nodig om config te laden
+    summary_data: dict,  # VERWIJDERDE PARAMETER TERUGGEZET
+    errors_per_field: dict = None,
+    validation_config: dict = None,  # Geconverteerde config voor Sheet 9
+    template_context: dict = None,  # Template Generator context
+    excel_path: Union[str, WorkbookProbe] = None,  # Pad of WorkbookProbe van origineel Excel bestand voor template detectie
+    max_rows: int = None,
+    total_rows: int = None,
+    constant_memory: bool = None,
+    report_stats: ReportStats = None,
+    report_profile: str = None,
+    active_fields=None,
+):
+    """
+    Genereert het volledige Excel validatierapport, inclusief alle sheets,
+    gebaseerd op notebook Code 5 en aangepast dashboard layout.
 
-                    table_header_row = table_subheader_row + 1  # Start direct na subheader
-                    # Data wordt direct geschreven met nieuwe kolom mapping
-                    # Nieuwe mapping: Beschrijving=E-G(merged), Aantal=H(7), Type=I(8), Type(Sheet)=J(9), Foutcode=K(10)
-                    for r_idx, row_data in df_foutcodes_top.iterrows():
-                        current_table_row = table_header_row + r_idx
-                        
-                        # Set row height for better readability
-                        ws_dash.set_row(current_table_row, 18)
-                        
-                        # Custom kolom mapping voor nieuwe layout
-                        for c_idx, cell_value in enumerate(row_data):
-                            col_name = df_foutcodes_top.columns[c_idx]
-                            
-                            # Ensure cell_value is never None or NaN
-                            if pd.isna(cell_value) or cell_value is None:
-                                cell_value = ""
-                            
-                            fmt = (
-                                fmt_error_table_code
-                                if col_name == "Foutcode"
-                                else fmt_error_table_cell_right
-                                if col_name == "Aantal"
-                                else fmt_error_table_cell
-                            )
-                            
-                            try:
-                                if col_name == "Beschrijving":
-                                    # Beschrijving spreidt over E-G (kolommen 4-6, was 3-5)
-                                    ws_dash.merge_range(
-                                        f"E{current_table_row+1}:G{current_table_row+1}",
-                                        str(cell_value),
-                                        fmt
-                                    )
-                                elif col_name == "Aantal":
-                                    # Aantal naar kolom H (7, was 6)
-                                    try:
-                                        if cell_value != "":
-                                            num_val = int(float(str(cell_value)))  # Handle float strings
-                                            ws_dash.write_number(current_table_row, 7, num_val, fmt)
-                                        else:
-                                            ws_dash.write_string(current_table_row, 7, "0", fmt)
-                                    except (ValueError, TypeError):
-                                        ws_dash.write_string(current_table_row, 7, str(cell_value), fmt)
-                                elif col_name == "Type":
-                                    # Type naar kolom I (8, was 7)
-                                    ws_dash.write_string(current_table_row, 8, str(cell_value), fmt)
-                                elif col_name == "Type (Sheet)":
-                                    # Type (Sheet) naar kolom J (9, was 8)
-                                    ws_dash.write_string(current_table_row, 9, str(cell_value), fmt)
-                                elif col_name == "Foutcode":
-                                    # Foutcode naar kolom K (10, was 9)
-                                    try:
-                                        if cell_value != "":
-                                            num_val = int(float(str(cell_value)))  # Handle float strings
-                                            ws_dash.write_number(current_table_row, 10, num_val, fmt)
-                                        else:
-                                            ws_dash.write_string(current_table_row, 10, "", fmt)
-                                    except (ValueError, TypeError):
-                                        ws_dash.write_string(current_table_row, 10, str(cell_value), fmt)
-                            except Exception as e:
-                                # Fallback: write as string if any formatting fails
-                                logging.warning(f"Error formatting cell {col_name} at row {current_table_row}: {e}")
-                                ws_dash.write_string(current_table_row, 7 if col_name == "Aantal" else 8 if col_name == "Type" else 9 if col_name == "Type (Sheet)" else 10, str(cell_value), fmt_error_table_cell)
-                                
-                    table_end_row = table_header_row + len(df_foutcodes_top)
-                else:
-                    # 'code' kolom mist - schrijf over E-G (merged)
-                    ws_dash.merge_range(
-                        f"E{table_subheader_row + 2}:G{table_subheader_row + 2}",  # Na subheader, E-G merged (was D-F)
-                        "'code' kolom mist in validatieresultaten.",
-                        fmt_error_table_cell,
-                    )
-                    table_end_row = table_subheader_row + 1
-            else:
-                # Geen fouten - schrijf DOORLOPEND over E-K (hele breedte) 
-                # GEBRUIK EEN ANDERE RIJ dan de error data om conflicten te voorkomen
-                geen_fouten_row = table_subheader_row + 2  # Dit is rij 10 (Excel rij 11)
-                ws_dash.merge_range(
-                    f"E{geen_fouten_row + 1}:K{geen_fouten_row + 1}",  # E11:K11 om conflicten te vermijden
-                    "Geen fouten gevonden",
-                    fmt_error_table_cell
-                )
-                table_end_row = geen_fouten_row
+    constant_memory (default REPORT_CONSTANT_MEMORY) schrijft de sheets die met het aantal
+    rijen meegroeien (3, 5 en 7) rij voor rij weg, zodat het geheugen vlak blijft.
 
+    report_stats: al berekende ReportStats (prepare_report_stats) voor deze run, bv. als
+    ook machine-leesbare outputs geschreven zijn; anders worden ze hier berekend.
 
-            # DYNAMISCHE POSITIE voor Aandachtspunten: bereken based op einde van Foutmeldingen data
-            # Minimaal 2 regels ruimte tussen Foutmeldingen en Aandachtspunten
-            if validation_results:
-                # Bereken het einde van de Foutmeldingen tabel
-                foutmeldingen_end_row = table_header_row + len(df_foutcodes_top) - 1  # -1 omdat we bij 0 starten
-                attention_start_row = foutmeldingen_end_row + 2  # 1 lege regel + 1 voor de header
-            else:
-                # Als er geen fouten zijn, start vanaf de "Geen fouten gevonden" regel + 2
-                foutmeldingen_end_row = table_subheader_row + 3  # "Geen fouten gevonden" is nu op rij 11
-                attention_start_row = foutmeldingen_end_row + 2
+    report_profile (default GHX_REPORT_PROFILE, "full") kiest de sheets: "full", "summary",
+    "errors-only" of "dataset-only" (zie REPORT_PROFILES).
 
-            # Schrijf hoofdheader voor Aandachtspunten (E-K)
-            ws_dash.merge_range(
-                f"E{attention_start_row+1}:K{attention_start_row+1}",  # E-K voor Aandachtspunten (was D-J)
-                "Aandachtspunten",
-                fmt_header_red,  # Behoud donkerrode hoofdheader
-            )
-            ws_dash.set_row(attention_start_row, 18)  # Hoofdheader hoogte
-            
-            # Voeg GRIJZE subheaders toe - melding over E-J, foutcode alleen in K (was D-I, J)
-            attention_subheader_row = attention_start_row + 1
-            ws_dash.merge_range(
-                f"E{attention_subheader_row+1}:J{attention_subheader_row+1}",  # E-J voor Melding (was D-I, 6 kolommen)
-                "Melding",
-                fmt_subheader_grey  # Gebruik grijze subheader zoals bij foutmeldingen
+    active_fields: ActiveFieldPlan van de validatie (price_tool.build_active_field_plan);
+    sheets 7 en 8 tonen dan dezelfde velden als er gevalideerd zijn. Zonder plan vallen ze
+    terug op de visible_list van de Template Generator.
+    """
+    if errors_per_field is None:
+        errors_per_field = {}  # Voorkom None errors
+    if constant_memory is None:
+        constant_memory = REPORT_CONSTANT_MEMORY
+    report_sheets = resolve_report_profile(report_profile)
+
+    # Early Template Type Detectie (voorkom UnboundLocalError)
+    template_type, template_info = determine_template_type(df, excel_path)
+    
+    # Quick Mode detectie (voorkom UnboundLocalError)
+    quick_mode = (max_rows is not None)
+
+    try:
+        # Bestandsnaam zonder extensie voor output naamgeving
+        bestandsnaam_zonder_extensie = os.path.splitext(bestandsnaam)[0]
+
+        # --- Data Voorbereiding & Berekeningen (Begin) ---
+        # Voor Quick Mode: gebruik originele total_rows parameter, anders processed data lengte
+        if total_rows is None:
+            total_rows = len(df)  # Normale modus: gebruik processed data lengte
+        # Anders: behoud originele total_rows parameter (Quick Mode)
+        
+        # Voor berekeningen: gebruik altijd een numerieke waarde
+        numeric_total_rows = len(df) if total_rows == "5000+" else (total_rows if isinstance(total_rows, int) else len(df))
+        
+        total_original_cols = len(df_original.columns)  # Kolommen in origineel bestand
+
+        # DEBUG: Log template context
+        if template_context:
+            logging.info(f"DEBUG Sheet 1: Template context aanwezig, type: {template_context.get('type', 'Unknown')}")
+            if template_context.get('type') == 'TG':
+                logging.info(f"DEBUG Sheet 1: TG Template gedetecteerd met {template_context.get('visible_fields', '?')} zichtbare velden")
+        else:
+            logging.info("DEBUG Sheet 1: Geen template context (waarschijnlijk DT/AT template)")
+        
+        # Gebruik de doorgegeven validation_config of val terug op laden van bestand
+        if validation_config:
+            config = validation_config
+            logging.info(f"DEBUG Sheet 1: validation_config gebruikt (niet van file)")
+        else:
+            config = load_validation_config(JSON_CONFIG_PATH)
+            logging.info(f"DEBUG Sheet 1: config geladen van file: {JSON_CONFIG_PATH}")
+            if not config:
+                logging.error("Kan rapport niet genereren zonder validatie configuratie.")
+                return None
+
+        df_errors_all = results_dataframe(validation_results)
+        df_errors = errors_without_red_flags(df_errors_all)
+
+        # Alle tellingen, percentages en de score in één pass (zie report_stats.py);
+        # dashboard, percentage sheets en bestandsnaam lezen uit hetzelfde object
+        stats = report_stats
+        if stats is None:
+            stats = build_report_stats(
+                df, df_errors, ghx_mandatory_fields, errors_per_field, config, template_type,
+                template_context=template_context, max_rows=max_rows, total_rows=total_rows,
             )
-            ws_dash.write(attention_subheader_row, 10, "Foutcode", fmt_subheader_grey)  # K voor Foutcode (was J)
-            ws_dash.set_row(attention_subheader_row, 18)  # Normale rijhoogte
-            
-            attention_data_start_row = attention_subheader_row + 1  # Start van data
 
-            # Format met RODE rand, font size (aanpassen?), wrap, etc.
-            fmt_attention_item = workbook.add_format({
+        non_mandatory_fields = list(stats.non_mandatory_fields)
+        # Voor TG templates: template_context mandatory_list, voor ALT/DT templates: ghx_mandatory_fields
+        present_mandatory_columns = list(stats.present_mandatory_columns)
+        missing_mandatory_columns = list(stats.missing_mandatory_columns)
+        M_missing = stats.M_missing
+        total_possible_mandatory_fields = stats.total_possible_mandatory_fields
+
+        filled_counts = stats.filled_counts
+        corrected_errors = stats.corrected_errors
+        total_filled_in_present = stats.total_filled_in_present
+        empty_in_present = stats.empty_in_present
+        total_errors_in_present = stats.total_errors_in_present
+
+        # Fix voor Olaf's bug: M_found = aantal CORRECT ingevulde mandatory fields
+        # Niet aantal aanwezige kolommen, maar aantal correct ingevulde velden
+        M_found = stats.M_found
+
+        # Bereken percentage fouten van ingevulde verplichte velden
+        percentage_incorrect_of_filled_present = (
+            (total_errors_in_present / total_filled_in_present * 100)
+            if total_filled_in_present > 0
+            else 0
+        )
+
+        # Statistieken voor Blok 2 ("Actiepunten" uit origineel)
+        aantal_leeg_incl_missing = empty_in_present + (M_missing * numeric_total_rows)
+        percentage_ingevuld_incl_missing = (
+            (total_filled_in_present / total_possible_mandatory_fields * 100)
+            if total_possible_mandatory_fields > 0
+            else 0
+        )
+
+        # Fouten per veld non-mandatory (voor info in Aandachtspunten/Acties blok van 'new')
+        present_non_mandatory_columns = list(stats.present_non_mandatory_columns)
+        filled_counts_non_mand = stats.filled_counts_non_mand
+        total_filled_non_mand = stats.total_filled_non_mand
+        errors_per_field_non_mand = stats.errors_per_field_non_mand
+        total_errors_non_mand = stats.total_errors_non_mand
+
+        # Foutregels per categorie zijn alleen nodig voor de fout sheets (3 en 5)
+        df_errors_mand = pd.DataFrame()
+        df_errors_non_mand = pd.DataFrame()
+        needs_error_rows = "verplichte_fouten" in report_sheets or "optionele_fouten" in report_sheets
+        if needs_error_rows and not df_errors.empty and "GHX Kolom" in df_errors.columns:
+            df_errors_mand = df_errors[df_errors["GHX Kolom"].isin(ghx_mandatory_fields)].copy()
+            df_errors_non_mand = df_errors[df_errors["GHX Kolom"].isin(non_mandatory_fields)].copy()
+
+        # BEREKEN HIER DE MISSENDE VARIABELE (Percentage gevuld van AANWEZIGE verplichte velden):
+        perc_verpl_gevuld = (
+            (total_filled_in_present / (M_found * numeric_total_rows) * 100)
+            if (M_found * numeric_total_rows) > 0
+            else 0
+        )
+
+        # Score berekening - Enhanced Template Type Detectie (al gedaan aan begin functie)
+        template_display_info = get_template_display_info(template_type, template_info)
+
+        # Voor Template Generator: gebruik gefilterde kolom count
+        if template_context and template_context.get("decisions"):
+            visible_fields_count = template_context["decisions"].get("visible_fields", len(df.columns))
+            total_original_cols = visible_fields_count  # Use filtered count for TG templates
+        else:
+            total_original_cols = len(df.columns)  # Use actual columns for other templates
+
+        volledigheids_percentage = stats.volledigheids_percentage
+        percentage_correct = stats.percentage_correct
+
+        # === NIEUWE INTUÏTIEVE SCORE BEREKENING ===
+        score_result = dict(stats.score)
+
+        # Nieuwe filename format: TG_M86_J75_65(C) (J% terug zoals gevraagd)
+        score_suffix = stats.score_suffix
+
+        # --- Output Bestandsnaam ---
+        quick_mode_suffix = "_QM" if quick_mode else ""
+        output_filename = (
+            f"{bestandsnaam_zonder_extensie}_VR{quick_mode_suffix}{score_suffix}.xlsx"
+        )
+        output_path = os.path.join(output_dir, output_filename)
+
+        logging.info(f"Schrijven rapport naar: {output_path}")
+        with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
+            workbook = writer.book
+            workbook.set_size(2500, 1500)
+
+            # --- Formaten Definiëren ---
+            fmt_header_green = workbook.add_format(
+                {
+                    "bold": True,
+                    "font_size": 14,
+                    "font_color": "#006100",
+                    "bg_color": "#C6EFCE",
+                    "border": 1,
+                    "valign": "vcenter",
+                }
+            )
+            fmt_header_red = workbook.add_format({
+                "bold": True,
+                "font_size": 14,
+                "font_color": "#FFFFFF",  # Witte tekst
+                "bg_color": "#C00000",  # Identieke donkere rood als Foutmeldingen (was #E06666)
+                "border": 1,
+                "border_color": "#000000",  # Zwarte rand
+                "valign": "vcenter",
+                "align": "left",
+                "indent": 1
+            })
+            fmt_header_blue = workbook.add_format({
+                "bold": True,
+                "font_size": 14,
+                "font_color": "#FFFFFF",  # Witte tekst
+                "bg_color": "#C00000",  # Rood header voor Foutmeldingen volgens spec
+                "border": 1,
+                "border_color": "#000000",  # Zwarte rand
+                "align": "left",
+                "valign": "vcenter",
+                "indent": 1
+            })
+            fmt_label_green = workbook.add_format({
+                "font_size": 12, 
+                "bg_color": "#E2EFDA",  # Groen data achtergrond
+                "font_color": "#000000",  # Zwarte tekst
+                "border": 1,
+                "border_color": "#000000",  # Zwarte rand
+                "indent": 1
+            })
+            fmt_value_green = workbook.add_format({
                 "font_size": 12,
-                "bg_color": "#F2DCDB",  # Identieke kleur als Foutmeldingen data (was #F4CCCC)
+                "bg_color": "#E2EFDA",  # Groen data achtergrond
                 "font_color": "#000000",  # Zwarte tekst
                 "border": 1,
                 "border_color": "#000000",  # Zwarte rand
-                "text_wrap": True,
-                "align": "left",
-                "valign": "top",
-                "indent": 1
-            })
-
-            # Controleer of er aandachtspunten zijn
-            current_attention_row = attention_data_start_row
-            if red_flag_messages:
-                # Loop door elke individuele melding (nu dict met message + code)
-                for item in red_flag_messages:
-                    try:
-                        if isinstance(item, dict):
-                            msg = item.get("message", str(item))
-                            code = item.get("code", "")
-                        else:
-                            # Backward compatibility - als het nog een string is
-                            msg = str(item)
-                            code = ""
-                        
-                        # Clean up message and code
-                        if pd.isna(msg) or msg is None:
-                            msg = ""
-                        if pd.isna(code) or code is None:
-                            code = ""
-                            
-                        # Vaste rijhoogte voor alle Aandachtspunten regels
-                        ws_dash.set_row(current_attention_row, 18)  # Increased from 16 for better readability
-
-                        # Schrijf bericht over kolommen E-J (laat K vrij voor foutcode, was D-I)
-                        ws_dash.merge_range(
-                            f"E{current_attention_row+1}:J{current_attention_row+1}",
-                            str(msg),
-                            fmt_attention_item,
-                        )
-                        
-                        # Format voor foutcode kolom - rechts uitgelijnd en niet bold
-                        fmt_code_item = workbook.add_format(
-                            {
-                                "font_size": 12,
-                                "bg_color": "#F2DCDB",  # Licht rood (zelfde als message)
-                                "border": 1,
-                                "align": "right",  # Rechts uitlijnen voor codes
-                                "valign": "vcenter",
-                                "bold": False,  # Niet bold
-                            }
-                        )
-                        
-                        # Schrijf foutcode in kolom K
-                        code_value = str(code) if code else "N/A"
-                        ws_dash.write_string(
-                            current_attention_row, 10,  # Kolom K (10, was 9)
-                            code_value,
-                            fmt_code_item
-                        )
-
-                        current_attention_row += 1  # Ga naar de volgende rij
-                        
-                    except Exception as e:
-                        logging.warning(f"Error formatting attention point: {e}")
-                        # Write fallback message
-                        ws_dash.set_row(current_attention_row, 18)
-                        ws_dash.merge_range(
-                            f"E{current_attention_row+1}:J{current_attention_row+1}",
-                            "Error formatting attention point",
-                            fmt_attention_item,
-                        )
-                        ws_dash.write_string(current_attention_row, 10, "ERROR", fmt_attention_item)
-                        current_attention_row += 1
-            else:
-                # Geen meldingen: schrijf over kolom E-J (consistent met de rest)
-                ws_dash.set_row(current_attention_row, 18)  # Vaste hoogte 18pt
-                ws_dash.merge_range(
-                    f"E{current_attention_row+1}:K{current_attention_row+1}",  # E-K doorlopend (hele breedte)
-                    "Geen specifieke aandachtspunten gevonden.",
-                    fmt_attention_item,
-                )
-                current_attention_row += 1
-
-            # Onthoud de laatst gebruikte rij-index (0-based)
-            attention_end_row = current_attention_row - 1
-            # --- Einde Aandachtspunten ---
-
-
-            # ============================
-            # Grafieken Data Voorbereiding
-            # ============================
-            
-            chart_data_start_row = 500
-            ws_dash.write(
-                chart_data_start_row,
-                0,
-                "Chart Data Area",
-                workbook.add_format({"bold": True}),
-            ) 
-            
-            # 1. Stacked Bar Data
-            bar_chart_row = chart_data_start_row + 2
-            bar_headers = ["Veld", "Juist", "Foutief", "Leeg", "Kolom Missing", "UOM Conflict"]
-            ws_dash.write_row(bar_chart_row, 0, bar_headers)
-            bar_chart_data = []
-            # NIEUWE SIMPELE CHART LOGICA: Gebruik Sheet 7 kleuren
-            chart_rows = len(df)
-            
-            # Analyseer validation_results per kolom (net zoals Sheet 7 doet)
-            def analyze_column_colors(column_name, df, validation_results):
-                """Analyseer kleuren van een kolom zoals Sheet 7 doet"""
-                if column_name not in df.columns:
-                    return {"correct": 0, "error": 0, "empty": 0, "conflict": 0, "missing": chart_rows}
-                
-                colors = {"correct": 0, "error": 0, "empty": 0, "conflict": 0, "missing": 0}
-                
-                # Bouw lookup dictionaries zoals Sheet 7 doet
-                error_lookup = {}  # Voor normale fouten (rood)
-                uom_relation_error_lookup = {}  # Voor UOM conflicten (blauw - codes 724, 801, 805)
-                
-                for error in validation_results:
-                    if error["GHX Kolom"] == "RED FLAG":
-                        continue
-                    # Gebruik dezelfde rij index logica als Sheet 7
-                    row_idx = error["Rij"] - 3
-                    col_name = error["GHX Kolom"]
-                    error_code = error.get("code", "")
-                    
-                    if col_name == column_name and col_name in df.columns:
-                        col_idx = df.columns.get_loc(col_name)
-                        if 0 <= row_idx < len(df):
-                            # UOM relatie fouten (724, 801, 805) krijgen speciale behandeling
-                            if error_code in ["724", "801", "805"]:
-                                if row_idx not in uom_relation_error_lookup:
-                                    uom_relation_error_lookup[row_idx] = set()
-                                uom_relation_error_lookup[row_idx].add(col_idx)
-                            else:
-                                # Normale fouten (rejection/correction)
-                                error_type = error.get("type", "")
-                                if error_type != "flag":  # Skip flags
-                                    if row_idx not in error_lookup:
-                                        error_lookup[row_idx] = set()
-                                    error_lookup[row_idx].add(col_idx)
-                
-                # Nu analyseer elke rij in de kolom
-                col_idx = df.columns.get_loc(column_name)
-                for row_idx, row in df.iterrows():
-                    cell_value = row.get(column_name, "")
-                    is_filled = not (pd.isna(cell_value) or str(cell_value).strip() == "")
-                    
-                    if not is_filled:
-                        colors["empty"] += 1
-                    elif row_idx in uom_relation_error_lookup and col_idx in uom_relation_error_lookup[row_idx]:
-                        colors["conflict"] += 1  # Blauw voor UOM conflicten
-                    elif row_idx in error_lookup and col_idx in error_lookup[row_idx]:
-                        colors["error"] += 1  # Rood voor normale fouten
-                    else:
-                        colors["correct"] += 1  # Groen voor correcte cellen
-                
-                return colors
-            
-            # SHEET7-BASED CHART LOGIC - Direct replacement using analyze_column_colors
-            for i, f in enumerate(ghx_mandatory_fields):
-                row_num = bar_chart_row + 1 + i
-                
-                # Use Sheet 7 logic to analyze this column
-                colors = analyze_column_colors(f, df, validation_results)
-                
-                # Write to worksheet - exact same layout as before
-                ws_dash.write(row_num, 0, f)
-                ws_dash.write(row_num, 1, colors["correct"])
-                ws_dash.write(row_num, 2, colors["error"])
-                ws_dash.write(row_num, 3, colors["empty"])
-                ws_dash.write(row_num, 4, colors["missing"])
-                ws_dash.write(row_num, 5, colors["conflict"])
-                bar_chart_data.append([f, colors["correct"], colors["error"], colors["empty"], colors["missing"], colors["conflict"]])
-            last_bar_data_row = bar_chart_row + len(ghx_mandatory_fields)
-
-            # 2. Donut Mandatory Data
-            donut_mand_row = last_bar_data_row + 2
-            missing_mandatory_count = M_missing * numeric_total_rows
-            donut_mand_data = [
-                ["Status", "Aantal"],
-                ["Juist ingevuld", totaal_juist],
-                ["Foutief ingevuld", total_errors_in_present],
-                ["Leeg", empty_in_present],
-                ["Kolom niet aanwezig", missing_mandatory_count],
-            ]
-            ws_dash.write_row(donut_mand_row, 0, donut_mand_data[0])
-            ws_dash.write_row(donut_mand_row + 1, 0, donut_mand_data[1])
-            ws_dash.write_row(donut_mand_row + 2, 0, donut_mand_data[2])
-            ws_dash.write_row(donut_mand_row + 3, 0, donut_mand_data[3])
-            ws_dash.write_row(donut_mand_row + 4, 0, donut_mand_data[4])
-            total_donut_mand = sum(item[1] for item in donut_mand_data[1:])
-
-            # 3. Donut All Data
-            donut_all_row = donut_mand_row + 6
-            total_all_fields_in_config = len(config.get("fields", {}))
-            total_all_fields_possible = numeric_total_rows * total_all_fields_in_config
-            total_all_filled = total_filled_in_present + total_filled_non_mand
-            total_all_errors = total_errors_in_present + total_errors_non_mand
-            total_all_correct = total_all_filled - total_all_errors
-            total_all_empty_or_missing = total_all_fields_possible - total_all_filled
-
-            donut_all_data = [
-                ["Status", "Aantal"],
-                ["Correct ingevuld", max(0, total_all_correct)],
-                ["Foutief ingevuld", total_all_errors],
-                ["Leeg / Kolom niet aanwezig", max(0, total_all_empty_or_missing)],
-            ]
-            ws_dash.write_row(donut_all_row, 0, donut_all_data[0])
-            ws_dash.write_row(donut_all_row + 1, 0, donut_all_data[1])
-            ws_dash.write_row(donut_all_row + 2, 0, donut_all_data[2])
-            ws_dash.write_row(donut_all_row + 3, 0, donut_all_data[3])
-            total_donut_all = sum(item[1] for item in donut_all_data[1:])
-
-            # --- VERBETERDE Grafieken Positionering ---
-            # Scheid linker en rechter kolom voor betere ruimtebenutting
-            left_table_end_rows = [
-                template_table_end_row,  # Template tabel (indien aanwezig)
-                stats_end_row,      # Statistieken tabel (linksboven)
-                missing_end_row,    # Missing data tabel (links midden)  
-                actions_end_row,    # Actions tabel (links onder)
-            ]
-            right_table_end_rows = [
-                table_end_row,      # Foutmeldingen tabel (rechts boven)
-                attention_end_row   # Aandachtspunten tabel (rechts onder)
-            ]
-            
-            left_max_row = max(left_table_end_rows)
-            right_max_row = max(right_table_end_rows)
-            
-            # Chart positionering volgens gebruikerswens:
-            # "2 regels onder belangrijkste actiepunten, tenzij aandachtspunten lager is"
-            if attention_end_row > actions_end_row:
-                # Aandachtspunten tabel eindigt lager, dus gebruik die als basis
-                chart_start_row = attention_end_row + 3  # 3 voor 2 lege regels
-            else:
-                # Belangrijkste actiepunten eindigt lager of gelijk, gebruik die als basis
-                chart_start_row = actions_end_row + 3  # 3 voor 2 lege regels
-            
-            # Chart positionering logica toegepast
-
-            # Grafiek 1: Stacked Bar Verplichte Velden (MET GECORRIGEERDE LEGENDA)
-            stacked_chart = workbook.add_chart({"type": "column", "subtype": "stacked"})
-            legend_labels = {
-                1: "Juist ingevuld",
-                2: "Foutief",
-                3: "Leeg",
-                4: "Kolom niet aanwezig",
-                5: "UOM Conflict",
-            }
-            colors = {1: "#70AD47", 2: "#FF0000", 3: "#FFC000", 4: "#000000", 5: "#ADD8E6"}
-            for i in range(1, 6):
-                stacked_chart.add_series(
-                    {
-                        "name": legend_labels[i],  # <-- Correcte naam direct hier
-                        "categories": [
-                            "1. Dashboard",
-                            bar_chart_row + 1,
-                            0,
-                            last_bar_data_row,
-                            0,
-                        ],
-                        "values": [
-                            "1. Dashboard",
-                            bar_chart_row + 1,
-                            i,
-                            last_bar_data_row,
-                            i,
-                        ],
-                        "fill": {"color": colors[i]},
-                    }
-                )
-            stacked_chart.set_title({"name": "Verplichte Kolommen Overzicht"})
-            stacked_chart.set_x_axis(
-                {"name": "Verplichte Velden", "num_font": {"rotation": -45, "size": 11}}
-            )
-            stacked_chart.set_y_axis(
-                {"name": "Aantal", "major_gridlines": {"visible": False}}
-            )
-            stacked_chart.set_legend({"position": "bottom", "font": {"size": 11}})
-            # Breedte geoptimaliseerd voor A-J kolommen (totaal ~280px * 7 = ~2000px voor goede proportie)  
-            stacked_chart.set_size({"width": 2000, "height": 500})  # Optimaal voor A-J breedte
-            # Voeg een subtiele rand toe rond de chart
-            stacked_chart.set_chartarea({
-                'border': {'color': '#D32F2F', 'width': 2},  # Rode rand, 2px
-                'fill':   {'color': '#FFFFFF'}  # Witte achtergrond
+                "align": "right",
+                "num_format": "#,##0"
             })
-            ws_dash.insert_chart(f"B{chart_start_row + 1}", stacked_chart)  # Kolom B (na gutter A)
-
-            # Donut charts verwijderd - alleen tabellen blijven bestaan voor overzicht
-            # Data blijft beschikbaar in donut_mand_row en donut_all_row tabellen
-            
-            # --- EINDE DASHBOARD: Nu rijhoogtes forceren voor content rijen (vanaf rij 11) ---
-            # Eerste 50 rijen van content (rij 11-60) krijgen hoogte 18
-            for row in range(10, 60):  # Rijen 11-60 (0-based: 10-59) - content area
-                ws_dash.set_row(row, 18)
-            
-            # Header area (rijen 1-10) blijft standaard hoogte voor logo ruimte
-            for row in range(0, 10):  # Rijen 1-10 (0-based: 0-9) - header area
-                ws_dash.set_row(row, None)  # Standaard rijhoogte
-            
-            pass
-
-            # ==================================================================
-            # START CODE VOOR SHEET 2: INLEIDING
-            # ==================================================================
-            ws_inleiding = workbook.add_worksheet("2. Inleiding")
-            suppress_excel_errors(ws_inleiding)
-            writer.sheets["2. Inleiding"] = ws_inleiding
-            ws_inleiding.hide_gridlines(2)  # Gridlines verbergen
-            ws_inleiding.set_column("A:A", 125)  # Kolombreedte aangepast naar 125
-
-            # --- Definieer Formats (ALLE formats hier, font_size 12, indent) ---
-            fmt_title = workbook.add_format(
-                {  # <<<< DEFINITIE STAAT NU HIER BOVENAAN
-                    "font_name": "Arial",
-                    "font_size": 20,
-                    "bold": True,
-                    "align": "left",
-                    "valign": "vcenter",
-                    "bg_color": "#16365C",  # Gewijzigd naar blauw
-                    "font_color": "white",
+            fmt_label_red = workbook.add_format(
+                {"font_size": 12, "bg_color": "#F2DCDB", "border": 1, "indent": 1}
+            )  # Zorg dat label format ook bestaat
+            fmt_value_red = workbook.add_format(
+                {
+                    "font_size": 12,
+                    "bg_color": "#F2DCDB",
                     "border": 1,
+                    "align": "right",
+                    "num_format": "#,##0",
                 }
             )
-            fmt_score = workbook.add_format(
+            fmt_value_red_perc = workbook.add_format(
                 {
-                    "font_name": "Arial",
                     "font_size": 12,
-                    "text_wrap": True,  # Size 12
-                    "align": "left",
-                    "valign": "top",
-                    "indent": 1,  # Indent 1
-                    "bg_color": "#E6F2FF",
+                    "bg_color": "#F2DCDB",
                     "border": 1,
-                    "border_color": "#CCCCCC",
+                    "align": "right",
+                    "num_format": "0.00%",
                 }
             )
-            fmt_filename = workbook.add_format(
-                {"font_size": 12, "indent": 2, "bold": True}
-            )  # Size 12, Indent 2, Bold toegevoegd
-            # fmt_standard nu size 12 MET INDENT
-            fmt_standard = workbook.add_format(
+            fmt_attention_text = workbook.add_format(
                 {
                     "font_size": 12,
+                    "bg_color": "#F2DCDB",
+                    "border": 1,
                     "text_wrap": True,
-                    "align": "left",
                     "valign": "top",
-                    "indent": 4,
+                    "indent": 1,
                 }
-            )  # << Indent verhoogd naar 4
-            fmt_section_header = workbook.add_format(
-                {"font_size": 14, "indent": 2, "bold": True}
             )
-            # Format for URL (based on standard, maar blauw/onderstreept + indent)
-            fmt_url = workbook.add_format(
-                {"font_size": 12, "font_color": "blue", "underline": 1, "indent": 4}
+            fmt_error_table_header = workbook.add_format(
+                {
+                    "bold": True,
+                    "font_size": 14,
+                    "bg_color": "#D9D9D9",
+                    "border": 1,
+                    "align": "left",
+                    "indent": 1,
+                }
             )
-
-            # --- Schrijf Inhoud stap voor stap ---
-            current_row_intro = 0  # Start bovenaan
-
-            # Titel (Excel rij 1-3)
-            # Gebruik NU de correct gedefinieerde fmt_title9
-            ws_inleiding.merge_range(
-                f"A{current_row_intro+1}:B{current_row_intro+1}",
-                "  GHX TEMPLATE VALIDATIE RAPPORT",
-                fmt_title,
-            )  # Merge A1:B1
-            ws_inleiding.set_row(current_row_intro, 40)  # Stel hoogte in voor titelrij
-            current_row_intro = 1  # Start volgende blok op rij 4
-
-            # Extra witregel VOOR het scoreblok (om het op rij 5 te laten beginnen)
-            current_row_intro += 1
-
-            # <<<<<< DE TWEEDE (FOUTE) DEFINITIE VAN fmt_title IS HIER VERWIJDERD >>>>>>
-
-            # === GEBRUIK NIEUWE SCORE VOOR SHEET 2 DISPLAY ===
-            # Gebruik dezelfde score als filename en Sheet 1 (consistent!)
-            score_int_uitleg = score_result['final_score']
-            score_grade_uitleg = score_result['grade']
-            
-            # Bepaal kleuren voor Sheet 2 score display
-            if score_grade_uitleg in ["B", "A", "A+"]:
-                score_text_color = "#4f6229"  # Groen
-                score_bg_color = "#E8F4E8"    # Licht groen
-                score_border_color = "#4f6229"  # Groen
-            elif score_grade_uitleg in ["C", "D"]:
-                score_text_color = "#FF5E1A"  # Oranje
-                score_bg_color = "#FFF4E6"    # Licht oranje
-                score_border_color = "#FF5E1A"  # Oranje
-            else:  # E, F
-                score_text_color = "#c00000"  # Rood
-                score_bg_color = "#FFE6E6"    # Licht rood
-                score_border_color = "#c00000"  # Rood
-            
-            # Maak aparte formats voor mooiere opmaak
-            fmt_score_title = workbook.add_format({
-                'bold': True,
-                'font_size': 14,
-                'font_color': score_text_color,
-                'bg_color': score_bg_color,
-                'border': 1,
-                'border_color': score_border_color,
-                'align': 'left',
-                'valign': 'vcenter',
-                'text_wrap': True,
-                'indent': 1
-            })
-            
-            fmt_score_body = workbook.add_format({
-                'font_size': 12,
-                'font_color': '#000000',
-                'bg_color': score_bg_color,  # Gebruik dezelfde achtergrondkleur als de titel
-                'border': 1,
-                'border_color': score_border_color,  # Gebruik dezelfde randkleur als de titel
-                'align': 'left',
-                'valign': 'top',
-                'text_wrap': True,
-                'indent': 1
-            })
-            
-            # Titel apart (bold en groot)
-            score_title = f"KWALITEITSSCORE: {score_int_uitleg}/100 - CIJFER {score_grade_uitleg}"
-            
-            # Gedetailleerde score berekening uitleg
-            M_percentage = score_result['M_percentage']
-            J_percentage = score_result['J_percentage']
-            core_score = score_result['core_score']
-            uom_penalties = score_result['uom_penalties']
-            template_penalty = score_result['template_penalty']
-            
-            # Template type beschrijving voor gebruikersvriendelijke tekst
-            if template_type == "TG":
-                template_type_description = "nieuwe GHX Template Generator"
-            elif template_type == "DT": 
-                template_type_description = "standaard GHX Default Template"
-            else:  # AT
-                template_type_description = "een onbekende template, ofwel niet een nieuwe GHX Prijstemplate"
-            
-            score_body_tekst = f"""BEREKENING:
-• Volledigheid (M): {M_percentage}% ({M_found}/{len(ghx_mandatory_fields)} verplichte velden ingevuld)
-• Juistheid (J): {J_percentage}% (correcte data van ingevulde velden)
-• Core score: {M_percentage}% × {J_percentage}% = {core_score}%
-• Template penalty: {template_penalty} ({template_type_description})
-• UOM penalties: {uom_penalties} (foutcodes in UOM kolommen)
-• Eindscore: {core_score} + {template_penalty} + {uom_penalties} = {score_int_uitleg}
-
-Kwaliteitscore Uitleg:
-• A+ (≥95): Uitstekend - gereed voor Gatekeeper, minimale verbeteringen nodig
-• A (90-94): Zeer goed - kleine verbeteringen mogelijk  
-• B (80-89): Goed - enkele verbeterpunten aanwezig
-• C (70-79): Voldoende - aandacht vereist voor verbeteringen
-• D (60-69): Onvoldoende - significante verbeteringen nodig
-• E (50-59): Slecht - grote problemen aanwezig
-• F (<50): Zeer slecht - uitgebreide herziening vereist"""
-            # Titel (bold en groot) - 2 rijen
-            ws_inleiding.merge_range(
-                f"A{current_row_intro+1}:B{current_row_intro + 2}",
-                score_title,
-                fmt_score_title,
+            fmt_error_table_cell = workbook.add_format({"font_size": 12, "border": 1, "align": "left", "indent": 1, "bg_color": "#F2DCDB"})
+            fmt_error_table_cell_right = workbook.add_format({"font_size": 12, "border": 1, "align": "right", "indent": 1, "bg_color": "#F2DCDB"})
+            fmt_error_table_code = workbook.add_format(
+                {"font_size": 12, "border": 1, "align": "right", "bg_color": "#F2DCDB"}
             )
-            current_row_intro += 3  # 2 rijen titel + 1 witregel
-            
-            # Body tekst (extra ruimte voor volledige uitleg tot regel 20+)
-            ws_inleiding.merge_range(
-                f"A{current_row_intro+1}:B{current_row_intro + 18}",
-                score_body_tekst,
-                fmt_score_body,
+            fmt_chart_title = workbook.add_format({"bold": True, "font_size": 12})
+            fmt_perc_table = workbook.add_format(
+                {"border": 1, "font_size": 12, "num_format": "0.00%"}
             )
-            current_row_intro += 18
-
-            # Witregel
-            current_row_intro += 1
-
-            # Bestandsnaam wordt nu getoond in Sheet 1 Template-tabel
-            # Geen bestandsnaam meer in Sheet 2
-            
-            # Witregel (behouden voor spacing)
-            current_row_intro += 1
+            fmt_default_table = workbook.add_format({"border": 1, "font_size": 12})
+            fmt_header_orange = workbook.add_format(
+                {
+                    "bold": True,
+                    "bg_color": "#f79645",
+                    "font_color": "white",
+                    "border": 1,
+                    "font_size": 14,
+                }
+            )  # Voor andere tabellen
 
-            # Beknopte introductie - verwijst naar Sheet 1 voor details
-            ws_inleiding.write(
-                f"A{current_row_intro+1}", "Geachte leverancier,", fmt_standard
-            )
-            current_row_intro += 1
-            ws_inleiding.write(
-                f"A{current_row_intro+1}",
-                "Hartelijk dank voor de aangeleverde GHX-prijslijsttemplate. In dit rapport vindt u de validatieresultaten en interpretatie van uw gegevens.",
-                fmt_standard,
-            )
-            current_row_intro += 1
+            # Voor TG templates: verplichte kolommen via header matching. Dit gebeurt vóór de
+            # sheets, zodat inleiding en logboek in elk profiel dezelfde aantallen krijgen
+            if template_type == "TG" and template_context and template_context.get("decisions"):
+                present_mandatory_columns, missing_mandatory_columns = match_template_mandatory_columns(
+                    template_context["decisions"].get("mandatory_list", []), df.columns
+                )
+                M_found = len(present_mandatory_columns)
+                M_missing = len(missing_mandatory_columns)
 
-            # Witregel voor ademruimte
-            current_row_intro += 1
+            # Cel matrix één keer bouwen; Sheet 7 en de dashboard chart lezen daaruit
+            cell_matrix = None
+            if "dashboard" in report_sheets or "dataset" in report_sheets:
+                cell_matrix = build_cell_matrix(df, validation_results, ghx_mandatory_fields, config)
 
-            # Rapport Onderdelen - dynamisch gebaseerd op template type
-            ws_inleiding.write(
-                f"A{current_row_intro+1}",
-                "Dit rapport bestaat uit de volgende onderdelen:",
-                fmt_section_header,
-            )
-            current_row_intro += 1
-            
-            # Basis onderdelen (altijd aanwezig)
-            rapport_onderdelen = [
-                "1. Dashboard\n   Belangrijkste statistieken en aandachtspunten in één oogopslag.",
-                "2. Inleiding\n   Score-interpretatie en gebruiksinstructies.",
-                "3. Verplichte Fouten\n   Gedetailleerde lijst van fouten in verplichte velden.",
-                "4. Verplichte %\n   Statistieken over volledigheid verplichte velden.",
-                "5. Optionele Fouten\n   Overzicht van fouten in optionele velden.",
-                "6. Optionele %\n   Statistieken over volledigheid optionele velden.",
-            ]
-            
-            # Sheet 7 altijd toevoegen (Dataset Validatie)
-            rapport_onderdelen.append("7. Dataset Validatie\n   Visueel overzicht dataset met kleurcodering.")
-            
-            # Conditioneel: voeg Sheet 8 toe voor oude/leverancier templates  
-            if template_type in ["O", "AT"]:
-                rapport_onderdelen.append("8. Kolom Mapping\n   Mapping tussen GHX-standaard en uw kolomnamen.")
-            
-            for onderdeel in rapport_onderdelen:
-                ws_inleiding.write(
-                    f"A{current_row_intro+1}", onderdeel, fmt_standard
+            # ==================================================================
+            # START CODE VOOR SHEET 1: DASHBOARD
+            # ==================================================================
+            if "dashboard" in report_sheets:
+                add_dashboard_sheet(
+                    workbook,
+                    writer,
+                    JSON_CONFIG_PATH=JSON_CONFIG_PATH, M_found=M_found, M_missing=M_missing,
+                    bestandsnaam=bestandsnaam, cell_matrix=cell_matrix, config=config, df=df,
+                    df_errors=df_errors, excel_path=excel_path,
+                    fmt_error_table_cell=fmt_error_table_cell,
+                    fmt_error_table_cell_right=fmt_error_table_cell_right,
+                    fmt_error_table_code=fmt_error_table_code, fmt_header_blue=fmt_header_blue,
+                    fmt_header_red=fmt_header_red, fmt_label_green=fmt_label_green,
+                    fmt_value_green=fmt_value_green, ghx_mandatory_fields=ghx_mandatory_fields,
+                    max_rows=max_rows, missing_mandatory_columns=missing_mandatory_columns,
+                    numeric_total_rows=numeric_total_rows,
+                    percentage_ingevuld_incl_missing=percentage_ingevuld_incl_missing,
+                    red_flag_messages=red_flag_messages, score_result=score_result, stats=stats,
+                    summary_data=summary_data, template_context=template_context,
+                    template_display_info=template_display_info, template_type=template_type,
+                    total_original_cols=total_original_cols, total_rows=total_rows,
+                    validation_results=validation_results,
                 )
-                current_row_intro += 1
 
-            # Witregel
-            current_row_intro += 1
-            
-            # Gebruiksinstructies toevoegen
-            ws_inleiding.write(
-                f"A{current_row_intro+1}",
-                "HOE DIT RAPPORT GEBRUIKEN:",
-                fmt_section_header,
-            )
-            current_row_intro += 1
-            
-            gebruiks_instructies = [
-                "1. Bekijk eerst Sheet 1 voor het overzicht en volledige scores",
-                "2. Controleer Sheet 3-5 voor specifieke foutmeldingen",  
-                "3. Gebruik de aandachtspunten om prioriteiten te stellen"
-            ]
-            
-            for instructie in gebruiks_instructies:
-                ws_inleiding.write(
-                    f"A{current_row_intro+1}", instructie, fmt_standard
+            # ==================================================================
+            # START CODE VOOR SHEET 2: INLEIDING
+            # ==================================================================
+            if "inleiding" in report_sheets:
+                add_inleiding_sheet(
+                    workbook,
+                    writer,
+                    M_found=M_found, ghx_mandatory_fields=ghx_mandatory_fields,
+                    report_sheets=report_sheets, score_result=score_result,
+                    template_type=template_type,
                 )
-                current_row_intro += 1
-
-            # Witregel
-            current_row_intro += 1
-            # Nieuwe template link
-            ws_inleiding.write(
-                f"A{current_row_intro+1}",
-                "We vragen u om altijd gebruik te maken van de nieuwste versie van de GHX-template, welke te downloaden is via de volgende link:",
-                fmt_standard,
-            )
-            current_row_intro += 1
-            ws_inleiding.write_url(
-                f"A{current_row_intro+1}",
-                "https://ghxnl.ghxeurope.com/synqeps/webroot/upload/GHXstandaardTemplate2.xlsx",
-                fmt_url,
-                string="https://ghxnl.ghxeurope.com/synqeps/webroot/upload/GHXstandaardTemplate2.xlsx",
-            )
-            current_row_intro += 1
-
-            # Witregel
-            current_row_intro += 1
-
-            # Beknopte afsluiting
-            ws_inleiding.write(
-                f"A{current_row_intro+1}",
-                "Wij verzoeken u vriendelijk eventuele fouten te corrigeren, ontbrekende informatie aan te vullen, en volledig lege verplichte kolommen te voorzien van data, zodat de prijslijst succesvol kan worden verwerkt.",
-                fmt_standard,
-            )
-            current_row_intro += 1
-            current_row_intro += 1  # Witregel
-            ws_inleiding.write(
-                f"A{current_row_intro+1}", "Met vriendelijke groet,", fmt_standard
-            )
-            current_row_intro += 1
-            current_row_intro += 1  # Witregel
-            ws_inleiding.write(
-                f"A{current_row_intro+1}", "GHX", fmt_standard
-            )
-            current_row_intro += 1
             # ==================================================================
             # EINDE CODE VOOR SHEET 2: INLEIDING
             # ==================================================================
 
-            # ==================================================================
-            # START CODE VOOR SHEET 3: VERPLICHTE FOUTEN
-            # ==================================================================
-            ws_mand_err = workbook.add_worksheet("3. Verplichte Fouten")
-            suppress_excel_errors(ws_mand_err)
-            writer.sheets["3. Verplichte Fouten"] = ws_mand_err
+            # Kolommen van de foutsheets (3 en 5)
             required_cols_err = [
                 "Rij",
                 "GHX Kolom",
@@ -3395,136 +3871,17 @@ Kwaliteitscore Uitleg:
                 "Foutmelding",
                 "code",
             ]
-            if not df_errors_mand.empty and all(
-                c in df_errors_mand.columns for c in required_cols_err
-            ):
-                df_errors_mand_sheet = df_errors_mand[required_cols_err].copy()
-                df_errors_mand_sheet = df_errors_mand_sheet.rename(
-                    columns={"code": "Foutcode"}
-                )
-                
-                # Voeg Type kolom toe
-                df_errors_mand_sheet["Type"] = df_errors_mand_sheet.apply(get_error_category_with_type, axis=1)
-                df_errors_mand_sheet = df_errors_mand_sheet.sort_values(
-                    by=["Rij", "GHX Kolom"]
-                )
-                df_errors_mand_sheet = df_errors_mand_sheet.fillna(
-                    ""
-                )  # Vul NaN etc. met lege string
-                
-                # Schoon de "Supplier Kolom" headers op (alleen Nederlandse namen)
-                if "Supplier Kolom" in df_errors_mand_sheet.columns:
-                    df_errors_mand_sheet["Supplier Kolom"] = df_errors_mand_sheet["Supplier Kolom"].apply(
-                        clean_header_for_display
-                    )
-
-                # Limiet toepassen
-                limit_message_format = workbook.add_format(
-                    {"bold": True, "color": "red", "font_size": 10}
-                )
-                # Gebruik een aparte naam voor de DataFrame die daadwerkelijk naar Excel gaat (ivm slicing)
-                df_errors_mand_sheet_display = df_errors_mand_sheet
-                if len(df_errors_mand_sheet) > ERROR_LIMIT:
-                    ws_mand_err.write(
-                        0,
-                        0,
-                        f"LET OP: Weergave beperkt tot de eerste {ERROR_LIMIT} fouten.",
-                        limit_message_format,
-                    )
-                    # Maak een slice en BELANGRIJK: een .copy() om SettingWithCopyWarning te voorkomen
-                    df_errors_mand_sheet_display = df_errors_mand_sheet.iloc[
-                        ERROR_START:ERROR_END
-                    ].copy()
-                    startrow_err = 1  # Data start op rij 2 (index 1) omdat rij 1 het limiet-bericht bevat
-                else:
-                    startrow_err = 0  # Data start op rij 1 (index 0)
 
-                # Schrijf de data naar Excel (BELANGRIJK: ZONDER header nu)
-                df_errors_mand_sheet_display.to_excel(
+            # ==================================================================
+            # START CODE VOOR SHEET 3: VERPLICHTE FOUTEN
+            # ==================================================================
+            if "verplichte_fouten" in report_sheets:
+                add_verplichte_fouten_sheet(
+                    workbook,
                     writer,
-                    sheet_name="3. Verplichte Fouten",
-                    startrow=startrow_err + 1,
-                    index=False,
-                    header=False,
-                )
-
-                # Kolombreedtes instellen
-                ws_mand_err.set_column(0, 0, 8)  # Rij
-                ws_mand_err.set_column(1, 1, 30)  # GHX Kolom
-                ws_mand_err.set_column(
-                    2, 2, 30
-                )  # Supplier Kolom << Kolom die moet wrappen
-                ws_mand_err.set_column(3, 3, 45)  # Veldwaarde
-                ws_mand_err.set_column(4, 4, 150)  # Foutmelding
-                ws_mand_err.set_column(5, 5, 10)  # Foutcode
-                ws_mand_err.set_column(6, 6, 12)  # Type
-
-                # Bepaal tabel dimensies gebaseerd op de display DataFrame
-                (max_row_disp, max_col_disp) = df_errors_mand_sheet_display.shape
-                # Excel rij-index (0-based) van de LAATSTE rij met data
-                last_data_row_index = startrow_err + max_row_disp
-
-                # Definieer headers voor tabel stijl
-                header_list = [
-                    {"header": col} for col in df_errors_mand_sheet_display.columns
-                ]
-
-                # Voeg tabel toe (past basis stijl toe)
-                # Range is van de header rij (startrow_err) t/m de laatste data rij (last_data_row_index)
-                ws_mand_err.add_table(
-                    startrow_err,
-                    0,
-                    last_data_row_index,
-                    max_col_disp - 1,
-                    {
-                        "columns": header_list,
-                        "style": "Table Style Medium 10",
-                        "header_row": True,  # Laat stijl de header opmaken op rij startrow_err
-                    },
-                )
-
-                # --- Pas text wrap toe op Kolom C ("Supplier Kolom") NA HET MAKEN VAN DE TABEL ---
-                # Definieer een format dat WEL text wrap en top align doet (om overflow te voorkomen)
-                # fmt_col_c_wrap_override = workbook.add_format({'valign': 'top', 'text_wrap': True})
-                fmt_col_c_wrap_override = workbook.add_format(
-                    {"valign": "top"}
-                )  # Zet text_wrap weer AAN
-                # Loop door de data rijen (excel rij indexen: startrow_err + 1 t/m last_data_row_index)
-                # Kolom C heeft index 2
-                for row_idx_in_df in range(
-                    max_row_disp
-                ):  # Loopt van 0 tot aantal data rijen - 1
-                    # Bepaal het werkelijke Excel rijnummer (0-based index)
-                    excel_row_index = startrow_err + 1 + row_idx_in_df
-
-                    # Kolom C (index 2): Overschrijf de cel met dezelfde waarde maar MET het wrap format
-                    # Dit overschrijft de tabel stijl specifiek voor deze cellen
-                    value_c = df_errors_mand_sheet_display.iat[row_idx_in_df, 2]
-                    ws_mand_err.write(excel_row_index, 2, value_c, fmt_col_c_wrap_override)
-
-                    # Kolom D (index 3): Schrijf expliciet, zet spatie indien leeg
-                    fmt_col_d_basic = workbook.add_format({'valign': 'top'}) # Basic format for D
-                    value_d = df_errors_mand_sheet_display.iat[row_idx_in_df, 3]
-                    if value_d == '': # Check if value is empty string (due to earlier fillna(''))
-                        ws_mand_err.write_string(excel_row_index, 3, ' ', fmt_col_d_basic) # Write a space if empty
-                    else:
-                        ws_mand_err.write(excel_row_index, 3, value_d, fmt_col_d_basic) # Write original value if not empty
-
-                # --- Stel vaste rijhoogte in om auto-resize door wrap te voorkomen ---
-                default_row_height = 15
-                # Loop door de Excel rij-indexen van de datarijen
-                for row_num in range(startrow_err + 1, last_data_row_index + 1):
-                    ws_mand_err.set_row(row_num, default_row_height)
-                # --- Einde Vaste Rijhoogte --- 
-            else:
-                # Schrijf 'geen fouten' bericht
-                fmt_default_table = workbook.add_format(
-                    {"font_size": 10}
-                )  # Basic format
-                ws_mand_err.write(
-                    0, 0, "Geen fouten gevonden in verplichte velden.", fmt_default_table
+                    constant_memory=constant_memory, df_errors_mand=df_errors_mand,
+                    required_cols_err=required_cols_err,
                 )
-                ws_mand_err.set_column("A:A", 50)
             # ==================================================================
             # EINDE CODE VOOR SHEET 3: VERPLICHTE FOUTEN
             # ==================================================================
@@ -3532,81 +3889,15 @@ Kwaliteitscore Uitleg:
             # ==================================================================
             # START CODE VOOR SHEET 4: VERPLICHTE %
             # ==================================================================
-            ws_mand_perc = workbook.add_worksheet("4. Verplichte %")
-            suppress_excel_errors(ws_mand_perc)
-            writer.sheets["4. Verplichte %"] = ws_mand_perc
-            # Bereken df_percentages hier opnieuw of gebruik een doorgegeven versie
-            # Voor nu, herbruik berekening van eerder in deze functie
-            field_stats_perc = []
-            for f in ghx_mandatory_fields:
-                aanwezig = "Ja" if f in df.columns else "Nee"
-                filled = filled_counts.get(f, 0)
-                field_filled_percentage = (
-                    (filled / numeric_total_rows * 100) if numeric_total_rows > 0 else 0
-                )
-                field_errors = corrected_errors.get(f, 0)
-                percentage_fout_field = (
-                    (field_errors / filled * 100) if filled > 0 else 0
-                )
-                field_juist = max(0, filled - field_errors)
-                field_stats_perc.append(
-                    {
-                        "GHX Header": f,
-                        "Supplier Header": clean_header(
-                            original_column_mapping.get(f, "")
-                        ),
-                        "Aanwezig": aanwezig,
-                        "FilledPercentage": field_filled_percentage
-                        / 100,  # Deel door 100 voor format
-                        "PercentageFout": percentage_fout_field
-                        / 100,  # Deel door 100 voor format
-                        "Aantal juist ingevuld": field_juist,
-                    }
+            if "verplichte_perc" in report_sheets:
+                add_verplichte_perc_sheet(
+                    workbook,
+                    writer,
+                    corrected_errors=corrected_errors, df=df, filled_counts=filled_counts,
+                    fmt_header_orange=fmt_header_orange, ghx_mandatory_fields=ghx_mandatory_fields,
+                    numeric_total_rows=numeric_total_rows,
+                    original_column_mapping=original_column_mapping,
                 )
-            df_percentages_sheet = pd.DataFrame(field_stats_perc)
-            df_percentages_sheet = df_percentages_sheet[
-                [
-                    "GHX Header",
-                    "Supplier Header",
-                    "Aanwezig",
-                    "FilledPercentage",
-                    "PercentageFout",
-                    "Aantal juist ingevuld",
-                ]
-            ]
-
-            df_percentages_sheet.to_excel(
-                writer, sheet_name="4. Verplichte %", index=False
-            )
-            # Definieer percentage opmaak
-            percentage_format = writer.book.add_format({'num_format': '0.00%'})
-
-            ws_mand_perc.set_column(0, 0, 30)
-            ws_mand_perc.set_column(1, 1, 30)
-            ws_mand_perc.set_column(2, 2, 12)
-            ws_mand_perc.set_column(3, 3, 18, percentage_format)  # Filled %
-            ws_mand_perc.set_column(4, 4, 18, percentage_format)  # Fout %
-            ws_mand_perc.set_column(5, 5, 20)  # Aantal Juist
-            # Pas format toe op percentage kolommen
-            # (Let op: De set_column hieronder leek overbodig/dubbel in de originele code, ik laat hem weg
-            # tenzij er problemen ontstaan)
-            # ws_mand_perc.set_column(3, 4, 18)  # fmt_perc_table verwijderd?
-            (max_row_mp, max_col_mp) = df_percentages_sheet.shape
-            # Header format
-            for c_idx, value in enumerate(df_percentages_sheet.columns.values):
-                ws_mand_perc.write(0, c_idx, value, fmt_header_orange)
-            # Tabel stijl
-            ws_mand_perc.add_table(
-                0,
-                0,
-                max_row_mp,
-                max_col_mp - 1,
-                {
-                    "columns": [{"header": col} for col in df_percentages_sheet.columns],
-                    "header_row": True,  # Gebruik de geschreven header
-                    "style": "Table Style Medium 1",
-                },
-            )
             # ==================================================================
             # EINDE CODE VOOR SHEET 4: VERPLICHTE %
             # ==================================================================
@@ -3614,108 +3905,13 @@ Kwaliteitscore Uitleg:
             # ==================================================================
             # START CODE VOOR SHEET 5: OPTIONELE FOUTEN
             # ==================================================================
-            ws_opt_err = workbook.add_worksheet("5. Optionele Fouten")
-            suppress_excel_errors(ws_opt_err)
-            writer.sheets["5. Optionele Fouten"] = ws_opt_err
-            if not df_errors_non_mand.empty and all(
-                c in df_errors_non_mand.columns for c in required_cols_err
-            ):
-                df_errors_non_mand_sheet = df_errors_non_mand[required_cols_err].copy()
-                df_errors_non_mand_sheet = df_errors_non_mand_sheet.rename(
-                    columns={"code": "Foutcode"}
-                )
-                
-                # Voeg Type kolom toe (speciale versie voor optionele fouten)
-                df_errors_non_mand_sheet["Type"] = df_errors_non_mand_sheet.apply(get_error_category_optional, axis=1)
-                df_errors_non_mand_sheet = df_errors_non_mand_sheet.sort_values(
-                    by=["Rij", "GHX Kolom"]
-                )
-                df_errors_non_mand_sheet = df_errors_non_mand_sheet.fillna("")
-                
-                # Schoon de "Supplier Kolom" headers op (alleen Nederlandse namen)
-                if "Supplier Kolom" in df_errors_non_mand_sheet.columns:
-                    df_errors_non_mand_sheet["Supplier Kolom"] = df_errors_non_mand_sheet["Supplier Kolom"].apply(
-                        clean_header_for_display
-                    )
-                # Gebruik een aparte naam voor de DataFrame die daadwerkelijk naar Excel gaat (ivm slicing)
-                df_errors_non_mand_sheet_display = df_errors_non_mand_sheet
-                if len(df_errors_non_mand_sheet) > ERROR_LIMIT:
-                    ws_opt_err.write(
-                        0,
-                        0,
-                        f"LET OP: Weergave beperkt tot de eerste {ERROR_LIMIT} fouten.",
-                        workbook.add_format({"bold": True, "color": "red"}),
-                    )
-                    # Maak een slice en BELANGRIJK: een .copy() om SettingWithCopyWarning te voorkomen
-                    df_errors_non_mand_sheet_display = df_errors_non_mand_sheet.iloc[
-                        ERROR_START:ERROR_END
-                    ].copy()
-                    startrow_opt_err = 1  # Data start op rij 2 (index 1) omdat rij 1 het limiet-bericht bevat
-                else:
-                    startrow_opt_err = 0  # Data start op rij 1 (index 0)
-                
-                # Schrijf de data naar Excel (BELANGRIJK: ZONDER header nu)
-                df_errors_non_mand_sheet_display.to_excel(
+            if "optionele_fouten" in report_sheets:
+                add_optionele_fouten_sheet(
+                    workbook,
                     writer,
-                    sheet_name="5. Optionele Fouten",
-                    startrow=startrow_opt_err,
-                    index=False,
+                    constant_memory=constant_memory, df_errors_non_mand=df_errors_non_mand,
+                    required_cols_err=required_cols_err,
                 )
-                # Opmaak
-                ws_opt_err.set_column(0, 0, 8)   # Rij
-                ws_opt_err.set_column(1, 1, 30)  # GHX Kolom
-                ws_opt_err.set_column(2, 2, 30)  # Supplier Kolom
-                ws_opt_err.set_column(3, 3, 45)  # Veldwaarde
-                ws_opt_err.set_column(4, 4, 150)  # Foutmelding
-                ws_opt_err.set_column(5, 5, 10)  # Foutcode
-                ws_opt_err.set_column(6, 6, 12)  # Type
-                # Bepaal tabel dimensies gebaseerd op de display DataFrame
-                (max_row_oe, max_col_oe) = df_errors_non_mand_sheet_display.shape
-                ws_opt_err.add_table(
-                    startrow_opt_err,
-                    0,
-                    startrow_opt_err + max_row_oe,
-                    max_col_oe - 1,
-                    {
-                        "columns": [{"header": col} for col in df_errors_non_mand_sheet_display.columns],
-                        "style": "Table Style Medium 7",
-                    },
-                )
-                # --- Pas format toe op Kol C & D NA HET MAKEN VAN DE TABEL ---
-                fmt_col_c_no_wrap_oe = workbook.add_format({'valign': 'top'}) # ZONDER text_wrap
-                fmt_col_d_basic_oe = workbook.add_format({'valign': 'top'})
-                # Kolom C = index 2, Kolom D = index 3 in df_errors_non_mand_sheet_display
-                for row_idx_in_df in range(max_row_oe):
-                    excel_row_index = startrow_opt_err + 1 + row_idx_in_df
-
-                    # Kolom C: Schrijf ZONDER wrap
-                    value_c = df_errors_non_mand_sheet_display.iat[row_idx_in_df, 2]
-                    ws_opt_err.write(excel_row_index, 2, value_c, fmt_col_c_no_wrap_oe)
-
-                    # Kolom D: Schrijf expliciet, zet spatie indien leeg
-                    value_d = df_errors_non_mand_sheet_display.iat[row_idx_in_df, 3]
-                    if value_d == '':
-                        ws_opt_err.write_string(excel_row_index, 3, ' ', fmt_col_d_basic_oe)
-                    else:
-                        ws_opt_err.write(excel_row_index, 3, value_d, fmt_col_d_basic_oe)
-                # --- Einde format Kol C & D --- 
-                # --- Stel vaste rijhoogte in om auto-resize door wrap te voorkomen ---
-                default_row_height = 15
-                # Bepaal de index van de laatste datarow voor de loop
-                last_data_row_index_oe = startrow_opt_err + max_row_oe
-                # Loop door de Excel rij-indexen van de datarijen
-                for row_num in range(startrow_opt_err + 1, last_data_row_index_oe + 1):
-                    ws_opt_err.set_row(row_num, default_row_height)
-                # --- Einde Vaste Rijhoogte --- 
-            else:
-                # Schrijf 'geen fouten' bericht
-                fmt_default_table = workbook.add_format(
-                    {"font_size": 10}
-                )  # Basic format
-                ws_opt_err.write(
-                    0, 0, "Geen fouten gevonden in optionele velden.", fmt_default_table
-                )
-                ws_opt_err.set_column("A:A", 50)
 
             # ==================================================================
             # EINDE CODE VOOR SHEET 5: OPTIONELE FOUTEN
@@ -3724,106 +3920,17 @@ Kwaliteitscore Uitleg:
             # ==================================================================
             # START CODE VOOR SHEET 6: OPTIONELE %
             # ==================================================================
-            ws_opt_perc = workbook.add_worksheet("6. Optionele %")
-            suppress_excel_errors(ws_opt_perc)
-            writer.sheets["6. Optionele %"] = ws_opt_perc
-            # Bereken df_percentages_non_mand hier
-            field_stats_non_mand_perc = []
-            for (
-                f
-            ) in non_mandatory_fields:  # Loop door *alle* optionele velden uit config
-                aanwezig = "Ja" if f in df.columns else "Nee"
-                filled_nm = filled_counts_non_mand.get(f, 0)  # 0 als kolom mist
-                field_filled_percentage_nm = (
-                    (filled_nm / numeric_total_rows * 100) if numeric_total_rows > 0 else 0
-                )
-                field_errors_nm = errors_per_field_non_mand.get(
-                    f, 0
-                )  # 0 als kolom mist
-                percentage_fout_field_nm = (
-                    (field_errors_nm / filled_nm * 100) if filled_nm > 0 else 0
-                )
-                field_juist_nm = max(0, filled_nm - field_errors_nm)
-                field_stats_non_mand_perc.append(
-                    {
-                        "GHX Header": f,
-                        "Supplier Header": clean_header(
-                            original_column_mapping.get(f, "")
-                        ),
-                        "Aanwezig": aanwezig,
-                        "FilledPercentage": field_filled_percentage_nm
-                        / 100,  # Deel door 100
-                        "PercentageFout": percentage_fout_field_nm
-                        / 100,  # Deel door 100
-                        "Aantal juist ingevuld": field_juist_nm,
-                    }
-                )
-            df_percentages_non_mand_sheet = pd.DataFrame(field_stats_non_mand_perc)
-            
-            # Check if DataFrame is not empty before column selection
-            if not df_percentages_non_mand_sheet.empty:
-                df_percentages_non_mand_sheet = df_percentages_non_mand_sheet[
-                    [
-                        "GHX Header",
-                        "Supplier Header",
-                        "Aanwezig",
-                        "FilledPercentage",
-                        "PercentageFout",
-                        "Aantal juist ingevuld",
-                    ]
-                ]
-            else:
-                # Create empty DataFrame with correct columns
-                df_percentages_non_mand_sheet = pd.DataFrame(columns=[
-                    "GHX Header",
-                    "Supplier Header", 
-                    "Aanwezig",
-                    "FilledPercentage",
-                    "PercentageFout",
-                    "Aantal juist ingevuld"
-                ])
-
-            if not df_percentages_non_mand_sheet.empty:
-                df_percentages_non_mand_sheet.to_excel(
-                    writer, sheet_name="6. Optionele %", index=False
-                )
-                # Definieer percentage opmaak (als het nog niet bestaat of voor de zekerheid opnieuw)
-                percentage_format = writer.book.add_format({'num_format': '0.00%'})
-
-                ws_opt_perc.set_column(0, 0, 30)
-                ws_opt_perc.set_column(1, 1, 30)
-                ws_opt_perc.set_column(2, 2, 12)
-                ws_opt_perc.set_column(3, 3, 18, percentage_format)  # Filled %
-                ws_opt_perc.set_column(4, 4, 18, percentage_format)  # Fout %
-                ws_opt_perc.set_column(5, 5, 20)  # Aantal Juist
-                # De onderstaande regel is nu overbodig door de expliciete format hierboven
-                # ws_opt_perc.set_column(3, 4, 18)  # fmt_perc_table verwijderd
-                (max_row_op, max_col_op) = df_percentages_non_mand_sheet.shape
-                # Header format
-                for c_idx, value in enumerate(
-                    df_percentages_non_mand_sheet.columns.values
-                ):
-                    ws_opt_perc.write(0, c_idx, value, fmt_header_orange)
-                # Tabel stijl
-                ws_opt_perc.add_table(
-                    0,
-                    0,
-                    max_row_op,
-                    max_col_op - 1,
-                    {
-                        "columns": [{"header": col} for col in df_percentages_non_mand_sheet.columns],
-                        "header_row": True,
-                        "style": "Table Style Medium 1",
-                    },
-                )
-            else:
-                ws_opt_perc.write(
-                    0,
-                    0,
-                    "Geen optionele velden gevonden of van toepassing.",
-                    fmt_default_table,
+            if "optionele_perc" in report_sheets:
+                add_optionele_perc_sheet(
+                    workbook,
+                    writer,
+                    df=df, errors_per_field_non_mand=errors_per_field_non_mand,
+                    filled_counts_non_mand=filled_counts_non_mand,
+                    fmt_default_table=fmt_default_table, fmt_header_orange=fmt_header_orange,
+                    non_mandatory_fields=non_mandatory_fields,
+                    numeric_total_rows=numeric_total_rows,
+                    original_column_mapping=original_column_mapping,
                 )
-                ws_opt_perc.set_column("A:A", 50)
 
             # ==================================================================
             # EINDE CODE VOOR SHEET 6: OPTIONELE %
@@ -3919,18 +4026,22 @@ Kwaliteitscore Uitleg:
             # ==================================================================
             # START CODE VOOR SHEET 7: DATASET VALIDATIE
             # ==================================================================
-            # Deze functie wordt nu aangeroepen vanuit dit script
-            add_colored_dataset_sheet(
-                workbook,
-                df,
-                validation_results,
-                ghx_mandatory_fields,
-                original_column_mapping,
-                JSON_CONFIG_PATH,
-                validation_config,
-                template_context,
-                excel_path,
-            )
+            if "dataset" in report_sheets:
+                # Deze functie wordt nu aangeroepen vanuit dit script
+                add_colored_dataset_sheet(
+                    workbook,
+                    df,
+                    validation_results,
+                    ghx_mandatory_fields,
+                    original_column_mapping,
+                    JSON_CONFIG_PATH,
+                    validation_config,
+                    template_context,
+                    excel_path,
+                    constant_memory=constant_memory,
+                    cell_matrix=cell_matrix,
+                    active_fields=active_fields,
+                )
 
             # ==================================================================
             # EINDE CODE VOOR SHEET 7: DATASET VALIDATIE
@@ -3939,170 +4050,21 @@ Kwaliteitscore Uitleg:
             # ==================================================================
             # START CODE VOOR SHEET 8: KOLOM MAPPING - NIEUWE SIMPELE IMPLEMENTATIE
             # ==================================================================
-            # SKIP Sheet 8 voor Template Generator bestanden - kolom mapping is niet relevant
-            mapping_data_map = []  # Initialize outside of if/else scope
-            ws_map = None  # Initialize ws_map to prevent UnboundLocalError
-            
-            if (template_context and template_context.get("decisions")) or template_type == "N":
-                # Skip Sheet 8 voor:
-                # - Template Generator (TG): hebben al correcte kolommen
-                # - Nieuwe GHX templates (N): standaard GHX kolommen, geen mapping nodig
-                # Alleen oude/leverancier templates (O) krijgen Sheet 8
-                pass
-            elif template_type in ["O", "AT"]:
-                # Import normalize function voor header vergelijking
-                from .price_tool import normalize_template_header
-                
-                ws_map = workbook.add_worksheet("8. Kolom Mapping")
-                suppress_excel_errors(ws_map)
-                writer.sheets["8. Kolom Mapping"] = ws_map
-            mapped_originals = set()
-            
-            # 1. Toon alle succesvol gemapte headers in GHX template volgorde
-            # Gebruik visible_headers volgorde i.p.v. original_column_mapping volgorde
-            if validation_config:
-                # Check voor v20 vs v18 structuur
-                if "field_validations" in validation_config:
-                    # v20 structuur - gebruik field_validations volgorde
-                    template_ordered_headers = list(validation_config.get("field_validations", {}).keys())
-                else:
-                    # v18 structuur (fallback)
-                    template_ordered_headers = list(validation_config.get("fields", {}).keys())
-                
-                # Ga door ALLE GHX headers in template volgorde (103 totaal)
-                for ghx_header in template_ordered_headers:
-                    # Check of deze header gemapt is
-                    if ghx_header in original_column_mapping:
-                        original_header = original_column_mapping[ghx_header]
-                        
-                        # Check of dit veld zichtbaar is in Template Generator context
-                        is_visible = True
-                        if template_context and template_context.get("_decisions"):
-                            decisions = template_context.get("_decisions", {})
-                            is_visible = decisions.get(ghx_header, {}).get("visible", True)
-                        
-                        # Voeg toe met supplier header (voor zichtbare velden)
-                        if is_visible:
-                            mapping_data_map.append({
-                                "GHX Header": ghx_header,
-                                "Supplier Header": original_header,
-                            })
-                            # Normaliseer originele header voor vergelijking
-                            from .price_tool import normalize_template_header
-                            normalized_original = normalize_template_header(original_header)
-                            mapped_originals.add(normalized_original)
-                        else:
-                            # Veld is niet zichtbaar in context - toon als ontbrekend
-                            mapping_data_map.append({
-                                "GHX Header": ghx_header,
-                                "Supplier Header": "— ONTBREKEND (VERBORGEN) —",
-                            })
-                    else:
-                        # Geen mapping gevonden - toon als ontbrekend/optioneel
-                        mapping_data_map.append({
-                            "GHX Header": ghx_header,
-                            "Supplier Header": "— ONTBREKEND (OPTIONEEL) —",
-                        })
-            else:
-                # Fallback naar oude methode als geen validation_config
-                for ghx_header, original_header in original_column_mapping.items():
-                    # Check of dit veld zichtbaar is in Template Generator context
-                    is_visible = True
-                    if template_context and template_context.get("_decisions"):
-                        decisions = template_context.get("_decisions", {})
-                        is_visible = decisions.get(ghx_header, {}).get("visible", True)
-                    
-                    # Alleen toevoegen als het veld zichtbaar is
-                    if is_visible:
-                        mapping_data_map.append({
-                            "GHX Header": ghx_header,
-                            "Supplier Header": original_header,
-                        })
-                        # Normaliseer originele header voor vergelijking
-                        from .price_tool import normalize_template_header
-                        normalized_original = normalize_template_header(original_header)
-                        mapped_originals.add(normalized_original)
-            
-            # 2. Toon verplichte velden die ontbreken (gefilterd voor Template Generator)
-            if not validation_config:
-                logging.warning("validation_config is None, kan Sheet 8 niet volledig genereren.")
-            else:
-                # Check voor v20 vs v18 structuur
-                if "field_validations" in validation_config:
-                    # v20 structuur
-                    ghx_headers_in_config = list(validation_config.get("field_validations", {}).keys())
-                else:
-                    # v18 structuur (fallback)  
-                    ghx_headers_in_config = list(validation_config.get("fields", {}).keys())
-                
-                # Filter headers voor Template Generator templates - alleen zichtbare velden
-                visible_headers = ghx_headers_in_config
-                
-                if template_context and template_context.get("decisions"):
-                    # Use Template Generator decisions om ingeklapte velden uit te filteren
-                    decisions = template_context.get("decisions", {})
-                    visible_list = decisions.get("visible_list", [])
-                    visible_headers = [header for header in ghx_headers_in_config if header in visible_list]
-                    # Template Generator kolom filtering toegepast voor Sheet 8
-                else:
-                    # Template Generator filtering overgeslagen voor Sheet 8
-                    pass
-                
-                # Toon ALLE GHX headers met mapping status voor AT templates  
-                for ghx_header in visible_headers:
-                    if ghx_header not in original_column_mapping:
-                        # Bepaal status: verplicht of optioneel
-                        if ghx_header in ghx_mandatory_fields:
-                            status = "--- ONTBREKEND (VERPLICHT) ---"
-                        else:
-                            status = "--- ONTBREKEND (OPTIONEEL) ---"
-                            
-                        mapping_data_map.append({
-                            "GHX Header": ghx_header,
-                            "Supplier Header": status,
-                        })
-            
-            # 3. Vind alle originele headers die NIET gemapt werden
-            for original_header in df_original.columns:
-                if original_header.lower().startswith("algemeen"):
-                    continue  # Skip algemeen kolommen
-                    
-                # Normaliseer en vergelijk
-                normalized_original = normalize_template_header(original_header) 
-                if normalized_original not in mapped_originals:
-                    mapping_data_map.append({
-                        "GHX Header": "--- ONBEKEND / NIET GEMAPT ---",
-                        "Supplier Header": normalized_original,
-                    })
-            mapping_df_sheet = pd.DataFrame(mapping_data_map)
-
-            # Alleen Sheet 8 schrijven voor oude/leverancier templates (O/AT)
-            if template_type in ["O", "AT"]:
-                mapping_df_sheet.to_excel(
-                    writer, sheet_name="8. Kolom Mapping", index=False
-                )
-                ws_map.set_column(0, 0, 45)
-                ws_map.set_column(1, 1, 75)
-                (max_row_map, max_col_map) = mapping_df_sheet.shape
-                # Header format
-                for c_idx, value in enumerate(mapping_df_sheet.columns.values):
-                    ws_map.write(0, c_idx, value, fmt_header_orange)
-                # Tabel stijl
-                ws_map.add_table(
-                    0,
-                    0,
-                    max_row_map,
-                    max_col_map - 1,
-                    {
-                        "columns": [{"header": col} for col in mapping_df_sheet.columns],
-                        "header_row": True,
-                        "style": "Table Style Medium 1",
-                    },
+            if "mapping" in report_sheets:
+                add_mapping_sheet(
+                    workbook,
+                    writer,
+                    df_original=df_original, fmt_header_orange=fmt_header_orange,
+                    ghx_mandatory_fields=ghx_mandatory_fields,
+                    original_column_mapping=original_column_mapping,
+                    template_context=template_context, template_type=template_type,
+                    validation_config=validation_config,
+                    active_fields=active_fields,
                 )
 
-                # ==================================================================
-                # EINDE CODE VOOR SHEET 8: KOLOM MAPPING (binnen normale bestanden if-block)
-                # ==================================================================
+                    # ==================================================================
+                    # EINDE CODE VOOR SHEET 8: KOLOM MAPPING (binnen normale bestanden if-block)
+                    # ==================================================================
 
 
             # ==================================================================
@@ -4184,7 +4146,7 @@ Kwaliteitscore Uitleg:
         # Bereken kwaliteitscore (0-45 punten)  
         # Gebaseerd op foutpercentage - hoe minder fouten, hoe hoger de score
         if numeric_total_rows > 0:
-            total_fouten = len(df_errors_mand) + len(df_errors_non_mand)
+            total_fouten = stats.mandatory_error_count + stats.non_mandatory_error_count
             fout_percentage = min(100, (total_fouten / numeric_total_rows) * 100)
             kwaliteits_score = int(max(0, 45 - (fout_percentage / 100 * 45)))
         else:
@@ -4226,7 +4188,7 @@ Kwaliteitscore Uitleg:
         
         ws_config.write("A6", "Kwaliteit (0-45):", fmt_config_label)
         ws_config.write("B6", kwaliteits_score, fmt_config_value)
-        ws_config.write("C6", f"({len(df_errors_mand) + len(df_errors_non_mand)} fouten)", fmt_config_label)
+        ws_config.write("C6", f"({stats.mandatory_error_count + stats.non_mandatory_error_count} fouten)", fmt_config_label)
         
         ws_config.write("A7", "Template (0/10):", fmt_config_label)
         ws_config.write("B7", template_score, fmt_config_value)
@@ -0,0 +1,136 @@
+"""
+Report Exports Module
+
+Machine-leesbare outputs naast (of in plaats van) het Excel rapport. Laadjobs die alleen
+de meldingen en de score nodig hebben hoeven dan geen opgemaakte XLSX met negen sheets
+te openen, en zonder "xlsx" wordt dat rapport helemaal niet gebouwd.
+
+Formaten (naast het rapport, als <bestandsnaam>_VR[_QM]<achtervoegsel>):
+- "xlsx":    het bestaande validatierapport (genereer_rapport)
+- "parquet": _errors.parquet, alle meldingen kolomgewijs (dictionary-encoded, incl. RED FLAG)
+- "json":    _summary.json, de ReportStats (tellingen per veld/code, percentages, score)
+- "ndjson":  _errors.ndjson, dezelfde meldingen als Parquet, één JSON object per regel
+
+Omgevingsvariabelen:
+- GHX_OUTPUT_FORMATS: komma-gescheiden default formaten (default "xlsx")
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow staat in requirements.txt
+    pq = None
+
+from .report_stats import ReportStats
+from .validation_results import as_validation_results, results_dataframe
+
+OUTPUT_FORMATS = ("xlsx", "parquet", "json", "ndjson")
+DEFAULT_OUTPUT_FORMATS = os.environ.get("GHX_OUTPUT_FORMATS", "xlsx")
+
+_OUTPUT_SUFFIXES = {
+    "parquet": "_errors.parquet",
+    "json": "_summary.json",
+    "ndjson": "_errors.ndjson",
+}
+
+
+def resolve_output_formats(output_formats: Optional[Union[str, Iterable[str]]] = None) -> Tuple[str, ...]:
+    """
+    Normaliseert de gevraagde formaten ("json,parquet" of een lijst; None = GHX_OUTPUT_FORMATS).
+
+    Raises:
+        ValueError: bij een onbekend formaat of een lege selectie
+    """
+    if output_formats is None:
+        output_formats = DEFAULT_OUTPUT_FORMATS
+    if isinstance(output_formats, str):
+        output_formats = output_formats.split(",")
+
+    formats = []
+    for fmt in output_formats:
+        fmt = str(fmt).strip().lower()
+        if not fmt:
+            continue
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Onbekend output formaat '{fmt}' (kies uit {', '.join(OUTPUT_FORMATS)})")
+        if fmt not in formats:
+            formats.append(fmt)
+    if not formats:
+        raise ValueError("Geen output formaat opgegeven")
+    return tuple(formats)
+
+
+def output_base_name(bestandsnaam: str, quick_mode: bool = False) -> str:
+    """Basisnaam voor de outputs, gelijk aan het begin van de rapport bestandsnaam."""
+    quick_mode_suffix = "_QM" if quick_mode else ""
+    return f"{os.path.splitext(bestandsnaam)[0]}_VR{quick_mode_suffix}"
+
+
+def write_report_outputs(
+    validation_results: Iterable[dict],
+    stats: ReportStats,
+    output_dir: str,
+    bestandsnaam: str,
+    formats: Iterable[str],
+    processed_rows: int,
+    total_rows: Any = None,
+    max_rows: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Schrijft de machine-leesbare outputs ("xlsx" in formats wordt hier overgeslagen).
+
+    Args:
+        validation_results: Alle meldingen (ValidationResults of lijst met dicts)
+        stats: ReportStats van dezelfde run
+        output_dir: Map voor de bestanden
+        bestandsnaam: Originele bestandsnaam van de prijslijst
+        formats: Formaten uit resolve_output_formats
+        processed_rows: Aantal gevalideerde rijen
+        total_rows: Aantal rijen in het bestand (Quick Mode: mogelijk "5000+")
+        max_rows: Quick Mode limiet of None
+
+    Returns:
+        Dict formaat -> pad van elk geschreven bestand
+    """
+    base_path = os.path.join(output_dir, output_base_name(bestandsnaam, quick_mode=max_rows is not None))
+    paths = {}
+
+    if "parquet" in formats:
+        if pq is None:
+            logging.error("Parquet output overgeslagen: pyarrow is niet geïnstalleerd")
+        else:
+            path = base_path + _OUTPUT_SUFFIXES["parquet"]
+            pq.write_table(as_validation_results(validation_results).to_arrow(), path)
+            paths["parquet"] = path
+
+    if "ndjson" in formats:
+        path = base_path + _OUTPUT_SUFFIXES["ndjson"]
+        df_errors_all = results_dataframe(validation_results)
+        if df_errors_all.empty:
+            open(path, "w", encoding="utf-8").close()
+        else:
+            df_errors_all.to_json(path, orient="records", lines=True, force_ascii=False, date_format="iso")
+        paths["ndjson"] = path
+
+    if "json" in formats:
+        path = base_path + _OUTPUT_SUFFIXES["json"]
+        summary = {
+            "bestandsnaam": bestandsnaam,
+            "gegenereerd": datetime.now().isoformat(timespec="seconds"),
+            "quick_mode": max_rows is not None,
+            "processed_rows": processed_rows,
+            "total_rows": processed_rows if total_rows is None else total_rows,
+            "stats": stats.to_dict(),
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+        paths["json"] = path
+
+    for fmt, path in paths.items():
+        logging.info(f"Output ({fmt}) geschreven: {path}")
+    return paths
@@ -0,0 +1,275 @@
+"""
+Report Matrix Module
+
+Dichte cel matrix (rijen x kolommen, uint8) voor het rapport. Sheet 7 (Dataset Validatie)
+en de stacked bar chart op het dashboard bouwden elk hun eigen lookups uit
+validation_results; de chart deed dat per verplicht veld opnieuw en liep daarna met
+df.iterrows() door alle rijen, O(velden x (fouten + rijen)).
+
+build_cell_matrix() zet de validatieresultaten één keer met een gevectoriseerde scatter
+(np.bitwise_or.at) in de matrix. Elke cel is een bitmasker:
+
+- CELL_ERROR: fout (rejection/correction) op deze cel
+- CELL_FLAG: flag op deze cel
+- CELL_UOM_CONFLICT: UOM relatie conflict (724, 801, 805) op deze cel
+- CELL_UOM_RELATED: gerelateerd veld van een 801/805 conflict (alleen sheet 7 kleurt dit)
+- CELL_EMPTY: lege cel (NaN of str(value).strip() == "")
+- CELL_EMPTY_REQUIRED: lege cel in een verplicht veld of met depends_on conditie "1"
+- CELL_MANDATORY: kolom is een verplicht GHX veld
+
+dataset_categories() leidt daaruit de sheet 7 kleur per cel af, column_color_counts()
+de aantallen per kolom voor de dashboard chart (kolomsommen). display_values() en
+iter_format_runs() leveren sheet 7 de getoonde waarden en de runs per rij met hetzelfde
+format, zodat die met write_row in plaats van per cel geschreven worden.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .validation_results import ValidationResults
+
+CELL_ERROR = 1
+CELL_FLAG = 2
+CELL_UOM_CONFLICT = 4
+CELL_UOM_RELATED = 8
+CELL_EMPTY = 16
+CELL_EMPTY_REQUIRED = 32
+CELL_MANDATORY = 64
+
+# Sheet 7 categorieën (index in de lijst met cel formats)
+CATEGORY_CORRECT = 0
+CATEGORY_ERROR = 1  # Rood: fout in verplicht veld
+CATEGORY_ERROR_OPTIONAL = 2  # Roze: flag of fout in niet-verplicht veld
+CATEGORY_EMPTY_MANDATORY = 3  # Geel: verplicht veld leeg
+CATEGORY_UOM_CONFLICT = 4  # Blauw: UOM relatie conflict
+
+UOM_RELATION_CODES = ("724", "801", "805")
+
+# 801 (UOM match) en 805 (Content match) kleuren ook het gerelateerde veld
+RELATED_UOM_FIELDS = {
+    "801": {
+        "UOM Code Verpakkingseenheid": "UOM Code Basiseenheid",
+        "UOM Code Basiseenheid": "UOM Code Verpakkingseenheid",
+    },
+    "805": {
+        "Inhoud Verpakkingseenheid": "Inhoud Basiseenheid",
+        "Inhoud Basiseenheid": "Inhoud Verpakkingseenheid",
+    },
+}
+
+
+def _unique_mask(series: pd.Series, func) -> np.ndarray:
+    """Past func toe op str(value).strip() per unieke waarde (NaN telt als None)."""
+    null = series.isna().to_numpy()
+    # Factorize op str(value): 1 en 1.0 zijn gelijk als waarde maar niet als tekst
+    codes, uniques = pd.factorize(series.map(str).to_numpy(dtype=object))
+    mask_u = np.fromiter((func(u.strip()) for u in uniques), dtype=bool, count=len(uniques))
+    return np.where(null, func(None), mask_u[codes])
+
+
+def _empty_mask(series: pd.Series) -> np.ndarray:
+    """"" if pd.isna(value) else str(value).strip() == "" per rij."""
+    return _unique_mask(series, lambda s: s is None or s == "")
+
+
+def _dependency_mask(field_config: dict, df: pd.DataFrame) -> Optional[np.ndarray]:
+    """Rijen waar het eerste depends_on veld '1' is (alleen conditie '1'), anders None."""
+    depends_on = field_config.get("depends_on") if isinstance(field_config, dict) else None
+    if not depends_on or depends_on.get("condition") != "1":
+        return None
+    related_fields = depends_on.get("fields", [])
+    if not related_fields or related_fields[0] not in df.columns:
+        return None
+    # str(NaN) is 'nan', dus lege gerelateerde cellen tellen niet mee
+    return _unique_mask(df[related_fields[0]], lambda s: (s if s is not None else "nan") == "1")
+
+
+def _result_bits(code: Any, rule_type: Any) -> int:
+    if code in UOM_RELATION_CODES:
+        return CELL_UOM_CONFLICT
+    return CELL_FLAG if rule_type == "flag" else CELL_ERROR
+
+
+def _dict_hits(validation_results: Iterable[dict], col_positions: Dict[str, int],
+               n_rows: int) -> Tuple[list, list, list]:
+    """(rij, kolom, bit) per melding uit een lijst met result dicts."""
+    rows, cols, bits = [], [], []
+    for error in validation_results:
+        col_name = error.get("GHX Kolom")
+        if col_name == "RED FLAG" or col_name not in col_positions:
+            continue
+        try:
+            row_idx = int(error["Rij"]) - 3
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not 0 <= row_idx < n_rows:
+            continue
+        error_code = str(error.get("code", ""))
+        bit = _result_bits(error_code, error.get("type", ""))
+        rows.append(row_idx)
+        cols.append(col_positions[col_name])
+        bits.append(bit)
+        related = RELATED_UOM_FIELDS.get(error_code, {}).get(col_name)
+        if related in col_positions:
+            rows.append(row_idx)
+            cols.append(col_positions[related])
+            bits.append(CELL_UOM_RELATED)
+    return rows, cols, bits
+
+
+def _columnar_hits(results: ValidationResults, col_positions: Dict[str, int],
+                   n_rows: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(rij, kolom, bit) arrays uit een ValidationResults via lookups per veld en regel id."""
+    fields, rules = results.fields, results.rules
+    field_cols = np.asarray([col_positions.get(field, -1) if field != "RED FLAG" else -1 for field in fields] or [-1])
+    rule_codes = [str(rule[1]) for rule in rules]
+    rule_bits = np.asarray([_result_bits(code, rule[2] if len(rule) == 3 else "")
+                            for code, rule in zip(rule_codes, rules)] or [0], dtype=np.uint8)
+
+    row_idx = results.rows.astype(np.int64) - 3
+    field_ids = results.field_ids.astype(np.intp)
+    rule_ids = results.rule_ids.astype(np.intp)
+    cols = field_cols[field_ids]
+    keep = (cols >= 0) & (row_idx >= 0) & (row_idx < n_rows)
+    rows_out, cols_out, bits_out = [row_idx[keep]], [cols[keep]], [rule_bits[rule_ids[keep]]]
+
+    # 801/805: ook het gerelateerde veld (alleen sheet 7 kleurt dit)
+    related_cols = np.full((len(field_cols), max(len(rules), 1)), -1, dtype=np.int64)
+    for rule_id, code in enumerate(rule_codes):
+        for field, related in RELATED_UOM_FIELDS.get(code, {}).items():
+            if field in fields and related in col_positions:
+                related_cols[fields.index(field), rule_id] = col_positions[related]
+    related = related_cols[field_ids, rule_ids]
+    keep_related = keep & (related >= 0)
+    if keep_related.any():
+        rows_out.append(row_idx[keep_related])
+        cols_out.append(related[keep_related])
+        bits_out.append(np.full(int(keep_related.sum()), CELL_UOM_RELATED, dtype=np.uint8))
+    return np.concatenate(rows_out), np.concatenate(cols_out), np.concatenate(bits_out)
+
+
+def build_cell_matrix(df: pd.DataFrame, validation_results: Iterable[dict], mandatory_fields: List[str],
+                      validation_config: Optional[dict] = None) -> np.ndarray:
+    """
+    Bouwt de cel matrix (len(df) x len(df.columns), uint8 bitmaskers).
+
+    Args:
+        df: Het gevalideerde DataFrame (rij positie = Rij - 3)
+        validation_results: Validatieresultaten (RED FLAG regels worden overgeslagen)
+        mandatory_fields: Verplichte GHX velden
+        validation_config: Native v20 config voor depends_on (None = geen dependencies)
+    """
+    n_rows, n_cols = len(df), len(df.columns)
+    matrix = np.zeros((n_rows, n_cols), dtype=np.uint8)
+    col_positions = {name: idx for idx, name in enumerate(df.columns)}
+    mandatory = set(mandatory_fields or [])
+    fields_config = (validation_config or {}).get("fields", {})
+
+    for col_idx, field_name in enumerate(df.columns):
+        empty = _empty_mask(df.iloc[:, col_idx])
+        is_mandatory = field_name in mandatory
+        required = empty if is_mandatory else None
+        if not is_mandatory and field_name in fields_config:
+            dependency = _dependency_mask(fields_config[field_name], df)
+            if dependency is not None:
+                required = empty & dependency
+        column = matrix[:, col_idx]
+        column[empty] |= CELL_EMPTY
+        if required is not None:
+            column[required] |= CELL_EMPTY_REQUIRED
+        if is_mandatory:
+            column |= CELL_MANDATORY
+
+    # Scatter van de resultaten: (rij, kolom, bit) verzamelen en in één keer OR-en
+    if isinstance(validation_results, ValidationResults):
+        rows, cols, bits = _columnar_hits(validation_results, col_positions, n_rows)
+    else:
+        rows, cols, bits = _dict_hits(validation_results, col_positions, n_rows)
+
+    if len(rows):
+        np.bitwise_or.at(matrix, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)),
+                         np.asarray(bits, dtype=np.uint8))
+    logging.debug(f"Cel matrix gebouwd: {n_rows}x{n_cols}, {len(rows)} gemarkeerde cellen")
+    return matrix
+
+
+def dataset_categories(matrix: np.ndarray) -> np.ndarray:
+    """
+    Sheet 7 kleur per cel (CATEGORY_*), in dezelfde prioriteit als voorheen:
+    UOM conflict > verplicht leeg > flag > fout (lege optionele cel blijft wit;
+    rood voor verplichte velden, roze voor de rest) > correct.
+    """
+    def has(bit):
+        return (matrix & bit) != 0
+
+    error = has(CELL_ERROR)
+    conditions = [
+        has(CELL_UOM_CONFLICT | CELL_UOM_RELATED),
+        has(CELL_EMPTY_REQUIRED),
+        has(CELL_FLAG),
+        error & has(CELL_EMPTY),
+        error & has(CELL_MANDATORY),
+        error,
+    ]
+    choices = [
+        CATEGORY_UOM_CONFLICT,
+        CATEGORY_EMPTY_MANDATORY,
+        CATEGORY_ERROR_OPTIONAL,
+        CATEGORY_CORRECT,
+        CATEGORY_ERROR,
+        CATEGORY_ERROR_OPTIONAL,
+    ]
+    return np.select(conditions, choices, default=CATEGORY_CORRECT).astype(np.uint8)
+
+
+def column_color_counts(matrix: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Aantallen per kolom voor de dashboard chart: leeg > UOM conflict > fout > correct.
+    Flags tellen als correct en gerelateerde 801/805 velden niet als conflict.
+    """
+    empty = (matrix & CELL_EMPTY) != 0
+    conflict = ~empty & ((matrix & CELL_UOM_CONFLICT) != 0)
+    error = ~empty & ~conflict & ((matrix & CELL_ERROR) != 0)
+    n_rows = matrix.shape[0]
+    counts = {
+        "empty": empty.sum(axis=0),
+        "conflict": conflict.sum(axis=0),
+        "error": error.sum(axis=0),
+    }
+    counts["correct"] = n_rows - counts["empty"] - counts["conflict"] - counts["error"]
+    return counts
+
+
+def display_values(df: pd.DataFrame, col_positions: List[int], start: int, stop: int) -> np.ndarray:
+    """
+    Celwaarden zoals sheet 7 ze toont ("" voor NaN, anders str(value).strip()) voor de
+    rijen start:stop, kolom voor kolom over unieke waarden berekend.
+    """
+    values = np.empty((stop - start, len(col_positions)), dtype=object)
+    for out_idx, col_idx in enumerate(col_positions):
+        series = df.iloc[start:stop, col_idx]
+        null = series.isna().to_numpy()
+        codes, uniques = pd.factorize(series.map(str).to_numpy(dtype=object))
+        stripped = np.asarray([u.strip() for u in uniques] + [""], dtype=object)
+        values[:, out_idx] = stripped[np.where(null, len(uniques), codes)]
+    return values
+
+
+def iter_format_runs(format_ids: np.ndarray) -> Iterator[Tuple[int, List[Tuple[int, int, int]]]]:
+    """
+    Splitst elke rij van een (rijen x kolommen) format-id array in aaneengesloten runs.
+
+    Yields:
+        (rij offset, [(kolom start, kolom stop, format id), ...])
+    """
+    n_rows, n_cols = format_ids.shape
+    if n_cols == 0:
+        return
+    changes = format_ids[:, 1:] != format_ids[:, :-1]
+    for offset in range(n_rows):
+        bounds = [0, *(np.flatnonzero(changes[offset]) + 1).tolist(), n_cols]
+        row_ids = format_ids[offset]
+        yield offset, [(bounds[i], bounds[i + 1], int(row_ids[bounds[i]])) for i in range(len(bounds) - 1)]
@@ -0,0 +1,315 @@
+"""
+Report Stats Module
+
+Statistieken voor het rapport in één pass. genereer_rapport telde gevulde velden per
+kolom opnieuw met een astype(str).str.strip().str.lower().isin keten (de Omschrijving
+Verpakkingseenheid mask zelfs per UOM veld), filterde de fout DataFrames per veld en
+calculate_uom_penalties plakte df_errors_mand en df_errors_non_mand weer aan elkaar.
+
+compute_report_stats() berekent:
+- gevulde aantallen per kolom over de unieke waarden van die kolom
+- alle per-veld, per-code en per-categorie (verplicht/optioneel) foutaantallen uit één
+  group-by over (GHX Kolom, code) van de meldingen
+- totalen, percentages, de score (calculate_new_intuitive_score) en het bestandsnaam
+  achtervoegsel (_TG_M86_J75_65(C))
+
+Het resultaat is een onveranderlijk ReportStats object; dashboard, percentage sheets,
+score en bestandsnaam lezen allemaal uit hetzelfde object.
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Velden die alleen als gevuld tellen als 'Omschrijving Verpakkingseenheid' gevuld is
+UOM_CONDITIONAL_FIELDS = [
+    'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
+    'UOM Code Basiseenheid', 'Inhoud Basiseenheid',
+    'UOM Code Inhoud Basiseenheid'
+]
+
+
+def filled_mask(series: pd.Series, invalid_values: List[str]) -> np.ndarray:
+    """
+    notna() & str(value).strip().lower() niet in ["nan", ""] + invalid_values, per rij.
+    De strip/lower/isin gebeurt per unieke waarde.
+    """
+    null = series.isna().to_numpy()
+    codes, uniques = pd.factorize(series.astype(str).to_numpy(dtype=object))
+    empty_values = set(["nan", ""] + list(invalid_values))
+    filled_u = np.fromiter((u.strip().lower() not in empty_values for u in uniques), dtype=bool, count=len(uniques))
+    return ~null & filled_u[codes]
+
+
+def errors_without_red_flags(df_errors_all: pd.DataFrame) -> pd.DataFrame:
+    """Meldingen zonder de RED FLAG regels (die tellen niet mee in de statistieken)."""
+    if df_errors_all.empty:
+        return pd.DataFrame()
+    return df_errors_all[df_errors_all["GHX Kolom"] != "RED FLAG"].copy()
+
+
+def _is_rejection_code(code: Any) -> bool:
+    """Codes 700-749: regels die door Gatekeeper afgewezen zouden worden."""
+    text = str(code).strip()
+    return text.isdigit() and 700 <= int(float(text)) <= 749
+
+
+def _counts(series: pd.Series) -> Mapping[Any, int]:
+    return MappingProxyType({key: int(value) for key, value in series.items()})
+
+
+@dataclass(frozen=True)
+class ReportStats:
+    """Onveranderlijke statistieken van één rapport (zie compute_report_stats)."""
+
+    template_type: str
+    non_mandatory_fields: Tuple[str, ...]
+    present_mandatory_columns: Tuple[str, ...]
+    missing_mandatory_columns: Tuple[str, ...]
+    present_non_mandatory_columns: Tuple[str, ...]
+
+    # Per veld
+    filled_counts: Mapping[str, int]  # Aanwezige verplichte kolommen (UOM conditie toegepast)
+    filled_counts_non_mand: Mapping[str, int]
+    corrected_errors: Mapping[str, int]  # Verplicht: min(fouten, gevuld) met UOM correctie
+    errors_per_field_non_mand: Mapping[str, int]
+    error_rows_per_field: Mapping[str, int]  # Unieke rijen met een fout, alle velden
+
+    # Per code
+    code_counts: Mapping[Any, int]  # Alle meldingen behalve RED FLAG, gesorteerd op code
+    mandatory_code_counts: Mapping[Any, int]
+    non_mandatory_code_counts: Mapping[Any, int]
+
+    # Totalen
+    mandatory_error_count: int  # len(df_errors_mand)
+    non_mandatory_error_count: int  # len(df_errors_non_mand)
+    rejection_rows: int  # Unieke rijen met een afkeuring (700-749)
+    total_filled_in_present: int
+    empty_in_present: int
+    total_errors_in_present: int
+    totaal_juist: int
+    total_filled_non_mand: int
+    total_errors_non_mand: int
+    total_possible_mandatory_fields: int
+
+    # Percentages en score
+    volledigheids_percentage: float
+    juistheid_percentage: float
+    percentage_correct: int
+    score: Mapping[str, Any]
+
+    @property
+    def M_found_columns(self) -> int:
+        return len(self.present_mandatory_columns)
+
+    @property
+    def M_missing(self) -> int:
+        return len(self.missing_mandatory_columns)
+
+    @property
+    def M_found(self) -> int:
+        """Aantal CORRECT ingevulde verplichte velden (niet het aantal aanwezige kolommen)."""
+        return self.totaal_juist
+
+    @property
+    def uom_penalty_code_counts(self) -> Dict[Any, int]:
+        """Foutaantallen per code over verplichte en optionele velden (basis voor UOM penalty's)."""
+        combined = dict(self.mandatory_code_counts)
+        for code, count in self.non_mandatory_code_counts.items():
+            combined[code] = combined.get(code, 0) + count
+        return combined
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-vriendelijke weergave (foutcodes als string sleutels)."""
+        def plain(value: Any) -> Any:
+            if isinstance(value, Mapping):
+                return {str(key): plain(item) for key, item in value.items()}
+            if isinstance(value, tuple):
+                return list(value)
+            return value.item() if isinstance(value, np.generic) else value
+
+        data = {name: plain(getattr(self, name)) for name in self.__dataclass_fields__}
+        data['M_found'] = self.M_found
+        data['score_suffix'] = self.score_suffix
+        return data
+
+    @property
+    def score_suffix(self) -> str:
+        """Bestandsnaam achtervoegsel, bv. _TG_M86_J75_65(C)."""
+        score = self.score
+        return (f"_{self.template_type}_M{score['M_percentage']}_J{score['J_percentage']}_"
+                f"{score['final_score']}({score['grade']})")
+
+
+def _error_aggregates(df_errors: pd.DataFrame, mandatory_fields: List[str],
+                      non_mandatory_fields: List[str]) -> Dict[str, Any]:
+    """Alle foutaantallen uit één group-by over (GHX Kolom, code)."""
+    aggregates = {
+        'code_counts': {}, 'mandatory_code_counts': {}, 'non_mandatory_code_counts': {},
+        'error_rows_per_field': {}, 'mandatory_error_count': 0, 'non_mandatory_error_count': 0,
+        'rejection_rows': 0,
+    }
+    if df_errors.empty or not {"GHX Kolom", "code", "Rij"}.issubset(df_errors.columns):
+        return aggregates
+
+    sizes = df_errors.groupby(["GHX Kolom", "code"], sort=False, dropna=False).size()
+    fields = sizes.index.get_level_values(0)
+    is_mandatory = fields.isin(mandatory_fields)
+    is_non_mandatory = fields.isin(non_mandatory_fields)
+
+    aggregates['code_counts'] = sizes.groupby(level=1).sum()
+    aggregates['mandatory_code_counts'] = sizes[is_mandatory].groupby(level=1).sum()
+    aggregates['non_mandatory_code_counts'] = sizes[is_non_mandatory].groupby(level=1).sum()
+    aggregates['mandatory_error_count'] = int(sizes[is_mandatory].sum())
+    aggregates['non_mandatory_error_count'] = int(sizes[is_non_mandatory].sum())
+    aggregates['error_rows_per_field'] = df_errors.groupby("GHX Kolom")["Rij"].nunique()
+
+    rejection_codes = [code for code in aggregates['code_counts'].index if _is_rejection_code(code)]
+    if rejection_codes:
+        aggregates['rejection_rows'] = int(df_errors.loc[df_errors["code"].isin(rejection_codes), "Rij"].nunique())
+    return aggregates
+
+
+def compute_report_stats(
+    df: pd.DataFrame,
+    df_errors: pd.DataFrame,
+    errors_per_field: Dict[str, int],
+    ghx_mandatory_fields: List[str],
+    non_mandatory_fields: List[str],
+    present_mandatory_columns: List[str],
+    missing_mandatory_columns: List[str],
+    invalid_values: List[str],
+    rows_for_calculation: int,
+    total_possible_mandatory_fields: int,
+    template_type: str,
+    score_function: Callable[..., Dict[str, Any]],
+) -> ReportStats:
+    """
+    Berekent alle rapport statistieken in één pass.
+
+    Args:
+        df: Gevalideerde DataFrame
+        df_errors: Meldingen zonder RED FLAG (results_dataframe)
+        errors_per_field: Unieke foutrijen per veld uit de validatie
+        ghx_mandatory_fields: Verplichte GHX velden
+        non_mandatory_fields: Optionele velden uit de config
+        present_mandatory_columns / missing_mandatory_columns: Verplichte kolommen (TG: template lijst)
+        invalid_values: Ongeldige waarden (lowercase) die niet als gevuld tellen
+        rows_for_calculation: Rijen voor lege velden (Quick Mode: verwerkte rijen)
+        total_possible_mandatory_fields: Verplichte velden x verwerkte rijen
+        template_type: TG, DT, AT, ...
+        score_function: calculate_new_intuitive_score
+
+    Returns:
+        ReportStats
+    """
+    # --- Gevulde velden per kolom ---
+    masks: Dict[str, np.ndarray] = {}
+
+    def mask(field: str) -> np.ndarray:
+        if field not in masks:
+            masks[field] = filled_mask(df[field], invalid_values)
+        return masks[field]
+
+    omschrijving_column = 'Omschrijving Verpakkingseenheid'
+    filled_counts = {}
+    for f in present_mandatory_columns:
+        if f in UOM_CONDITIONAL_FIELDS and omschrijving_column in df.columns:
+            # PER RIJ: UOM veld telt alleen als die rij ook Omschrijving Verpakkingseenheid heeft
+            filled_counts[f] = int((mask(omschrijving_column) & mask(f)).sum())
+        else:
+            filled_counts[f] = int(mask(f).sum())
+
+    present_non_mandatory_columns = [f for f in non_mandatory_fields if f in df.columns]
+    filled_counts_non_mand = {f: int(mask(f).sum()) for f in present_non_mandatory_columns}
+
+    # --- Fouten per veld en per code ---
+    aggregates = _error_aggregates(df_errors, ghx_mandatory_fields, non_mandatory_fields)
+
+    corrected_errors = {}
+    for f in present_mandatory_columns:
+        field_filled = filled_counts.get(f, 0)
+        field_errors = errors_per_field.get(f, 0)
+        if f in UOM_CONDITIONAL_FIELDS:
+            # Voor UOM velden: alleen errors tellen waar Omschrijving Verpakkingseenheid gevuld is
+            omschrijving_filled = filled_counts.get(omschrijving_column, 0)
+            if omschrijving_filled < field_filled:
+                field_errors = min(field_errors, omschrijving_filled)
+        corrected_errors[f] = min(field_errors, field_filled)
+
+    errors_per_field_non_mand = {}
+    if not df_errors.empty:
+        error_rows = aggregates['error_rows_per_field']
+        errors_per_field_non_mand = {
+            f: min(int(error_rows.get(f, 0)), filled_counts_non_mand.get(f, 0))
+            for f in present_non_mandatory_columns
+        }
+
+    # --- Totalen en percentages ---
+    total_filled_in_present = sum(filled_counts.values())
+    empty_in_present = (len(present_mandatory_columns) * rows_for_calculation) - total_filled_in_present
+    total_errors_in_present = sum(corrected_errors.values())
+    totaal_juist = total_filled_in_present - total_errors_in_present
+
+    volledigheids_percentage = 0
+    juistheid_percentage = 0
+    percentage_correct = 0
+    if total_filled_in_present > 0:
+        volledigheids_percentage = (
+            (total_filled_in_present / total_possible_mandatory_fields) * 100
+            if total_possible_mandatory_fields > 0
+            else 0
+        )
+        juistheid_percentage = (totaal_juist / total_filled_in_present) * 100
+        percentage_correct = round((volledigheids_percentage * juistheid_percentage) / 100)
+
+    mandatory_code_counts = _counts(pd.Series(aggregates['mandatory_code_counts'], dtype=object))
+    non_mandatory_code_counts = _counts(pd.Series(aggregates['non_mandatory_code_counts'], dtype=object))
+    penalty_code_counts = dict(mandatory_code_counts)
+    for code, count in non_mandatory_code_counts.items():
+        penalty_code_counts[code] = penalty_code_counts.get(code, 0) + count
+
+    score = score_function(
+        M_found=totaal_juist,
+        total_mandatory=len(ghx_mandatory_fields),
+        df_errors_mand=None,
+        df_errors_non_mand=None,
+        total_rows=len(df) if len(df) > 0 else 1,  # Verwerkte rijen voor de penalty berekening
+        template_type=template_type,
+        volledigheids_percentage=volledigheids_percentage,
+        juistheid_percentage=juistheid_percentage,
+        code_counts=penalty_code_counts,
+    )
+
+    return ReportStats(
+        template_type=template_type,
+        non_mandatory_fields=tuple(non_mandatory_fields),
+        present_mandatory_columns=tuple(present_mandatory_columns),
+        missing_mandatory_columns=tuple(missing_mandatory_columns),
+        present_non_mandatory_columns=tuple(present_non_mandatory_columns),
+        filled_counts=MappingProxyType(filled_counts),
+        filled_counts_non_mand=MappingProxyType(filled_counts_non_mand),
+        corrected_errors=MappingProxyType(corrected_errors),
+        errors_per_field_non_mand=MappingProxyType(errors_per_field_non_mand),
+        error_rows_per_field=_counts(pd.Series(aggregates['error_rows_per_field'], dtype=object)),
+        code_counts=_counts(pd.Series(aggregates['code_counts'], dtype=object)),
+        mandatory_code_counts=mandatory_code_counts,
+        non_mandatory_code_counts=non_mandatory_code_counts,
+        mandatory_error_count=aggregates['mandatory_error_count'],
+        non_mandatory_error_count=aggregates['non_mandatory_error_count'],
+        rejection_rows=aggregates['rejection_rows'],
+        total_filled_in_present=total_filled_in_present,
+        empty_in_present=empty_in_present,
+        total_errors_in_present=total_errors_in_present,
+        totaal_juist=totaal_juist,
+        total_filled_non_mand=sum(filled_counts_non_mand.values()),
+        total_errors_non_mand=sum(errors_per_field_non_mand.values()),
+        total_possible_mandatory_fields=total_possible_mandatory_fields,
+        volledigheids_percentage=volledigheids_percentage,
+        juistheid_percentage=juistheid_percentage,
+        percentage_correct=percentage_correct,
+        score=MappingProxyType(dict(score)),
+    )
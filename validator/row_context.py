@@ -0,0 +1,216 @@
+"""
+Row Context Module
+
+Evalueert de row_context_rules uit field_validation_v20.json (is_medical_device,
+is_implantable, is_chemical_substance, ...) naar één boolean kolom per context. De
+is_empty_when_context regels zijn daarmee een intersectie van twee masks: veld leeg én
+context waar voor de rij.
+
+Elke trigger wordt per unieke waarde van het veld één keer geëvalueerd en daarna op alle
+rijen geprojecteerd; contexten die naar een andere context verwijzen (if_context) worden
+in afhankelijkheidsvolgorde berekend.
+
+Contexten per bestand komen uit de template context (Template Generator configuratie):
+- is_gs1_submission: gs1_mode anders dan 'none'/'ghx_only'
+- is_umcu_or_lumc_submission: instelling umcu of lumc gekozen
+- is_staffel_file: staffel vlag uit de template code
+- template_category: producttypes van de template code (medical, lab, facility, other).
+  has_chemicals telt niet mee: die vlag zegt alleen dat de chemische kolommen in de
+  template staan, niet dat elke regel een chemische stof is
+Triggers met "filled_anywhere_in_file" worden niet uit de data afgeleid: bij streaming en
+parallelle validatie ziet een chunk maar een deel van het bestand.
+"""
+
+import logging
+from graphlib import CycleError, TopologicalSorter
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Sleutel waaronder validate_rows_iterrows de context waarden van een rij in row_data zet
+ROW_CONTEXT_KEY = "__row_context__"
+
+# Contextnamen uit de field rules die geen eigen row_context_rule hebben: AND van de delen
+CONTEXT_ALIASES = {
+    "is_chemical": ("is_chemical_substance",),
+    "is_medical_device_high_risk": ("is_medical_device", "risk_class_is_high"),
+}
+
+# Producttypes uit de template code -> template_category waarden in de row context rules
+TEMPLATE_CATEGORIES = {
+    "medisch": "medical",
+    "lab": "lab",
+    "facilitair": "facility",
+    "overige": "other",
+}
+
+NON_GS1_MODES = frozenset({"none", "ghx_only", ""})
+UMCU_LUMC_CODES = frozenset({"umcu", "lumc"})
+NAN_STRINGS = frozenset({"nan", "none", "null"})
+
+
+def uses_row_context(validation_config: dict, field_names: Iterable[str]) -> bool:
+    """True als één van de velden een is_empty_when_context regel heeft."""
+    field_validations = validation_config.get("field_validations", {})
+    return any(
+        rule.get("condition") == "is_empty_when_context"
+        for field in field_names
+        for rule in field_validations.get(field, {}).get("rules", [])
+    )
+
+
+def file_contexts(template_context: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Contexten die voor het hele bestand gelden, afgeleid uit de template context.
+
+    Returns:
+        Dict met is_gs1_submission, is_umcu_or_lumc_submission, is_staffel_file (bool) en
+        template_category (frozenset met categorieën)
+    """
+    configuration = (template_context or {}).get("configuration") or {}
+    categories = {TEMPLATE_CATEGORIES.get(t, t) for t in configuration.get("product_types") or []}
+    institution_codes = {str(code).lower() for code in configuration.get("institution_codes") or []}
+    return {
+        "is_gs1_submission": str(configuration.get("gs1_mode") or "none") not in NON_GS1_MODES,
+        "is_umcu_or_lumc_submission": bool(institution_codes & UMCU_LUMC_CODES),
+        "is_staffel_file": bool(configuration.get("is_staffel_file", False)),
+        "template_category": frozenset(categories),
+    }
+
+
+def _reference_list(reference_lists: Optional[dict], list_ref: str) -> Optional[list]:
+    """Zoekt een lijst in reference_lists.json inhoud (met of zonder 'reference_lists' niveau)."""
+    if not reference_lists:
+        return None
+    return reference_lists.get("reference_lists", reference_lists).get(list_ref)
+
+
+def _equals_number(value_str: str, target: float) -> bool:
+    try:
+        return float(value_str.replace(",", ".")) == target
+    except ValueError:
+        return False
+
+
+def _trigger_predicate(trigger: dict, reference_lists: Optional[dict],
+                       invalid_values: frozenset) -> Optional[Callable[[str], bool]]:
+    """
+    Zet een if_field trigger om naar een functie op str(value).strip().
+
+    Returns:
+        Predicate, of None als de trigger onbekend of onbruikbaar is (triggert nooit)
+    """
+    if trigger.get("is") == "filled":
+        return lambda v: v != "" and v.lower() not in invalid_values and v.lower() not in NAN_STRINGS
+    if "equals" in trigger:
+        expected = trigger["equals"]
+        if isinstance(expected, (int, float)) and not isinstance(expected, bool):
+            return lambda v: _equals_number(v, float(expected))
+        expected = str(expected).strip().lower()
+        return lambda v: v.lower() == expected
+    if "starts_with" in trigger:
+        prefix = str(trigger["starts_with"])
+        return lambda v: v.startswith(prefix)
+    if "value_in_list" in trigger:
+        allowed = frozenset(str(x).strip().upper() for x in trigger["value_in_list"])
+        return lambda v: v.upper() in allowed
+    if "value_in_list_ref" in trigger:
+        values = _reference_list(reference_lists, trigger["value_in_list_ref"])
+        if values is None:
+            logging.warning(f"Row context: referentielijst '{trigger['value_in_list_ref']}' niet gevonden")
+            return None
+        allowed = frozenset(str(x).strip().upper() for x in values)
+        return lambda v: v.upper() in allowed
+    logging.warning(f"Row context: onbekende trigger {trigger}")
+    return None
+
+
+def _field_mask(df: pd.DataFrame, field: str, predicate: Callable[[str], bool],
+                cache: Dict[str, tuple]) -> np.ndarray:
+    """Past predicate toe per unieke str(value).strip() van een kolom en projecteert terug."""
+    if field not in cache:
+        codes, uniques = pd.factorize(df[field].map(str).to_numpy(dtype=object))
+        cache[field] = (codes, [u.strip() for u in uniques])
+    codes, stripped = cache[field]
+    per_unique = np.fromiter((predicate(v) for v in stripped), dtype=bool, count=len(stripped))
+    return per_unique[codes]
+
+
+def _context_order(context_rules: Dict[str, dict]) -> list:
+    """Volgorde waarin de contexten berekend worden (afhankelijkheden via if_context eerst)."""
+    graph = {
+        name: {
+            trigger["if_context"] for trigger in rule.get("triggers", [])
+            if trigger.get("if_context") in context_rules
+        }
+        for name, rule in context_rules.items()
+    }
+    try:
+        return list(TopologicalSorter(graph).static_order())
+    except CycleError as e:
+        logging.error(f"Row context regels verwijzen cyclisch naar elkaar ({e.args[1]}); cyclus wordt overgeslagen")
+        return [name for name, dependencies in graph.items() if not dependencies]
+
+
+def evaluate_row_contexts(df: pd.DataFrame, validation_config: dict,
+                          template_context: Optional[Dict[str, Any]] = None,
+                          reference_lists: Optional[dict] = None,
+                          invalid_values: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+    """
+    Berekent elke row context als boolean kolom (één waarde per rij van df).
+
+    Args:
+        df: DataFrame (of chunk) met GHX kolomnamen
+        validation_config: field_validation_v20.json inhoud
+        template_context: Template context (voor de contexten per bestand)
+        reference_lists: reference_lists.json inhoud (voor value_in_list_ref)
+        invalid_values: Lowercase null_values; tellen niet als gevuld
+
+    Returns:
+        Dict contextnaam -> bool array, inclusief CONTEXT_ALIASES en de contexten per bestand
+    """
+    n_rows = len(df)
+    invalid_values = frozenset(invalid_values)
+    context_rules = validation_config.get("row_context_rules", {}) or {}
+    per_file = file_contexts(template_context)
+    contexts: Dict[str, np.ndarray] = {
+        name: np.full(n_rows, value, dtype=bool)
+        for name, value in per_file.items() if isinstance(value, bool)
+    }
+    cache: Dict[str, tuple] = {}
+
+    for name in _context_order(context_rules):
+        rule = context_rules[name]
+        combine_all = str(rule.get("trigger_logic", "OR")).upper() == "AND"
+        mask = np.full(n_rows, combine_all, dtype=bool)
+        for trigger in rule.get("triggers", []):
+            if "if_context" in trigger:
+                other = trigger["if_context"]
+                if other in contexts:
+                    hit = contexts[other] if trigger.get("equals", True) is True else ~contexts[other]
+                elif other in per_file:
+                    hit = np.full(n_rows, trigger.get("equals") in per_file[other], dtype=bool)
+                else:
+                    hit = np.zeros(n_rows, dtype=bool)
+            else:
+                field = trigger.get("if_field")
+                predicate = _trigger_predicate(trigger, reference_lists, invalid_values)
+                if field in df.columns and predicate is not None:
+                    hit = _field_mask(df, field, predicate, cache)
+                else:
+                    hit = np.zeros(n_rows, dtype=bool)
+            mask = mask & hit if combine_all else mask | hit
+        contexts[name] = mask
+
+    for alias, parts in CONTEXT_ALIASES.items():
+        if alias not in contexts and all(part in contexts for part in parts):
+            mask = np.ones(n_rows, dtype=bool)
+            for part in parts:
+                mask &= contexts[part]
+            contexts[alias] = mask
+
+    if n_rows:
+        counts = {name: int(mask.sum()) for name, mask in contexts.items() if name in context_rules}
+        logging.info(f"Row contexts berekend voor {n_rows} rijen: {counts}")
+    return contexts
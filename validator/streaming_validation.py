@@ -0,0 +1,438 @@
+"""
+Streaming Validation Module
+
+Valideert een prijslijst in chunks van vaste grootte in plaats van het hele werkblad
+in één keer met pd.read_excel in te lezen. Het werkblad wordt met openpyxl read_only
+rij voor rij gelezen; elke chunk wordt net als pd.read_excel omgezet (TextParser met
+dezelfde dtype spec), daarna header-gemapt, opgeschoond en gevalideerd. De ruwe rijen
+worden tussen de lees- en de parse pass in een tijdelijk bestand bewaard, niet in het
+geheugen.
+
+Header mapping gebeurt één keer op de header rij. De validatie-state (filled_counts,
+field_validation_results, red flags) wordt over alle chunks gedeeld en pas aan het
+eind afgerond met finalize_validation_state. Zo blijft het geheugen voor parsen en
+valideren begrensd tot één chunk; alleen het opgeschoonde DataFrame voor het rapport
+wordt bewaard (zonder df_original kopie).
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+
+from .price_tool import (
+    map_headers,
+    normalize_template_header,
+    prepare_validation_state,
+    validate_rows_iterrows,
+    finalize_validation_state,
+    validate_uom_relationships,
+)
+from .vectorized_engine import uom_already_validated
+from .validation_results import ValidationResults
+from .workbook_probe import WorkbookProbe
+from .parse_cache import CachedWorkbookProbe
+
+DEFAULT_CHUNK_ROWS = int(os.environ.get("GHX_STREAMING_CHUNK_ROWS", "20000"))
+
+# Trefwoorden uit clean_dataframe voor de uitleg/instructie rij en de voorbeeld rij
+EXPLANATION_KEYWORDS = [
+    "karakters", "characters", "the unique", "explanation", "unique article number",
+    "instructie", "instruction", "you, as the", "vul het unieke",
+    "assign to", "supplier", "artikelnummer dat u als leverancier"
+]
+VOORBEELD_WAARDEN = ["ghx-12345", "voorbeeld", "demo", "example", "test"]
+
+
+# -----------------------------
+# CHUNKED EXCEL READER
+# -----------------------------
+
+def _convert_cell(cell) -> Any:
+    """Zet een openpyxl cel om zoals pandas' openpyxl reader dat doet."""
+    value = cell.value
+    if value is None:
+        return ""
+    data_type = getattr(cell, 'data_type', None)
+    if data_type == 'e':
+        return np.nan
+    if data_type == 'n':
+        as_int = int(value)
+        if as_int == value:
+            return as_int
+        return float(value)
+    return value
+
+
+def _parse_chunk(header: list, rows: List[list], dtype: Optional[dict]) -> pd.DataFrame:
+    """Parseert header + rijen met dezelfde TextParser instellingen als pd.read_excel."""
+    parser = TextParser([header] + rows, header=0, dtype=dtype, skip_blank_lines=False)
+    try:
+        return parser.read()
+    finally:
+        parser.close()
+
+
+def _dtype_key(dtype: Optional[dict]) -> Optional[tuple]:
+    return tuple(sorted((str(k), str(v)) for k, v in dtype.items())) if dtype else None
+
+
+def _resolve_dtypes(columns: list, chunk_dtypes: List[set], dtype: Optional[dict]) -> Optional[dict]:
+    """
+    Bepaalt per kolom de dtype die pd.read_excel over het hele werkblad zou afleiden.
+
+    Een kolom die in alle chunks dezelfde dtype heeft houdt die dtype. Alleen int64 en
+    float64 (bv. een lege cel in een latere chunk) wordt float64; elke andere combinatie
+    wordt object, waarbij de ruwe celwaarden behouden blijven zoals bij de volledige read.
+    """
+    resolved = dict(dtype) if dtype else {}
+    for column, kinds in zip(columns, chunk_dtypes):
+        if column in resolved or len(kinds) <= 1:
+            continue
+        resolved[column] = 'float64' if kinds <= {'int64', 'float64'} else object
+    return resolved or None
+
+
+def iter_sheet_chunks(probe: WorkbookProbe, chunk_size: int = DEFAULT_CHUNK_ROWS,
+                      dtype: Optional[dict] = None, max_rows: Optional[int] = None,
+                      cache_writer=None) -> Iterator[pd.DataFrame]:
+    """
+    Leest het eerste werkblad in chunks van maximaal chunk_size datarijen.
+
+    Kolomnamen, waarden en dtypes komen overeen met pd.read_excel(path, dtype=dtype, nrows=max_rows).
+    Omdat pandas dtypes over de hele kolom afleidt (één lege cel maakt van een int kolom
+    een float kolom) gebeurt dit in twee passes: de eerste pass leest het werkblad, schrijft
+    de ruwe rijen per chunk weg naar een tijdelijk bestand en houdt per kolom de chunk
+    dtypes bij; de tweede pass parseert de chunks opnieuw met de afgeleide dtypes.
+    Cellen rechts van de laatste header kolom worden genegeerd.
+
+    Args:
+        probe: Geopende WorkbookProbe
+        chunk_size: Aantal datarijen per chunk
+        dtype: dtype spec zoals bij pd.read_excel
+        max_rows: Maximaal aantal datarijen (Quick Mode), None voor alles
+        cache_writer: Optionele ParseCacheWriter; elke chunk wordt als part opgeslagen
+            en na de laatste chunk wordt de entry vastgelegd
+
+    Yields:
+        DataFrame per chunk met een index die per chunk op 0 begint
+    """
+    if isinstance(probe, CachedWorkbookProbe) and _dtype_key(probe.dtype) == _dtype_key(dtype):
+        # Parse cache: de opgeslagen delen zijn al geparsed met dezelfde dtype spec
+        remaining = max_rows
+        for part in probe.iter_parts():
+            if remaining is not None:
+                part = part.iloc[:remaining]
+                remaining -= len(part)
+            for start in range(0, len(part), chunk_size):
+                yield part.iloc[start:start + chunk_size].reset_index(drop=True)
+            if remaining is not None and remaining <= 0:
+                break
+        return
+
+    sheet = probe.first_worksheet()
+    if sheet is None:
+        # Geen openpyxl werkmap (bv. .xls): val terug op één read, in chunks opgeknipt
+        logging.warning("Streaming niet beschikbaar voor dit bestandsformaat, gebruik volledige read")
+        if cache_writer is not None:
+            cache_writer.abort()
+        df = probe.read(dtype=dtype, nrows=max_rows)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size].reset_index(drop=True)
+        return
+
+    # Lees alle rijen, ook als de dimensie in het bestand te klein is opgegeven
+    sheet.reset_dimensions()
+
+    header = None
+    width = 0
+    rows: List[list] = []
+    pending_empty = 0  # lege rijen die alleen meetellen als er later nog data komt
+    data_rows = 0
+    chunk_count = 0
+    columns: list = []
+    chunk_dtypes: List[set] = []
+    truncated_warning = False
+
+    def spill(spill_file, chunk_rows):
+        chunk = _parse_chunk(header, chunk_rows, dtype)
+        for kinds, column_dtype in zip(chunk_dtypes, chunk.dtypes):
+            kinds.add(str(column_dtype))
+        pickle.dump(chunk_rows, spill_file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    with tempfile.TemporaryFile(prefix="ghx_stream_") as spill_file:
+        # Pass 1: werkblad lezen, ruwe rijen wegschrijven en dtypes per chunk verzamelen
+        for row in sheet.iter_rows():
+            converted = [_convert_cell(cell) for cell in row]
+            while converted and converted[-1] == "":
+                converted.pop()
+
+            if header is None:
+                header = converted
+                width = len(header)
+                columns = list(_parse_chunk(header, [], dtype).columns)
+                chunk_dtypes = [set() for _ in columns]
+                continue
+
+            if max_rows is not None and data_rows >= max_rows:
+                break
+            data_rows += 1
+
+            if not converted:
+                pending_empty += 1
+                continue
+            if pending_empty:
+                rows.extend([[""] * width for _ in range(pending_empty)])
+                pending_empty = 0
+
+            if len(converted) > width:
+                if not truncated_warning:
+                    logging.warning(f"Streaming: cellen buiten de {width} header kolommen worden genegeerd")
+                    truncated_warning = True
+                converted = converted[:width]
+            rows.append(converted + [""] * (width - len(converted)))
+
+            if len(rows) >= chunk_size:
+                spill(spill_file, rows)
+                chunk_count += 1
+                rows = []
+
+        if rows:
+            spill(spill_file, rows)
+            chunk_count += 1
+            rows = []
+
+        # Pass 2: chunks parsen met de dtypes van de hele kolom
+        resolved_dtype = _resolve_dtypes(columns, chunk_dtypes, dtype)
+        logging.info(f"Streaming: {data_rows} rijen in {chunk_count} chunks gelezen")
+        spill_file.seek(0)
+        for _ in range(chunk_count):
+            chunk = _parse_chunk(header, pickle.load(spill_file), resolved_dtype)
+            if cache_writer is not None:
+                try:
+                    cache_writer.add_part(chunk)
+                except Exception as e:
+                    logging.warning(f"Parse cache: chunk niet opgeslagen, cache voor dit bestand overgeslagen: {e}")
+                    cache_writer.abort()
+                    cache_writer = None
+            yield chunk
+        if cache_writer is not None:
+            cache_writer.commit()
+
+
+# -----------------------------
+# CHUNKED OPSCHONING
+# -----------------------------
+
+def iter_clean_chunks(chunks: Iterator[pd.DataFrame], stats: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    """
+    Chunk-gewijze tegenhanger van clean_dataframe.
+
+    Verwijdert lege rijen, rijen vóór het eerste en na het laatste Artikelnummer en de
+    uitleg/voorbeeld rij aan het begin. Rijen zonder Artikelnummer aan het eind van een
+    chunk worden vastgehouden tot duidelijk is of er nog een Artikelnummer volgt.
+    Geeft chunks terug met een doorlopende 0-based index, gelijk aan reset_index.
+
+    Args:
+        chunks: Header-gemapte chunks
+        stats: Dict dat gevuld wordt met 'removed_rows_count'
+    """
+    stats['removed_rows_count'] = 0
+    next_index = 0
+    started = False
+    pending = None
+    first_row_checks = ['explanation', 'demo']
+    algemeen_cols = None
+
+    for chunk in chunks:
+        if algemeen_cols is None:
+            algemeen_cols = [col for col in chunk.columns if str(col).strip().lower() == 'algemeen']
+            if algemeen_cols:
+                logging.warning(f"Kolommen {algemeen_cols} gevonden die lijken op 'algemeen' en worden verwijderd.")
+
+        if 'Artikelnummer' not in chunk.columns:
+            # Net als clean_dataframe: zonder Artikelnummer wordt niets opgeschoond
+            chunk.index = pd.RangeIndex(next_index, next_index + len(chunk))
+            next_index += len(chunk)
+            yield chunk
+            continue
+
+        chunk = chunk.dropna(how='all')
+        if not started:
+            first_valid = chunk['Artikelnummer'].first_valid_index()
+            if first_valid is None:
+                continue
+            chunk = chunk.loc[first_valid:]
+            started = True
+
+        if pending is not None:
+            chunk = pd.concat([pending, chunk])
+            pending = None
+
+        last_valid = chunk['Artikelnummer'].last_valid_index()
+        if last_valid is None:
+            pending = chunk
+            continue
+        last_pos = chunk.index.get_loc(last_valid)
+        if last_pos + 1 < len(chunk):
+            pending = chunk.iloc[last_pos + 1:]
+        chunk = chunk.iloc[:last_pos + 1]
+
+        # Uitleg/instructie rij en voorbeeld rij worden alleen aan het begin gecontroleerd
+        while first_row_checks and len(chunk):
+            check = first_row_checks.pop(0)
+            first_value = str(chunk['Artikelnummer'].iloc[0]).strip()
+            if check == 'explanation':
+                remove = len(first_value) > 70 or any(keyword in first_value.lower() for keyword in EXPLANATION_KEYWORDS)
+            else:
+                remove = first_value.lower() in VOORBEELD_WAARDEN
+            if remove:
+                logging.info(f"Mogelijke {check} rij verwijderd op basis van inhoud: '{first_value[:100]}'")
+                chunk = chunk.iloc[1:]
+                stats['removed_rows_count'] += 1
+
+        if algemeen_cols:
+            chunk = chunk.drop(columns=algemeen_cols)
+        chunk = chunk.reset_index(drop=True)
+        chunk.index = pd.RangeIndex(next_index, next_index + len(chunk))
+        next_index += len(chunk)
+        if len(chunk):
+            yield chunk
+
+    logging.info(f"Streaming opschoning: totaal {stats['removed_rows_count']} regels verwijderd")
+
+
+# -----------------------------
+# STREAMING VALIDATIE
+# -----------------------------
+
+def validate_excel_streaming(
+    probe: WorkbookProbe,
+    header_mapping_config: dict,
+    validation_config: dict,
+    template_context: Optional[Dict[str, Any]] = None,
+    dtype: Optional[dict] = None,
+    chunk_size: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    engine: Optional[str] = None,
+    reference_lists: Optional[dict] = None,
+    cache_writer=None,
+    incremental_run=None,
+) -> Tuple[pd.DataFrame, pd.DataFrame, dict, int, tuple]:
+    """
+    Leest, mapt, schoont en valideert een werkblad chunk voor chunk.
+
+    Args:
+        probe: Geopende WorkbookProbe van de prijslijst
+        header_mapping_config: header_mapping.json inhoud
+        validation_config: Validatie configuratie (native v20 of v18)
+        template_context: Template context; 'removed_rows_count' wordt hierin gezet
+        dtype: dtype spec zoals bij pd.read_excel
+        chunk_size: Aantal rijen per chunk (default DEFAULT_CHUNK_ROWS)
+        max_rows: Maximaal aantal datarijen, None voor het hele bestand
+        engine: "vectorized" of "iterrows" (default DEFAULT_VALIDATION_ENGINE)
+        reference_lists: Geladen reference_lists.json voor de vectorized engine
+        cache_writer: Optionele ParseCacheWriter voor de parse cache (alleen zonder max_rows)
+        incremental_run: Optionele IncrementalRun; per chunk worden dan alleen nieuwe of
+            gewijzigde rijen gevalideerd (alleen met de vectorized engine)
+
+    Returns:
+        (df, df_original, original_column_mapping, removed_rows_count,
+         (results, filled_percentages, red_flag_messages, errors_per_field))
+        waarbij df_original alleen de originele kolommen bevat (geen data)
+    """
+    from .price_tool import DEFAULT_VALIDATION_ENGINE
+    chunk_size = chunk_size or DEFAULT_CHUNK_ROWS
+    engine = engine or DEFAULT_VALIDATION_ENGINE
+    use_vectorized = engine != "iterrows" and "field_validations" in validation_config
+    if engine == "compare":
+        logging.warning("Engine 'compare' wordt niet ondersteund in streaming mode, gebruik 'vectorized'")
+    if incremental_run is not None and not use_vectorized:
+        logging.warning("Incrementele validatie vereist de vectorized engine, volledige validatie")
+        incremental_run = None
+    if use_vectorized:
+        from .vectorized_engine import validate_rows_vectorized, validate_uom_relationships_vectorized
+        from .validation_plan import get_validation_plan
+        plan = get_validation_plan(validation_config, reference_lists)
+        uom_validator = validate_uom_relationships_vectorized
+    else:
+        uom_validator = validate_uom_relationships
+
+    # Header normalisatie en mapping één keer op de header rij
+    original_header = pd.DataFrame(columns=probe.header)
+    normalized_columns = [
+        normalize_template_header(col) if isinstance(col, str) and '\n' in col and '_' in col else col
+        for col in original_header.columns
+    ]
+    header_df, unrecognized, duplicates, original_column_mapping = map_headers(
+        pd.DataFrame(columns=normalized_columns), header_mapping_config, return_mapping=True
+    )
+    mapped_columns = list(header_df.columns)
+    logging.info(f"Streaming header mapping voltooid. Onherkend: {len(unrecognized)}, Duplicaten: {len(duplicates)}.")
+
+    state = prepare_validation_state(header_df, validation_config, template_context)
+
+    def mapped_chunks():
+        for chunk in iter_sheet_chunks(probe, chunk_size, dtype, max_rows, cache_writer):
+            chunk.columns = mapped_columns
+            yield chunk
+
+    clean_stats = {}
+    row_results, uom_results, uom_flags = ValidationResults(), [], []
+    cleaned_chunks = []
+    start_time = time.time()
+    for chunk in iter_clean_chunks(mapped_chunks(), clean_stats):
+        if incremental_run is not None:
+            chunk_rows, chunk_uom = incremental_run.validate_rows(chunk, original_column_mapping, state)
+            row_results.extend(chunk_rows)
+            uom_results.extend(chunk_uom)
+            cleaned_chunks.append(chunk)
+            continue
+        if use_vectorized:
+            row_results.extend(validate_rows_vectorized(
+                chunk, validation_config, original_column_mapping, state, reference_lists, plan
+            ))
+        else:
+            row_results.extend(validate_rows_iterrows(chunk, validation_config, original_column_mapping, state))
+
+        # UOM relaties zijn rij-lokaal; de geconsolideerde Red Flags worden één keer bewaard
+        for item in uom_validator(chunk, [], validation_config, original_column_mapping):
+            if item.get("GHX Kolom") == "RED FLAG":
+                if all(flag.get("Foutmelding") != item.get("Foutmelding") for flag in uom_flags):
+                    uom_flags.append(item)
+            else:
+                uom_results.append(item)
+
+        cleaned_chunks.append(chunk)
+        logging.info(f"Streaming: {sum(len(c) for c in cleaned_chunks)} rijen gevalideerd "
+                     f"({time.time() - start_time:.1f} sec)")
+
+    if cleaned_chunks:
+        df = pd.concat(cleaned_chunks)
+    else:
+        df = header_df.drop(columns=[c for c in header_df.columns if str(c).strip().lower() == 'algemeen'])
+    del cleaned_chunks
+
+    removed_rows_count = clean_stats.get('removed_rows_count', 0)
+    if template_context is not None:
+        template_context['removed_rows_count'] = removed_rows_count
+
+    # Totaal aantal rijen is pas na de laatste chunk bekend
+    state['total_rows'] = len(df)
+    state['summary_stats']['total_rows_in_df'] = len(df)
+
+    if incremental_run is not None:
+        validation_output = incremental_run.finish(df, row_results + uom_results, original_column_mapping, state)
+    else:
+        validation_output = finalize_validation_state(
+            df, row_results + uom_results + uom_flags, validation_config, original_column_mapping, state,
+            uom_validator=uom_already_validated
+        )
+    logging.info(f"Streaming validatie voltooid: {len(df)} rijen in {time.time() - start_time:.1f} sec")
+    return df, original_header, original_column_mapping, removed_rows_count, validation_output
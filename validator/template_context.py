@@ -7,15 +7,17 @@ Deze module extraheert en parseert metadata uit Template Generator templates.
 import logging
 import pandas as pd
 import re
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 
+from .workbook_probe import WorkbookProbe, open_probe
 
-def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, Any]]:
+
+def extract_template_generator_context(excel_path: Union[str, WorkbookProbe]) -> Optional[Dict[str, Any]]:
     """
     Extraheert volledige Template Generator context uit Excel metadata.
     
     Args:
-        excel_path: Pad naar Template Generator Excel bestand
+        excel_path: Pad naar Template Generator Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         Dict met volledige TG context of None als geen TG template
@@ -23,15 +25,16 @@ def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, An
     try:
         # Check eerst of het een TG template is
         from .template_detector import has_template_generator_stamp
-        if not has_template_generator_stamp(excel_path):
+        probe = open_probe(excel_path)
+        if not has_template_generator_stamp(probe):
             return None
         
         # Laad eerste paar rijen voor stamp parsing
-        df = pd.read_excel(excel_path, nrows=5)
+        df = probe.head(5)
         
         context = {
             'template_type': 'TG',
-            'excel_path': excel_path,
+            'excel_path': probe.path,
             'stamp_data': {},
             'version_info': {},
             'parsed_config': {},
@@ -49,8 +52,7 @@ def extract_template_generator_context(excel_path: str) -> Optional[Dict[str, An
         
         # Als geen A1 stamp, check headers
         if not stamp_code:
-            df_headers = pd.read_excel(excel_path, nrows=0)
-            for col in df_headers.columns:
+            for col in probe.header:
                 col_str = str(col).lower().strip()
                 if "deze code niet verwijderen" in col_str:
                     lines = col_str.split('\n')
@@ -318,7 +320,7 @@ def extract_version_info_from_sheet(worksheet) -> Dict[str, str]:
         return {}
 
 
-def detect_chemical_fields_in_template(excel_path: str) -> bool:
+def detect_chemical_fields_in_template(excel_path: Union[str, WorkbookProbe]) -> bool:
     """
     Detecteert of een template chemical fields bevat door header analysis.
     
@@ -326,15 +328,14 @@ def detect_chemical_fields_in_template(excel_path: str) -> bool:
     geen Template Generator stamp hebben maar wel chemical fields kunnen bevatten.
     
     Args:
-        excel_path: Pad naar Excel bestand
+        excel_path: Pad naar Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         True als chemical fields gedetecteerd, anders False
     """
     try:
-        # Laad alleen headers (eerste rij)
-        df = pd.read_excel(excel_path, nrows=0)
-        headers = [str(col).lower().strip() for col in df.columns]
+        # Alleen headers (eerste rij)
+        headers = [str(col).lower().strip() for col in open_probe(excel_path).header]
         
         # Chemical field patterns om te detecteren
         chemical_patterns = [
@@ -6,10 +6,12 @@ Deze module implementeert de TG → N → O beslissingsboom voor template type d
 
 import logging
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Union
 
+from .workbook_probe import WorkbookProbe, open_probe
 
-def determine_template_type(excel_path: str) -> str:
+
+def determine_template_type(excel_path: Union[str, WorkbookProbe]) -> str:
     """
     Bepaalt het type template volgens beslissingsboom:
     
@@ -18,7 +20,7 @@ def determine_template_type(excel_path: str) -> str:
     3. O (Oude/Alternatieve): Alle andere templates
     
     Args:
-        excel_path: Pad naar Excel bestand
+        excel_path: Pad naar Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         'TG' - Template Generator (met stamp metadata)
@@ -26,15 +28,16 @@ def determine_template_type(excel_path: str) -> str:
         'O' - Oude/Alternatieve Template (voor nov 2024 of supplier templates)
     """
     try:
+        probe = open_probe(excel_path)
+
         # STAP 1: Check voor Template Generator stamp in A1 + A2
-        if has_template_generator_stamp(excel_path):
+        if has_template_generator_stamp(probe):
             logging.info("Template type: TG (Template Generator) - stamp gedetecteerd")
             return "TG"
         
         # STAP 2: Check voor Nieuwe Generatie Template markers
         try:
-            df = pd.read_excel(excel_path, nrows=0)  # Alleen headers laden
-            columns = [str(col).strip().lower() for col in df.columns]
+            columns = [str(col).strip().lower() for col in probe.header]  # Alleen headers
             
             # Nieuwe Generatie markers (altijd aanwezig in templates na nov 2024)
             nieuwe_generatie_markers = [
@@ -64,7 +67,7 @@ def determine_template_type(excel_path: str) -> str:
         return "O"  # Default fallback
 
 
-def has_template_generator_stamp(excel_path: str) -> bool:
+def has_template_generator_stamp(excel_path: Union[str, WorkbookProbe]) -> bool:
     """
     Controleert of er een Template Generator stamp aanwezig is.
     
@@ -74,14 +77,16 @@ def has_template_generator_stamp(excel_path: str) -> bool:
     Format: "S-LM-0-0-0-ul-V78-M18" of in header: "deze code niet verwijderen:\ns-lm-0-0-0-ul-v78-m18"
     
     Args:
-        excel_path: Pad naar Excel bestand
+        excel_path: Pad naar Excel bestand of een al geopende WorkbookProbe
         
     Returns:
         True als Template Generator stamp wordt gedetecteerd
     """
     try:
+        probe = open_probe(excel_path)
+
         # Controleer A1 cel (oude format)
-        df_cells = pd.read_excel(excel_path, nrows=2, usecols=[0, 1])
+        df_cells = probe.head(2).iloc[:, :2]
         if not df_cells.empty and len(df_cells.columns) > 0:
             a1_value = str(df_cells.iloc[0, 0]).strip() if pd.notna(df_cells.iloc[0, 0]) else ""
             
@@ -93,8 +98,7 @@ def has_template_generator_stamp(excel_path: str) -> bool:
                     return True
         
         # Controleer kolom headers (nieuwe format)  
-        df_headers = pd.read_excel(excel_path, nrows=0)
-        for col in df_headers.columns:
+        for col in probe.header:
             col_str = str(col).lower().strip()
             
             # Check voor TG stamp in header
@@ -115,7 +119,7 @@ def has_template_generator_stamp(excel_path: str) -> bool:
         return False
 
 
-def test_template_detection(excel_path: str) -> Dict[str, Any]:
+def test_template_detection(excel_path: Union[str, WorkbookProbe]) -> Dict[str, Any]:
     """
     Test utility voor template detectie - geeft gedetailleerde informatie.
     
@@ -126,8 +130,9 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
         Dict met detectie resultaten en debug info
     """
     try:
+        probe = open_probe(excel_path)
         result = {
-            'excel_path': excel_path,
+            'excel_path': probe.path,
             'template_type': None,
             'has_tg_stamp': False,
             'tg_stamp_value': None,
@@ -138,11 +143,11 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
         }
         
         # Test TG stamp
-        result['has_tg_stamp'] = has_template_generator_stamp(excel_path)
+        result['has_tg_stamp'] = has_template_generator_stamp(probe)
         if result['has_tg_stamp']:
             # Haal stamp waarde op
             try:
-                df = pd.read_excel(excel_path, nrows=1, usecols=[0])
+                df = probe.head(1).iloc[:, :1]
                 if not df.empty:
                     result['tg_stamp_value'] = str(df.iloc[0, 0]).strip()
             except:
@@ -150,8 +155,7 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
         
         # Test Nieuwe Generatie markers
         try:
-            df = pd.read_excel(excel_path, nrows=0)
-            columns = [str(col).strip().lower() for col in df.columns]
+            columns = [str(col).strip().lower() for col in probe.header]
             result['alle_kolommen'] = columns
             
             nieuwe_generatie_markers = [
@@ -171,7 +175,7 @@ def test_template_detection(excel_path: str) -> Dict[str, Any]:
             result['debug_info'].append(f"Fout bij kolom analyse: {e}")
         
         # Bepaal template type
-        result['template_type'] = determine_template_type(excel_path)
+        result['template_type'] = determine_template_type(probe)
         
         return result
         
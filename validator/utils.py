@@ -7,6 +7,8 @@ Deze module bevat helper functies en utilities die door andere modules gebruikt
 import logging
 import re
 import os
+import stat
+import tempfile
 from typing import Any, Dict, List, Optional, Union
 
 
@@ -210,6 +212,50 @@ def ensure_directory_exists(directory_path: str) -> bool:
         return False
 
 
+def private_temp_dir(name: str) -> str:
+    """
+    Map voor caches en werkbestanden onder de tempdir, per gebruiker: <tempdir>/<name>-<uid>.
+
+    Een vaste naam in een gedeelde tempdir kan door een andere gebruiker vooraf aangemaakt
+    en gevuld worden; gebruik de map alleen na ensure_private_dir.
+    """
+    suffix = f"-{os.getuid()}" if hasattr(os, "getuid") else ""
+    return os.path.join(tempfile.gettempdir(), f"{name}{suffix}")
+
+
+def ensure_private_dir(directory_path: str) -> bool:
+    """
+    Maakt een map aan (0700) en controleert of pickle bestanden daaruit te vertrouwen zijn.
+
+    Een pickle voert bij het laden code uit, dus de map moet van de huidige gebruiker zijn:
+    geen symlink, eigenaar is de huidige gebruiker en niet schrijfbaar voor groep of anderen.
+    Op Windows (geen uid) wordt alleen gecontroleerd dat het een echte map is.
+
+    Args:
+        directory_path: Pad naar directory
+
+    Returns:
+        True als de map bestaat en gebruikt mag worden
+    """
+    try:
+        os.makedirs(directory_path, mode=0o700, exist_ok=True)
+        st = os.lstat(directory_path)
+    except OSError as e:
+        logging.warning(f"Kon directory niet aanmaken {directory_path}: {e}")
+        return False
+
+    if not stat.S_ISDIR(st.st_mode):
+        reason = "geen gewone map"
+    elif hasattr(os, "getuid") and st.st_uid != os.getuid():
+        reason = "eigenaar is een andere gebruiker"
+    elif hasattr(os, "getuid") and st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        reason = "schrijfbaar voor andere gebruikers"
+    else:
+        return True
+    logging.warning(f"Directory {directory_path} wordt niet gebruikt: {reason}")
+    return False
+
+
 def generate_filename_timestamp() -> str:
     """
     Genereert timestamp string voor bestandsnamen.
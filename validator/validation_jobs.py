@@ -0,0 +1,346 @@
+"""
+Validation Jobs Module
+
+Job queue met een lokale process pool voor het valideren van meerdere prijslijsten
+tegelijk. De Streamlit app valideerde geüploade bestanden één voor één in de knop
+handler, waardoor 20 prijslijsten de sessie minutenlang blokkeerden.
+
+Elke job krijgt een eigen job ID en een eigen werkmap (<GHX_JOB_DIR>/<job_id>) met de
+upload en het rapport, zodat twee uploads met dezelfde bestandsnaam elkaar niet raken.
+De worker schrijft fase en voortgang naar status.json in die map; ValidationJobQueue.poll()
+leest die in en haalt rapporten van afgeronde jobs op, zodat de UI per job de status kan
+tonen en rapporten verschijnen zodra een job klaar is.
+
+Alle sessies van de app delen één process pool per aantal workers (_shared_executor), zodat
+het aantal worker processen begrensd blijft, ongeacht het aantal geopende browser sessies.
+
+Job soorten:
+- "auto": telt eerst de rijen; meer dan QUICK_MODE_ROWS rijen wordt Quick Mode (eerste
+  QUICK_MODE_ROWS rijen), anders volledige validatie
+- "full": volledige streaming validatie (na Quick Mode)
+
+Omgevingsvariabelen:
+- GHX_JOB_WORKERS: aantal worker processen (default min(4, aantal cores))
+- GHX_JOB_DIR: werkmap voor jobs (default <tempdir>/ghx_jobs-<uid>). Uploads en rapporten
+  worden alleen geschreven in een map van de huidige gebruiker die anderen niet kunnen
+  beschrijven (zie utils.ensure_private_dir); de map wordt 0700 gezet
+"""
+
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, wait as wait_for_futures
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional
+
+from .utils import ensure_private_dir, private_temp_dir
+
+DEFAULT_JOB_WORKERS = int(os.environ.get("GHX_JOB_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+DEFAULT_JOB_DIR = os.environ.get("GHX_JOB_DIR") or private_temp_dir("ghx_jobs")
+QUICK_MODE_ROWS = 5000
+STATUS_FILE = "status.json"
+
+JOB_QUEUED = "wachtrij"
+JOB_RUNNING = "bezig"
+JOB_DONE = "klaar"
+JOB_FAILED = "fout"
+
+
+class ValidationJob:
+    """Status van één validatie job zoals de UI die toont."""
+
+    def __init__(self, job_id: str, filename: str, kind: str, job_dir: str, input_path: str,
+                 total_rows: Any = None, parent_id: Optional[str] = None):
+        self.job_id = job_id
+        self.filename = filename
+        self.kind = kind
+        self.job_dir = job_dir
+        self.input_path = input_path
+        self.total_rows = total_rows
+        self.parent_id = parent_id
+        self.status = JOB_QUEUED
+        self.phase = "In wachtrij"
+        self.progress = 0.0
+        self.quick_mode = False
+        self.report_path: Optional[str] = None
+        self.report_bytes: Optional[bytes] = None
+        self.error: Optional[str] = None
+        self.submitted_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_DONE, JOB_FAILED)
+
+    @property
+    def report_filename(self) -> Optional[str]:
+        return os.path.basename(self.report_path) if self.report_path else None
+
+    def __repr__(self) -> str:
+        return f"ValidationJob({self.job_id}, {self.filename!r}, {self.kind}, {self.status})"
+
+
+def _write_status(job_dir: str, phase: str, progress: float) -> None:
+    """Schrijft fase en voortgang atomair naar status.json van de job."""
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=job_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"phase": phase, "progress": progress}, f)
+        os.replace(tmp_path, os.path.join(job_dir, STATUS_FILE))
+    except Exception as e:
+        logging.debug(f"Kon job status niet schrijven in {job_dir}: {e}")
+
+
+def _read_status(job_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(job_dir, STATUS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_validation_job(job_dir: str, input_path: str, filename: str, kind: str, config_paths: Dict[str, str],
+                       total_rows: Any = None) -> Dict[str, Any]:
+    """
+    Draait één validatie job in een worker proces.
+
+    Args:
+        job_dir: Werkmap van de job (status.json en validation_reports komen hier)
+        input_path: Pad van de upload in de werkmap
+        filename: Originele bestandsnaam (voor rapport en incrementele state)
+        kind: "auto" (Quick Mode bij meer dan QUICK_MODE_ROWS rijen) of "full"
+        config_paths: Paden van mapping, validation en reference JSON
+        total_rows: Bekend aantal rijen (bv. uit de Quick Mode job) of None
+
+    Returns:
+        Dict met report_path, total_rows, quick_mode en error
+    """
+    from .incremental_validation import default_state_path
+    from .parse_cache import find_cached_probe
+    from .price_tool import validate_pricelist
+    from .workbook_probe import WorkbookProbe
+
+    def progress(phase: str, fraction: float) -> None:
+        _write_status(job_dir, phase, fraction)
+
+    probe = None
+    quick_mode = False
+    try:
+        progress("Rijen tellen", 0.02)
+        probe = WorkbookProbe(input_path)
+        input_df = None
+        if kind == "full":
+            if total_rows in (None, f"{QUICK_MODE_ROWS}+"):
+                total_rows = probe.row_count
+        else:
+            # Zelfde bestand al eerder geparsed? Dan komen de probes uit de parse cache
+            cached_probe = find_cached_probe(probe)
+            if cached_probe is not None:
+                probe.close()  # De cache entry staat los van de werkmap
+                probe = cached_probe
+            df_check = probe.head(QUICK_MODE_ROWS + 1)
+            if len(df_check) <= QUICK_MODE_ROWS:
+                total_rows = len(df_check)
+            else:
+                quick_mode = True
+                input_df = df_check
+                total_rows = probe.row_count
+                if total_rows is None:
+                    total_rows = f"{QUICK_MODE_ROWS}+"  # Voor rapport weergave
+
+        report_path = validate_pricelist(
+            input_excel_path=probe,
+            mapping_json_path=config_paths["mapping"],
+            validation_json_path=config_paths["validation"],
+            original_input_filename=filename,
+            reference_json_path=config_paths.get("reference"),
+            max_rows=QUICK_MODE_ROWS if quick_mode else None,
+            total_rows=total_rows,
+            streaming=kind == "full",  # Chunks: begrensd geheugen voor grote bestanden
+            input_df=input_df,
+            incremental_state=default_state_path(filename),  # Alleen gewijzigde rijen t.o.v. vorige versie
+            progress_callback=progress,
+        )
+        error = None if report_path and os.path.exists(report_path) else "Genereren van rapport mislukt"
+        progress("Klaar" if error is None else "Mislukt", 1.0)
+        return {"report_path": report_path, "total_rows": total_rows, "quick_mode": quick_mode, "error": error}
+    except Exception as e:
+        logging.exception(f"Validatie job voor '{filename}' mislukt")
+        progress("Mislukt", 1.0)
+        return {"report_path": None, "total_rows": total_rows, "quick_mode": quick_mode, "error": str(e)}
+    finally:
+        if probe is not None:
+            probe.close()
+
+
+# Gedeelde process pools (per aantal workers) voor alle job queues in dit proces
+_shared_executors: Dict[int, ProcessPoolExecutor] = {}
+_shared_executors_lock = threading.Lock()
+
+
+def _shared_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool voor max_workers workers, gedeeld door alle ValidationJobQueue's."""
+    with _shared_executors_lock:
+        executor = _shared_executors.get(max_workers)
+        if executor is None:
+            # spawn: de Streamlit server is multi-threaded, fork is daar niet veilig
+            executor = ProcessPoolExecutor(max_workers=max_workers,
+                                           mp_context=multiprocessing.get_context("spawn"))
+            _shared_executors[max_workers] = executor
+        return executor
+
+
+def _discard_shared_executor(executor: ProcessPoolExecutor) -> None:
+    """Vergeet een gecrashte pool; de volgende submit start een nieuwe."""
+    with _shared_executors_lock:
+        for max_workers, current in list(_shared_executors.items()):
+            if current is executor:
+                del _shared_executors[max_workers]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_shared_executors(wait: bool = False) -> None:
+    """Stopt alle gedeelde process pools (bv. bij het afsluiten van de server of in tests)."""
+    with _shared_executors_lock:
+        executors = list(_shared_executors.values())
+        _shared_executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class ValidationJobQueue:
+    """
+    Job queue met een lokale process pool.
+
+    submit() zet een upload in de wachtrij en geeft direct een job ID terug; poll() werkt
+    status en voortgang bij en leest rapporten van afgeronde jobs in. De queue (één per
+    sessie) houdt alleen zijn eigen jobs bij; de process pool wordt gedeeld.
+    """
+
+    def __init__(self, config_paths: Dict[str, str], max_workers: Optional[int] = None,
+                 base_dir: Optional[str] = None):
+        self.config_paths = {key: os.path.abspath(path) for key, path in config_paths.items() if path}
+        self.max_workers = max_workers or DEFAULT_JOB_WORKERS
+        self.base_dir = base_dir or DEFAULT_JOB_DIR
+        self._jobs: Dict[str, ValidationJob] = {}
+        self._futures: Dict[str, Future] = {}
+
+    def _submit_job(self, *args) -> Future:
+        executor = _shared_executor(self.max_workers)
+        try:
+            return executor.submit(run_validation_job, *args)
+        except BrokenProcessPool:
+            # Een gecrashte worker maakt de hele pool onbruikbaar; start een nieuwe
+            _discard_shared_executor(executor)
+            return _shared_executor(self.max_workers).submit(run_validation_job, *args)
+
+    def _private_base_dir(self) -> str:
+        """Werkmap voor uploads en rapporten; alleen als die van de huidige gebruiker is."""
+        if not ensure_private_dir(self.base_dir):
+            raise RuntimeError(f"Job werkmap {self.base_dir} is niet privé; upload niet opgeslagen")
+        if hasattr(os, "getuid"):
+            os.chmod(self.base_dir, 0o700)  # Ook een bestaande eigen map niet leesbaar voor anderen
+        return self.base_dir
+
+    def submit(self, filename: str, data: bytes, kind: str = "auto", total_rows: Any = None,
+               parent_id: Optional[str] = None) -> str:
+        """Zet een upload in de wachtrij. Retourneert het job ID."""
+        job_id = uuid.uuid4().hex[:12]
+        job_dir = os.path.join(self._private_base_dir(), job_id)
+        os.mkdir(job_dir, 0o700)
+        suffix = os.path.splitext(filename)[1].lower() or ".xlsx"
+        input_path = os.path.join(job_dir, f"upload{suffix}")
+        with open(input_path, "wb") as f:
+            f.write(data)
+        _write_status(job_dir, "In wachtrij", 0.0)
+
+        job = ValidationJob(job_id, filename, kind, job_dir, input_path, total_rows, parent_id)
+        self._jobs[job_id] = job
+        try:
+            self._futures[job_id] = self._submit_job(
+                job_dir, input_path, filename, kind, self.config_paths, total_rows
+            )
+        except Exception as e:
+            logging.error(f"Kon validatie job voor '{filename}' niet starten: {e}")
+            self._finish(job, {"error": str(e)})
+        logging.info(f"Validatie job {job_id} ({kind}) voor '{filename}' in wachtrij")
+        return job_id
+
+    def _finish(self, job: ValidationJob, result: Dict[str, Any]) -> None:
+        job.finished_at = time.time()
+        job.total_rows = result.get("total_rows", job.total_rows)
+        job.quick_mode = bool(result.get("quick_mode"))
+        job.report_path = result.get("report_path")
+        job.error = result.get("error")
+        if job.error is None and job.report_path:
+            try:
+                with open(job.report_path, "rb") as f:
+                    job.report_bytes = f.read()
+            except OSError as e:
+                job.error = f"Kon rapport niet lezen: {e}"
+        job.status = JOB_FAILED if job.error else JOB_DONE
+        job.phase = "Klaar" if job.status == JOB_DONE else "Mislukt"
+        job.progress = 1.0
+        # De upload is niet meer nodig; het rapport blijft in de werkmap tot remove()
+        if os.path.exists(job.input_path):
+            try:
+                os.remove(job.input_path)
+            except OSError as e:
+                logging.warning(f"Kon upload {job.input_path} niet verwijderen: {e}")
+
+    def poll(self) -> List[ValidationJob]:
+        """Werkt status en voortgang van lopende jobs bij. Retourneert alle jobs in volgorde van indienen."""
+        for job_id, future in list(self._futures.items()):
+            job = self._jobs[job_id]
+            if future.done():
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    # De volgende submit vervangt de gecrashte pool (_submit_job)
+                    logging.error(f"Process pool van de job queue gecrasht: {e}")
+                    result = {"error": f"Worker fout: {e}"}
+                except Exception as e:
+                    result = {"error": f"Worker fout: {e}"}
+                self._finish(job, result)
+                del self._futures[job_id]
+                continue
+            status = _read_status(job.job_dir)
+            if status and future.running():
+                job.status = JOB_RUNNING
+                job.phase = status.get("phase", job.phase)
+                job.progress = float(status.get("progress", job.progress))
+        return list(self._jobs.values())
+
+    @property
+    def active(self) -> bool:
+        """True zolang er nog jobs in de wachtrij staan of lopen."""
+        return bool(self._futures)
+
+    def get(self, job_id: str) -> Optional[ValidationJob]:
+        return self._jobs.get(job_id)
+
+    def remove(self, job_id: str) -> None:
+        """Verwijdert een afgeronde job en zijn werkmap."""
+        job = self._jobs.get(job_id)
+        if job is None or job_id in self._futures:
+            return
+        shutil.rmtree(job.job_dir, ignore_errors=True)
+        del self._jobs[job_id]
+
+    def clear(self) -> None:
+        """Verwijdert alle afgeronde jobs."""
+        for job_id in list(self._jobs):
+            self.remove(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Annuleert de eigen jobs in de wachtrij; de gedeelde pool blijft voor andere sessies."""
+        for future in self._futures.values():
+            future.cancel()
+        if wait:
+            wait_for_futures(list(self._futures.values()))
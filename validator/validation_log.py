@@ -0,0 +1,295 @@
+"""
+Validation Log Module
+
+Append-only opslag voor het validatie logboek (één regel per uitgevoerde validatie).
+update_validation_log las voorheen bij elke validatie het hele validaties_overzicht.xlsx
+in, voegde één regel toe, sorteerde en schreef de opgemaakte workbook opnieuw: de kosten
+groeiden met de historie en twee gelijktijdige validaties overschreven elkaars regels.
+
+Nu doet elke validatie één insert in een lokale store; het opgemaakte overzicht wordt op
+verzoek gerenderd met export_validation_log (of `python export_validation_log.py`).
+
+Backends (gekozen op extensie van het store pad):
+- .sqlite / .db (default): SQLite in WAL modus met een index op datum en bestandsnaam.
+  Writers houden de lock alleen voor de duur van één insert; readers (de export) blokkeren
+  writers niet
+- .ndjson / .jsonl: één JSON object per regel, geschreven met één O_APPEND write zodat
+  parallelle workers geen regels van elkaar overschrijven
+
+Omgevingsvariabelen:
+- GHX_VALIDATION_LOG_STORE: pad naar de store (default validaties_overzicht.sqlite naast
+  VALIDATION_LOG_FILE)
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+SHEET_NAME = "Validatie Overzicht"
+SQLITE_TIMEOUT = 30.0
+_NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+# Kolomvolgorde van het overzicht (gelijk aan de regel die update_validation_log opbouwt)
+LOG_COLUMNS = (
+    "Datum",
+    "Bestandsnaam",
+    "Score",
+    "Rijen",
+    "Kolommen",
+    "Template Type",
+    "Verplichte kolommen Aanwezig",
+    "Verplichte kolommen Ontbrekend",
+    "Verplicht - Gevuld",
+    "Verplicht - Correct Gevuld",
+    "Verplicht - Foutief Gevuld",
+    "Verplicht - Leeg (waar kolom aanwezig)",
+    "Verplicht - % Gevuld (van totaal mogelijk)",
+    "Verplicht - % Correct (van gevuld)",
+    "Optioneel - Gevuld",
+    "Optioneel - Correct Gevuld",
+    "Optioneel - Foutief Gevuld",
+    "Optioneel - Leeg",
+    "Totaal velden",
+    "Totaal gevuld",
+    "Totaal correct gevuld",
+    "Totaal foutief gevuld",
+    "Totaal leeg",
+    "Kwaliteitsscore",
+)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS validaties (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        datum TEXT NOT NULL,
+        bestandsnaam TEXT NOT NULL,
+        regel TEXT NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_validaties_datum ON validaties (datum)",
+    "CREATE INDEX IF NOT EXISTS idx_validaties_bestandsnaam ON validaties (bestandsnaam, datum)",
+)
+
+# Stores waarvan het schema in dit proces al is aangemaakt
+_INITIALIZED_STORES = set()
+
+
+def default_store_path(log_file: Optional[str] = None) -> str:
+    """Pad van de store: GHX_VALIDATION_LOG_STORE of <log_file zonder extensie>.sqlite."""
+    store_path = os.environ.get("GHX_VALIDATION_LOG_STORE")
+    if store_path:
+        return store_path
+    if log_file is None:
+        from .rapport_utils import VALIDATION_LOG_FILE
+        log_file = VALIDATION_LOG_FILE
+    return os.path.splitext(log_file)[0] + ".sqlite"
+
+
+def _is_ndjson(store_path: str) -> bool:
+    return store_path.lower().endswith(_NDJSON_EXTENSIONS)
+
+
+def _json_value(value: Any) -> Any:
+    """JSON fallback voor numpy/pandas scalars in een log regel."""
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _connect(store_path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(store_path, timeout=SQLITE_TIMEOUT)
+    if store_path not in _INITIALIZED_STORES:
+        # WAL blijft op het bestand staan; readers en de writer blokkeren elkaar dan niet
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+        _INITIALIZED_STORES.add(store_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def append_validation_log(row: Dict[str, Any], store_path: Optional[str] = None) -> str:
+    """
+    Voegt één validatie regel toe aan de store (één insert, geen read-rewrite).
+
+    Args:
+        row: Log regel met minimaal "Datum" en "Bestandsnaam" (zie LOG_COLUMNS)
+        store_path: Pad naar de store (None = default_store_path())
+
+    Returns:
+        Pad van de store
+    """
+    store_path = store_path or default_store_path()
+    directory = os.path.dirname(store_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    record = json.dumps(row, ensure_ascii=False, default=_json_value)
+
+    if _is_ndjson(store_path):
+        # Eén write op een O_APPEND descriptor: regels van parallelle workers lopen niet door elkaar
+        fd = os.open(store_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, (record + "\n").encode("utf-8"))
+        finally:
+            os.close(fd)
+        return store_path
+
+    conn = _connect(store_path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO validaties (datum, bestandsnaam, regel) VALUES (?, ?, ?)",
+                (str(row.get("Datum", "")), str(row.get("Bestandsnaam", "")), record),
+            )
+    finally:
+        conn.close()
+    return store_path
+
+
+def read_validation_log(
+    store_path: Optional[str] = None,
+    bestandsnaam: Optional[str] = None,
+    since: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Leest het logboek als DataFrame, nieuwste validatie eerst.
+
+    Args:
+        store_path: Pad naar de store (None = default_store_path())
+        bestandsnaam: Alleen validaties van dit bestand
+        since: Alleen validaties vanaf deze datum ("YYYY-MM-DD[ HH:MM:SS]")
+
+    Returns:
+        DataFrame met de kolommen uit LOG_COLUMNS (plus eventuele extra kolommen)
+    """
+    store_path = store_path or default_store_path()
+    records: List[Dict[str, Any]] = []
+
+    if os.path.exists(store_path):
+        if _is_ndjson(store_path):
+            with open(store_path, encoding="utf-8") as f:
+                for line_number, line in enumerate(f, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        logging.warning(f"Logboek regel {line_number} overgeslagen (geen geldige JSON): {store_path}")
+                        continue
+                    if bestandsnaam is not None and record.get("Bestandsnaam") != bestandsnaam:
+                        continue
+                    if since is not None and str(record.get("Datum", "")) < since:
+                        continue
+                    records.append(record)
+            records.sort(key=lambda record: str(record.get("Datum", "")), reverse=True)
+        else:
+            query = "SELECT regel FROM validaties"
+            conditions, params = [], []
+            if bestandsnaam is not None:
+                conditions.append("bestandsnaam = ?")
+                params.append(bestandsnaam)
+            if since is not None:
+                conditions.append("datum >= ?")
+                params.append(since)
+            if conditions:
+                query += " WHERE " + " AND ".join(conditions)
+            query += " ORDER BY datum DESC, id DESC"
+            conn = _connect(store_path)
+            try:
+                records = [json.loads(regel) for (regel,) in conn.execute(query, params)]
+            finally:
+                conn.close()
+
+    columns = list(LOG_COLUMNS)
+    for record in records:
+        for key in record:
+            if key not in columns:
+                columns.append(key)
+    return pd.DataFrame.from_records(records, columns=columns)
+
+
+def import_validation_log_excel(excel_path: str, store_path: Optional[str] = None) -> int:
+    """
+    Neemt een bestaand validaties_overzicht.xlsx eenmalig over in de store.
+
+    Returns:
+        Aantal overgenomen regels
+    """
+    existing_df = pd.read_excel(excel_path, sheet_name=0)
+    existing_df = existing_df.astype(object).where(existing_df.notna(), None)
+    rows = existing_df.to_dict("records")
+    # Oudste eerst, zodat de insert volgorde overeenkomt met de validatie volgorde
+    for row in reversed(rows):
+        if row.get("Datum") is not None:
+            row["Datum"] = pd.Timestamp(row["Datum"]).strftime("%Y-%m-%d %H:%M:%S")
+        append_validation_log(row, store_path)
+    logging.info(f"{len(rows)} regels uit {excel_path} overgenomen in het logboek")
+    return len(rows)
+
+
+def export_validation_log(
+    output_path: Optional[str] = None,
+    store_path: Optional[str] = None,
+    bestandsnaam: Optional[str] = None,
+    since: Optional[str] = None,
+) -> str:
+    """
+    Rendert het opgemaakte validatie overzicht (xlsx) uit de store.
+
+    Args:
+        output_path: Doelbestand (None = VALIDATION_LOG_FILE)
+        store_path: Pad naar de store (None = default_store_path())
+        bestandsnaam, since: Optionele filters, zie read_validation_log
+
+    Returns:
+        Pad van het geschreven overzicht
+    """
+    if output_path is None:
+        from .rapport_utils import VALIDATION_LOG_FILE
+        output_path = VALIDATION_LOG_FILE
+    log_df = read_validation_log(store_path, bestandsnaam=bestandsnaam, since=since)
+    _write_overview(log_df, output_path)
+    logging.info(f"Validatie overzicht ({len(log_df)} regels) geschreven: {output_path}")
+    return output_path
+
+
+def _write_overview(log_df: pd.DataFrame, output_path: str) -> None:
+    """Schrijft het overzicht met dezelfde opmaak als het oude validaties_overzicht.xlsx."""
+    with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
+        log_df.to_excel(writer, index=False, sheet_name=SHEET_NAME)
+
+        worksheet = writer.sheets[SHEET_NAME]
+        worksheet.set_column("A:A", 20)  # Datum
+        worksheet.set_column("B:B", 40)  # Bestandsnaam
+        worksheet.set_column("C:C", 12)  # Score
+        worksheet.set_column("D:W", 18)  # Generieke breedte voor de rest
+
+        # Header opmaak (GHX oranje)
+        header_format = writer.book.add_format(
+            {
+                "bold": True,
+                "bg_color": "#f79645",
+                "font_color": "white",
+                "border": 1,
+            }
+        )
+        for col_num, value in enumerate(log_df.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+
+        (max_row, max_col) = log_df.shape
+        if max_row == 0:
+            return
+        worksheet.add_table(
+            0,
+            0,
+            max_row,
+            max_col - 1,
+            {
+                "columns": [{"header": col} for col in log_df.columns],
+                "style": "Table Style Medium 2",
+                "first_column": True,
+            },
+        )
@@ -0,0 +1,239 @@
+"""
+Validation Plan Module
+
+Deze module compileert field_validation_v20.json + reference_lists.json één keer naar
+een validatieplan. Per regel wordt vooraf bepaald welke mask functie gebruikt wordt,
+met welke parameters (frozensets voor list_refs, genormaliseerde toegestane waarden,
+lengtes, afhankelijke velden) en met welke message/code/type strings.
+
+Het plan bestaat alleen uit dicts, tuples, frozensets en functools.partial objecten
+van module-level functies, zodat het herbruikbaar is over bestanden en processen
+(picklable).
+"""
+
+import hashlib
+import json
+import logging
+from functools import partial
+from typing import Dict, Any, Optional, Callable
+
+from .vectorized_engine import (
+    mask_is_empty,
+    mask_is_not_numeric,
+    mask_is_empty_or_not_numeric,
+    mask_is_not_integer,
+    mask_is_less_than_field,
+    mask_value_not_in_list,
+    mask_min_length,
+    mask_max_length,
+    mask_is_empty_when_dependency_filled,
+    mask_is_empty_when_context,
+    mask_mismatch_calculation,
+    mask_is_not_boolean,
+    mask_is_not_exact_length_numeric,
+    mask_invalid_gtin_check_digit,
+    mask_uom_description_mismatch,
+    mask_not_starts_with,
+    mask_not_space_separated,
+    mask_no_gtin_or_barcode,
+    mask_invalid_date_format,
+    mask_is_in_the_past,
+    mask_is_before_field,
+    mask_invalid_au_risk_combination,
+    mask_medical_product_missing_classification,
+)
+
+# Cache van gecompileerde plannen per config signature
+_PLAN_CACHE: Dict[str, Dict[str, Any]] = {}
+_PLAN_CACHE_MAX = 8
+# Plannen voor read-only configs uit de config registry, op object identiteit: die objecten
+# veranderen niet, dus de signature (json.dumps + SHA-256 van de hele config) is niet nodig
+_PLAN_BY_IDENTITY: Dict[tuple, tuple] = {}
+
+
+def config_signature(validation_config: dict, reference_lists: Optional[dict] = None) -> str:
+    """Berekent een stabiele SHA-256 signature over validatie config en reference lists."""
+    payload = json.dumps([validation_config, reference_lists or {}], sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _normalized_set(values) -> frozenset:
+    """Normaliseert toegestane waarden zoals validate_field_v20_native (strip + upper)."""
+    return frozenset(str(x).strip().upper() for x in values)
+
+
+def _compile_mask(rule: dict, reference_sets: Dict[str, frozenset], uom_codes: Optional[frozenset]) -> Optional[Callable]:
+    """
+    Vertaalt één v20 regel naar een mask functie met vooraf berekende parameters.
+
+    Returns:
+        functools.partial van de mask functie, of None als de regel nooit kan triggeren
+        (onbekende conditie of ongeldige params)
+    """
+    condition = rule.get("condition")
+    params = rule.get("params")
+
+    if condition == "is_empty":
+        return partial(mask_is_empty)
+    if condition == "is_not_numeric":
+        return partial(mask_is_not_numeric)
+    if condition == "is_empty_or_not_numeric":
+        return partial(mask_is_empty_or_not_numeric)
+    if condition == "is_not_integer":
+        return partial(mask_is_not_integer)
+    if condition in ("is_less_than_field", "is_less_than_or_equal_to_field"):
+        if isinstance(params, list) and len(params) > 0:
+            return partial(mask_is_less_than_field, other_field=params[0],
+                           or_equal=condition == "is_less_than_or_equal_to_field")
+        return None
+    if condition == "value_not_in_list":
+        if isinstance(params, list):
+            return partial(mask_value_not_in_list, allowed=_normalized_set(params))
+        if "list_ref" in rule and rule["list_ref"] in reference_sets:
+            return partial(mask_value_not_in_list, allowed=reference_sets[rule["list_ref"]])
+        return None
+    if condition == "min_length":
+        return partial(mask_min_length, limit=params) if isinstance(params, (int, float)) else None
+    if condition == "max_length":
+        return partial(mask_max_length, limit=params) if isinstance(params, (int, float)) else None
+    if condition == "is_empty_when_dependency_filled":
+        if isinstance(params, list) and len(params) > 0:
+            return partial(mask_is_empty_when_dependency_filled, dependency_field=params[0])
+        return None
+    if condition == "is_empty_when_context":
+        if isinstance(params, list) and len(params) > 0:
+            return partial(mask_is_empty_when_context, context=params[0])
+        return None
+    if condition == "mismatch_calculation":
+        if isinstance(params, list) and len(params) >= 3 and params[1] in ("*", "/"):
+            return partial(mask_mismatch_calculation, field1=params[0], operator=params[1], field2=params[2])
+        return None
+    if condition == "is_not_boolean":
+        return partial(mask_is_not_boolean)
+    if condition == "is_not_exact_length_numeric":
+        return partial(mask_is_not_exact_length_numeric, length=params) if isinstance(params, (int, float)) else None
+    if condition == "invalid_gtin_check_digit":
+        return partial(mask_invalid_gtin_check_digit)
+    if condition == "uom_description_mismatch":
+        return partial(mask_uom_description_mismatch, valid_uom_codes=uom_codes)
+    if condition == "not_starts_with":
+        return partial(mask_not_starts_with, prefix=params) if isinstance(params, str) else None
+    if condition == "not_space_separated":
+        return partial(mask_not_space_separated)
+    if condition == "no_gtin_or_barcode":
+        return partial(mask_no_gtin_or_barcode, gtin_fields=tuple(params)) if isinstance(params, list) else None
+    if condition == "invalid_date_format":
+        return partial(mask_invalid_date_format)
+    if condition == "is_in_the_past":
+        return partial(mask_is_in_the_past)
+    if condition == "is_before_field":
+        if isinstance(params, list) and len(params) > 0:
+            return partial(mask_is_before_field, other_field=params[0])
+        return None
+    if condition == "invalid_au_risk_combination":
+        return partial(mask_invalid_au_risk_combination)
+    if condition == "medical_product_missing_classification":
+        return partial(mask_medical_product_missing_classification)
+
+    # Condities zonder mask (bv. is_duplicate_artikelnummer/is_duplicate_gtin, die als
+    # cross-row check draaien) triggeren net als in validate_field_v20_native nooit per cel
+    return None
+
+
+def compile_validation_plan(validation_config: dict, reference_lists: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Compileert een native v20 validatie configuratie naar een validatieplan.
+
+    Args:
+        validation_config: field_validation_v20.json inhoud
+        reference_lists: reference_lists.json inhoud (optioneel)
+
+    Returns:
+        Dict met:
+        - signature: SHA-256 over config + reference lists
+        - invalid_values: frozenset met lowercase null_values
+        - reference_sets: frozenset per list_ref (genormaliseerd)
+        - fields: per veld {'rules': [gecompileerde regels], 'legacy_rules': config of None}
+          waarbij een gecompileerde regel bestaat uit order, condition, mask, message, code en type
+    """
+    reference_sets = {}
+    if reference_lists:
+        for list_ref, values in reference_lists.get("reference_lists", {}).items():
+            reference_sets[list_ref] = _normalized_set(values)
+    uom_codes = reference_sets.get("uom_codes") or None
+
+    invalid_values = frozenset(
+        str(val).lower() for val in validation_config.get("global_settings", {}).get("null_values", [])
+    )
+
+    fields = {}
+    compiled_count = 0
+    for field_name, field_config in validation_config.get("field_validations", {}).items():
+        if "rules" not in field_config:
+            # v18-stijl veld: wordt per rij met validate_field gevalideerd
+            fields[field_name] = {'rules': [], 'legacy_rules': field_config}
+            continue
+
+        compiled_rules = []
+        for order, rule in enumerate(field_config.get("rules", [])):
+            message = rule.get("message", f"Validatie fout in veld '{field_name}'")
+            if not (message and str(message).strip()):
+                continue
+            mask = _compile_mask(rule, reference_sets, uom_codes)
+            if mask is None:
+                continue
+            compiled_rules.append({
+                'order': order,
+                'condition': rule.get("condition"),
+                'mask': mask,
+                'message': message,
+                'code': str(rule.get("code")),
+                'type': rule.get("type"),
+            })
+        compiled_count += len(compiled_rules)
+        fields[field_name] = {'rules': compiled_rules, 'legacy_rules': None}
+
+    logging.info(f"Validatieplan gecompileerd: {len(fields)} velden, {compiled_count} regels, {len(reference_sets)} reference lists")
+    return {
+        'signature': config_signature(validation_config, reference_lists),
+        'invalid_values': invalid_values,
+        'reference_sets': reference_sets,
+        'fields': fields,
+    }
+
+
+def get_validation_plan(validation_config: dict, reference_lists: Optional[dict] = None) -> Dict[str, Any]:
+    """
+    Geeft het (gecachte) validatieplan voor deze config + reference lists.
+
+    Het plan wordt per signature maar één keer gecompileerd en daarna hergebruikt
+    voor volgende bestanden binnen hetzelfde proces.
+    """
+    cached = _PLAN_BY_IDENTITY.get((id(validation_config), id(reference_lists)))
+    if cached is not None and cached[0] is validation_config and cached[1] is reference_lists:
+        return cached[2]
+
+    signature = config_signature(validation_config, reference_lists)
+    plan = _PLAN_CACHE.get(signature)
+    if plan is None:
+        plan = compile_validation_plan(validation_config, reference_lists)
+        if len(_PLAN_CACHE) >= _PLAN_CACHE_MAX:
+            _PLAN_CACHE.pop(next(iter(_PLAN_CACHE)))
+        _PLAN_CACHE[signature] = plan
+    return plan
+
+
+def register_validation_plan(plan: Dict[str, Any], validation_config: dict, reference_lists: Optional[dict] = None) -> None:
+    """
+    Registreert een (uit een config snapshot geladen) plan voor deze read-only config objecten.
+
+    De config registry geeft alle aanroepers dezelfde objecten; get_validation_plan vindt het
+    plan dan op identiteit zonder de config opnieuw te hashen of te compileren.
+    """
+    if len(_PLAN_CACHE) >= _PLAN_CACHE_MAX and plan['signature'] not in _PLAN_CACHE:
+        _PLAN_CACHE.pop(next(iter(_PLAN_CACHE)))
+    _PLAN_CACHE[plan['signature']] = plan
+    if len(_PLAN_BY_IDENTITY) >= _PLAN_CACHE_MAX:
+        _PLAN_BY_IDENTITY.pop(next(iter(_PLAN_BY_IDENTITY)))
+    # De tuple houdt de config objecten vast, zodat hun id niet hergebruikt kan worden
+    _PLAN_BY_IDENTITY[(id(validation_config), id(reference_lists))] = (validation_config, reference_lists, plan)
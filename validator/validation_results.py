@@ -0,0 +1,376 @@
+"""
+Validation Results Module
+
+Kolomgewijze opslag van validatiemeldingen. De engines voegden per fout een dict met
+zeven sleutels toe, met steeds dezelfde strings voor veld, leverancierskolom, foutmelding
+en code; op een vervuild bestand van 450.000 rijen zijn dat miljoenen dicts die het
+rapport daarna nog een paar keer naar DataFrames omzet.
+
+ValidationResults bewaart per melding alleen:
+- Rij: int32 (Excel rij nummer, idx + 3; 0 voor RED FLAG meldingen)
+- veld id en leverancierskolom id: int16
+- regel id: int32 (regel = (Foutmelding, code, type); UOM meldingen noemen de waarden)
+- waarde id: int32 in een tabel met geïnterneerde veldwaarden; de vectorized engine
+  vult die per veld alleen met de unieke waarden van de bronkolom die een fout hebben
+
+Strings worden één keer geïnterneerd. De klasse gedraagt zich voor bestaande code als
+een lijst met dicts (len, iteratie, indexering, append, extend, +), maar het rapport en
+de score code gebruiken to_dataframe() en de aggregaties (count_by_field, count_by_code,
+field_rows) zodat er geen dict per melding ontstaat. Meldingen zonder 'type' sleutel
+(UOM relaties, cross-row checks) houden die sleutel ook bij iteratie weg.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow staat in requirements.txt
+    pa = None
+
+RESULT_COLUMNS = ["Rij", "GHX Kolom", "Supplier Kolom", "Veldwaarde", "Foutmelding", "code", "type"]
+
+_ARRAY_DTYPES = {
+    'rows': np.int32,
+    'fields': np.int16,
+    'suppliers': np.int16,
+    'rules': np.int32,  # UOM meldingen bevatten de waarden in de tekst, dus veel unieke regels
+    'values': np.int32,
+}
+
+
+def _object_array(values: Sequence[Any]) -> np.ndarray:
+    """1-dimensionale object array (ook als waarden zelf sequences zijn)."""
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return array
+
+
+class _InternTable:
+    """Lijst met unieke waarden plus lookup naar hun positie."""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self._ids: Dict[Any, int] = {}
+
+    def intern(self, value: Any) -> int:
+        try:
+            key = (type(value), value)
+            value_id = self._ids.get(key)
+            if value_id is None:
+                value_id = self._ids[key] = len(self.values)
+                self.values.append(value)
+            return value_id
+        except TypeError:
+            # Niet-hashbare waarde: altijd een nieuwe entry
+            self.values.append(value)
+            return len(self.values) - 1
+
+    def intern_many(self, values: Iterable[Any]) -> np.ndarray:
+        return np.fromiter((self.intern(value) for value in values), dtype=np.int64)
+
+
+class ValidationResults:
+    """Kolomgewijze, lijst-compatibele verzameling validatiemeldingen."""
+
+    def __init__(self, items: Optional[Iterable[dict]] = None):
+        self._fields = _InternTable()
+        self._suppliers = _InternTable()
+        self._rules = _InternTable()  # (Foutmelding, code) of (Foutmelding, code, type)
+        self._values = _InternTable()
+        self._chunks: List[Dict[str, np.ndarray]] = []
+        self._pending: Dict[str, list] = {name: [] for name in _ARRAY_DTYPES}
+        if items is not None:
+            self.extend(items)
+
+    # -----------------------------
+    # TOEVOEGEN
+    # -----------------------------
+
+    def intern_field(self, field: str) -> int:
+        return self._fields.intern(field)
+
+    def intern_supplier(self, supplier: str) -> int:
+        return self._suppliers.intern(supplier)
+
+    def intern_rule(self, message: Any, code: Any, rule_type: Any = None, has_type: bool = True) -> int:
+        return self._rules.intern((message, code, rule_type) if has_type else (message, code))
+
+    def intern_values(self, values: Iterable[Any]) -> np.ndarray:
+        return self._values.intern_many(values)
+
+    def _flush(self) -> None:
+        if self._pending['rows']:
+            self._chunks.append({name: np.asarray(values, dtype=_ARRAY_DTYPES[name])
+                                 for name, values in self._pending.items()})
+            self._pending = {name: [] for name in _ARRAY_DTYPES}
+
+    def add_arrays(self, rows: np.ndarray, fields: np.ndarray, suppliers: np.ndarray,
+                   rules: np.ndarray, values: np.ndarray) -> None:
+        """Voegt meldingen in bulk toe; ids komen uit de intern_* methodes."""
+        if len(rows) == 0:
+            return
+        self._flush()
+        self._chunks.append({
+            'rows': np.asarray(rows, dtype=np.int32),
+            'fields': np.asarray(fields, dtype=np.int16),
+            'suppliers': np.asarray(suppliers, dtype=np.int16),
+            'rules': np.asarray(rules, dtype=np.int32),
+            'values': np.asarray(values, dtype=np.int32),
+        })
+
+    def append(self, item: dict) -> None:
+        """Voegt één melding (dict met de RESULT_COLUMNS sleutels) toe."""
+        pending = self._pending
+        pending['rows'].append(int(item.get("Rij", 0)))
+        pending['fields'].append(self._fields.intern(item.get("GHX Kolom", "")))
+        pending['suppliers'].append(self._suppliers.intern(item.get("Supplier Kolom", "")))
+        pending['rules'].append(self.intern_rule(item.get("Foutmelding", ""), item.get("code", ""),
+                                                 item.get("type"), "type" in item))
+        pending['values'].append(self._values.intern(item.get("Veldwaarde", "")))
+
+    def extend(self, items: Iterable[dict]) -> None:
+        if isinstance(items, ValidationResults):
+            self._extend_columnar(items)
+            return
+        for item in items:
+            self.append(item)
+
+    def _extend_columnar(self, other: "ValidationResults") -> None:
+        data = other._arrays()
+        if len(data['rows']) == 0:
+            return
+        maps = {
+            'fields': self._fields.intern_many(other._fields.values),
+            'suppliers': self._suppliers.intern_many(other._suppliers.values),
+            'rules': self._rules.intern_many(other._rules.values),
+            'values': self._values.intern_many(other._values.values),
+        }
+        self.add_arrays(data['rows'], *(maps[name][data[name]] for name in ('fields', 'suppliers', 'rules', 'values')))
+
+    def __add__(self, other: Iterable[dict]) -> "ValidationResults":
+        combined = self.copy()
+        combined.extend(other)
+        return combined
+
+    def __radd__(self, other: Iterable[dict]) -> "ValidationResults":
+        combined = ValidationResults(other)
+        combined.extend(self)
+        return combined
+
+    def copy(self) -> "ValidationResults":
+        return self.take(np.arange(len(self)))
+
+    # -----------------------------
+    # LEZEN
+    # -----------------------------
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        """Alle kolommen als aaneengesloten arrays (chunks worden hier samengevoegd)."""
+        self._flush()
+        if len(self._chunks) != 1:
+            if not self._chunks:
+                return {name: np.empty(0, dtype=dtype) for name, dtype in _ARRAY_DTYPES.items()}
+            self._chunks = [{name: np.concatenate([chunk[name] for chunk in self._chunks])
+                             for name in _ARRAY_DTYPES}]
+        return self._chunks[0]
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Excel rij nummers (int32) per melding."""
+        return self._arrays()['rows']
+
+    @property
+    def field_ids(self) -> np.ndarray:
+        return self._arrays()['fields']
+
+    @property
+    def rule_ids(self) -> np.ndarray:
+        return self._arrays()['rules']
+
+    @property
+    def fields(self) -> List[str]:
+        """GHX veldnamen per veld id."""
+        return self._fields.values
+
+    @property
+    def rules(self) -> List[Tuple[Any, ...]]:
+        """(Foutmelding, code[, type]) per regel id."""
+        return self._rules.values
+
+    def __len__(self) -> int:
+        return sum(len(chunk['rows']) for chunk in self._chunks) + len(self._pending['rows'])
+
+    def _item(self, row: int, field: int, supplier: int, rule: int, value: int) -> dict:
+        rule_values = self._rules.values[rule]
+        item = {
+            "Rij": row,
+            "GHX Kolom": self._fields.values[field],
+            "Supplier Kolom": self._suppliers.values[supplier],
+            "Veldwaarde": self._values.values[value],
+            "Foutmelding": rule_values[0],
+            "code": rule_values[1],
+        }
+        if len(rule_values) == 3:
+            item["type"] = rule_values[2]
+        return item
+
+    def __iter__(self) -> Iterator[dict]:
+        data = self._arrays()
+        columns = [data[name].tolist() for name in _ARRAY_DTYPES]
+        for values in zip(*columns):
+            yield self._item(*values)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[dict, "ValidationResults"]:
+        if isinstance(key, slice):
+            return self.take(np.arange(len(self))[key])
+        data = self._arrays()
+        return self._item(*(int(data[name][key]) for name in _ARRAY_DTYPES))
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ValidationResults, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ValidationResults({len(self)} meldingen, {len(self._fields.values)} velden)"
+
+    def take(self, indices: np.ndarray) -> "ValidationResults":
+        """Nieuwe ValidationResults met de meldingen op de gegeven posities (deelt de intern tabellen)."""
+        subset = ValidationResults()
+        subset._fields, subset._suppliers = self._fields, self._suppliers
+        subset._rules, subset._values = self._rules, self._values
+        data = self._arrays()
+        subset._chunks = [{name: data[name][indices] for name in _ARRAY_DTYPES}]
+        return subset
+
+    def select_field(self, field: str) -> "ValidationResults":
+        """Meldingen van één veld (bv. "RED FLAG")."""
+        try:
+            field_id = self._fields.values.index(field)
+        except ValueError:
+            return self.take(np.empty(0, dtype=np.int64))
+        return self.take(np.flatnonzero(self.field_ids == field_id))
+
+    # -----------------------------
+    # AGGREGATIES EN EXPORT
+    # -----------------------------
+
+    def _group_counts(self, ids: np.ndarray, labels: List[Any]) -> Dict[Any, int]:
+        counts = np.bincount(ids, minlength=len(labels)) if len(ids) else np.zeros(len(labels), dtype=np.int64)
+        result: Dict[Any, int] = {}
+        for label, count in zip(labels, counts.tolist()):
+            if count:
+                result[label] = result.get(label, 0) + count
+        return result
+
+    def count_by_field(self) -> Dict[str, int]:
+        """Aantal meldingen per GHX veld."""
+        return self._group_counts(self.field_ids, self._fields.values)
+
+    def count_by_code(self) -> Dict[Any, int]:
+        """Aantal meldingen per foutcode."""
+        return self._group_counts(self.rule_ids, [rule[1] for rule in self._rules.values])
+
+    def field_rows(self) -> Dict[str, np.ndarray]:
+        """Excel rij nummers per GHX veld (in volgorde van de meldingen)."""
+        data = self._arrays()
+        order = np.argsort(data['fields'], kind='stable')
+        sorted_fields = data['fields'][order]
+        bounds = np.flatnonzero(np.diff(sorted_fields)) + 1
+        result = {}
+        for group in np.split(order, bounds):
+            if len(group):
+                result[self._fields.values[data['fields'][group[0]]]] = data['rows'][group]
+        return result
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        DataFrame met dezelfde kolommen en dtypes als pd.DataFrame(list_of_dicts): Rij int64,
+        overige kolommen object; 'type' is NaN voor meldingen zonder type (en ontbreekt als
+        geen enkele melding een type heeft).
+        """
+        data = self._arrays()
+        if len(data['rows']) == 0:
+            return pd.DataFrame()
+        rules = self._rules.values
+        rule_ids = data['rules']
+        columns = {
+            "Rij": data['rows'].astype(np.int64),
+            "GHX Kolom": _object_array(self._fields.values)[data['fields']],
+            "Supplier Kolom": _object_array(self._suppliers.values)[data['suppliers']],
+            "Veldwaarde": _object_array(self._values.values)[data['values']],
+            "Foutmelding": _object_array([rule[0] for rule in rules])[rule_ids],
+            "code": _object_array([rule[1] for rule in rules])[rule_ids],
+        }
+        has_type = np.asarray([len(rule) == 3 for rule in rules], dtype=bool)[rule_ids]
+        if has_type.any():
+            columns["type"] = _object_array([rule[2] if len(rule) == 3 else np.nan for rule in rules])[rule_ids]
+        return pd.DataFrame(columns)
+
+    def to_arrow(self):
+        """pyarrow Table met dictionary-encoded kolommen (vereist pyarrow)."""
+        if pa is None:
+            raise ImportError("pyarrow is niet geïnstalleerd")
+        data = self._arrays()
+        rules = self._rules.values
+
+        def dictionary(indices: np.ndarray, labels: List[Any]):
+            # None als null index, niet in de dictionary zelf (dat kan Parquet niet schrijven)
+            missing = np.array([label is None for label in labels] + [False], dtype=bool)
+            return pa.DictionaryArray.from_arrays(
+                pa.array(indices.astype(np.int32), mask=missing[indices]),
+                pa.array(["" if label is None else str(label) for label in labels], type=pa.string()),
+            )
+
+        return pa.table({
+            "Rij": pa.array(data['rows']),
+            "GHX Kolom": dictionary(data['fields'], self._fields.values),
+            "Supplier Kolom": dictionary(data['suppliers'], self._suppliers.values),
+            "Veldwaarde": dictionary(data['values'], self._values.values),
+            "Foutmelding": dictionary(data['rules'], [rule[0] for rule in rules]),
+            "code": dictionary(data['rules'], [rule[1] for rule in rules]),
+            "type": dictionary(data['rules'], [rule[2] if len(rule) == 3 else None for rule in rules]),
+        })
+
+
+def as_validation_results(results: Iterable[dict]) -> ValidationResults:
+    """Zet een lijst met result dicts om (een ValidationResults blijft ongewijzigd)."""
+    if isinstance(results, ValidationResults):
+        return results
+    return ValidationResults(results)
+
+
+def results_dataframe(results: Iterable[dict]) -> pd.DataFrame:
+    """DataFrame van de meldingen zonder tussenliggende dicts bij een ValidationResults."""
+    if isinstance(results, ValidationResults):
+        return results.to_dataframe()
+    return pd.DataFrame(list(results))
+
+
+def select_field(results: Iterable[dict], field: str) -> List[dict]:
+    """Meldingen van één veld als dicts (alleen die meldingen worden gematerialiseerd)."""
+    if isinstance(results, ValidationResults):
+        return list(results.select_field(field))
+    return [item for item in results if item.get("GHX Kolom") == field]
+
+
+def count_unique_rows(field_errors: Iterable[Any]) -> int:
+    """
+    Aantal unieke rijen in een field_validation_results lijst: result dicts (iterrows
+    engine) en/of arrays met Rij nummers (vectorized engine).
+    """
+    arrays, dict_rows = [], []
+    for item in field_errors:
+        if isinstance(item, dict):
+            dict_rows.append(item["Rij"])
+        else:
+            arrays.append(np.asarray(item))
+    if not arrays:
+        return len(set(dict_rows))
+    if dict_rows:
+        arrays.append(np.asarray(dict_rows))
+    return int(len(np.unique(np.concatenate(arrays))))
@@ -0,0 +1,858 @@
+"""
+Vectorized Validation Engine Module
+
+Deze module implementeert een kolomgebaseerde variant van de rij-validatie uit
+price_tool.validate_dataframe. In plaats van per (rij, veld) validate_field_v20_native
+aan te roepen wordt elke v20 regel vertaald naar een boolean mask over de hele kolom.
+Stringbewerkingen worden per unieke celwaarde uitgevoerd en daarna via de
+factorize-codes teruggeprojecteerd op alle rijen.
+
+De uitvoer (results, filled_percentages, red_flag_messages, errors_per_field) is
+identiek aan die van de iterrows engine, inclusief de volgorde van de resultaten.
+"""
+
+import logging
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Tuple, Optional, Callable
+
+from .price_tool import (
+    prepare_validation_state,
+    finalize_validation_state,
+    validate_field,
+    clean_supplier_header,
+    parse_date_strings,
+    parse_numeric_strings,
+    invalid_gtin_check_digits,
+    validation_today,
+)
+from .validation_results import ValidationResults, select_field
+from .row_context import evaluate_row_contexts
+
+
+# Velden die alleen als gevuld tellen als 'Omschrijving Verpakkingseenheid' gevuld is
+UOM_FIELDS = [
+    'UOM Code Verpakkingseenheid', 'Inhoud Verpakkingseenheid',
+    'UOM Code Basiseenheid', 'Inhoud Basiseenheid',
+    'UOM Code Inhoud Basiseenheid'
+]
+
+NAN_STRINGS = {'nan', 'none', 'null'}
+VALID_BOOLEANS = {"1", "0", "ja", "nee", "yes", "no", "true", "false"}
+GTIN_EMPTY_STRINGS = {"", "nan", "NaN", "None"}
+RISK_CLASSES_MDR = {"EU_CLASS_I", "EU_CLASS_IIA", "EU_CLASS_IIB", "EU_CLASS_III",
+                    "EU_CLASS_A", "EU_CLASS_B", "EU_CLASS_C", "EU_CLASS_D"}
+RISK_CLASSES_MDD = {"EU_CLASS_I", "EU_CLASS_IIA", "EU_CLASS_IIB", "EU_CLASS_III",
+                    "IVDD_ANNEX_II_LIST_A", "IVDD_ANNEX_II_LIST_B",
+                    "IVDD_DEVICES_SELF_TESTING", "IVDD_GENERAL"}
+UOM_WORD_PATTERN = re.compile(r'\b[A-Z]{2,}\b')
+
+RIJ_OFFSET = 3  # Start rijnummer in Excel na header(s)/instructie(s)
+
+# Default codes voor per-rij global_validations zonder eigen code
+RED_FLAG_DEFAULT_CODES = {"all_fields_empty": "800", "both_empty": "800", "uom_match": "801",
+                          "uom_match_if_base_and_orderable": "801", "content_match": "805",
+                          "content_match_if_base_and_orderable": "805", "incomplete_dimensions": "804",
+                          "incomplete_set": "804"}
+
+
+# -----------------------------
+# KOLOM HELPERS
+# -----------------------------
+
+def _row_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Geeft een DataFrame terug waarvan de kolomwaarden overeenkomen met wat iterrows oplevert.
+
+    iterrows() zet een rij om naar één gezamenlijk dtype. Bij een volledig numerieke
+    DataFrame betekent dat bijvoorbeeld dat int kolommen als float worden gezien.
+    """
+    common_dtype = df.iloc[:0].to_numpy().dtype
+    if common_dtype != object and len(set(df.dtypes)) > 1:
+        return df.astype(common_dtype)
+    return df
+
+
+def _unique_map(codes: np.ndarray, uniques: list, func: Callable, dtype=bool) -> np.ndarray:
+    """Past func toe op elke unieke waarde en projecteert het resultaat terug op alle rijen."""
+    per_unique = np.fromiter((func(u) for u in uniques), dtype=dtype, count=len(uniques))
+    return per_unique[codes]
+
+
+def _py_float(value: Any) -> Tuple[bool, float]:
+    """Python float() conversie als (gelukt, waarde) tuple."""
+    try:
+        return True, float(value)
+    except (ValueError, TypeError, OverflowError):
+        return False, np.nan
+
+
+def _column(ctx: Dict[str, Any], field: str) -> Dict[str, Any]:
+    """
+    Haalt (gecachet) de voorbewerkte kolomgegevens op.
+
+    Returns:
+        Dict met:
+        - null: pd.isnull(value) per rij
+        - codes / raw_uniques: factorize van str(value) per rij
+        - stripped / lower: per unieke str(value) de strip() en lower() variant
+        - gevuld: value_str != '' en niet in invalid_values (telling filled_counts)
+        - empty: is_empty_or_invalid zoals in validate_field_v20_native
+    """
+    cache = ctx['columns']
+    if field in cache:
+        return cache[field]
+
+    series = ctx['df'][field]
+    null = series.isna().to_numpy()
+    raw = series.map(str).to_numpy(dtype=object)
+    codes, raw_uniques = pd.factorize(raw)
+    raw_uniques = list(raw_uniques)
+    stripped = [u.strip() for u in raw_uniques]
+    lower = [s.lower() for s in stripped]
+    invalid_values = ctx['invalid_values']
+
+    gevuld_u = np.fromiter((s != '' and l not in invalid_values for s, l in zip(stripped, lower)),
+                           dtype=bool, count=len(stripped))
+    empty_u = np.fromiter((s == '' or l in invalid_values or l in NAN_STRINGS for s, l in zip(stripped, lower)),
+                          dtype=bool, count=len(stripped))
+
+    column = {
+        'null': null,
+        'codes': codes,
+        'raw_uniques': raw_uniques,
+        'stripped': stripped,
+        'lower': lower,
+        'gevuld': ~null & gevuld_u[codes],
+        'empty': null | empty_u[codes],
+    }
+    cache[field] = column
+    return column
+
+
+def _stripped_values(column: Dict[str, Any]) -> np.ndarray:
+    """value_str per rij: '' voor lege cellen, anders str(value).strip()."""
+    if 'stripped_rows' not in column:
+        stripped = np.asarray(column['stripped'] + [''], dtype=object)
+        codes = np.where(column['null'], len(column['stripped']), column['codes'])
+        column['stripped_rows'] = stripped[codes]
+    return column['stripped_rows']
+
+
+def _raw_stripped(ctx: Dict[str, Any], field: str) -> np.ndarray:
+    """str(row_data.get(field, "")).strip() per rij ('nan' voor NaN, '' als kolom ontbreekt)."""
+    if field not in ctx['df'].columns:
+        return np.full(ctx['n_rows'], '', dtype=object)
+    column = _column(ctx, field)
+    return np.asarray(column['stripped'], dtype=object)[column['codes']]
+
+
+def _raw_unique_mask(ctx: Dict[str, Any], field: str, func: Callable, missing: bool) -> np.ndarray:
+    """Past func toe op str(value).strip() per unieke waarde; 'missing' als de kolom ontbreekt."""
+    if field not in ctx['df'].columns:
+        return np.full(ctx['n_rows'], missing, dtype=bool)
+    column = _column(ctx, field)
+    return _unique_map(column['codes'], column['stripped'], func)
+
+
+def _numeric_values(ctx: Dict[str, Any], field: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Numerieke view van een kolom: parse_numeric_string op str(value).strip() per rij.
+
+    Elke unieke waarde wordt één keer geparsed en het resultaat in de kolom cache bewaard,
+    zodat alle numerieke en veld-vergelijkende regels (704, 720, 752, 754/755, 758) dezelfde
+    parse delen.
+
+    Returns:
+        (valid, values): valid is False als de waarde niet numeriek is (of de kolom ontbreekt),
+        values is float64 met NaN waar valid False is
+    """
+    if field not in ctx['df'].columns:
+        return np.zeros(ctx['n_rows'], dtype=bool), np.full(ctx['n_rows'], np.nan)
+    column = _column(ctx, field)
+    if 'numeric' not in column:
+        valid_u, values_u = parse_numeric_strings(column['stripped'])
+        column['numeric'] = (valid_u[column['codes']], values_u[column['codes']])
+    return column['numeric']
+
+
+def _date_values(ctx: Dict[str, Any], field: str) -> np.ndarray:
+    """
+    Geparste datum (datetime64[D], NaT = geen geldige datum) per rij.
+
+    Elke unieke waarde wordt één keer geparsed en het resultaat in de kolom cache bewaard,
+    zodat invalid_date_format, is_in_the_past en is_before_field dezelfde parse delen.
+    """
+    if field not in ctx['df'].columns:
+        return np.full(ctx['n_rows'], np.datetime64('NaT'), dtype='datetime64[D]')
+    column = _column(ctx, field)
+    if 'dates' not in column:
+        column['dates'] = parse_date_strings(column['stripped'])[column['codes']]
+    return column['dates']
+
+
+# -----------------------------
+# REGEL MASKS
+# -----------------------------
+# Elke mask functie krijgt de vooraf gecompileerde parameters uit validation_plan
+# als keyword argumenten en retourneert een boolean array (None = triggert niet).
+# Regels zonder mask (zoals is_duplicate_artikelnummer, een cross-row check) triggeren nooit per cel.
+
+def mask_is_empty(ctx, field, column):
+    return column['empty']
+
+
+def mask_is_not_numeric(ctx, field, column):
+    return ~column['empty'] & ~_numeric_values(ctx, field)[0]
+
+
+def mask_is_empty_or_not_numeric(ctx, field, column):
+    return column['empty'] | ~_numeric_values(ctx, field)[0]
+
+
+def mask_is_not_integer(ctx, field, column):
+    valid, values = _numeric_values(ctx, field)
+    with np.errstate(invalid='ignore'):
+        is_integer = valid & np.isfinite(values) & (values == np.floor(values))
+    return ~column['empty'] & ~is_integer
+
+
+def mask_is_less_than_field(ctx, field, column, other_field: str, or_equal: bool = False):
+    if other_field not in ctx['df'].columns:
+        return None
+    valid, values = _numeric_values(ctx, field)
+    other_valid, other_values = _numeric_values(ctx, other_field)
+    with np.errstate(invalid='ignore'):
+        smaller = values <= other_values if or_equal else values < other_values
+    return ~column['empty'] & valid & other_valid & smaller
+
+
+def mask_value_not_in_list(ctx, field, column, allowed: frozenset):
+    return ~column['empty'] & _unique_map(column['codes'], column['stripped'], lambda v: v.upper() not in allowed)
+
+
+def mask_min_length(ctx, field, column, limit):
+    return ~column['empty'] & _unique_map(column['codes'], column['stripped'], lambda v: len(v) < limit)
+
+
+def mask_max_length(ctx, field, column, limit):
+    return ~column['empty'] & _unique_map(column['codes'], column['stripped'], lambda v: len(v) > limit)
+
+
+def mask_is_empty_when_dependency_filled(ctx, field, column, dependency_field: str):
+    if dependency_field not in ctx['df'].columns:
+        return None
+    mask = column['empty'] & _column(ctx, dependency_field)['gevuld']
+    if mask.any():
+        logging.info(f"DEPENDENCY VALIDATIE TRIGGER: Veld '{field}' is {int(mask.sum())}x leeg terwijl '{dependency_field}' wel ingevuld is")
+    return mask
+
+
+def mask_mismatch_calculation(ctx, field, column, field1: str, operator: str, field2: str):
+    current_ok, current = _numeric_values(ctx, field)
+    ok1, val1 = _numeric_values(ctx, field1)
+    ok2, val2 = _numeric_values(ctx, field2)
+
+    with np.errstate(all='ignore'):
+        if operator == "*":
+            calculated = val1 * val2
+            calculated_ok = ok1 & ok2
+        else:
+            calculated_ok = ok1 & ok2 & (val2 != 0)
+            calculated = np.divide(val1, np.where(calculated_ok, val2, 1.0))
+        # Allow kleine afwijkingen door floating point precision
+        deviates = np.abs(current - calculated) > 0.01
+    return ~column['empty'] & current_ok & calculated_ok & deviates
+
+
+def mask_is_not_boolean(ctx, field, column):
+    return ~column['empty'] & _unique_map(column['codes'], column['lower'], lambda v: v not in VALID_BOOLEANS)
+
+
+def mask_is_not_exact_length_numeric(ctx, field, column, length):
+    return ~column['empty'] & _unique_map(
+        column['codes'], column['stripped'], lambda v: len(v) != length or not v.isdigit()
+    )
+
+
+def mask_invalid_gtin_check_digit(ctx, field, column):
+    # Eén vectorized controlecijfer check over alle unieke waarden van de kolom
+    invalid_u = invalid_gtin_check_digits(column['stripped'])
+    return ~column['empty'] & invalid_u[column['codes']]
+
+
+def mask_uom_description_mismatch(ctx, field, column, valid_uom_codes: Optional[frozenset]):
+    not_empty = ~column['empty']
+    values = _stripped_values(column)
+    uom_values = _raw_stripped(ctx, "UOM Code Verpakkingseenheid")
+
+    # Check 1: Begint omschrijving met UOM Code uit kolom K?
+    mask = np.zeros(ctx['n_rows'], dtype=bool)
+    for pos in np.flatnonzero(not_empty):
+        uom_verpakking = uom_values[pos]
+        if uom_verpakking and not values[pos].upper().startswith(uom_verpakking.upper()):
+            mask[pos] = True
+
+    # Check 2: Zijn alle hoofdletterwoorden geldige UOM codes?
+    if valid_uom_codes:
+        invalid_word = _unique_map(
+            column['codes'], column['stripped'],
+            lambda v: any(word.upper() not in valid_uom_codes for word in UOM_WORD_PATTERN.findall(v))
+        )
+        mask |= not_empty & invalid_word
+    return mask
+
+
+def mask_not_starts_with(ctx, field, column, prefix: str):
+    mask = ~column['empty'] & _unique_map(column['codes'], column['stripped'], lambda v: not v.startswith(prefix))
+    if mask.any():
+        logging.info(f"URL validatie TRIGGER: {int(mask.sum())} waarden beginnen niet met '{prefix}' in veld '{field}'")
+    return mask
+
+
+def mask_not_space_separated(ctx, field, column):
+    mask = ~column['empty'] & _unique_map(
+        column['codes'], column['stripped'], lambda v: len(v.strip()) > 0 and ' ' not in v
+    )
+    if mask.any():
+        logging.info(f"GTIN Historie validatie TRIGGER: {int(mask.sum())} waarden niet gescheiden met spaties in veld '{field}'")
+    return mask
+
+
+def mask_no_gtin_or_barcode(ctx, field, column, gtin_fields: tuple):
+    has_any_gtin = np.zeros(ctx['n_rows'], dtype=bool)
+    for gtin_field in gtin_fields:
+        has_any_gtin |= _raw_unique_mask(ctx, gtin_field, lambda v: v not in GTIN_EMPTY_STRINGS, missing=False)
+    return ~has_any_gtin
+
+
+def mask_invalid_date_format(ctx, field, column):
+    return ~column['empty'] & np.isnat(_date_values(ctx, field))
+
+
+def mask_is_in_the_past(ctx, field, column):
+    # NaT vergelijkt als False: ongeldige datums meldt invalid_date_format
+    return ~column['empty'] & (_date_values(ctx, field) < ctx['today'])
+
+
+def mask_is_before_field(ctx, field, column, other_field: str):
+    if other_field not in ctx['df'].columns:
+        return None
+    return ~column['empty'] & (_date_values(ctx, field) < _date_values(ctx, other_field))
+
+
+def mask_is_empty_when_context(ctx, field, column, context: str):
+    if 'row_contexts' not in ctx:
+        ctx['row_contexts'] = evaluate_row_contexts(
+            ctx['df'], ctx['validation_config'], ctx['template_context'],
+            ctx['reference_lists'], ctx['invalid_values']
+        )
+    row_context = ctx['row_contexts'].get(context)
+    if row_context is None:
+        return None
+    return column['empty'] & row_context
+
+
+def mask_invalid_au_risk_combination(ctx, field, column):
+    au_field = "Code voor Aanvullende Productclassificatie"
+    is_76 = _raw_unique_mask(ctx, au_field, lambda v: v == "76", missing=False)
+    is_85 = _raw_unique_mask(ctx, au_field, lambda v: v == "85", missing=False)
+    not_mdr = _unique_map(column['codes'], column['stripped'], lambda v: v.upper() not in RISK_CLASSES_MDR)
+    not_mdd = _unique_map(column['codes'], column['stripped'], lambda v: v.upper() not in RISK_CLASSES_MDD)
+    return ~column['empty'] & ((is_76 & not_mdr) | (is_85 & not_mdd))
+
+
+def mask_medical_product_missing_classification(ctx, field, column):
+    invalid_values = ctx['invalid_values']
+    is_filled = lambda v: v != '' and v.lower() not in invalid_values
+    is_medical = _raw_unique_mask(ctx, "UNSPSC Code", lambda v: v.startswith("42") and len(v) >= 2, missing=False)
+    gmdn_filled = _raw_unique_mask(ctx, "GMDN Code", is_filled, missing=False)
+    emdn_filled = _raw_unique_mask(ctx, "EMDN Code", is_filled, missing=False)
+    return column['empty'] & is_medical & ~gmdn_filled & ~emdn_filled
+
+
+# -----------------------------
+# RED FLAG MASKS (global_validations per rij)
+# -----------------------------
+
+def _red_flag_mask(ctx: Dict[str, Any], flag: dict) -> Optional[np.ndarray]:
+    """Bepaalt per rij of een global_validations flag triggert (None = niet van toepassing)."""
+    df = ctx['df']
+    invalid_values = ctx['invalid_values']
+    condition = flag.get("condition")
+
+    if condition == "both_empty" or condition == "all_fields_empty":
+        flag_fields = flag.get("fields", [])
+        if not all(f in df.columns for f in flag_fields):
+            return None
+        all_empty = np.ones(ctx['n_rows'], dtype=bool)
+        for f in flag_fields:
+            column = _column(ctx, f)
+            all_empty &= column['null'] | _unique_map(
+                column['codes'], column['stripped'], lambda v: v == '' or v.lower() in invalid_values
+            )
+        return all_empty
+
+    if condition in ("uom_match", "uom_match_if_base_and_orderable",
+                     "content_match", "content_match_if_base_and_orderable"):
+        if condition.startswith("uom_match"):
+            trade_field, base_field = "UOM Code Verpakkingseenheid", "UOM Code Basiseenheid"
+        else:
+            trade_field, base_field = "Inhoud Verpakkingseenheid", "Inhoud Basiseenheid"
+        required_fields = ["Is BestelbareEenheid", "Is BasisEenheid", trade_field, base_field]
+        if not all(f in df.columns for f in required_fields):
+            return None
+        base_and_orderable = (_raw_unique_mask(ctx, "Is BasisEenheid", lambda v: v == "1", missing=False) &
+                              _raw_unique_mask(ctx, "Is BestelbareEenheid", lambda v: v == "1", missing=False))
+        trade = _raw_stripped(ctx, trade_field)
+        base = _raw_stripped(ctx, base_field)
+        mask = np.zeros(ctx['n_rows'], dtype=bool)
+        for pos in np.flatnonzero(base_and_orderable):
+            if trade[pos] and base[pos] and trade[pos] != base[pos]:
+                mask[pos] = True
+        return mask
+
+    if condition == "incomplete_dimensions" or condition == "incomplete_set":
+        available_fields = [f for f in ["Hoogte", "Breedte", "Diepte"] if f in df.columns]
+        if not available_fields:
+            return None
+        filled_count = np.zeros(ctx['n_rows'], dtype=np.int64)
+        for f in available_fields:
+            filled_count += _raw_unique_mask(ctx, f, lambda v: bool(v) and v.lower() not in invalid_values, missing=False)
+        return (filled_count > 0) & (filled_count < len(available_fields))
+
+    return None
+
+
+# -----------------------------
+# UOM RELATIES
+# -----------------------------
+
+def _normalize_boolean_field(value: str) -> Optional[str]:
+    """Normaliseer boolean veld naar '0', '1' of None voor ongeldige waarden"""
+    if not value or value.lower() in ['nan', 'none', '']:
+        return None
+    value_lower = value.lower()
+    if value_lower in ['1', 'true', 'ja', 'yes']:
+        return '1'
+    elif value_lower in ['0', 'false', 'nee', 'no']:
+        return '0'
+    return None
+
+
+def validate_uom_relationships_vectorized(df: pd.DataFrame, validation_results: list, validation_config: dict,
+                                          original_column_mapping: dict,
+                                          row_details: Optional[Dict[str, Any]] = None) -> list:
+    """
+    Kolomgebaseerde variant van price_tool.validate_uom_relationships met identieke uitvoer.
+
+    row_details (optioneel) krijgt 'uom_description_mismatch': per rij of de
+    Omschrijving Verpakkingseenheid niet bij UOM code + inhoud past.
+    """
+    required_cols = [
+        "Is BestelbareEenheid", "Is BasisEenheid",
+        "UOM Code Verpakkingseenheid", "UOM Code Basiseenheid",
+        "Inhoud Verpakkingseenheid"
+    ]
+
+    # Als cruciale kolommen ontbreken, sla over (oude template?)
+    if not all(col in df.columns for col in required_cols):
+        logging.warning("Benodigde UOM-kolommen niet allemaal aanwezig, UOM-relatie validatie overgeslagen.")
+        return validation_results
+
+    ctx = _new_context(_row_frame(df), [], None)
+    n_rows = ctx['n_rows']
+
+    def normalized(field):
+        column = _column(ctx, field)
+        per_unique = np.asarray([_normalize_boolean_field(v) or '' for v in column['stripped']], dtype=object)
+        return per_unique[column['codes']]
+
+    besteleenheid = normalized("Is BestelbareEenheid")
+    basiseenheid = normalized("Is BasisEenheid")
+    uom_verpakking = _raw_stripped(ctx, "UOM Code Verpakkingseenheid")
+    uom_basis = _raw_stripped(ctx, "UOM Code Basiseenheid")
+    inhoud_strings = _raw_stripped(ctx, "Inhoud Verpakkingseenheid")
+
+    inhoud_column = _column(ctx, "Inhoud Verpakkingseenheid")
+
+    def parse_inhoud(value):
+        # Vervang eerst komma door punt voor conversie; (False, nan) als conversie faalt
+        if value and value.lower() not in ["nan", "none", ""]:
+            return _py_float(value.replace(",", "."))
+        return False, np.nan
+
+    parsed_inhoud = [parse_inhoud(value) for value in inhoud_column['stripped']]
+    has_inhoud = np.fromiter((ok for ok, _ in parsed_inhoud), dtype=bool, count=len(parsed_inhoud))[inhoud_column['codes']]
+    inhoud = np.fromiter((number for _, number in parsed_inhoud), dtype=float, count=len(parsed_inhoud))[inhoud_column['codes']]
+
+    has_omschrijving_column = "Omschrijving Verpakkingseenheid" in df.columns
+    omschrijving = _raw_stripped(ctx, "Omschrijving Verpakkingseenheid") if has_omschrijving_column else None
+
+    both_valid = (besteleenheid != '') & (basiseenheid != '')
+    both_one = both_valid & (besteleenheid == '1') & (basiseenheid == '1')
+    different = both_valid & (besteleenheid != basiseenheid)
+
+    index_labels = df.index.tolist()
+    supplier_uom = clean_supplier_header(original_column_mapping.get("UOM Code Verpakkingseenheid", ""))
+    supplier_inhoud = clean_supplier_header(original_column_mapping.get("Inhoud Verpakkingseenheid", ""))
+
+    uom_relation_errors_found = False
+    omschrijving_format_mismatch = np.zeros(n_rows, dtype=bool)
+
+    for pos in np.flatnonzero(both_valid):
+        excel_row_num = index_labels[pos] + RIJ_OFFSET
+        uom_v = uom_verpakking[pos]
+        uom_b = uom_basis[pos]
+        inhoud_str = inhoud_strings[pos]
+
+        if both_one[pos]:
+            if uom_v and uom_b and uom_v != uom_b:
+                uom_relation_errors_found = True
+                validation_results.append({
+                    "Rij": excel_row_num, "GHX Kolom": "UOM Code Verpakkingseenheid",
+                    "Supplier Kolom": supplier_uom,
+                    "Veldwaarde": uom_v,
+                    "Foutmelding": f"Als IsBestelbaar=1 én IsBasis=1, moeten UOMs gelijk zijn (nu: '{uom_v}' vs '{uom_b}').",
+                    "code": "724"
+                })
+            if has_inhoud[pos] and inhoud[pos] != 1:
+                uom_relation_errors_found = True
+                validation_results.append({
+                    "Rij": excel_row_num, "GHX Kolom": "Inhoud Verpakkingseenheid",
+                    "Supplier Kolom": supplier_inhoud,
+                    "Veldwaarde": inhoud_str,
+                    "Foutmelding": "Als IsBestelbaar=1 én IsBasis=1, moet Inhoud Verpakkingseenheid '1' zijn.",
+                    "code": "724"
+                })
+        elif different[pos]:
+            if uom_v and uom_b and uom_v == uom_b:
+                uom_relation_errors_found = True
+                validation_results.append({
+                    "Rij": excel_row_num, "GHX Kolom": "UOM Code Verpakkingseenheid",
+                    "Supplier Kolom": supplier_uom,
+                    "Veldwaarde": uom_v,
+                    "Foutmelding": "Als IsBestelbaar/IsBasis verschillend zijn, moeten UOMs ook verschillend zijn.",
+                    "code": "724"
+                })
+            if has_inhoud[pos] and inhoud[pos] == 1:
+                uom_relation_errors_found = True
+                validation_results.append({
+                    "Rij": excel_row_num, "GHX Kolom": "Inhoud Verpakkingseenheid",
+                    "Supplier Kolom": supplier_inhoud,
+                    "Veldwaarde": inhoud_str,
+                    "Foutmelding": "Als IsBestelbaar/IsBasis verschillend zijn, mag Inhoud Verpakkingseenheid geen '1' zijn.",
+                    "code": "724"
+                })
+
+        if has_omschrijving_column:
+            omschrijving_value = omschrijving[pos]
+            if omschrijving_value and uom_v and has_inhoud[pos]:
+                inhoud_str_check = inhoud_str[:-2] if inhoud_str.endswith('.0') else inhoud_str
+                omschrijving_lower = omschrijving_value.lower()
+                if not (inhoud_str_check.lower() in omschrijving_lower and uom_v.lower() in omschrijving_lower):
+                    omschrijving_format_mismatch[pos] = True
+
+    if row_details is not None:
+        row_details['uom_description_mismatch'] = omschrijving_format_mismatch
+
+    return append_uom_red_flags(validation_results, validation_config,
+                                uom_relation_errors_found, bool(omschrijving_format_mismatch.any()))
+
+
+def uom_already_validated(df: pd.DataFrame, validation_results: list, validation_config: dict,
+                          original_column_mapping: dict) -> list:
+    """UOM validator voor finalize_validation_state als de UOM relaties al per chunk/shard verwerkt zijn."""
+    return validation_results
+
+
+def append_uom_red_flags(validation_results: list, validation_config: dict,
+                         relation_errors_found: bool, description_mismatch_found: bool) -> list:
+    """
+    Voegt de geconsolideerde UOM Red Flags (relatie conflict en omschrijving notatie)
+    achteraan validation_results toe, zoals validate_uom_relationships dat doet.
+    """
+    uom_red_flag_config = None
+    uom_description_flag_config = None
+    flags_to_search = validation_config.get("red_flags", []) if "red_flags" in validation_config else validation_config.get("global_validations", [])
+    for flag_config in flags_to_search:
+        condition = flag_config.get("condition")
+        if condition in ["uom_relation", "uom_relation_conflict"]:
+            uom_red_flag_config = flag_config
+        elif condition in ["uom_description_format", "uom_description_format_mismatch"]:
+            uom_description_flag_config = flag_config
+
+    if description_mismatch_found and uom_description_flag_config:
+        json_omschrijving_message = (uom_description_flag_config.get("message") or
+                                     uom_description_flag_config.get("error_message") or
+                                     "Verschillende 'Omschrijving Verpakkingseenheid' velden komen mogelijk niet overeen met de verwachte notatie. Controleer of deze velden de juiste UOM code bevatten.")
+        validation_results.append({
+            "Rij": 0, "GHX Kolom": "RED FLAG",
+            "Supplier Kolom": "Omschrijving Verpakkingseenheid",
+            "Veldwaarde": "",
+            "Foutmelding": json_omschrijving_message,
+            "code": uom_description_flag_config.get("code", "721")
+        })
+
+    if relation_errors_found and uom_red_flag_config:
+        message = uom_red_flag_config.get("message") or uom_red_flag_config.get("error_message")
+        if message:
+            flag_exists = any(r.get("Foutmelding") == message for r in select_field(validation_results, "RED FLAG"))
+            if not flag_exists:
+                validation_results.append({
+                    "Rij": 0, "GHX Kolom": "RED FLAG", "Supplier Kolom": "", "Veldwaarde": "",
+                    "Foutmelding": message,
+                    "code": ""
+                })
+
+    return validation_results
+
+
+# -----------------------------
+# HOOFDFUNCTIE
+# -----------------------------
+
+def _new_context(df: pd.DataFrame, invalid_values: list, reference_lists: Optional[dict],
+                 validation_config: Optional[dict] = None,
+                 template_context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Maakt de gedeelde context voor kolom- en regel masks."""
+    return {
+        'df': df,
+        'n_rows': len(df),
+        'invalid_values': set(invalid_values),
+        'reference_lists': reference_lists,
+        'validation_config': validation_config or {},
+        'template_context': template_context,
+        'columns': {},
+        'today': validation_today(),
+    }
+
+
+def validate_rows_vectorized(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict,
+                             state: Dict[str, Any], reference_lists: Optional[dict] = None,
+                             plan: Optional[Dict[str, Any]] = None,
+                             row_details: Optional[Dict[str, Any]] = None) -> ValidationResults:
+    """
+    Kolomgewijze tegenhanger van validate_rows_iterrows: valideert alle rijen van df
+    met boolean masks per v20 regel en werkt de state bij (filled_counts,
+    field_validation_results, red_flag_messages_list).
+
+    De state mag over meerdere aanroepen gedeeld worden (bv. per chunk); Rij nummers
+    komen uit de index van df.
+
+    row_details (optioneel) wordt gevuld met de bijdrage per rij: 'filled' (veld ->
+    gevuld mask, in veldvolgorde) en 'red_flags' (index in global_validations -> mask).
+    De incrementele validatie bewaart die per rij voor een volgende run.
+
+    Returns:
+        ValidationResults in dezelfde volgorde als de iterrows engine (field_validation_results
+        krijgt per veld een array met Rij nummers in plaats van de result dicts)
+    """
+    if plan is None:
+        from .validation_plan import get_validation_plan
+        plan = get_validation_plan(validation_config, reference_lists)
+    plan_fields = plan['fields']
+
+    filled_counts = state['filled_counts']
+    field_validation_results = state['field_validation_results']
+
+    ctx = _new_context(_row_frame(df), plan['invalid_values'], reference_lists,
+                       validation_config, state['template_context'])
+    n_rows = ctx['n_rows']
+    index_labels = df.index.tolist()
+    logging.info(f"Start vectorized validatie van {n_rows} rijen...")
+
+    omschrijving_gevuld = None
+    if 'Omschrijving Verpakkingseenheid' in df.columns:
+        omschrijving_gevuld = _column(ctx, 'Omschrijving Verpakkingseenheid')['gevuld']
+
+    # Verzamel (rij positie, veld volgorde, regel volgorde) per fout zodat de
+    # uiteindelijke volgorde gelijk is aan die van de iterrows engine
+    hit_positions, hit_fields, hit_rules = [], [], []
+    hit_payloads = []  # per (veld, regel): (field, message, code, type) of per-rij fouten (legacy)
+    active_fields = []
+
+    # Template filtering, ingeklapte velden en aanwezigheid zijn al bepaald in het ActiveFieldPlan
+    for field_order, field, rules, _, _ in state['active_fields'].present:
+        active_fields.append(field)
+        column = _column(ctx, field)
+
+        # Tel gevulde velden - met UOM conditional logic
+        if field in UOM_FIELDS:
+            filled = column['gevuld'] & omschrijving_gevuld if omschrijving_gevuld is not None else np.zeros(n_rows, dtype=bool)
+        else:
+            filled = column['gevuld']
+        filled_counts[field] = filled_counts.get(field, 0) + int(filled.sum())
+        if row_details is not None:
+            row_details.setdefault('filled', {})[field] = filled
+
+        compiled_field = plan_fields.get(field, {'rules': [], 'legacy_rules': None})
+        if compiled_field['legacy_rules'] is not None:
+            # v18 legacy veld binnen een v20 config: val terug op validate_field per rij
+            records = ctx['df'].to_dict('records') if n_rows else []
+            stripped = _stripped_values(column) if n_rows else []
+            for pos, row_data in enumerate(records):
+                value = row_data[field]
+                value_str = stripped[pos]
+                is_gevuld = column['gevuld'][pos]
+                errors = validate_field(field, value_str if is_gevuld else value, rules, state['invalid_values'], row_data)
+                for err_order, err in enumerate(errors or []):
+                    if err.get("message") and str(err.get("message")).strip():
+                        hit_positions.append(np.array([pos]))
+                        hit_fields.append(np.array([field_order]))
+                        hit_rules.append(np.array([err_order]))
+                        hit_payloads.append((field, err.get('message', ''), err.get('code', ''), err.get('type', '')))
+            continue
+
+        if n_rows == 0:
+            continue
+        for compiled_rule in compiled_field['rules']:
+            mask = compiled_rule['mask'](ctx, field, column)
+            if mask is None:
+                continue
+            positions = np.flatnonzero(mask)
+            if len(positions) == 0:
+                continue
+            hit_positions.append(positions)
+            hit_fields.append(np.full(len(positions), field_order))
+            hit_rules.append(np.full(len(positions), compiled_rule['order']))
+            hit_payloads.append((field, compiled_rule['message'], compiled_rule['code'], compiled_rule['type']))
+
+    # Bouw de resultaten in rij-volgorde (rij, veld, regel), kolomgewijs zonder dict per fout
+    results = ValidationResults()
+    if hit_positions:
+        payload_ids = np.concatenate([np.full(len(p), i) for i, p in enumerate(hit_positions)])
+        positions = np.concatenate(hit_positions)
+        field_orders = np.concatenate(hit_fields)
+        rule_orders = np.concatenate(hit_rules)
+        order = np.lexsort((rule_orders, field_orders, positions))
+
+        # Per (veld, regel) de ids; de veldwaarde verwijst naar de unieke waarden van de bronkolom
+        supplier_ids = {field: results.intern_supplier(clean_supplier_header(original_column_mapping.get(field, field)))
+                        for field in active_fields}
+        payload_field_ids = np.asarray([results.intern_field(field) for field, _, _, _ in hit_payloads])
+        payload_supplier_ids = np.asarray([supplier_ids[field] for field, _, _, _ in hit_payloads])
+        payload_rule_ids = np.asarray([results.intern_rule(message, code, rule_type)
+                                       for _, message, code, rule_type in hit_payloads])
+        value_ids = np.concatenate([
+            _value_ids(results, _column(ctx, hit_payloads[i][0]), group_positions)
+            for i, group_positions in enumerate(hit_positions)
+        ])
+
+        sorted_positions = positions[order]
+        sorted_payloads = payload_ids[order]
+        rows = np.asarray(index_labels, dtype=np.int64)[sorted_positions] + RIJ_OFFSET
+        sorted_fields = payload_field_ids[sorted_payloads]
+        results.add_arrays(rows, sorted_fields, payload_supplier_ids[sorted_payloads],
+                           payload_rule_ids[sorted_payloads], value_ids[order])
+
+        # Per veld de Rij nummers (telling errors_per_field in finalize_validation_state)
+        for field, field_rows in results.field_rows().items():
+            field_validation_results[field].append(field_rows)
+
+    # --- Red Flag Checks per rij (uit JSON config) ---
+    red_flags_config = validation_config.get("global_validations", [])
+    triggered_flags = []
+    for flag_order, flag in enumerate(red_flags_config):
+        try:
+            message = flag.get("message") or flag.get("error_message")
+            mask = _red_flag_mask(ctx, flag) if n_rows else None
+            if mask is None or not message:
+                continue
+            if row_details is not None:
+                row_details.setdefault('red_flags', {})[flag_order] = mask
+            positions = np.flatnonzero(mask)
+            if len(positions):
+                triggered_flags.append((int(positions[0]), flag_order, flag))
+        except Exception as e:
+            logging.error(f"Red flag check error voor conditie '{flag.get('condition')}': {e}")
+
+    append_row_red_flags(state['red_flag_messages_list'], triggered_flags)
+
+    logging.info("Vectorized validatie per kolom voltooid.")
+    return results
+
+
+def _value_ids(results: ValidationResults, column: Dict[str, Any], positions: np.ndarray) -> np.ndarray:
+    """Interneert value_str ('' voor lege cellen) van de rijen op positions; alleen gebruikte unieke waarden."""
+    codes = np.where(column['null'][positions], len(column['stripped']), column['codes'][positions])
+    used, inverse = np.unique(codes, return_inverse=True)
+    stripped = column['stripped']
+    used_values = [stripped[code] if code < len(stripped) else '' for code in used.tolist()]
+    return results.intern_values(used_values)[inverse]
+
+
+def append_row_red_flags(red_flag_messages_list: list, triggered_flags: list) -> None:
+    """
+    Voegt getriggerde per-rij Red Flags toe in de volgorde van de iterrows engine.
+
+    Args:
+        red_flag_messages_list: Lijst met {"message", "code"} dicts uit de state
+        triggered_flags: (eerste rij positie, index in global_validations, flag) per flag
+    """
+    for _, _, flag in sorted(triggered_flags, key=lambda item: (item[0], item[1])):
+        message = flag.get("message") or flag.get("error_message")
+        existing_messages = [item["message"] for item in red_flag_messages_list]
+        if message not in existing_messages:
+            code = flag.get("code", RED_FLAG_DEFAULT_CODES.get(flag.get("condition"), ""))
+            red_flag_messages_list.append({"message": message, "code": code})
+
+
+def validate_dataframe_vectorized(df: pd.DataFrame, validation_config: dict, original_column_mapping: dict,
+                                  template_context: Dict[str, Any] = None,
+                                  reference_lists: Optional[dict] = None,
+                                  plan: Optional[Dict[str, Any]] = None) -> Tuple[list, dict, list, dict]:
+    """
+    Valideert het DataFrame kolomgewijs met boolean masks per v20 regel.
+
+    Args:
+        df: DataFrame om te valideren
+        validation_config: Native v20 validatie configuratie
+        original_column_mapping: Kolom mapping
+        template_context: Template Generator context (None voor default templates)
+        reference_lists: Geladen reference_lists.json (voor list_ref en uom_codes)
+        plan: Gecompileerd validatieplan (default: gecachet plan voor deze config)
+
+    Retourneert: (results, filled_percentages, red_flag_messages, errors_per_field)
+    """
+    state = prepare_validation_state(df, validation_config, template_context)
+    results = validate_rows_vectorized(df, validation_config, original_column_mapping, state, reference_lists, plan)
+    return finalize_validation_state(
+        df, results, validation_config, original_column_mapping, state,
+        uom_validator=validate_uom_relationships_vectorized
+    )
+
+
+# -----------------------------
+# ENGINE VERGELIJKING
+# -----------------------------
+
+def compare_validation_outputs(expected: tuple, actual: tuple, max_differences: int = 50) -> List[str]:
+    """
+    Vergelijkt de uitvoer van twee validatie engines.
+
+    Args:
+        expected: (results, filled_percentages, red_flag_messages, errors_per_field) referentie
+        actual: Uitvoer van de te vergelijken engine
+        max_differences: Maximaal aantal gerapporteerde verschillen
+
+    Returns:
+        Lijst met leesbare beschrijvingen van de verschillen (leeg = identiek)
+    """
+    differences = []
+    names = ["results", "filled_percentages", "red_flag_messages", "errors_per_field"]
+
+    for name, left, right in zip(names, expected, actual):
+        if name == "results":
+            if len(left) != len(right):
+                differences.append(f"results: {len(left)} vs {len(right)} meldingen")
+            for i, (left_item, right_item) in enumerate(zip(left, right)):
+                if left_item != right_item:
+                    differences.append(f"results[{i}]: {left_item} != {right_item}")
+                if len(differences) >= max_differences:
+                    return differences
+        elif left != right:
+            differences.append(f"{name}: {left} != {right}")
+
+    return differences[:max_differences]